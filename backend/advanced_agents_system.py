@@ -4,6 +4,7 @@ Custom implementation without LangGraph - builds complete full-stack projects wi
 """
 
 import asyncio
+import contextvars
 import json
 import os
 import re
@@ -25,7 +26,15 @@ load_dotenv()
 
 import google.generativeai as genai
 from config import Config
+from code_checker import code_checker, format_diagnostics
 from json_parser import json_parser
+from llm_gateway import llm_gateway
+from project_catalog import project_catalog
+
+# Agent currently running in this task; stages run concurrently, so a plain
+# attribute on the shared state would be overwritten by sibling stages
+_current_agent = contextvars.ContextVar("current_agent", default="")
+
 
 class ProjectState:
     """State management for multi-agent workflow"""
@@ -40,14 +49,33 @@ class ProjectState:
         self.backend_code = {}
         self.frontend_code = {}
         self.main_runner = ""
+        self.infrastructure_code = {}
         self.requirements = []
         self.code_check_results = {}
         self.documentation = ""
         self.shared_memory = {}
-        self.current_agent = ""
         self.logs = []
         self.status = "starting"
         self.created_at = datetime.now()
+        self.stage_timings = {}
+        self.critical_path = []
+
+    @property
+    def current_agent(self) -> str:
+        return _current_agent.get()
+
+    @current_agent.setter
+    def current_agent(self, agent: str):
+        _current_agent.set(agent)
+
+
+class WorkflowStage:
+    """One node of the workflow DAG: an agent plus the state outputs it needs and produces"""
+    def __init__(self, name: str, handler, requires: tuple = (), provides: tuple = ()):
+        self.name = name
+        self.handler = handler
+        self.requires = tuple(requires)
+        self.provides = tuple(provides)
 
 
 class AdvancedAgentsSystem:
@@ -64,8 +92,8 @@ class AdvancedAgentsSystem:
             
         genai.configure(api_key=api_key)
         
-        # Initialize Gemini model
-        self.model = genai.GenerativeModel('gemini-2.0-flash')  # Using faster, more efficient model
+        # Gemini model used for every agent call (handles are pooled by llm_gateway)
+        self.model_name = 'gemini-2.0-flash'  # Using faster, more efficient model
         
         # Project directories
         self.base_projects_dir = Path("generated_projects")
@@ -90,8 +118,12 @@ class AdvancedAgentsSystem:
             {"Please respond ONLY with valid JSON format. Do not include any markdown formatting, code blocks, or additional text." if request_json else "Respond with clear, structured information. Be concise but comprehensive."}
             """
             
-            response = self.model.generate_content(context_prompt)
-            return response.text
+            return await llm_gateway.generate_text_async(
+                context_prompt,
+                role=state.current_agent or "advanced_agent",
+                feature="multi_agent",
+                model_name=self.model_name
+            )
             
         except Exception as e:
             error_msg = str(e)
@@ -111,8 +143,9 @@ class AdvancedAgentsSystem:
             
             response = await self._api_call(json_prompt, state, request_json=True)
             
-            # Use robust JSON parser
-            parsed_response = json_parser.parse_json_response(
+            # Use robust JSON parser (off the event loop, large responses take a while)
+            parsed_response = await asyncio.to_thread(
+                json_parser.parse_json_response,
                 response=response,
                 expected_keys=expected_keys,
                 agent_type=state.current_agent,
@@ -279,8 +312,24 @@ class AdvancedAgentsSystem:
             self.log_event(state, f"❌ Planning failed: {str(e)}", "error")
             state.plan = {"error": str(e)}
         
+        # Backend and frontend are generated in parallel against this contract
+        state.shared_memory["api_contract"] = self._derive_api_contract(state)
+        
         return state
     
+    def _derive_api_contract(self, state: ProjectState) -> Dict[str, Any]:
+        """API contract shared by the backend and frontend agents, derived from the plan"""
+        requirements = state.plan.get("technical_requirements", {}) if isinstance(state.plan, dict) else {}
+        return {
+            "base_url": "http://localhost:7000",
+            "endpoints": [
+                {"method": "GET", "path": "/health", "response": {"status": "healthy", "service": "string"}},
+                {"method": "POST", "path": "/generate", "request": {"prompt": "string"},
+                 "response": {"result": "string", "status": "success"}, "error_response": {"error": "string"}}
+            ],
+            "backend_requirements": requirements.get("backend", []) if isinstance(requirements, dict) else []
+        }
+    
     def _determine_frontend_type(self, user_request: str) -> str:
         """Determine frontend type based on user request"""
         request_lower = user_request.lower()
@@ -357,7 +406,7 @@ class AdvancedAgentsSystem:
         You are an AI model expert selecting RELIABLE, TESTED models that work without issues.
         
         Project: {state.user_request}
-        Domain Insights: {state.shared_memory.get("domain_insights", "General AI project")}
+        Project Requirements: {json.dumps(state.shared_memory.get("project_requirements", {}), indent=2)}
         
         CHOOSE FROM THESE PROVEN, WORKING MODELS ONLY:
         
@@ -459,6 +508,8 @@ class AdvancedAgentsSystem:
         User Request: {state.user_request}
         Selected AI Model: {json.dumps(state.selected_model, indent=2)}
         Domain Research: {json.dumps(state.domain_research, indent=2)}
+        API Contract (the frontend is built against it in parallel, implement it exactly):
+        {json.dumps(state.shared_memory.get("api_contract", {}), indent=2)}
 
         CRITICAL RELIABILITY REQUIREMENTS:
         1. **SIMPLE, WORKING MODELS ONLY**: 
@@ -663,10 +714,10 @@ python app.py
         PROJECT ANALYSIS:
         User Request: {}
         Selected AI Model: {}
-        Backend API Design: {}
+        Backend API Contract: {}
         Technology Stack: {}
         Frontend Type: {}
-        Domain Research: {}
+        Project Plan: {}
 
         CRITICAL REQUIREMENTS - MUST FOLLOW EXACTLY:
         1. **React Version**: Use React 18 with functional components and hooks
@@ -823,10 +874,10 @@ python app.py
         Generate COMPLETE, WORKING React application that compiles and runs without errors.""".format(
             state.user_request,
             json.dumps(state.selected_model, indent=2),
-            json.dumps(state.shared_memory.get("backend_api", {}), indent=2),
+            json.dumps(state.shared_memory.get("api_contract", {}), indent=2),
             json.dumps(state.shared_memory.get("technology_stack", {}), indent=2),
             frontend_type,
-            json.dumps(state.domain_research, indent=2)
+            json.dumps({key: state.plan.get(key) for key in ("project_overview", "objectives", "success_criteria")}, indent=2)
         )
 
         try:
@@ -1532,37 +1583,19 @@ code {
         # Check for duplicate/conflicting files
         self._check_project_consistency(project_dir, issues_found, fixes_applied)
         
-        # Check Python syntax
-        for py_file in project_dir.rglob("*.py"):
-            try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Basic syntax check
-                compile(content, str(py_file), 'exec')
-                
-            except SyntaxError as e:
-                issue = f"Syntax error in {py_file.name}: {str(e)}"
-                issues_found.append(issue)
-                self.log_event(state, f"⚠️ {issue}", "warning")
-        
-        # Check React/JavaScript files for basic issues
-        for js_file in project_dir.rglob("*.js"):
-            try:
-                with open(js_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Log file found
-                self.log_event(state, f"✅ Checked {js_file.name}", "info")
-                
-            except Exception as e:
-                issue = f"Error reading {js_file.name}: {str(e)}"
+        # Syntax, JSX and import-resolution checks; files unchanged since the last check come from the cache
+        check = await asyncio.to_thread(code_checker.check_project, str(project_dir))
+        for diagnostic in check['diagnostics']:
+            issue = format_diagnostics([diagnostic])
+            if diagnostic['severity'] == 'error':
                 issues_found.append(issue)
-                self.log_event(state, f"⚠️ {issue}", "warning")
+            self.log_event(state, f"⚠️ {issue}", "warning")
         
         state.code_check_results = {
             "issues_found": issues_found,
             "fixes_applied": fixes_applied,
+            "diagnostics": check['diagnostics'],
+            "files_checked": check['files_checked'],
             "status": "passed" if not issues_found else "issues_found"
         }
         
@@ -1651,7 +1684,6 @@ code {
                 f.write(documentation)
             
             state.documentation = documentation
-            state.status = "completed"
             
             self.log_event(state, "✅ Project documentation completed", "success")
             
@@ -1796,60 +1828,128 @@ Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 """
     
     
+    def _workflow_stages(self) -> List[WorkflowStage]:
+        """The eight-agent workflow as a DAG; a stage starts once everything it requires exists"""
+        return [
+            WorkflowStage("planner", self.planner_agent,
+                          provides=("plan", "api_contract")),
+            WorkflowStage("domain_expert", self.domain_expert_agent,
+                          requires=("plan",), provides=("domain_research",)),
+            WorkflowStage("model_selector", self.model_selector_agent,
+                          requires=("plan",), provides=("selected_model",)),
+            WorkflowStage("backend_developer", self.backend_developer_agent,
+                          requires=("selected_model", "domain_research", "api_contract"), provides=("backend_code",)),
+            WorkflowStage("frontend_developer", self.frontend_developer_agent,
+                          requires=("selected_model", "api_contract"), provides=("frontend_code",)),
+            # Its prompt lists the backend and frontend files it wires together
+            WorkflowStage("main_file_creator", self.main_file_creator_agent,
+                          requires=("plan", "backend_code", "frontend_code"), provides=("infrastructure_code",)),
+            WorkflowStage("code_checker", self._cleanup_and_check_agent,
+                          requires=("backend_code", "frontend_code", "infrastructure_code"),
+                          provides=("code_check_results",)),
+            # Last, so its README.md replaces the one main_file_creator writes and describes the checked project
+            WorkflowStage("documentation", self.documentation_agent,
+                          requires=("plan", "selected_model", "code_check_results"), provides=("documentation",)),
+        ]
+    
+    async def _cleanup_and_check_agent(self, state: ProjectState) -> ProjectState:
+        """Remove conflicting files once every file-writing stage is done, then check the code"""
+        self._cleanup_project_files(state)
+        return await self.code_checker_agent(state)
+    
+    async def _run_stage(self, state: ProjectState, stage: WorkflowStage, workflow_start: float):
+        """Run one stage in its own task and record when it started and finished"""
+        started = time.monotonic()
+        await stage.handler(state)
+        state.stage_timings[stage.name] = {
+            "start": round(started - workflow_start, 3),
+            "end": round(time.monotonic() - workflow_start, 3),
+            "duration": round(time.monotonic() - started, 3),
+        }
+    
+    async def _run_stage_graph(self, state: ProjectState, stages: List[WorkflowStage]):
+        """Launch every stage whose inputs are available; keep going until the DAG is drained"""
+        workflow_start = time.monotonic()
+        pending = {stage.name: stage for stage in stages}
+        running = {}
+        produced = set()
+        
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(item in produced for item in stage.requires):
+                        del pending[name]
+                        running[asyncio.create_task(self._run_stage(state, stage, workflow_start))] = stage
+                
+                if not running:
+                    raise RuntimeError(f"Workflow stages have unsatisfiable inputs: {', '.join(pending)}")
+                
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = running.pop(task)
+                    task.result()
+                    produced.update(stage.provides)
+        finally:
+            for task in running:
+                task.cancel()
+        
+        state.critical_path = self._critical_path(state, stages)
+    
+    def _critical_path(self, state: ProjectState, stages: List[WorkflowStage]) -> List[str]:
+        """Walk back from the last stage to finish through the input that unblocked each stage"""
+        providers = {item: stage.name for stage in stages for item in stage.provides}
+        by_name = {stage.name: stage for stage in stages}
+        timings = state.stage_timings
+        if not timings:
+            return []
+        
+        path = [max(timings, key=lambda name: timings[name]["end"])]
+        while True:
+            upstream = {providers[item] for item in by_name[path[-1]].requires if item in providers}
+            upstream = [name for name in upstream if name in timings]
+            if not upstream:
+                break
+            path.append(max(upstream, key=lambda name: timings[name]["end"]))
+        return list(reversed(path))
+    
     async def run_workflow(self, user_request: str, project_id: str = None) -> Dict[str, Any]:
         """
-        Main workflow that runs all 8 agents sequentially
+        Main workflow that runs the 8 agents as a dependency graph, independent stages in parallel
         """
         # Initialize project state
+        project_id = project_id or str(uuid.uuid4())
         state = ProjectState(
             user_request=user_request,
-            project_id=project_id or str(uuid.uuid4()),
+            project_id=project_id,
             project_name=self._sanitize_project_name(user_request),
-            project_folder=self.base_projects_dir / (project_id or str(uuid.uuid4()))
+            project_folder=self.base_projects_dir / project_id
         )
         
         # Create project directory structure
         self._create_project_structure(state)
         
         try:
-            # Agent 1: Project Planner
-            state = await self.planner_agent(state)
-            
-            # Agent 2: Domain Expert
-            state = await self.domain_expert_agent(state)
-            
-            # Agent 3: Model Selector
-            state = await self.model_selector_agent(state)
-            
-            # Agent 4: Backend Developer
-            state = await self.backend_developer_agent(state)
-            
-            # Agent 5: Frontend Developer
-            state = await self.frontend_developer_agent(state)
-            
-            # Agent 6: Main File Creator
-            state = await self.main_file_creator_agent(state)
-            
-            # Clean up any duplicate or conflicting files
-            self._cleanup_project_files(state)
-            
-            # Agent 7: Code Checker
-            state = await self.code_checker_agent(state)
-            
-            # Agent 8: Documentation
-            state = await self.documentation_agent(state)
+            await self._run_stage_graph(state, self._workflow_stages())
             
             # Final status
             if state.status != "failed":
                 state.status = "completed"
             
+            state.current_agent = "System"
+            self.log_event(state, f"⏱️ Critical path: {' → '.join(state.critical_path)}", "info")
             self.log_event(state, "🎉 Multi-agent workflow completed successfully!", "success")
+            await asyncio.to_thread(
+                project_catalog.index_directory, state.project_id,
+                name=state.project_name, prompt=user_request, mode="multi_agent", status=state.status
+            )
             
             return {
                 "status": state.status,
                 "project_id": state.project_id,
                 "project_folder": str(state.project_folder),
                 "files_created": self._count_project_files(state.project_folder),
+                "stage_timings": state.stage_timings,
+                "critical_path": state.critical_path,
                 "logs": state.logs,
                 "errors": [log for log in state.logs if log.get("level") == "error"]
             }
@@ -1857,6 +1957,10 @@ Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
         except Exception as e:
             self.log_event(state, f"💥 Workflow failed: {str(e)}", "error")
             state.status = "failed"
+            await asyncio.to_thread(
+                project_catalog.index_directory, state.project_id,
+                name=state.project_name, prompt=user_request, mode="multi_agent", status="failed"
+            )
             
             return {
                 "status": "failed",
@@ -2203,9 +2307,9 @@ if __name__ == '__main__':
         except:
             return {'raw_response': response, 'justification': response[:500]}
 
-    async def generate_project(self, user_request: str) -> Dict:
+    async def generate_project(self, user_request: str, project_id: str = None) -> Dict:
         """Main entry point to generate a complete project using the custom workflow"""
-        return await self.run_workflow(user_request)
+        return await self.run_workflow(user_request, project_id)
     
     async def _fallback_generate_project(self, user_request: str) -> Dict:
         """Deprecated - now using custom workflow directly"""
@@ -2213,10 +2317,10 @@ if __name__ == '__main__':
 
 
 # API endpoint for integration
-async def create_advanced_project(user_request: str) -> Dict:
+async def create_advanced_project(user_request: str, project_id: str = None) -> Dict:
     """Main API function to create advanced projects"""
     system = AdvancedAgentsSystem()
-    return await system.generate_project(user_request)
+    return await system.generate_project(user_request, project_id)
 
 
 if __name__ == "__main__":
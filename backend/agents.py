@@ -1,5 +1,6 @@
 import google.generativeai as genai
 from config import Config
+from llm_gateway import llm_gateway
 import json
 import re
 
@@ -13,10 +14,14 @@ class BaseAgent:
         self.role = role
         self.goal = goal
         self.backstory = backstory
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model_name = 'gemini-2.5-flash'
     
-    def execute_task(self, description):
-        """Execute a task using the Gemini model"""
+    def execute_task(self, description, cache=False, on_chunk=None):
+        """Execute a task using the Gemini model (cache=True for deterministic prompts).
+
+        When on_chunk is given the response is streamed and on_chunk(text) is
+        called for every chunk as it arrives.
+        """
         try:
             prompt = f"""
 Role: {self.role}
@@ -28,8 +33,22 @@ Task: {description}
 Please provide a comprehensive response following the task requirements.
 """
             
-            response = self.model.generate_content(prompt)
-            return response.text
+            if on_chunk:
+                return llm_gateway.generate_stream(
+                    prompt,
+                    on_chunk,
+                    role=self.role,
+                    feature='code_generation',
+                    model_name=self.model_name
+                )
+            return llm_gateway.generate_text(
+                prompt,
+                role=self.role,
+                feature='code_generation',
+                model_name=self.model_name,
+                cache=cache,
+                cache_scope=f"{self.role}|{self.goal}|{self.backstory}"
+            )
         except Exception as e:
             return f"Error executing task: {str(e)}"
 
@@ -108,7 +127,7 @@ class PlanningAgent(BaseAgent):
         Return ONLY valid JSON, no additional text.
         """
         
-        result = self.execute_task(description)
+        result = self.execute_task(description, cache=True)
         return result
 
 class SrDeveloper1Agent(BaseAgent):
@@ -122,7 +141,7 @@ class SrDeveloper1Agent(BaseAgent):
             functions and proper module imports."""
         )
     
-    def generate_code(self, project_plan):
+    def generate_code(self, project_plan, on_chunk=None):
         description = f"""
         Based on the following project plan, generate complete Python code for all files:
         
@@ -163,7 +182,7 @@ class SrDeveloper1Agent(BaseAgent):
         Return ONLY valid JSON, no additional text.
         """
         
-        result = self.execute_task(description)
+        result = self.execute_task(description, on_chunk=on_chunk)
         return result
 
 class SrDeveloper2Agent(BaseAgent):
@@ -221,6 +240,53 @@ class SrDeveloper2Agent(BaseAgent):
         result = self.execute_task(description)
         return result
 
+    def repair(self, problem_report, code_context, previous_problems=None):
+        """Targeted fix: sees only the failing code and returns edits, not the whole project"""
+        feedback = ""
+        if previous_problems:
+            feedback = "\n\nYour previous patch could not be applied:\n" + "\n".join(previous_problems)
+
+        description = f"""
+        Fix the errors below with the smallest possible change.
+
+        Errors:
+        {problem_report}
+
+        Relevant code (each line is prefixed with its line number and '| '; the prefix is NOT part of the file):
+        {code_context}
+        {feedback}
+
+        Return edits in JSON format:
+        {{
+            "edits": [
+                {{
+                    "path": "utils.py",
+                    "search": "exact lines currently in the file, without line-number prefixes",
+                    "replace": "the lines that replace them"
+                }}
+            ],
+            "files": [
+                {{
+                    "path": "new_module.py",
+                    "content": "complete content, only for files that must be created"
+                }}
+            ]
+        }}
+
+        Rules:
+        - "search" must match the file exactly once; include enough surrounding lines to be unique
+        - Keep edits minimal; do not rewrite code that is not involved in the error
+        - Only use "files" for files that do not exist yet
+
+        CRITICAL JSON FORMAT REQUIREMENTS:
+        - Return ONLY valid JSON, no additional text or markdown
+        - Escape all backslashes and quotes in code strings
+        - Do NOT wrap in markdown code blocks
+        """
+
+        result = self.execute_task(description)
+        return result
+
 class TesterAgent(BaseAgent):
     def __init__(self):
         super().__init__(
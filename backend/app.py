@@ -1,10 +1,10 @@
-from flask import Flask, request, jsonify, send_file, session
+from flask import Flask, request, jsonify, send_file, session, Response, stream_with_context
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import uuid
 import os
+import asyncio
 import threading
-import zipfile
 import re
 import json
 import logging
@@ -13,6 +13,17 @@ from project_manager import ProjectManager
 from advanced_agents_system import create_advanced_project
 from config import Config
 from parsing_debugger import debug_logger
+from llm_gateway import llm_gateway
+from job_queue import job_queue, QueueFullError
+from progress_broadcaster import progress_broadcaster
+from project_catalog import project_catalog
+from blob_store import blob_store
+from project_archive import project_archiver
+from env_manager import env_manager
+from runtime_pool import runtime_pool
+from output_supervisor import output_supervisor
+from sandbox import sandbox
+from worker_pool import detach_main_module
 
 # Configure logging
 logging.basicConfig(
@@ -26,10 +37,18 @@ logging.getLogger('json_parser').setLevel(logging.DEBUG)
 # Try to import data_cleaner, but don't crash if dependencies are missing
 try:
     from data_cleaner import data_cleaner
+    from dataset_store import dataset_store
+    from artifact_store import artifact_store
+    from data_profiler import data_profiler
+    from graph_renderer import graph_renderer
     DATA_CLEANER_AVAILABLE = True
 except ImportError as e:
     print(f"Data cleaner not available: {e}")
     data_cleaner = None
+    dataset_store = None
+    artifact_store = None
+    data_profiler = None
+    graph_renderer = None
     DATA_CLEANER_AVAILABLE = False
 
 # Try to import PPT functionality, but don't crash if dependencies are missing
@@ -79,8 +98,9 @@ except ImportError as e:
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = Config.SECRET_KEY
-CORS(app, origins="*")
+CORS(app, origins="*", expose_headers=["X-Total-Count", "Retry-After"])
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+progress_broadcaster.attach(socketio)
 
 # Import and register the exam blueprint
 from exam.app import exam_bp
@@ -151,14 +171,107 @@ def index():
             "/api/data/upload",
             "/api/data/analyze", 
             "/api/data/graphs",
+            "/api/data/graphs/<dataset_id>/<graph>.svg",
             "/api/data/clean",
-            "/api/data/download/<filename>"
+            "/api/data/download/<artifact_id>"
         ]
     })
 
+def _project_entry(job):
+    """active_projects entry for a job, recreated if the server restarted since it was queued"""
+    return active_projects.setdefault(job['id'], {
+        "id": job['id'],
+        "prompt": job['payload']['prompt'],
+        "mode": job['payload']['mode'],
+        "status": "queued",
+        "created_at": datetime.fromtimestamp(job['created_at']).isoformat()
+    })
+
+def _record_generation_result(job, result):
+    """Store a finished generation and notify clients"""
+    if job_queue.is_cancelled(job['id']):
+        return
+
+    project = _project_entry(job)
+    if job['payload']['mode'] == 'multi_agent':
+        # The advanced workflow reports a status string rather than a success flag
+        result.setdefault("success", result.get("status") == "completed")
+        project.update({
+            "project_folder": result.get("project_folder"),
+            "project_name": result.get("project_name")
+        })
+    project.update({
+        "status": "completed" if result.get("success") else "failed",
+        "result": result,
+        "completed_at": datetime.now().isoformat()
+    })
+    project_catalog.upsert(job['id'], status=project["status"])
+
+    # Emit completion event
+    progress_broadcaster.publish(job['id'], 'project_completed', {
+        "project_id": job['id'],
+        "success": result.get("success"),
+        "result": result
+    })
+
+def _record_generation_failure(job, error):
+    """Store a failed generation and notify clients"""
+    _project_entry(job).update({
+        "status": "failed",
+        "error": str(error),
+        "completed_at": datetime.now().isoformat()
+    })
+    project_catalog.upsert(job['id'], status="failed")
+
+    progress_broadcaster.publish(job['id'], 'project_failed', {
+        "project_id": job['id'],
+        "error": str(error)
+    })
+
+def run_generation_job(job):
+    """Job handler for simple/web generation (runs on a worker thread)"""
+    _project_entry(job)["status"] = "running"
+    try:
+        result = project_manager.generate_project(job['payload']['prompt'], job['id'], mode=job['payload']['mode'])
+    except Exception as e:
+        _record_generation_failure(job, e)
+        raise
+    _record_generation_result(job, result)
+
+async def run_multi_agent_job(job):
+    """Job handler for the advanced agents workflow (runs on the shared event loop)"""
+    _project_entry(job)["status"] = "running"
+    try:
+        result = await create_advanced_project(job['payload']['prompt'], job['id'])
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        _record_generation_failure(job, e)
+        raise
+    _record_generation_result(job, result)
+
+job_queue.register_handler('simple', run_generation_job, Config.JOB_WORKERS['simple'])
+job_queue.register_handler('multi_agent', run_multi_agent_job, Config.JOB_WORKERS['multi_agent'])
+
+def start_background_services():
+    """Start the job workers, reconciler and runtime pool and clean up after a previous run.
+    
+    Called by the server entry point only: importing this module (tests,
+    tools) must not start any of it, nor kill the projects a previous run left.
+    """
+    project_manager.cleanup_leftover_processes()
+    job_queue.start()
+    blob_store.cleanup_staging()
+    if dataset_store is not None:
+        dataset_store.evict()
+        artifact_store.evict()
+    project_catalog.start_reconciler()
+    env_manager.prewarm()
+    runtime_pool.start()
+
 @app.route('/api/generate', methods=['POST'])
 def generate_project():
-    """Start project generation process"""
+    """Queue a project generation job"""
     try:
         data = request.get_json()
         user_prompt = data.get('prompt', '').strip()
@@ -167,74 +280,52 @@ def generate_project():
         if not user_prompt:
             return jsonify({"error": "Prompt is required"}), 400
 
+        priority = data.get('priority', 0)
+        if isinstance(priority, bool) or not isinstance(priority, (int, str)):
+            return jsonify({"error": "Priority must be an integer"}), 400
+        try:
+            priority = int(priority)
+        except ValueError:
+            return jsonify({"error": "Priority must be an integer"}), 400
+        priority = max(Config.JOB_MIN_PRIORITY, min(Config.JOB_MAX_PRIORITY, priority))
+
         # Generate unique project ID
         project_id = str(uuid.uuid4())
 
-        # Store project info
+        # Every mode except the advanced workflow is handled by the ProjectManager pool
+        queue_mode = 'multi_agent' if mode == 'multi_agent' else 'simple'
+
+        # Store project info before queueing: a worker may pick the job up (and update these) right away
+        created_at = datetime.now()
         active_projects[project_id] = {
             "id": project_id,
             "prompt": user_prompt,
             "mode": mode,
-            "status": "started",
-            "created_at": datetime.now().isoformat()
+            "status": "queued",
+            "created_at": created_at.isoformat()
         }
-
-        # Start project generation in background thread
-        def generate_in_background():
-            try:
-                if mode == 'multi_agent':
-                    # Use new advanced agents system with LangGraph
-                    import asyncio
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    result = loop.run_until_complete(
-                        create_advanced_project(user_prompt)
-                    )
-                    
-                    # Update project status
-                    active_projects[project_id].update({
-                        "status": "completed" if result.get('success') else "failed",
-                        "result": result,
-                        "project_folder": result.get("project_folder"),
-                        "project_name": result.get("project_name"),
-                        "completed_at": datetime.now().isoformat()
-                    })
-                else:
-                    # Use simple generation
-                    result = project_manager.generate_project(user_prompt, project_id, mode=mode)
-                    active_projects[project_id].update({
-                        "status": "completed" if result.get("success") else "failed",
-                        "result": result,
-                        "completed_at": datetime.now().isoformat()
-                    })
-
-                # Emit completion event
-                socketio.emit('project_completed', {
-                    "project_id": project_id,
-                    "success": result.get("success"),
-                    "result": result
-                })
-
-            except Exception as e:
-                active_projects[project_id].update({
-                    "status": "failed",
-                    "error": str(e),
-                    "completed_at": datetime.now().isoformat()
-                })
-
-                socketio.emit('project_failed', {
-                    "project_id": project_id,
-                    "error": str(e)
-                })
-
-        thread = threading.Thread(target=generate_in_background)
-        thread.daemon = True
-        thread.start()
+        project_catalog.upsert(project_id, prompt=user_prompt, mode=mode, status="queued",
+                               created_at=created_at.timestamp())
+        try:
+            job = job_queue.submit(project_id, queue_mode, {"prompt": user_prompt, "mode": mode}, priority=priority)
+        except QueueFullError as e:
+            active_projects.pop(project_id, None)
+            project_catalog.remove(project_id)
+            response = jsonify({
+                "error": "Too many projects are being generated right now, please retry later",
+                "retry_after": e.retry_after
+            })
+            return response, 429, {"Retry-After": str(e.retry_after)}
+        except Exception:
+            active_projects.pop(project_id, None)
+            project_catalog.remove(project_id)
+            raise
 
         return jsonify({
             "project_id": project_id,
-            "status": "started",
-            "message": "Project generation started"
+            "status": job.get("status", "queued"),
+            "queue_position": job.get("queue_position"),
+            "message": "Project generation queued"
         })
 
     except Exception as e:
@@ -242,42 +333,96 @@ def generate_project():
 
 @app.route('/api/projects/<project_id>/status', methods=['GET'])
 def get_project_status(project_id):
-    """Get project status"""
-    if project_id not in active_projects:
+    """Get project status, including queue position while waiting for a worker"""
+    job = job_queue.get_job(project_id)
+    if project_id not in active_projects and job is None:
         return jsonify({"error": "Project not found"}), 404
+
+    project = dict(active_projects.get(project_id) or {
+        "id": project_id,
+        "prompt": job['payload']['prompt'],
+        "mode": job['payload']['mode'],
+        "created_at": datetime.fromtimestamp(job['created_at']).isoformat()
+    })
+    if job:
+        if job['status'] in ('queued', 'running', 'cancelled') or 'status' not in project:
+            project['status'] = job['status']
+        project['queue_position'] = job['queue_position']
+        if job.get('error') and 'error' not in project:
+            project['error'] = job['error']
+
+    return jsonify(project)
+
+@app.route('/api/projects/<project_id>/cancel', methods=['POST'])
+def cancel_project(project_id):
+    """Cancel a queued or running generation"""
+    status = job_queue.cancel(project_id)
+    if status is None:
+        return jsonify({"error": "Project not found"}), 404
+    if status != 'cancelled':
+        return jsonify({"error": f"Project already {status}", "status": status}), 409
+
+    if project_id in active_projects:
+        active_projects[project_id].update({
+            "status": "cancelled",
+            "completed_at": datetime.now().isoformat()
+        })
+    project_catalog.upsert(project_id, status="cancelled")
+    progress_broadcaster.publish(project_id, 'project_failed', {
+        "project_id": project_id,
+        "error": "Project generation cancelled",
+        "cancelled": True
+    })
+    return jsonify({"project_id": project_id, "status": "cancelled"})
+
+def _project_directory(project_id):
+    """A project's directory under GENERATED_PROJECTS_DIR, or None for ids that aren't projects
     
-    return jsonify(active_projects[project_id])
+    Only uuids and ids known to the catalog are accepted, and the resolved
+    path must stay inside the projects directory (no '..', '.' or symlinks out).
+    """
+    try:
+        known = str(uuid.UUID(project_id)) == project_id
+    except ValueError:
+        known = False
+    if not known and project_catalog.get(project_id) is None:
+        return None
+    root = os.path.realpath(Config.GENERATED_PROJECTS_DIR)
+    project_dir = os.path.realpath(os.path.join(root, project_id))
+    if os.path.dirname(project_dir) != root or not os.path.isdir(project_dir):
+        return None
+    return project_dir
 
 @app.route('/api/projects/<project_id>/download', methods=['GET'])
 def download_project(project_id):
-    """Download project zip file"""
-    if project_id not in active_projects:
-        return jsonify({"error": "Project not found"}), 404
-    
-    project = active_projects[project_id]
-    if project["status"] != "completed":
+    """Download the project as a zip, streamed while it is built or served from the archive cache"""
+    project = active_projects.get(project_id)
+    if project and project["status"] in ("queued", "running"):
         return jsonify({"error": "Project not completed"}), 400
     
-    result = project.get("result", {})
-    zip_path = result.get("zip_path")
-    
-    if not zip_path or not os.path.exists(zip_path):
-        return jsonify({"error": "Project file not found"}), 404
+    project_dir = _project_directory(project_id)
+    if project_dir is None:
+        return jsonify({"error": "Project not found"}), 404
     
+    download_name = f"python_project_{project_id}.zip"
     try:
-        # Verify the zip file is valid before sending
-        with zipfile.ZipFile(zip_path, 'r') as test_zip:
-            # This will raise an exception if the zip is corrupted
-            test_zip.testzip()
+        blob_store.materialize(project_id, project_dir)
+        cached_path, entries, fingerprint = project_archiver.cached_archive(project_id, project_dir)
+        if cached_path:
+            return send_file(
+                cached_path,
+                as_attachment=True,
+                download_name=download_name,
+                mimetype='application/zip',
+                etag=fingerprint
+            )
         
-        return send_file(
-            zip_path,
-            as_attachment=True,
-            download_name=f"python_project_{project_id}.zip",
-            mimetype='application/zip'
+        # Not cached for this version of the project: stream it as it is built (chunked)
+        return Response(
+            stream_with_context(project_archiver.stream(project_id, project_dir, entries, fingerprint)),
+            mimetype='application/zip',
+            headers={"Content-Disposition": f'attachment; filename="{download_name}"', "ETag": f'"{fingerprint}"'}
         )
-    except zipfile.BadZipFile:
-        return jsonify({"error": "Project file is corrupted"}), 500
     except Exception as e:
         return jsonify({"error": f"Error accessing project file: {str(e)}"}), 500
 
@@ -288,84 +433,22 @@ def list_projects():
 
 @app.route('/api/projects/history', methods=['GET'])
 def get_project_history():
-    """Get project history with additional metadata"""
+    """Get project history from the catalog.
+
+    Supports ?limit=&offset= paging, ?status= and ?q= filters and
+    ?sort=<created_at|updated_at|name|status|file_count>&order=<asc|desc>.
+    The total number of matches is returned in the X-Total-Count header.
+    """
     try:
-        projects = []
-        projects_dir = Config.GENERATED_PROJECTS_DIR
-        
-        if not os.path.exists(projects_dir):
-            return jsonify([])
-        
-        # Scan the filesystem for all project directories
-        for project_folder in os.listdir(projects_dir):
-            project_path = os.path.join(projects_dir, project_folder)
-            if os.path.isdir(project_path):
-                try:
-                    # Initialize default values
-                    project_name = "Python Project"
-                    description = "No description available"
-                    
-                    # Try to read project metadata from README.md
-                    readme_path = os.path.join(project_path, "README.md")
-                    if os.path.exists(readme_path):
-                        try:
-                            with open(readme_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                lines = content.split('\n')
-                                
-                                # Extract project name from first heading
-                                for line in lines:
-                                    if line.strip().startswith('# '):
-                                        project_name = line.strip()[2:]
-                                        break
-                                
-                                # Extract description from content
-                                for i, line in enumerate(lines):
-                                    if line.strip() and not line.startswith('#') and not line.startswith('```'):
-                                        description = line.strip()
-                                        break
-                                        
-                                # Limit description length
-                                if len(description) > 100:
-                                    description = description[:100] + "..."
-                                    
-                        except Exception as e:
-                            print(f"Error reading README for {project_folder}: {e}")
-                    
-                    # Get creation time from directory
-                    creation_time = os.path.getctime(project_path)
-                    created_at = datetime.fromtimestamp(creation_time).strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    # Count files in the project
-                    file_count = 0
-                    for root, dirs, files in os.walk(project_path):
-                        # Skip __pycache__ directories
-                        dirs[:] = [d for d in dirs if d != '__pycache__']
-                        # Count only non-pyc files
-                        file_count += len([f for f in files if not f.endswith('.pyc')])
-                    
-                    # Check if this project is in active_projects (recently generated)
-                    status = 'completed'
-                    if project_folder in active_projects:
-                        status = active_projects[project_folder].get('status', 'completed')
-                    
-                    project_info = {
-                        'id': project_folder,
-                        'name': project_name,
-                        'description': description,
-                        'status': status,
-                        'created_at': created_at,
-                        'file_count': file_count
-                    }
-                    projects.append(project_info)
-                    
-                except Exception as e:
-                    print(f"Error processing project {project_folder}: {e}")
-                    continue
-        
-        # Sort by creation time (newest first)
-        projects.sort(key=lambda x: x['created_at'], reverse=True)
-        return jsonify(projects)
+        projects, total = project_catalog.query(
+            status=request.args.get('status'),
+            search=request.args.get('q'),
+            sort=request.args.get('sort', 'created_at'),
+            order=request.args.get('order', 'desc'),
+            limit=request.args.get('limit', type=int),
+            offset=request.args.get('offset', 0, type=int)
+        )
+        return jsonify(projects), 200, {"X-Total-Count": str(total)}
         
     except Exception as e:
         print(f"Error in get_project_history: {e}")
@@ -380,7 +463,10 @@ def delete_project(project_id):
     # Clean up files
     project = active_projects[project_id]
     result = project.get("result", {})
-    
+
+    # A running app would keep writing into the directory removed below
+    project_manager.stop_project(project_id)
+
     # Remove zip file
     zip_path = result.get("zip_path")
     if zip_path and os.path.exists(zip_path):
@@ -394,7 +480,12 @@ def delete_project(project_id):
     
     # Remove from active projects
     del active_projects[project_id]
-    
+    project_catalog.remove(project_id)
+    blob_store.remove_project(project_id)
+    project_archiver.remove(project_id)
+    # Stopped runs keep their output readable through /logs; a deleted project's is dropped
+    output_supervisor.forget(project_id)
+
     return jsonify({"message": "Project deleted successfully"})
 
 @app.route('/api/projects/<project_id>/files', methods=['GET'])
@@ -506,7 +597,7 @@ def run_project(project_id):
             try:
                 result = project_manager.execute_project(project_id, project_path, run_method)
                 active_projects[project_id]["execution"] = result
-                socketio.emit('execution_complete', {
+                progress_broadcaster.publish(project_id, 'execution_complete', {
                     'project_id': project_id,
                     'result': result
                 })
@@ -518,7 +609,7 @@ def run_project(project_id):
                     'method': run_method
                 }
                 active_projects[project_id]["execution"] = error_result
-                socketio.emit('execution_error', {
+                progress_broadcaster.publish(project_id, 'execution_error', {
                     'project_id': project_id,
                     'error': error_result
                 })
@@ -613,9 +704,52 @@ def handle_join_project(data):
     project_id = data.get('project_id')
     if project_id:
         # Join room for project-specific updates
-        from flask_socketio import join_room
-        join_room(project_id)
-        emit('joined_project', {'project_id': project_id})
+        join_room(f"project_{project_id}")
+        emit('joined_project', {
+            'project_id': project_id,
+            'last_seq': progress_broadcaster.last_sequence(project_id)
+        })
+        # Replay what the client missed when it passes the last sequence number it saw
+        since = data.get('since')
+        if since is not None:
+            # Parsed like the REST routes' ?since=: anything that isn't a number replays from the start
+            try:
+                since = int(since)
+            except (TypeError, ValueError):
+                since = 0
+            events = progress_broadcaster.get_events(project_id, since)
+            if events:
+                emit('progress_batch', {'project_id': project_id, 'events': events, 'replay': True})
+
+@app.route('/api/projects/<project_id>/events', methods=['GET'])
+def get_project_events(project_id):
+    """Structured progress log of a project, optionally only events after ?since=<seq>"""
+    try:
+        since = request.args.get('since', 0, type=int)
+        return jsonify(progress_broadcaster.get_events(project_id, since))
+    except Exception as e:
+        return jsonify({"error": f"Failed to get project events: {str(e)}"}), 500
+
+@app.route('/api/projects/<project_id>/logs', methods=['GET'])
+def get_project_logs(project_id):
+    """Output lines of a running (or last run) project after ?since=<seq>, up to ?limit= per page"""
+    try:
+        since = request.args.get('since', 0, type=int)
+        limit = request.args.get('limit', Config.PROJECT_LOG_PAGE_SIZE, type=int)
+        return jsonify(output_supervisor.lines_since(project_id, since, max(1, min(limit, Config.PROJECT_LOG_PAGE_SIZE))))
+    except Exception as e:
+        return jsonify({"error": f"Failed to get project logs: {str(e)}"}), 500
+
+@app.route('/api/projects/<project_id>/resources', methods=['GET'])
+def get_project_resources(project_id):
+    """CPU, memory, wall-clock and output accounting of the project's latest sandboxed run"""
+    try:
+        usage = sandbox.usage(project_id)
+        if usage is None:
+            return jsonify({"error": "Project has not been run"}), 404
+        return jsonify(usage)
+    except Exception as e:
+        return jsonify({"error": f"Failed to get project resources: {str(e)}"}), 500
 
 @app.route('/api/debug/parsing-stats', methods=['GET'])
 def get_parsing_stats():
@@ -626,6 +760,61 @@ def get_parsing_stats():
     except Exception as e:
         return jsonify({"error": f"Failed to get parsing stats: {str(e)}"}), 500
 
+@app.route('/api/debug/llm-stats', methods=['GET'])
+def get_llm_stats():
+    """Get per-role LLM latency/token counters and concurrency utilisation"""
+    try:
+        return jsonify(llm_gateway.get_stats())
+    except Exception as e:
+        return jsonify({"error": f"Failed to get LLM stats: {str(e)}"}), 500
+
+@app.route('/api/debug/queue-stats', methods=['GET'])
+def get_queue_stats():
+    """Get queued/running generation jobs per mode"""
+    try:
+        return jsonify(job_queue.get_stats())
+    except Exception as e:
+        return jsonify({"error": f"Failed to get queue stats: {str(e)}"}), 500
+
+@app.route('/api/debug/storage-stats', methods=['GET'])
+def get_storage_stats():
+    """Get logical vs. stored bytes of the deduplicated project file store"""
+    try:
+        return jsonify(blob_store.get_stats())
+    except Exception as e:
+        return jsonify({"error": f"Failed to get storage stats: {str(e)}"}), 500
+
+@app.route('/api/debug/env-stats', methods=['GET'])
+def get_env_stats():
+    """Get the shared execution environments and their dependency sets"""
+    try:
+        return jsonify(env_manager.get_stats())
+    except Exception as e:
+        return jsonify({"error": f"Failed to get environment stats: {str(e)}"}), 500
+
+@app.route('/api/debug/port-leases', methods=['GET'])
+def get_port_leases():
+    """Get the ports currently leased to running projects"""
+    try:
+        return jsonify(project_manager.port_registry.get_leases())
+    except Exception as e:
+        return jsonify({"error": f"Failed to get port leases: {str(e)}"}), 500
+
+@app.route('/api/debug/dataset-stats', methods=['GET'])
+def get_dataset_stats():
+    """Get the uploaded datasets and cleaned files held for the data-cleaning endpoints"""
+    try:
+        if dataset_store is None:
+            return jsonify({"error": "Data cleaning module not available"}), 500
+        return jsonify({
+            **dataset_store.get_stats(),
+            'artifacts': artifact_store.get_stats(),
+            'profiles': data_profiler.get_stats(),
+            'graphs': graph_renderer.get_stats()
+        })
+    except Exception as e:
+        return jsonify({"error": f"Failed to get dataset stats: {str(e)}"}), 500
+
 # Blog Generation Routes - Updated to use blog_main_system
 @app.route('/api/blog/interview', methods=['POST'])
 def blog_interview():
@@ -836,6 +1025,37 @@ def plan_blog():
         }), 500
 
 # Data Cleaning Endpoints
+def _request_dataset(load_frame=True):
+    """(dataset info, frame, error response) for a data request.
+
+    Requests name an uploaded dataset by dataset_id; a file sent instead is
+    stored as a new dataset first, so older clients keep working. With
+    load_frame=False a named dataset isn't loaded into memory (frame is None).
+    """
+    dataset_id = request.form.get('dataset_id') or (request.get_json(silent=True) or {}).get('dataset_id')
+    if dataset_id:
+        info = dataset_store.info(dataset_id)
+        if info and not load_frame:
+            return info, None, None
+        df = dataset_store.get(dataset_id) if info else None
+        if df is None:
+            return None, None, (jsonify({"error": "Dataset not found or expired, please upload the file again"}), 404)
+        return info, df, None
+
+    if 'file' not in request.files:
+        return None, None, (jsonify({"error": "No file uploaded"}), 400)
+    file = request.files['file']
+    if file.filename == '':
+        return None, None, (jsonify({"error": "No file selected"}), 400)
+    try:
+        info, df = dataset_store.create(file)
+    except ValueError as e:
+        return None, None, (jsonify({"error": str(e)}), 400)
+    if df is None and load_frame:
+        # Too large to have been kept while storing it
+        df = dataset_store.get(info['dataset_id'])
+    return info, df, None
+
 @app.route('/api/data/test', methods=['GET'])
 def test_data_endpoint():
     """Test endpoint to verify data cleaning module"""
@@ -866,17 +1086,19 @@ def upload_data():
                 "error": "Data cleaning module not available. Please install required dependencies: pip install pandas numpy openpyxl xlrd"
             }), 500
             
-        if 'file' not in request.files:
-            return jsonify({"error": "No file uploaded"}), 400
+        dataset, df, error = _request_dataset()
+        if error:
+            return error
         
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({"error": "No file selected"}), 400
-        
-        # Analyze the file
-        result = data_cleaner.analyze_file(file)
+        # Preview the stored dataset; later requests refer to it by dataset_id
+        result = data_cleaner.analyze_file(df)
         
         if result['success']:
+            result.update({
+                'dataset_id': dataset['dataset_id'],
+                'filename': dataset['filename'],
+                'size': dataset['size']
+            })
             return jsonify(result)
         else:
             return jsonify({"error": result['error']}), 400
@@ -893,17 +1115,15 @@ def analyze_data():
                 "error": "Data cleaning module not available. Please install required dependencies: pip install pandas numpy openpyxl xlrd"
             }), 500
             
-        if 'file' not in request.files:
-            return jsonify({"error": "No file uploaded"}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({"error": "No file selected"}), 400
+        dataset, _, error = _request_dataset(load_frame=False)
+        if error:
+            return error
         
         # Perform AI analysis
-        result = data_cleaner.ai_analysis(file)
+        result = data_cleaner.ai_analysis(dataset['dataset_id'])
         
         if result['success']:
+            result['dataset_id'] = dataset['dataset_id']
             return jsonify(result)
         else:
             return jsonify({"error": result['error']}), 400
@@ -913,24 +1133,25 @@ def analyze_data():
 
 @app.route('/api/data/graphs', methods=['POST'])
 def generate_data_graphs():
-    """Generate matplotlib/seaborn graphs for data visualization"""
+    """Render the data quality graphs of a dataset; returns an image URL per graph"""
     try:
         if not DATA_CLEANER_AVAILABLE or data_cleaner is None:
             return jsonify({
                 "error": "Data cleaning module not available. Please install required dependencies: pip install pandas numpy matplotlib seaborn openpyxl xlrd"
             }), 500
             
-        if 'file' not in request.files:
-            return jsonify({"error": "No file uploaded"}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({"error": "No file selected"}), 400
+        dataset, _, error = _request_dataset(load_frame=False)
+        if error:
+            return error
         
         # Generate graphs
-        result = data_cleaner.generate_data_quality_graphs(file)
+        result = data_cleaner.generate_data_quality_graphs(dataset['dataset_id'])
         
         if result['success']:
+            result['dataset_id'] = dataset['dataset_id']
+            result['graphs'] = {
+                graph: f"/api/data/graphs/{dataset['dataset_id']}/{graph}.svg" for graph in result['graphs']
+            }
             return jsonify(result)
         else:
             return jsonify({"error": result['error']}), 400
@@ -938,6 +1159,37 @@ def generate_data_graphs():
     except Exception as e:
         return jsonify({"error": f"Failed to generate graphs: {str(e)}"}), 500
 
+@app.route('/api/data/graphs/<dataset_id>/<graph>.svg', methods=['GET'])
+def get_data_graph(dataset_id, graph):
+    """Serve one rendered data quality graph as SVG"""
+    try:
+        if not DATA_CLEANER_AVAILABLE or graph_renderer is None:
+            return jsonify({
+                "error": "Data cleaning module not available. Please install required dependencies: pip install pandas numpy matplotlib seaborn openpyxl xlrd"
+            }), 500
+        
+        if dataset_store.info(dataset_id) is None:
+            return jsonify({"error": "Dataset not found or expired"}), 404
+        try:
+            rendered = graph_renderer.get(dataset_id, graph)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if rendered is None:
+            return jsonify({"error": f"Graph '{graph}' does not apply to this dataset"}), 404
+        
+        svg, etag = rendered
+        response = Response(svg, mimetype='image/svg+xml')
+        response.set_etag(etag)
+        # Datasets never change under an id, so browsers may keep the image; the ETag covers re-renders
+        response.cache_control.private = True
+        response.cache_control.max_age = Config.DATASET_TTL
+        return response.make_conditional(request)
+        
+    except KeyError:
+        return jsonify({"error": "Dataset not found or expired"}), 404
+    except Exception as e:
+        return jsonify({"error": f"Failed to render graph: {str(e)}"}), 500
+
 @app.route('/api/data/clean', methods=['POST'])
 def clean_data():
     """Clean data based on selected options"""
@@ -947,12 +1199,9 @@ def clean_data():
                 "error": "Data cleaning module not available. Please install required dependencies: pip install pandas numpy openpyxl xlrd"
             }), 500
             
-        if 'file' not in request.files:
-            return jsonify({"error": "No file uploaded"}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({"error": "No file selected"}), 400
+        dataset, _, error = _request_dataset(load_frame=False)
+        if error:
+            return error
         
         # Get cleaning options
         options = {
@@ -964,9 +1213,10 @@ def clean_data():
         }
         
         # Clean the data
-        result = data_cleaner.clean_data(file, options)
+        result = data_cleaner.clean_data(dataset['dataset_id'], options, dataset['filename'])
         
         if result['success']:
+            result['dataset_id'] = dataset['dataset_id']
             return jsonify(result)
         else:
             return jsonify({"error": result['error']}), 400
@@ -983,12 +1233,9 @@ def manual_clean_data():
                 "error": "Data cleaning module not available. Please install required dependencies: pip install pandas numpy openpyxl xlrd"
             }), 500
             
-        if 'file' not in request.files:
-            return jsonify({"error": "No file uploaded"}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({"error": "No file selected"}), 400
+        dataset, df, error = _request_dataset()
+        if error:
+            return error
         
         # Get operation and parameters
         operation = request.form.get('operation')
@@ -1019,9 +1266,10 @@ def manual_clean_data():
             }
         
         # Perform manual cleaning
-        result = data_cleaner.manual_clean_data(file, operation, parameters)
+        result = data_cleaner.manual_clean_data(df, operation, parameters, dataset['filename'])
         
         if result['success']:
+            result['dataset_id'] = dataset['dataset_id']
             return jsonify(result)
         else:
             return jsonify({"error": result['error']}), 400
@@ -1029,16 +1277,31 @@ def manual_clean_data():
     except Exception as e:
         return jsonify({"error": f"Failed to perform manual cleaning: {str(e)}"}), 500
 
-@app.route('/api/data/download/<filename>', methods=['GET'])
-def download_cleaned_data(filename):
-    """Download cleaned data file"""
+@app.route('/api/data/download/<artifact_id>', methods=['GET'])
+def download_cleaned_data(artifact_id):
+    """Download a cleaned data artifact as ?format=csv (default), csv.gz or parquet"""
     try:
-        # In a real implementation, you would store the cleaned data temporarily
-        # and retrieve it here. For now, we'll return a placeholder response
-        return jsonify({
-            "message": "Download functionality would be implemented here",
-            "filename": filename
-        })
+        if not DATA_CLEANER_AVAILABLE or artifact_store is None:
+            return jsonify({
+                "error": "Data cleaning module not available. Please install required dependencies: pip install pandas numpy openpyxl xlrd"
+            }), 500
+        
+        try:
+            artifact = artifact_store.open_format(artifact_id, request.args.get('format', 'csv'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if artifact is None:
+            return jsonify({"error": "Cleaned file not found or expired"}), 404
+        
+        # conditional=True answers If-None-Match / If-Modified-Since and Range requests
+        return send_file(
+            artifact['path'],
+            as_attachment=True,
+            download_name=artifact['download_name'],
+            mimetype=artifact['mimetype'],
+            conditional=True,
+            etag=True
+        )
         
     except Exception as e:
         return jsonify({"error": f"Failed to download file: {str(e)}"}), 500
@@ -1548,6 +1811,8 @@ else:
         }), 503
 
 if __name__ == '__main__':
+    # Code-check and graph pool workers must not re-run this script's top level
+    detach_main_module()
     print("Starting Python Code Generator API...")
     print(f"Gemini API Key configured: {'Yes' if Config.GOOGLE_API_KEY else 'No'}")
     print(f"Generated projects directory: {Config.GENERATED_PROJECTS_DIR}")
@@ -1559,6 +1824,8 @@ if __name__ == '__main__':
     else:
         print("PPT/SmartSlides functionality: ❌ Not Available")
     
+    start_background_services()
+    
     # Run with eventlet for WebSocket support - Debug disabled to prevent auto-restart
     socketio.run(
         app, 
@@ -0,0 +1,250 @@
+import os
+import re
+import json
+import gzip
+import time
+import uuid
+import shutil
+import threading
+import logging
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_float_dtype, is_integer_dtype
+
+from config import Config
+from dataset_store import PARQUET_AVAILABLE
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# format -> (file in the artifact directory, extension of the download name, mimetype)
+FORMATS = {
+    'csv': ('data.csv', '.csv', 'text/csv'),
+    'csv.gz': ('data.csv.gz', '.csv.gz', 'application/gzip'),
+    'parquet': ('data.parquet', '.parquet', 'application/vnd.apache.parquet'),
+}
+
+# Column types recorded while writing, so derived formats read the CSV back with stable dtypes
+READ_DTYPES = {'integer': 'Int64', 'float': 'float64', 'boolean': 'boolean', 'string': 'string'}
+
+
+def _column_type(series: pd.Series) -> str:
+    if is_bool_dtype(series):
+        return 'boolean'
+    if is_integer_dtype(series):
+        return 'integer'
+    if is_float_dtype(series):
+        return 'float'
+    return 'string'
+
+
+def _merge_types(first: str, second: str) -> str:
+    if first == second:
+        return first
+    if {first, second} == {'integer', 'float'}:
+        return 'float'
+    return 'string'
+
+
+class ArtifactWriter:
+    """Appends frames to a new artifact's CSV; the artifact exists once the with-block exits cleanly"""
+
+    def __init__(self, store: 'ArtifactStore', filename: str, details: Dict[str, Any] = None):
+        self.store = store
+        self.artifact_id = uuid.uuid4().hex
+        self.directory = store._artifact_dir(self.artifact_id)
+        self.work_dir = os.path.join(self.directory, 'work')  # scratch space for the producer
+        self.filename = filename
+        self.details = details or {}
+        self.rows = 0
+        self.column_types = {}
+        self._file = None
+
+    def __enter__(self) -> 'ArtifactWriter':
+        os.makedirs(self.work_dir)
+        self._file = open(os.path.join(self.directory, FORMATS['csv'][0]), 'w', encoding='utf-8', newline='')
+        return self
+
+    def write(self, frame: pd.DataFrame):
+        header = not self.column_types
+        for col in frame.columns:
+            kind = _column_type(frame[col])
+            self.column_types[col] = _merge_types(self.column_types.get(col, kind), kind)
+        frame.to_csv(self._file, header=header, index=False)
+        self.rows += len(frame)
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        if exc_type is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            return False
+        self.store._commit(self)
+        return False
+
+
+class ArtifactStore:
+    """Cleaned datasets kept on disk for download.
+
+    Each artifact is a directory holding the CSV written by its producer and
+    a metadata file. Gzip-CSV and Parquet copies are derived from the CSV on
+    first request and kept alongside it. Artifacts not downloaded for
+    ARTIFACT_TTL seconds are deleted, oldest first once the directory exceeds
+    ARTIFACT_MAX_BYTES.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or Config.ARTIFACT_DIR
+        self._lock = threading.Lock()
+        self._converting = {}  # (artifact_id, format) -> lock
+        self.stats = {'created': 0, 'conversions': 0, 'evicted': 0}
+
+    def _artifact_dir(self, artifact_id: str) -> str:
+        return os.path.join(self.root, artifact_id)
+
+    def _meta_path(self, artifact_id: str) -> str:
+        return os.path.join(self._artifact_dir(artifact_id), 'meta.json')
+
+    def formats(self) -> List[str]:
+        return [name for name in FORMATS if name != 'parquet' or PARQUET_AVAILABLE]
+
+    def writer(self, filename: str, details: Dict[str, Any] = None) -> ArtifactWriter:
+        """Start a new artifact; filename is the download name without extension"""
+        os.makedirs(self.root, exist_ok=True)
+        return ArtifactWriter(self, filename, details)
+
+    def _commit(self, writer: ArtifactWriter):
+        meta = {
+            'artifact_id': writer.artifact_id,
+            'filename': writer.filename,
+            'rows': writer.rows,
+            'column_types': writer.column_types,
+            'created_at': time.time(),
+            **writer.details,
+        }
+        tmp_path = f"{self._meta_path(writer.artifact_id)}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path(writer.artifact_id))
+        with self._lock:
+            self.stats['created'] += 1
+        self.evict(keep=writer.artifact_id)
+
+    def info(self, artifact_id: str) -> Optional[Dict[str, Any]]:
+        if not ARTIFACT_ID_PATTERN.match(artifact_id or ''):
+            return None
+        try:
+            with open(self._meta_path(artifact_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def open_format(self, artifact_id: str, fmt: str) -> Optional[Dict[str, Any]]:
+        """{'path', 'download_name', 'mimetype'} of an artifact in a format, deriving the file if needed
+
+        Returns None if the artifact doesn't exist; raises ValueError for an
+        unsupported format.
+        """
+        if fmt not in self.formats():
+            raise ValueError(f"Unsupported format '{fmt}'. Available formats: {', '.join(self.formats())}")
+        info = self.info(artifact_id)
+        if info is None:
+            return None
+        file_name, extension, mimetype = FORMATS[fmt]
+        path = os.path.join(self._artifact_dir(artifact_id), file_name)
+        if not os.path.exists(path):
+            with self._lock:
+                lock = self._converting.setdefault((artifact_id, fmt), threading.Lock())
+            with lock:
+                if not os.path.exists(path):
+                    self._convert(artifact_id, info, fmt, path)
+            with self._lock:
+                self._converting.pop((artifact_id, fmt), None)
+        try:
+            os.utime(self._meta_path(artifact_id))
+        except OSError:
+            pass
+        return {'path': path, 'download_name': f"{info['filename']}{extension}", 'mimetype': mimetype}
+
+    def _convert(self, artifact_id: str, info: Dict[str, Any], fmt: str, path: str):
+        """Derive a format from the artifact's CSV, streaming it so memory stays bounded"""
+        csv_path = os.path.join(self._artifact_dir(artifact_id), FORMATS['csv'][0])
+        tmp_path = f"{path}.tmp"
+        try:
+            if fmt == 'csv.gz':
+                with open(csv_path, 'rb') as source, gzip.open(tmp_path, 'wb', compresslevel=6) as target:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+            elif fmt == 'parquet':
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                dtypes = {col: READ_DTYPES[kind] for col, kind in info['column_types'].items()}
+                writer = None
+                try:
+                    for chunk in pd.read_csv(csv_path, dtype=dtypes, chunksize=Config.DATASET_CHUNK_ROWS):
+                        table = pa.Table.from_pandas(chunk, preserve_index=False)
+                        if writer is None:
+                            writer = pq.ParquetWriter(tmp_path, table.schema)
+                        writer.write_table(table.cast(writer.schema))
+                finally:
+                    if writer is not None:
+                        writer.close()
+                if writer is None:
+                    # Header-only CSV: an empty file with the right columns
+                    pd.read_csv(csv_path, dtype=dtypes).to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self.stats['conversions'] += 1
+
+    def remove(self, artifact_id: str):
+        if ARTIFACT_ID_PATTERN.match(artifact_id or ''):
+            shutil.rmtree(self._artifact_dir(artifact_id), ignore_errors=True)
+
+    def evict(self, keep: str = None) -> int:
+        """Delete expired artifacts, then the least recently used ones while over the size limit"""
+        if not os.path.isdir(self.root):
+            return 0
+        artifacts = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir() or not ARTIFACT_ID_PATTERN.match(entry.name):
+                continue
+            size, last_used = 0, 0.0
+            for root, _, names in os.walk(entry.path):
+                for name in names:
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except FileNotFoundError:
+                        continue
+                    size += stat.st_size
+                    # meta.json is touched on download; an artifact still being written ages from its newest file
+                    last_used = max(last_used, stat.st_mtime)
+            artifacts.append((last_used or entry.stat().st_mtime, size, entry.name))
+
+        now = time.time()
+        total = sum(size for _, size, _ in artifacts)
+        removed = 0
+        for last_used, size, artifact_id in sorted(artifacts):
+            if artifact_id == keep:
+                continue
+            if now - last_used > Config.ARTIFACT_TTL or total > Config.ARTIFACT_MAX_BYTES:
+                self.remove(artifact_id)
+                total -= size
+                removed += 1
+        if removed:
+            with self._lock:
+                self.stats['evicted'] += removed
+            logger.info(f"Evicted {removed} cleaned-data artifact(s)")
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'formats': self.formats(), **self.stats}
+
+
+# Global artifact store instance
+artifact_store = ArtifactStore()
@@ -0,0 +1,45 @@
+import asyncio
+import threading
+import logging
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRuntime:
+    """A single background event loop shared by all async workflows.
+
+    Coroutines are submitted from Flask/worker threads with submit() and run
+    concurrently on one loop thread, so waiting on the LLM no longer pins an
+    OS thread per request.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The shared loop, started on first use"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._run, name="async-runtime", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        logger.info("Shared async runtime started")
+        self._loop.run_forever()
+
+    def submit(self, coro) -> Future:
+        """Schedule a coroutine on the shared loop and return a thread-safe future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+# Global runtime instance
+async_runtime = AsyncRuntime()
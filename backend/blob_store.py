@@ -0,0 +1,380 @@
+import os
+import json
+import ctypes
+import ctypes.util
+import functools
+import shutil
+import hashlib
+import tempfile
+import threading
+import logging
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+STAGING_SUFFIX = '.staging'
+
+# Blobs, and project files linked to them, are read-only: an in-place write would change every project sharing them
+BLOB_MODE = 0o444
+
+
+class BlobStore:
+    """Content-addressed storage for generated project files.
+
+    Each distinct file body is stored once under objects/<sha256>, and every
+    project has a manifest mapping its relative paths to blob hashes. Project
+    directories are views onto the store: files are hard-linked in (copied
+    when linking is not possible) and can be re-materialized from the
+    manifest at any time, so only the store needs backing up.
+
+    Because linked files share their blob, project files must be replaced
+    (unlink + link/write) rather than modified in place; write_file() and
+    write_files() do that. Blobs are read-only so nothing else can edit
+    them through a link, and detach() gives a project private, writable
+    copies before it is run.
+    """
+
+    def __init__(self, root: str = None, projects_dir: str = None):
+        self.root = root or Config.BLOB_STORE_DIR
+        self.projects_dir = projects_dir or Config.GENERATED_PROJECTS_DIR
+        self.objects_dir = os.path.join(self.root, 'objects')
+        self.manifests_dir = os.path.join(self.root, 'manifests')
+        self._lock = threading.Lock()
+        self.stats = {'written': 0, 'unchanged': 0}
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _manifest_path(self, project_id: str) -> str:
+        return os.path.join(self.manifests_dir, f"{project_id}.json")
+
+    def put(self, data: bytes, digest: str = None) -> str:
+        """Store a blob (once) and return its hash"""
+        digest = digest or hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path))
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.chmod(tmp_path, BLOB_MODE)
+                os.replace(tmp_path, blob_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return digest
+
+    def read(self, digest: str) -> bytes:
+        with open(self._blob_path(digest), 'rb') as f:
+            return f.read()
+
+    def is_blob(self, stat: os.stat_result, digest: str) -> bool:
+        """Whether a project file (given its stat) is still the stored blob: a link to it, or a read-only copy
+        where linking isn't possible. Detached or rewritten files are writable and never count.
+        """
+        try:
+            blob = os.stat(self._blob_path(digest))
+        except OSError:
+            return False
+        if (stat.st_dev, stat.st_ino) == (blob.st_dev, blob.st_ino):
+            return True
+        return stat.st_nlink == 1 and not stat.st_mode & 0o222 and stat.st_size == blob.st_size
+
+    def load_manifest(self, project_id: str) -> Dict[str, Dict[str, Any]]:
+        """{relative path: {'hash', 'size'}} for a project (empty if it has none)"""
+        try:
+            with open(self._manifest_path(project_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_manifest(self, project_id: str, manifest: Dict[str, Dict[str, Any]]):
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        path = self._manifest_path(project_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def _split_path(self, file_path: str) -> Tuple[Optional[str], Optional[str]]:
+        """(project_id, path relative to the project) for a file under the projects dir"""
+        relative = os.path.relpath(os.path.abspath(file_path), os.path.abspath(self.projects_dir))
+        if relative.startswith(os.pardir) or os.sep not in relative:
+            return None, None
+        project_id, inner_path = relative.split(os.sep, 1)
+        return project_id, inner_path.replace(os.sep, '/')
+
+    def _link(self, digest: str, target: str):
+        """Point target at a blob, replacing whatever is there"""
+        target_dir = os.path.dirname(target)
+        if target_dir:
+            os.makedirs(target_dir, exist_ok=True)
+        if os.path.lexists(target):
+            os.remove(target)
+        blob_path = self._blob_path(digest)
+        if os.stat(blob_path).st_mode & 0o222:
+            os.chmod(blob_path, BLOB_MODE)  # Stored before blobs were made read-only
+        try:
+            os.link(blob_path, target)
+        except OSError:
+            # Different filesystem or no hardlink support
+            shutil.copyfile(blob_path, target)
+            os.chmod(target, BLOB_MODE)
+
+    def write_files(self, project_dir: str, files: Iterable[Tuple[str, bytes]]) -> Dict[str, Dict[str, Any]]:
+        """Write a batch of project files (relative path, content), all or nothing; returns the project's manifest.
+
+        Files whose content is unchanged are not touched. Everything else is
+        staged in a temporary sibling of the project directory and synced to
+        disk once. A new (or still empty) project directory is then renamed
+        into place in one step; in an existing one, changed files are renamed
+        over their targets only after the whole batch has been staged.
+        """
+        project_dir = os.path.normpath(project_dir)
+        project_id = os.path.basename(project_dir)
+        with self._lock:
+            manifest = self.load_manifest(project_id)
+            pending = {}
+            for relative_path, data in files:
+                relative_path = _clean_relative_path(relative_path)
+                if relative_path is None:
+                    logger.warning(f"Skipping unsafe path in {project_id}")
+                    continue
+                digest = hashlib.sha256(data).hexdigest()
+                entry = manifest.get(relative_path)
+                target = os.path.join(project_dir, relative_path)
+                if entry and entry['hash'] == digest and self._is_linked(target, digest):
+                    self.stats['unchanged'] += 1
+                    continue
+                pending[relative_path] = (data, digest)
+            if not pending:
+                return dict(manifest)
+
+            parent = os.path.dirname(project_dir)
+            os.makedirs(parent, exist_ok=True)
+            fresh = not os.path.isdir(project_dir) or not os.listdir(project_dir)
+            if not fresh:
+                _check_targets(project_dir, pending)
+            staging = tempfile.mkdtemp(prefix=f".{project_id}.", suffix=STAGING_SUFFIX, dir=parent)
+            try:
+                for relative_path, (data, digest) in pending.items():
+                    self.put(data, digest)
+                    self._link(digest, os.path.join(staging, relative_path))
+                _sync_to_disk([staging, self.objects_dir])
+
+                if fresh:
+                    # mkdtemp creates the directory private to us; projects are normal directories
+                    os.chmod(staging, 0o755)
+                    if os.path.isdir(project_dir) and os.name == 'nt':
+                        os.rmdir(project_dir)
+                    # Replaces an empty directory in one step on POSIX
+                    os.rename(staging, project_dir)
+                else:
+                    for relative_path in pending:
+                        target = os.path.join(project_dir, relative_path)
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        os.replace(os.path.join(staging, relative_path), target)
+            finally:
+                if os.path.isdir(staging):
+                    shutil.rmtree(staging, ignore_errors=True)
+
+            for relative_path, (data, digest) in pending.items():
+                manifest[relative_path] = {'hash': digest, 'size': len(data)}
+            self._save_manifest(project_id, manifest)
+            _sync_directory(parent)
+            self.stats['written'] += len(pending)
+            return dict(manifest)
+
+    def write_file(self, file_path: str, data: bytes):
+        """Store a single project file; paths outside the projects dir are written normally"""
+        project_id, relative_path = self._split_path(file_path)
+        if project_id is None:
+            directory = os.path.dirname(file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(file_path, 'wb') as f:
+                f.write(data)
+            return
+        self.write_files(os.path.join(self.projects_dir, project_id), [(relative_path, data)])
+
+    def materialize(self, project_id: str, project_dir: str = None) -> int:
+        """Re-link manifest files missing from a project's directory; returns how many were restored"""
+        project_dir = project_dir or os.path.join(self.projects_dir, project_id)
+        restored = 0
+        with self._lock:
+            for relative_path, entry in self.load_manifest(project_id).items():
+                target = os.path.join(project_dir, relative_path)
+                if os.path.exists(target) and os.path.getsize(target) == entry['size']:
+                    continue
+                if not os.path.exists(self._blob_path(entry['hash'])):
+                    logger.warning(f"Blob {entry['hash']} for {project_id}/{relative_path} is missing")
+                    continue
+                self._link(entry['hash'], target)
+                restored += 1
+        return restored
+
+    def detach(self, project_id: str, project_dir: str = None) -> int:
+        """Replace a project's links to shared blobs with private, writable copies; returns how many
+
+        Call before running a project: the program (or anyone editing its
+        files) may then write to them in place without touching the store or
+        other projects. The next write_files() links unchanged content again.
+        """
+        project_dir = project_dir or os.path.join(self.projects_dir, project_id)
+        detached = 0
+        with self._lock:
+            for relative_path, entry in self.load_manifest(project_id).items():
+                target = os.path.join(project_dir, relative_path)
+                if not self._is_linked(target, entry['hash']):
+                    continue
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix='.detach-')
+                try:
+                    with open(target, 'rb') as source, os.fdopen(fd, 'wb') as copy:
+                        shutil.copyfileobj(source, copy)
+                    os.chmod(tmp_path, 0o644)
+                    os.replace(tmp_path, target)
+                except Exception:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+                detached += 1
+        return detached
+
+    def _is_linked(self, path: str, digest: str) -> bool:
+        try:
+            return self.is_blob(os.stat(path), digest)
+        except OSError:
+            return False
+
+    def cleanup_staging(self):
+        """Remove staging directories left behind by writes interrupted by a crash"""
+        if not os.path.isdir(self.projects_dir):
+            return
+        for entry in os.scandir(self.projects_dir):
+            if entry.name.startswith('.') and entry.name.endswith(STAGING_SUFFIX) and entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def remove_project(self, project_id: str):
+        """Forget a project's manifest and drop blobs no other project references"""
+        with self._lock:
+            manifest_path = self._manifest_path(project_id)
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
+            self._collect_garbage()
+
+    def _collect_garbage(self):
+        referenced = set()
+        if os.path.isdir(self.manifests_dir):
+            for name in os.listdir(self.manifests_dir):
+                if name.endswith('.json'):
+                    referenced.update(entry['hash'] for entry in self.load_manifest(name[:-5]).values())
+        if not os.path.isdir(self.objects_dir):
+            return
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            for digest in os.listdir(prefix_dir):
+                if digest not in referenced:
+                    os.remove(os.path.join(prefix_dir, digest))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Stored vs. logical bytes, i.e. how much deduplication saves"""
+        with self._lock:
+            manifests, files, logical_bytes = 0, 0, 0
+            if os.path.isdir(self.manifests_dir):
+                for name in os.listdir(self.manifests_dir):
+                    if name.endswith('.json'):
+                        manifest = self.load_manifest(name[:-5])
+                        manifests += 1
+                        files += len(manifest)
+                        logical_bytes += sum(entry['size'] for entry in manifest.values())
+            blobs, stored_bytes = 0, 0
+            if os.path.isdir(self.objects_dir):
+                for prefix in os.listdir(self.objects_dir):
+                    for entry in os.scandir(os.path.join(self.objects_dir, prefix)):
+                        blobs += 1
+                        stored_bytes += entry.stat().st_size
+        return {
+            'projects': manifests,
+            'files': files,
+            'blobs': blobs,
+            'logical_bytes': logical_bytes,
+            'stored_bytes': stored_bytes,
+            'dedup_ratio': round(logical_bytes / stored_bytes, 2) if stored_bytes else 0.0,
+            'files_written': self.stats['written'],
+            'files_unchanged': self.stats['unchanged'],
+        }
+
+
+def _clean_relative_path(path: str) -> Optional[str]:
+    """Path relative to the project with '/' separators, or None if it would leave the project"""
+    path = path.replace('\\', '/').lstrip('/')
+    normalized = os.path.normpath(path).replace(os.sep, '/')
+    if not path or normalized == '.' or normalized.startswith('../') or normalized == '..' or os.path.isabs(normalized):
+        return None
+    return normalized
+
+
+def _check_targets(project_dir: str, pending: Dict[str, Any]):
+    """Fail before anything is renamed if a file would have to replace a directory, or vice versa"""
+    for relative_path in pending:
+        target = os.path.join(project_dir, relative_path)
+        if os.path.isdir(target):
+            raise IsADirectoryError(f"Cannot write {relative_path}: a directory is in the way")
+        parent = os.path.dirname(target)
+        while len(parent) > len(project_dir):
+            if os.path.isfile(parent):
+                raise NotADirectoryError(f"Cannot write {relative_path}: {os.path.relpath(parent, project_dir)} is a file")
+            parent = os.path.dirname(parent)
+
+
+def _sync_to_disk(paths):
+    """One filesystem-wide flush for a whole batch rather than an fsync per file"""
+    if not Config.PROJECT_WRITE_FSYNC:
+        return
+    syncfs = getattr(_libc(), 'syncfs', None)
+    if syncfs is None:
+        if hasattr(os, 'sync'):
+            os.sync()
+        return
+    devices = set()
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            device = os.fstat(fd).st_dev
+            if device not in devices:
+                devices.add(device)
+                syncfs(fd)
+        finally:
+            os.close(fd)
+
+
+def _sync_directory(path: str):
+    """Persist renames in a directory"""
+    if not Config.PROJECT_WRITE_FSYNC or os.name == 'nt':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@functools.lru_cache(maxsize=1)
+def _libc():
+    if os.name != 'posix':
+        return None
+    try:
+        return ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    except OSError:
+        return None
+
+
+# Global blob store instance
+blob_store = BlobStore()
@@ -7,8 +7,13 @@ from urllib.parse import quote_plus, urlparse
 from flask import Flask, request, jsonify, session
 from flask_cors import CORS
 from dotenv import load_dotenv
+import sys
 import google.generativeai as genai
 
+# Shared LLM gateway lives in the backend root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_gateway import llm_gateway
+
 # Import the robust YouTube blog generator
 from youtube_blog_generator import generate_blog_from_youtube
 
@@ -404,7 +409,7 @@ class Agent:
         else:
             model_name = 'gemini-2.0-flash'
             
-        self.model = genai.GenerativeModel(model_name)
+        self.model_name = model_name
     
     def execute(self, task_description, context="", research_data=None):
         research_context = ""
@@ -428,8 +433,10 @@ IMPORTANT: Use the verified research data above to ensure accuracy. Include spec
 Execute this task professionally and return a high-quality result.
 """
         try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
+            response_text = llm_gateway.generate_text(
+                prompt, role=self.role, feature='blog', model_name=self.model_name
+            )
+            return response_text.strip()
         except Exception as e:
             return f"Error: {str(e)}"
 
@@ -490,7 +497,7 @@ class Crew:
 # Mock LLM class for interface compatibility
 class MockLLM:
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model_name = 'gemini-2.0-flash'
     
     def invoke(self, prompt):
         class Response:
@@ -498,8 +505,10 @@ class MockLLM:
                 self.content = content
         
         try:
-            response = self.model.generate_content(prompt)
-            return Response(response.text.strip())
+            response_text = llm_gateway.generate_text(
+                prompt, role='blog_llm', feature='blog', model_name=self.model_name
+            )
+            return Response(response_text.strip())
         except Exception as e:
             return Response(f"Error: {str(e)}")
 
@@ -11,6 +11,7 @@ import google.generativeai as genai
 from youtube_transcript_api import YouTubeTranscriptApi
 from pytube import YouTube
 import logging
+from llm_gateway import llm_gateway
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -335,8 +336,9 @@ class YouTubeBlogGenerator:
                 Generate the factual blog post now:
                 """
 
-            model = genai.GenerativeModel('gemini-2.0-flash-exp')
-            response = model.generate_content(prompt)
+            response = llm_gateway.generate(
+                prompt, role='youtube_blog_writer', feature='blog', model_name='gemini-2.0-flash-exp'
+            )
             
             if response and response.text:
                 return {
@@ -466,8 +468,9 @@ class YouTubeBlogGenerator:
                 Generate the factual summary now:
                 """
             
-            model = genai.GenerativeModel('gemini-2.0-flash-exp')
-            response = model.generate_content(prompt)
+            response = llm_gateway.generate(
+                prompt, role='youtube_blog_writer', feature='blog', model_name='gemini-2.0-flash-exp'
+            )
             
             if response and response.text:
                 return {
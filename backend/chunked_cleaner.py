@@ -0,0 +1,154 @@
+import shutil
+import tempfile
+import logging
+from typing import Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import dataset_store
+from data_profiler import data_profiler, RowHashIndex
+from artifact_store import ArtifactWriter
+
+logger = logging.getLogger(__name__)
+
+# Share of a text column's values that must parse as numbers before it is converted
+NUMERIC_RATIO = 0.8
+
+
+def _is_text(series: pd.Series) -> bool:
+    return series.dtype == object or pd.api.types.is_string_dtype(series)
+
+
+class ChunkedCleaner:
+    """Cleans a stored dataset in two passes over bounded chunks, writing the result to an artifact.
+
+    Fill values, IQR clipping bounds and which text columns to convert to
+    numbers come from the dataset's cached profile (data_profiler). The first
+    pass only hashes rows, spilling the hashes to partition files on disk;
+    duplicates are then found one partition at a time and marked in an
+    on-disk bitmap. The second pass drops the marked rows and applies type
+    coercion, fills, format standardization and outlier clipping chunk by
+    chunk, appending each to the output.
+
+    Memory is bounded by DATASET_CHUNK_ROWS and DATASET_HASH_PARTITION_ROWS,
+    whatever the dataset size. Statistics include rows that turn out to be
+    duplicates.
+    """
+
+    def clean(self, dataset_id: str, options: Dict[str, bool], output: ArtifactWriter) -> Dict[str, Any]:
+        """Clean a dataset into an artifact; returns the cleaning log and before/after shapes"""
+        info = dataset_store.info(dataset_id)
+        if info is None:
+            raise KeyError(dataset_id)
+        profile = data_profiler.get_profile(dataset_id)
+
+        work_dir = tempfile.mkdtemp(prefix='clean-', dir=output.work_dir)
+        try:
+            duplicates = None
+            if options.get('removeDuplicates', True) and profile['duplicate_rows']:
+                hashes = RowHashIndex(work_dir, info['rows'])
+                for chunk in dataset_store.iter_chunks(dataset_id):
+                    hashes.add(chunk)
+                duplicates = hashes.duplicate_bitmap()
+            plan = self._plan(profile, options)
+            log, rows_written = self._apply(dataset_id, plan, duplicates, output)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        return {
+            'cleaning_log': log,
+            'before_stats': {'rows': profile['rows'], 'columns': profile['columns']},
+            'after_stats': {'rows': rows_written, 'columns': profile['columns']},
+        }
+
+    def _plan(self, profile: Dict[str, Any], options: Dict[str, bool]) -> Dict[str, Any]:
+        """What to do to each column, decided from the dataset profile"""
+        plan = {'coerce': [], 'fill': {}, 'clip': {}, 'email': [], 'country': []}
+        text = []
+        for col, column in profile['column_profiles'].items():
+            numeric = column['kind'] == 'numeric'
+            if (not numeric and column['kind'] == 'text' and options.get('validateDataTypes', True)
+                    and column['numeric_ratio'] > NUMERIC_RATIO):
+                plan['coerce'].append(col)
+                numeric = True
+
+            if numeric:
+                if 'quantiles' not in column:
+                    continue
+                if options.get('handleMissingValues', True):
+                    plan['fill'][col] = ('median', column['quantiles']['median'])
+                lower, upper = column['iqr_bounds']
+                if options.get('detectOutliers', True) and upper > lower:
+                    plan['clip'][col] = (lower, upper)
+                continue
+
+            if column['kind'] == 'text':
+                text.append(col)
+            if options.get('handleMissingValues', True) and column['mode'] is not None:
+                plan['fill'][col] = ('mode', column['mode'])
+
+        if options.get('standardizeFormats', True):
+            plan['email'] = [col for col in text if 'email' in str(col).lower()]
+            plan['country'] = [col for col in text if 'country' in str(col).lower()]
+        return plan
+
+    def _apply(self, dataset_id: str, plan: Dict[str, Any], duplicates: Optional[np.ndarray], output: ArtifactWriter):
+        """Second pass: apply the plan chunk by chunk, appending to the output"""
+        removed, invalid, filled, capped = 0, {}, {}, {}
+        offset, rows_written = 0, 0
+        for chunk in dataset_store.iter_chunks(dataset_id):
+            rows = len(chunk)
+            if duplicates is not None and rows:
+                keep = ~np.asarray(duplicates[offset:offset + rows])
+                removed += rows - int(keep.sum())
+                chunk = chunk[keep]
+            offset += rows
+            chunk = chunk.copy()
+
+            for col in plan['coerce']:
+                numbers = pd.to_numeric(chunk[col], errors='coerce')
+                invalid[col] = invalid.get(col, 0) + int(chunk[col].notna().sum() - numbers.notna().sum())
+                chunk[col] = numbers
+            for col, (_, value) in plan['fill'].items():
+                missing = int(chunk[col].isna().sum())
+                if missing:
+                    chunk[col] = chunk[col].fillna(value)
+                    filled[col] = filled.get(col, 0) + missing
+            for col in plan['email']:
+                if _is_text(chunk[col]):
+                    chunk[col] = chunk[col].str.lower().str.strip()
+            for col in plan['country']:
+                if _is_text(chunk[col]):
+                    chunk[col] = chunk[col].str.title().str.strip()
+            for col, (lower, upper) in plan['clip'].items():
+                values = chunk[col]
+                outside = int(((values < lower) | (values > upper)).sum())
+                if outside:
+                    chunk[col] = values.clip(lower=lower, upper=upper)
+                    capped[col] = capped.get(col, 0) + outside
+
+            output.write(chunk)
+            rows_written += len(chunk)
+
+        log = []
+        if removed:
+            log.append(f'Removed {removed} duplicate rows')
+        for col, (method, _) in plan['fill'].items():
+            if filled.get(col):
+                log.append(f'Filled {filled[col]} missing values in "{col}" with {method}')
+        for col in plan['coerce']:
+            if invalid.get(col):
+                log.append(f'Converted {invalid[col]} invalid values to NaN in "{col}"')
+        for col in plan['email']:
+            log.append(f'Standardized email format in "{col}"')
+        for col in plan['country']:
+            log.append(f'Standardized country format in "{col}"')
+        for col in plan['clip']:
+            if capped.get(col):
+                log.append(f'Capped {capped[col]} outliers in "{col}"')
+        return log, rows_written
+
+
+# Global chunked cleaner instance
+chunked_cleaner = ChunkedCleaner()
@@ -0,0 +1,737 @@
+import os
+import ast
+import sys
+import json
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import Config
+from worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+SKIPPED_DIRS = {'__pycache__', '.git', 'node_modules', 'venv', '.venv', 'env', 'build', 'dist'}
+
+CHECKED_KINDS = {'.py': 'python', '.js': 'js', '.jsx': 'js', '.mjs': 'js', '.cjs': 'js', '.json': 'json'}
+
+JS_ASSET_EXTENSIONS = ('.css', '.scss', '.svg', '.png', '.jpg', '.jpeg', '.gif')
+JS_RESOLVE_SUFFIXES = ['', '.js', '.jsx', '.ts', '.tsx', '.json', '/index.js', '/index.jsx', '/index.ts', '/index.tsx']
+
+# Import names whose distribution on PyPI is called something else
+DISTRIBUTION_NAMES = {
+    'sklearn': 'scikit-learn', 'cv2': 'opencv-python', 'PIL': 'pillow', 'yaml': 'pyyaml',
+    'bs4': 'beautifulsoup4', 'dotenv': 'python-dotenv', 'dateutil': 'python-dateutil',
+    'jwt': 'pyjwt', 'docx': 'python-docx', 'magic': 'python-magic', 'serial': 'pyserial',
+    'Crypto': 'pycryptodome', 'OpenSSL': 'pyopenssl', 'attr': 'attrs', 'skimage': 'scikit-image',
+}
+
+# After these tokens a '/' starts a regex and a '<' may start JSX, rather than being an operator
+JS_EXPRESSION_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw',
+                          'case', 'do', 'else', 'yield', 'await', 'export', 'default'}
+
+CLOSING = {')': '(', ']': '[', '}': '{'}
+
+
+def _diagnostic(code: str, message: str, line: int = None, column: int = None,
+                severity: str = 'error') -> Dict[str, Any]:
+    return {'code': code, 'severity': severity, 'message': message, 'line': line, 'column': column}
+
+
+# --- Per-file checks; these run in the worker processes and only see one file's source ---
+
+def check_python(source: str) -> Dict[str, Any]:
+    """Syntax errors, imports and top-level names of a Python module"""
+    try:
+        tree = ast.parse(source)
+        # Code generation catches errors the parser accepts, e.g. 'return' outside a function
+        compile(tree, '<generated>', 'exec', dont_inherit=True)
+    except SyntaxError as e:
+        return {'diagnostics': [_diagnostic('syntax-error', e.msg, e.lineno, e.offset)],
+                'imports': [], 'names': [], 'open_namespace': True}
+    except (ValueError, RecursionError) as e:
+        return {'diagnostics': [_diagnostic('syntax-error', str(e))],
+                'imports': [], 'names': [], 'open_namespace': True}
+
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend({'module': alias.name, 'names': [], 'level': 0, 'line': node.lineno}
+                           for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append({'module': node.module or '', 'names': [alias.name for alias in node.names],
+                            'level': node.level, 'line': node.lineno})
+
+    names, open_namespace = set(), False
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+            open_namespace |= node.name == '__getattr__'
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name == '*':
+                    open_namespace = True
+                names.add(alias.asname or alias.name.split('.')[0])
+        else:
+            # Assignments, including ones nested in top-level if/try/with/for blocks
+            for child in ast.walk(node):
+                if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+                    names.add(child.id)
+                elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    names.add(child.name)
+                elif isinstance(child, (ast.Import, ast.ImportFrom)):
+                    names.update(alias.asname or alias.name.split('.')[0] for alias in child.names)
+    return {'diagnostics': [], 'imports': imports, 'names': sorted(names), 'open_namespace': open_namespace}
+
+
+class _JsScanner:
+    """Tokenizer-level syntax check of JavaScript/JSX.
+
+    Tracks strings, template literals, comments, regex literals, brackets and
+    JSX elements well enough to report unterminated literals, unbalanced
+    brackets and mismatched JSX tags at the right line. It is not a parser:
+    the first structural error is reported and scanning stops.
+    """
+
+    def __init__(self, source: str):
+        self.src = source
+        self.i = 0
+        self.line = 1
+        self.line_start = 0
+        self.stack = []
+        self.prev = None
+        self.tokens = []
+        self.has_jsx = False
+        self.error = None
+
+    def fail(self, code: str, message: str, line: int = None, column: int = None):
+        if self.error is None:
+            self.error = _diagnostic(code, message, line or self.line,
+                                     column if column is not None else self.i - self.line_start + 1)
+
+    def column(self, index: int = None) -> int:
+        return (self.i if index is None else index) - self.line_start + 1
+
+    def advance(self, count: int = 1):
+        for _ in range(count):
+            if self.i < len(self.src) and self.src[self.i] == '\n':
+                self.line += 1
+                self.line_start = self.i + 1
+            self.i += 1
+
+    def mode(self) -> str:
+        if not self.stack:
+            return 'code'
+        kind = self.stack[-1][0]
+        return {'template': 'template', 'jsx_tag': 'jsx_tag', 'jsx_children': 'jsx_children'}.get(kind, 'code')
+
+    def expects_operand(self) -> bool:
+        prev = self.prev
+        if prev is None:
+            return True
+        kind, value = prev
+        if kind == 'word':
+            return value in JS_EXPRESSION_KEYWORDS
+        return kind == 'punct' and value not in (')', ']', '}')
+
+    def scan(self) -> Dict[str, Any]:
+        handlers = {'code': self.scan_code, 'template': self.scan_template,
+                    'jsx_tag': self.scan_jsx_tag, 'jsx_children': self.scan_jsx_children}
+        while self.error is None and self.i < len(self.src):
+            handlers[self.mode()]()
+        if self.error is None and self.stack:
+            frame = self.stack[-1]
+            what = {'template': 'template literal', 'jsx_tag': f"JSX tag <{frame[1]}>",
+                    'jsx_children': f"JSX element <{frame[1]}>", 'template_expr': "'${'",
+                    'jsx_expr': "'{'"}.get(frame[0], f"'{frame[1]}'")
+            self.fail('unclosed', f"{what} opened at line {frame[2]} is never closed", frame[2], frame[3])
+        return {'diagnostics': [self.error] if self.error else [], 'imports': self.imports(), 'has_jsx': self.has_jsx}
+
+    def scan_code(self):
+        src, i = self.src, self.i
+        ch = src[i]
+        nxt = src[i + 1] if i + 1 < len(src) else ''
+        if ch.isspace():
+            self.advance()
+        elif ch == '/' and nxt == '/':
+            end = src.find('\n', i)
+            self.i = len(src) if end == -1 else end
+        elif ch == '/' and nxt == '*':
+            end = src.find('*/', i + 2)
+            if end == -1:
+                self.fail('unterminated-comment', "unterminated /* comment")
+                return
+            self.advance(end + 2 - i)
+        elif ch in '\'"':
+            self.scan_string(ch)
+        elif ch == '`':
+            self.stack.append(('template', '`', self.line, self.column()))
+            self.advance()
+        elif ch.isalpha() or ch in '_$':
+            end = i
+            while end < len(src) and (src[end].isalnum() or src[end] in '_$'):
+                end += 1
+            word = src[i:end]
+            self.tokens.append(('word', word, self.line))
+            self.prev = ('word', word)
+            self.i = end
+        elif ch.isdigit() or (ch == '.' and nxt.isdigit()):
+            end = i
+            while end < len(src) and (src[end].isalnum() or src[end] in '._' or
+                                      (src[end] in '+-' and src[end - 1] in 'eE' and not src[i:end].startswith('0x'))):
+                end += 1
+            self.prev = ('number', src[i:end])
+            self.i = end
+        elif ch == '/' and self.expects_operand():
+            self.scan_regex()
+        elif ch == '<' and self.expects_operand() and (nxt.isalpha() or nxt == '>'):
+            self.has_jsx = True
+            self.open_jsx_tag()
+        elif ch in '+-' and nxt == ch:
+            # One token: after an operand it is postfix and ends the operand (a++ / 2 divides)
+            prev = self.prev
+            postfix = prev is not None and ((prev[0] == 'word' and prev[1] not in JS_EXPRESSION_KEYWORDS) or
+                                            prev == ('punct', ')') or prev == ('punct', ']'))
+            self.tokens.append(('punct', ch * 2, self.line))
+            self.prev = ('postfix', ch * 2) if postfix else ('punct', ch * 2)
+            self.advance(2)
+        elif ch in '([{':
+            self.stack.append(('bracket', ch, self.line, self.column()))
+            self.tokens.append(('punct', ch, self.line))
+            self.prev = ('punct', ch)
+            self.advance()
+        elif ch in ')]}':
+            self.close_bracket(ch)
+        else:
+            self.tokens.append(('punct', ch, self.line))
+            self.prev = ('punct', ch)
+            self.advance()
+
+    def close_bracket(self, ch: str):
+        if not self.stack:
+            self.fail('unbalanced-bracket', f"unexpected '{ch}' with nothing open")
+            return
+        frame = self.stack[-1]
+        if ch == '}' and frame[0] in ('template_expr', 'jsx_expr'):
+            self.stack.pop()
+            self.advance()
+            if frame[0] == 'jsx_expr':
+                self.prev = None
+            return
+        if frame[0] != 'bracket' or frame[1] != CLOSING[ch]:
+            opened = frame[1] if frame[0] == 'bracket' else ('${' if frame[0] == 'template_expr' else '{')
+            self.fail('unbalanced-bracket', f"unexpected '{ch}'; '{opened}' opened at line {frame[2]} is still open")
+            return
+        self.stack.pop()
+        self.tokens.append(('punct', ch, self.line))
+        self.prev = ('punct', ch)
+        self.advance()
+
+    def scan_string(self, quote: str):
+        start_line, start_col = self.line, self.column()
+        i = self.i + 1
+        src = self.src
+        while i < len(src):
+            c = src[i]
+            if c == '\\':
+                i += 2
+                continue
+            if c == quote:
+                break
+            if c == '\n':
+                self.fail('unterminated-string', "unterminated string literal", start_line, start_col)
+                return
+            i += 1
+        else:
+            self.fail('unterminated-string', "unterminated string literal", start_line, start_col)
+            return
+        value = src[self.i + 1:i]
+        self.tokens.append(('string', value, start_line))
+        self.prev = ('string', value)
+        self.i = i + 1
+
+    def scan_template(self):
+        src = self.src
+        while self.i < len(src):
+            c = src[self.i]
+            if c == '\\':
+                self.advance(2)
+            elif c == '`':
+                self.stack.pop()
+                self.advance()
+                self.prev = ('string', '`')
+                return
+            elif c == '$' and src[self.i + 1:self.i + 2] == '{':
+                self.stack.append(('template_expr', '${', self.line, self.column()))
+                self.advance(2)
+                self.prev = None
+                return
+            else:
+                self.advance()
+
+    def scan_regex(self):
+        start_line, start_col = self.line, self.column()
+        src, i, in_class = self.src, self.i + 1, False
+        while i < len(src):
+            c = src[i]
+            if c == '\\':
+                i += 2
+                continue
+            if c == '\n':
+                break
+            if c == '[':
+                in_class = True
+            elif c == ']':
+                in_class = False
+            elif c == '/' and not in_class:
+                i += 1
+                while i < len(src) and src[i].isalpha():
+                    i += 1
+                self.prev = ('regex', src[self.i:i])
+                self.i = i
+                return
+            i += 1
+        self.fail('unterminated-regex', "unterminated regular expression literal", start_line, start_col)
+
+    def read_tag_name(self) -> str:
+        src, i = self.src, self.i
+        while i < len(src) and src[i] in ' \t':
+            i += 1
+        end = i
+        while end < len(src) and (src[end].isalnum() or src[end] in '_$.:-'):
+            end += 1
+        self.advance(end - self.i)
+        return src[i:end]
+
+    def open_jsx_tag(self):
+        line, col = self.line, self.column()
+        self.advance()  # '<'
+        name = self.read_tag_name()
+        self.stack.append(('jsx_tag', name, line, col))
+
+    def scan_jsx_tag(self):
+        src = self.src
+        ch = src[self.i]
+        nxt = src[self.i + 1:self.i + 2]
+        if ch.isspace():
+            self.advance()
+        elif ch == '/' and nxt == '/':
+            end = src.find('\n', self.i)
+            self.i = len(src) if end == -1 else end
+        elif ch == '/' and nxt == '*':
+            end = src.find('*/', self.i + 2)
+            if end == -1:
+                self.fail('unterminated-comment', "unterminated /* comment")
+                return
+            self.advance(end + 2 - self.i)
+        elif ch == '/' and nxt == '>':
+            self.stack.pop()
+            self.advance(2)
+            self.end_jsx_element()
+        elif ch == '>':
+            _, name, line, col = self.stack.pop()
+            self.stack.append(('jsx_children', name, line, col))
+            self.advance()
+        elif ch == '{':
+            self.stack.append(('jsx_expr', '{', self.line, self.column()))
+            self.advance()
+            self.prev = None
+        elif ch in '\'"':
+            end = src.find(ch, self.i + 1)
+            if end == -1:
+                self.fail('unterminated-string', "unterminated JSX attribute value")
+                return
+            self.advance(end + 1 - self.i)
+        elif ch.isalnum() or ch in '_$-:.=':
+            self.advance()
+        else:
+            self.fail('jsx-syntax', f"unexpected '{ch}' in JSX tag <{self.stack[-1][1]}>")
+
+    def scan_jsx_children(self):
+        src = self.src
+        ch = src[self.i]
+        if ch == '{':
+            self.stack.append(('jsx_expr', '{', self.line, self.column()))
+            self.advance()
+            self.prev = None
+        elif ch == '<':
+            rest = src[self.i + 1:self.i + 64].lstrip()
+            if rest.startswith('/'):
+                line, col = self.line, self.column()
+                self.advance(src.index('/', self.i) + 1 - self.i)
+                name = self.read_tag_name()
+                while self.i < len(src) and src[self.i] in ' \t\n':
+                    self.advance()
+                if src[self.i:self.i + 1] != '>':
+                    self.fail('jsx-syntax', f"malformed closing tag </{name}", line, col)
+                    return
+                self.advance()
+                _, open_name, open_line, _ = self.stack[-1]
+                if name != open_name:
+                    self.fail('jsx-mismatch', f"closing tag </{name}> does not match <{open_name}> "
+                                              f"opened at line {open_line}", line, col)
+                    return
+                self.stack.pop()
+                self.end_jsx_element()
+            elif rest[:1].isalpha() or rest[:1] == '>':
+                self.open_jsx_tag()
+            else:
+                self.fail('jsx-syntax', "'<' in JSX text has to be written as {'<'}")
+        else:
+            self.advance()
+
+    def end_jsx_element(self):
+        # A finished element is a value in code, or just more content inside a parent element
+        self.prev = ('punct', ')')
+
+    def imports(self) -> List[Dict[str, Any]]:
+        """Module specifiers of import/export-from statements, require() and import() calls"""
+        found = []
+        tokens = self.tokens
+        statement_keyword = None
+        for index, (kind, value, line) in enumerate(tokens):
+            following = tokens[index + 1] if index + 1 < len(tokens) else (None, None, None)
+            if kind == 'punct' and value == ';':
+                statement_keyword = None
+            elif kind == 'word' and value in ('import', 'export'):
+                statement_keyword = value
+                if value == 'import' and following[0] == 'string':
+                    found.append({'module': following[1], 'line': line})
+            elif kind == 'word' and value == 'from' and statement_keyword and following[0] == 'string':
+                found.append({'module': following[1], 'line': line})
+                statement_keyword = None
+            elif kind == 'word' and value in ('require', 'import') and following[1] == '(':
+                argument = tokens[index + 2] if index + 2 < len(tokens) else (None, None, None)
+                closing = tokens[index + 3] if index + 3 < len(tokens) else (None, None, None)
+                if argument[0] == 'string' and closing[1] == ')':
+                    found.append({'module': argument[1], 'line': line})
+        return found
+
+
+def check_js(source: str) -> Dict[str, Any]:
+    return _JsScanner(source).scan()
+
+
+def check_json(source: str) -> Dict[str, Any]:
+    try:
+        json.loads(source)
+    except ValueError as e:
+        return {'diagnostics': [_diagnostic('syntax-error', e.msg, e.lineno, e.colno)]}
+    return {'diagnostics': []}
+
+
+CHECKS = {'python': check_python, 'js': check_js, 'json': check_json}
+
+
+def check_source(kind: str, source: str) -> Dict[str, Any]:
+    """Check one file's source; the result depends only on kind and source, so it is cacheable"""
+    try:
+        return CHECKS[kind](source)
+    except Exception as e:
+        return {'diagnostics': [_diagnostic('checker-error', f"checker failed: {e}", severity='warning')]}
+
+
+def format_diagnostics(diagnostics: List[Dict[str, Any]], limit: int = 50) -> str:
+    """Diagnostics as compiler-style lines, for logs and fix prompts"""
+    lines = []
+    for diag in diagnostics[:limit]:
+        location = diag['file']
+        if diag.get('line'):
+            location += f":{diag['line']}"
+            if diag.get('column'):
+                location += f":{diag['column']}"
+        lines.append(f"{location}: {diag['severity']} [{diag['code']}] {diag['message']}")
+    if len(diagnostics) > limit:
+        lines.append(f"... and {len(diagnostics) - limit} more")
+    return '\n'.join(lines)
+
+
+def _normalize_path(path: str) -> str:
+    path = path.replace('\\', '/')
+    return path[2:] if path.startswith('./') else path
+
+
+def _normalize_distribution(name: str) -> str:
+    return name.lower().replace('_', '-').replace('.', '-')
+
+
+class CodeChecker:
+    """Syntax, lint and import-resolution checks over a generated project.
+
+    Each file is checked on its own (in a process pool once enough files
+    changed) and the result is cached by content hash, so re-checking a
+    project after the fix loop rewrote a few files only re-parses those.
+    Import resolution needs the whole file set and runs afterwards in the
+    calling process from the cached per-file import lists.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or Config.CODE_CHECK_CACHE_ENTRIES
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._pool = WorkerPool('Code check', Config.CODE_CHECK_WORKERS, preload=['code_checker'])
+        self.stats = {'checked': 0, 'cache_hits': 0, 'parallel_batches': 0}
+
+    def _check_sources(self, pending: Dict[Tuple[str, str], str]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Run check_source for every uncached (kind, digest) -> source"""
+        keys = list(pending)
+        if len(keys) >= Config.CODE_CHECK_PARALLEL_MIN_FILES:
+            results, parallel = self._pool.map(check_source, [k[0] for k in keys], [pending[k] for k in keys],
+                                               chunksize=max(1, len(keys) // (Config.CODE_CHECK_WORKERS * 4)))
+            if parallel:
+                with self._lock:
+                    self.stats['parallel_batches'] += 1
+            return dict(zip(keys, results))
+        return {key: check_source(key[0], pending[key]) for key in keys}
+
+    def check_files(self, files: Dict[str, Optional[str]], requirements: Optional[List[str]] = None,
+                    digests: Optional[Dict[str, str]] = None, loader=None) -> Dict[str, Any]:
+        """Check an in-memory file set ({relative path: source}).
+
+        A source may be None when its content hash is given in digests; it
+        is then only read (through loader(path)) if that hash isn't cached.
+        Returns structured diagnostics, each with file, line, column,
+        severity ('error' or 'warning'), code and message.
+        """
+        started = time.time()
+        files = {_normalize_path(path): source for path, source in files.items()}
+        digests = {_normalize_path(path): digest for path, digest in (digests or {}).items()}
+        keyed, pending, unread = {}, {}, {}
+        with self._lock:
+            for path, source in files.items():
+                kind = CHECKED_KINDS.get(os.path.splitext(path)[1].lower())
+                if kind is None:
+                    continue
+                digest = digests.get(path) if source is None else None
+                if source is None and digest is None:
+                    continue
+                key = (kind, digest or hashlib.sha256(source.encode('utf-8', errors='replace')).hexdigest())
+                keyed[path] = key
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    self.stats['cache_hits'] += 1
+                elif source is None:
+                    unread[key] = path
+                else:
+                    pending[key] = source
+        for key, path in unread.items():
+            try:
+                pending[key] = loader(path)
+            except (OSError, TypeError) as e:
+                logger.warning(f"Could not read {path} for checking: {e}")
+                del keyed[path]
+
+        results = self._check_sources(pending) if pending else {}
+        with self._lock:
+            self.stats['checked'] += len(pending)
+            for key, result in results.items():
+                self._cache[key] = result
+                if len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+            per_file = {path: results.get(key) or self._cache.get(key) for path, key in keyed.items()}
+
+        diagnostics = []
+        for path, result in sorted(per_file.items()):
+            if result is None:
+                continue
+            diagnostics.extend(dict(diag, file=path) for diag in result['diagnostics'])
+
+        if requirements is None and files.get('requirements.txt') is not None:
+            requirements = files['requirements.txt'].splitlines()
+        diagnostics.extend(self._resolve_python_imports(files, per_file, requirements))
+        diagnostics.extend(self._resolve_js_imports(files, per_file))
+
+        errors = sum(1 for diag in diagnostics if diag['severity'] == 'error')
+        return {
+            'status': 'passed' if not errors else 'failed',
+            'diagnostics': diagnostics,
+            'errors': errors,
+            'warnings': len(diagnostics) - errors,
+            'files_checked': len(keyed),
+            'files_parsed': len(pending),
+            'duration': round(time.time() - started, 3),
+        }
+
+    def check_project(self, project_dir: str, manifest: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Check every source file under project_dir.
+
+        With the project's blob store manifest the tree isn't walked, and
+        files whose hash is already cached are not even read.
+        """
+        def read(rel_path: str) -> str:
+            with open(os.path.join(project_dir, rel_path), 'r', encoding='utf-8', errors='replace') as f:
+                return f.read()
+
+        if manifest:
+            files, digests = {}, {}
+            for rel_path, entry in manifest.items():
+                name = os.path.basename(rel_path)
+                if name in ('requirements.txt', 'package.json'):
+                    # Needed for import resolution, not just for their own check
+                    try:
+                        files[rel_path] = read(rel_path)
+                    except OSError as e:
+                        logger.warning(f"Could not read {rel_path} for checking: {e}")
+                elif os.path.splitext(name)[1].lower() in CHECKED_KINDS:
+                    files[rel_path] = None
+                    digests[rel_path] = entry['hash']
+                else:
+                    files[rel_path] = ''
+            return self.check_files(files, digests=digests, loader=read)
+
+        files = {}
+        for root, dirs, names in os.walk(project_dir):
+            dirs[:] = [d for d in dirs if d not in SKIPPED_DIRS]
+            for name in names:
+                path = os.path.join(root, name)
+                rel_path = os.path.relpath(path, project_dir).replace(os.sep, '/')
+                if os.path.splitext(name)[1].lower() not in CHECKED_KINDS and name != 'requirements.txt':
+                    # Listed so imports of assets resolve; never read
+                    files[rel_path] = ''
+                    continue
+                try:
+                    files[rel_path] = read(rel_path)
+                except OSError as e:
+                    logger.warning(f"Could not read {path} for checking: {e}")
+        return self.check_files(files)
+
+    def _resolve_python_imports(self, files: Dict[str, str], per_file: Dict[str, Dict[str, Any]],
+                                requirements: Optional[List[str]]) -> List[Dict[str, Any]]:
+        modules = {}
+        packages = set()
+        for path in files:
+            if not path.endswith('.py'):
+                continue
+            parts = path[:-3].split('/')
+            if parts[-1] == '__init__':
+                parts = parts[:-1]
+            modules['.'.join(parts)] = path
+            for depth in range(1, len(path.split('/'))):
+                packages.add('.'.join(path.split('/')[:depth]))
+
+        def local(name: str) -> bool:
+            return name in modules or name in packages
+
+        required = None
+        if requirements is not None:
+            required = set()
+            for line in requirements:
+                line = line.split('#', 1)[0].strip()
+                if line and not line.startswith('-'):
+                    name = line.split(';', 1)[0]
+                    for separator in '<>=!~[ @':
+                        name = name.split(separator, 1)[0]
+                    required.add(_normalize_distribution(name))
+
+        diagnostics = []
+        for path, result in per_file.items():
+            if not path.endswith('.py') or result is None:
+                continue
+            directory = path.rsplit('/', 1)[0] if '/' in path else ''
+            package = path[:-3].split('/')[:-1]
+            for item in result.get('imports', []):
+                module, level = item['module'], item['level']
+                if level:
+                    if level - 1 > len(package):
+                        diagnostics.append(dict(_diagnostic('unresolved-import', "relative import beyond top-level package",
+                                                            item['line']), file=path))
+                        continue
+                    base = package[:len(package) - (level - 1)]
+                    if not module:
+                        # from . import name: each name is a sibling module or defined in the package
+                        prefix = '.'.join(base)
+                        init = per_file.get(modules.get(prefix, '')) or {}
+                        for name in item['names']:
+                            qualified = f"{prefix}.{name}" if prefix else name
+                            if not local(qualified) and name not in init.get('names', []):
+                                diagnostics.append(dict(_diagnostic('unresolved-import', f"cannot resolve '{'.' * level}{name}' "
+                                                                                         f"in the project", item['line']), file=path))
+                        continue
+                    candidates = ['.'.join(base + [module])]
+                else:
+                    # A script's own directory comes first on sys.path, then the project root
+                    candidates = ([f"{directory.replace('/', '.')}.{module}"] if directory else []) + [module]
+                target = next((c for c in candidates if local(c)), None)
+
+                if target is None:
+                    top = module.split('.')[0]
+                    if level or any(local(c[:len(c) - len(module)] + top) for c in candidates):
+                        diagnostics.append(dict(_diagnostic('unresolved-import', f"cannot resolve module '{'.' * level}{module}' "
+                                                                                 f"in the project", item['line']), file=path))
+                    elif required is not None and top not in sys.stdlib_module_names and top != '__future__':
+                        wanted = {_normalize_distribution(top), _normalize_distribution(DISTRIBUTION_NAMES.get(top, top))}
+                        if not any(req in wanted or any(req.startswith(w + '-') for w in wanted) for req in required):
+                            diagnostics.append(dict(_diagnostic('missing-requirement',
+                                                                f"'{top}' is imported but not listed in requirements.txt",
+                                                                item['line'], severity='warning'), file=path))
+                    continue
+
+                # from local_module import name: the name has to exist there (or be a submodule)
+                target_result = per_file.get(modules.get(target, ''))
+                if not item['names'] or target_result is None or target_result.get('open_namespace'):
+                    continue
+                defined = set(target_result.get('names', []))
+                for name in item['names']:
+                    if name != '*' and name not in defined and not local(f"{target}.{name}"):
+                        diagnostics.append(dict(_diagnostic('missing-name', f"cannot import name '{name}' from '{target}' "
+                                                                            f"({modules[target]})", item['line']), file=path))
+        return diagnostics
+
+    def _resolve_js_imports(self, files: Dict[str, str], per_file: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        paths = set(files)
+        manifests = {}
+        for path in files:
+            if path.endswith('package.json') and os.path.basename(path) == 'package.json':
+                try:
+                    manifest = json.loads(files[path])
+                    deps = set()
+                    for field in ('dependencies', 'devDependencies', 'peerDependencies'):
+                        deps.update((manifest.get(field) or {}).keys())
+                    manifests[os.path.dirname(path)] = deps
+                except (ValueError, AttributeError, TypeError):
+                    continue
+
+        diagnostics = []
+        for path, result in per_file.items():
+            if result is None or 'has_jsx' not in result:
+                continue
+            directory = os.path.dirname(path)
+            for item in result.get('imports', []):
+                spec = item['module']
+                if spec.startswith('.'):
+                    target = os.path.normpath(os.path.join(directory, spec)).replace(os.sep, '/')
+                    if os.path.splitext(spec)[1] in JS_ASSET_EXTENSIONS:
+                        resolved = target in paths
+                    else:
+                        resolved = any(target + suffix in paths for suffix in JS_RESOLVE_SUFFIXES)
+                    if not resolved:
+                        diagnostics.append(dict(_diagnostic('unresolved-import', f"cannot resolve '{spec}' in the project",
+                                                            item['line']), file=path))
+                    continue
+                if spec.startswith(('/', 'http:', 'https:', 'node:')):
+                    continue
+                # Nearest package.json up the tree decides which packages are available
+                manifest_dir, deps = directory, None
+                while True:
+                    if manifest_dir in manifests:
+                        deps = manifests[manifest_dir]
+                        break
+                    if not manifest_dir:
+                        break
+                    manifest_dir = os.path.dirname(manifest_dir)
+                package = '/'.join(spec.split('/')[:2]) if spec.startswith('@') else spec.split('/')[0]
+                if deps is not None and package not in deps:
+                    diagnostics.append(dict(_diagnostic('missing-dependency', f"'{package}' is imported but not in package.json",
+                                                        item['line'], severity='warning'), file=path))
+        return diagnostics
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, cached_files=len(self._cache))
+
+
+# Global code checker instance
+code_checker = CodeChecker()
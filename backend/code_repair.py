@@ -0,0 +1,215 @@
+import os
+import re
+import ast
+import logging
+from typing import Dict, Any, List, Tuple
+
+from config import Config
+from code_checker import code_checker, SKIPPED_DIRS
+
+logger = logging.getLogger(__name__)
+
+SOURCE_EXTENSIONS = ('.py', '.js', '.jsx', '.json', '.txt', '.html', '.css', '.md', '.toml', '.cfg', '.ini')
+
+FRAME_PATTERN = re.compile(r'File "([^"]+)", line (\d+)')
+PATH_PATTERN = re.compile(r'[(\'"]([^()\'"\s]+\.py)[)\'"]')
+QUOTED_NAME_PATTERN = re.compile(r"'([A-Za-z_][\w.]*)'")
+LINE_PREFIX_PATTERN = re.compile(r'^\s*\d+\| ?', re.MULTILINE)
+
+
+def read_sources(project_dir: str) -> Dict[str, str]:
+    """Text sources of a project by relative path"""
+    files = {}
+    for root, dirs, names in os.walk(project_dir):
+        dirs[:] = [d for d in dirs if d not in SKIPPED_DIRS]
+        for name in names:
+            if name.endswith(SOURCE_EXTENSIONS):
+                path = os.path.join(root, name)
+                try:
+                    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                        files[os.path.relpath(path, project_dir).replace(os.sep, '/')] = f.read()
+                except OSError as e:
+                    logger.warning(f"Could not read {path}: {e}")
+    return files
+
+
+def locate_failures(project_dir: str, files: Dict[str, str], error_traceback: str,
+                    diagnostics: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+    """Project files (and lines in them) that a traceback and checker diagnostics point at"""
+    targets = {}
+    project_root = os.path.realpath(project_dir)
+
+    def add(path: str, line: int = None):
+        if not os.path.isabs(path):
+            path = os.path.join(project_root, path)
+        relative = os.path.relpath(os.path.realpath(path), project_root).replace(os.sep, '/')
+        if relative in files:
+            lines = targets.setdefault(relative, [])
+            if line and line not in lines:
+                lines.append(line)
+
+    for diagnostic in diagnostics:
+        if diagnostic['severity'] == 'error':
+            add(diagnostic['file'], diagnostic.get('line'))
+
+    if error_traceback:
+        # Frames in the project itself; library frames are context the model doesn't need
+        for path, line in FRAME_PATTERN.findall(error_traceback):
+            add(path, int(line))
+        last_line = error_traceback.strip().splitlines()[-1] if error_traceback.strip() else ''
+        for path in PATH_PATTERN.findall(last_line):
+            add(path)
+        # Local modules named in the error, e.g. "cannot import name 'x' from 'utils'"
+        modules = {path[:-3].replace('/', '.'): path for path in files if path.endswith('.py')}
+        for name in QUOTED_NAME_PATTERN.findall(last_line):
+            if name in modules:
+                add(modules[name])
+
+    for lines in targets.values():
+        lines.sort()
+    return targets
+
+
+def _numbered(lines: List[str], start: int, end: int) -> str:
+    return '\n'.join(f"{number:>5}| {lines[number - 1]}" for number in range(start, end + 1))
+
+
+def _outline(source: str) -> str:
+    """Signatures of a module's top-level functions and classes"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return ''
+    outline = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            outline.append(f"def {node.name}({ast.unparse(node.args)})")
+        elif isinstance(node, ast.ClassDef):
+            bases = ', '.join(ast.unparse(base) for base in node.bases)
+            outline.append(f"class {node.name}({bases}):" if bases else f"class {node.name}:")
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    outline.append(f"    def {item.name}({ast.unparse(item.args)})")
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            outline.append(ast.unparse(node).split('\n')[0][:120])
+    return '\n'.join(outline)
+
+
+def _local_imports(source: str, files: Dict[str, str]) -> List[str]:
+    """Project modules a Python source imports from"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+    modules = {path[:-3].replace('/', '.'): path for path in files if path.endswith('.py')}
+    imported = []
+    for node in ast.walk(tree):
+        names = []
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        for name in names:
+            if name in modules and modules[name] not in imported:
+                imported.append(modules[name])
+    return imported
+
+
+def build_repair_context(files: Dict[str, str], targets: Dict[str, List[int]]) -> str:
+    """The failing files (whole if short, else windows around the failing lines) plus outlines of what they import"""
+    sections = []
+    for path, target_lines in targets.items():
+        lines = files[path].split('\n')
+        if len(lines) <= Config.REPAIR_FULL_FILE_LINES or not target_lines:
+            sections.append(f"=== {path} (complete) ===\n{_numbered(lines, 1, len(lines))}")
+            continue
+        windows = []
+        for line in target_lines:
+            start = max(1, line - Config.REPAIR_CONTEXT_LINES)
+            end = min(len(lines), line + Config.REPAIR_CONTEXT_LINES)
+            if windows and start <= windows[-1][1] + 1:
+                windows[-1][1] = max(windows[-1][1], end)
+            else:
+                windows.append([start, end])
+        excerpt = '\n  ...\n'.join(_numbered(lines, start, end) for start, end in windows)
+        sections.append(f"=== {path} (lines {', '.join(f'{s}-{e}' for s, e in windows)} of {len(lines)}) ===\n{excerpt}")
+
+    related = []
+    for path in targets:
+        if path.endswith('.py'):
+            related.extend(p for p in _local_imports(files[path], files) if p not in targets and p not in related)
+    for path in related:
+        outline = _outline(files[path])
+        if outline:
+            sections.append(f"=== {path} (outline only) ===\n{outline}")
+
+    context = '\n\n'.join(sections)
+    if len(context) > Config.REPAIR_MAX_CONTEXT_CHARS:
+        context = context[:Config.REPAIR_MAX_CONTEXT_CHARS] + "\n... (context truncated)"
+    return context
+
+
+def _safe_path(path: str) -> bool:
+    normalized = os.path.normpath(path.replace('\\', '/'))
+    return bool(path) and not os.path.isabs(path) and not normalized.startswith('..')
+
+
+def apply_edits(files: Dict[str, str], response: Dict[str, Any]) -> Tuple[Dict[str, str], List[str]]:
+    """Apply a repair response to in-memory files, all or nothing.
+
+    Returns (changed files by path, problems). Any edit that does not apply
+    cleanly, or any change that leaves a Python file with a syntax error it
+    didn't have before, rejects the whole patch so nothing partial reaches
+    the disk.
+    """
+    changed, problems = {}, []
+
+    for replacement in response.get('files') or []:
+        path = (replacement.get('path') or '').replace('\\', '/')
+        if not _safe_path(path) or not isinstance(replacement.get('content'), str):
+            problems.append(f"invalid file replacement for '{path}'")
+            continue
+        changed[path] = replacement['content']
+
+    for edit in response.get('edits') or []:
+        path = (edit.get('path') or '').replace('\\', '/')
+        search, replace = edit.get('search', ''), edit.get('replace', '')
+        if not _safe_path(path) or not isinstance(search, str) or not isinstance(replace, str):
+            problems.append(f"invalid edit for '{path}'")
+            continue
+        current = changed.get(path, files.get(path))
+        if current is None:
+            if search:
+                problems.append(f"{path}: file does not exist")
+            else:
+                changed[path] = replace
+            continue
+        if not search:
+            problems.append(f"{path}: edit has an empty search text")
+            continue
+        count = current.count(search)
+        if count == 0:
+            # Models sometimes copy the line-number gutter of the context
+            stripped = LINE_PREFIX_PATTERN.sub('', search)
+            if stripped != search and current.count(stripped) == 1:
+                search, replace, count = stripped, LINE_PREFIX_PATTERN.sub('', replace), 1
+        if count != 1:
+            problems.append(f"{path}: search text {'not found' if count == 0 else f'matches {count} places'}: "
+                            f"{search.strip().splitlines()[0][:80] if search.strip() else ''!r}")
+            continue
+        changed[path] = current.replace(search, replace, 1)
+
+    changed = {path: content for path, content in changed.items() if files.get(path) != content}
+    if problems:
+        return {}, problems
+
+    before = code_checker.check_files({path: files[path] for path in changed if path in files})
+    after = code_checker.check_files(changed)
+    broken_before = {d['file'] for d in before['diagnostics'] if d['code'] == 'syntax-error'}
+    for diagnostic in after['diagnostics']:
+        if diagnostic['code'] == 'syntax-error' and diagnostic['file'] not in broken_before:
+            problems.append(f"patch leaves {diagnostic['file']} with a syntax error at line {diagnostic['line']}: "
+                            f"{diagnostic['message']}")
+    if problems:
+        return {}, problems
+    return changed, []
@@ -3,6 +3,16 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def _parse_limits(value, defaults):
+    """Parse 'feature=limit,feature=limit' overrides on top of defaults"""
+    limits = dict(defaults)
+    for item in (value or '').split(','):
+        if '=' in item:
+            key, limit = item.split('=', 1)
+            if limit.strip().isdigit():
+                limits[key.strip()] = int(limit.strip())
+    return limits
+
 class Config:
     # Use AI Studio Gemini API Key (same as GOOGLE_API_KEY)
     GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY')
@@ -24,9 +34,150 @@ class Config:
     TEMP_DIR = os.path.join(os.path.dirname(__file__), 'temp')
     GENERATED_PPTS_DIR = os.path.join(os.path.dirname(__file__), 'generated_ppts')
     HTML_OUTPUTS_DIR = os.path.join(os.path.dirname(__file__), 'html_outputs')
+    CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache')
+    DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 
     # Retry settings for external APIs
     MAX_RETRIES = 3
     RETRY_DELAY = 10  # seconds
     RETRY_BACKOFF = 2
     MAX_RETRY_DELAY = 60 # seconds
+
+    # Shared LLM gateway settings
+    LLM_DEFAULT_MODEL = os.getenv('LLM_DEFAULT_MODEL', 'gemini-2.5-flash')
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))
+    LLM_DEFAULT_FEATURE_CONCURRENCY = int(os.getenv('LLM_DEFAULT_FEATURE_CONCURRENCY', '4'))
+    LLM_FEATURE_CONCURRENCY = _parse_limits(os.getenv('LLM_FEATURE_CONCURRENCY'), {
+        'code_generation': 6,
+        'multi_agent': 6,
+        'exam': 6,
+        'data_cleaning': 2,
+        'blog': 3,
+    })
+    LLM_REQUEST_TIMEOUT = float(os.getenv('LLM_REQUEST_TIMEOUT', '120'))  # seconds per call
+    LLM_QUEUE_TIMEOUT = float(os.getenv('LLM_QUEUE_TIMEOUT', '300'))  # max wait for a free slot
+
+    # Response cache for deterministic prompts (callers opt in per call)
+    LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', os.path.join(CACHE_DIR, 'llm_responses.sqlite3'))
+    LLM_CACHE_MAX_BYTES = int(os.getenv('LLM_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+    LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))  # seconds
+
+    # Generation job queue
+    JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', os.path.join(DATA_DIR, 'jobs.sqlite3'))
+    JOB_WORKERS = _parse_limits(os.getenv('JOB_WORKERS'), {
+        'simple': 4,
+        'multi_agent': 4,
+    })
+    JOB_QUEUE_MAX_PENDING = int(os.getenv('JOB_QUEUE_MAX_PENDING', '50'))  # per mode
+    JOB_DEFAULT_DURATION = 120  # seconds, used for Retry-After before any job has finished
+    JOB_POLL_INTERVAL = 2  # seconds an idle worker sleeps between queue checks
+    # Range clients may request with 'priority'; by default they can only lower their own
+    JOB_MIN_PRIORITY = int(os.getenv('JOB_MIN_PRIORITY', '-10'))
+    JOB_MAX_PRIORITY = int(os.getenv('JOB_MAX_PRIORITY', '0'))
+
+    # Project catalog behind /api/projects/history
+    PROJECT_CATALOG_PATH = os.getenv('PROJECT_CATALOG_PATH', os.path.join(DATA_DIR, 'projects.sqlite3'))
+    PROJECT_CATALOG_RECONCILE_INTERVAL = int(os.getenv('PROJECT_CATALOG_RECONCILE_INTERVAL', '60'))  # seconds
+    PROJECT_HISTORY_PAGE_SIZE = 100
+
+    # Content-addressed store that generated project files are hard-linked from
+    BLOB_STORE_DIR = os.getenv('BLOB_STORE_DIR', os.path.join(DATA_DIR, 'blobs'))
+    # Flush each batch of project writes to disk before it is renamed into place
+    PROJECT_WRITE_FSYNC = os.getenv('PROJECT_WRITE_FSYNC', 'true').lower() == 'true'
+
+    # Project zips built for download, cached by a fingerprint of the project tree
+    ARCHIVE_CACHE_DIR = os.getenv('ARCHIVE_CACHE_DIR', os.path.join(CACHE_DIR, 'archives'))
+    ARCHIVE_CACHE_MAX_BYTES = int(os.getenv('ARCHIVE_CACHE_MAX_BYTES', str(1024 * 1024 * 1024)))
+
+    # Shared virtualenvs for running generated projects, one per distinct dependency set
+    ENV_CACHE_DIR = os.getenv('ENV_CACHE_DIR', os.path.join(CACHE_DIR, 'envs'))
+    WHEELHOUSE_DIR = os.getenv('WHEELHOUSE_DIR', os.path.join(CACHE_DIR, 'wheels'))
+    ENV_CACHE_MAX_BYTES = int(os.getenv('ENV_CACHE_MAX_BYTES', str(5 * 1024 * 1024 * 1024)))
+    ENV_BUILD_TIMEOUT = int(os.getenv('ENV_BUILD_TIMEOUT', '600'))  # seconds, per pip step
+    # Stacks built in the background at startup: ';' between stacks, ',' between packages
+    ENV_PREWARM_STACKS = [
+        [package.strip() for package in stack.split(',') if package.strip()]
+        for stack in os.getenv('ENV_PREWARM_STACKS', 'streamlit,pandas,numpy;flask;fastapi,uvicorn[standard]').split(';')
+        if stack.strip()
+    ]
+
+    # Warm interpreters that validate generated projects (runtime_pool / runtime_zygote)
+    RUNTIME_POOL_SIZE = int(os.getenv('RUNTIME_POOL_SIZE', '2'))
+    RUNTIME_POOL_PRELOAD = [
+        name.strip() for name in os.getenv('RUNTIME_POOL_PRELOAD', 'numpy,pandas,matplotlib,requests').split(',')
+        if name.strip()
+    ]
+    RUNTIME_MEMORY_LIMIT_MB = int(os.getenv('RUNTIME_MEMORY_LIMIT_MB', '2048'))
+
+    # Ports leased to running projects; leases are persisted so a restart can reclaim them
+    PROJECT_PORT_RANGE = os.getenv('PROJECT_PORT_RANGE', '8000-8599')
+    PORT_LEASES_PATH = os.getenv('PORT_LEASES_PATH', os.path.join(DATA_DIR, 'port_leases.json'))
+
+    # Output of running projects kept in memory for /api/projects/<id>/logs
+    PROJECT_LOG_LINES = int(os.getenv('PROJECT_LOG_LINES', '5000'))  # per project
+    PROJECT_LOG_PAGE_SIZE = 500
+
+    # Quotas for executing generated projects (sandbox / sandbox_launcher); 0 disables a limit
+    SANDBOX_ENABLED = os.getenv('SANDBOX_ENABLED', 'true').lower() == 'true'
+    SANDBOX_CPU_SECONDS = int(os.getenv('SANDBOX_CPU_SECONDS', '1800'))  # CPU time per run
+    SANDBOX_MEMORY_MB = int(os.getenv('SANDBOX_MEMORY_MB', '1024'))  # RSS of the whole process group
+    SANDBOX_ADDRESS_SPACE_MB = int(os.getenv('SANDBOX_ADDRESS_SPACE_MB', '0'))  # RLIMIT_AS per process
+    SANDBOX_MAX_OPEN_FILES = int(os.getenv('SANDBOX_MAX_OPEN_FILES', '1024'))
+    SANDBOX_MAX_FILE_MB = int(os.getenv('SANDBOX_MAX_FILE_MB', '512'))  # largest file a run may write
+    SANDBOX_MAX_PROCESSES = int(os.getenv('SANDBOX_MAX_PROCESSES', '64'))
+    SANDBOX_WALL_CLOCK_SECONDS = int(os.getenv('SANDBOX_WALL_CLOCK_SECONDS', str(4 * 3600)))
+    SANDBOX_OUTPUT_MB = int(os.getenv('SANDBOX_OUTPUT_MB', '100'))  # stdout + stderr per run
+    SANDBOX_CPU_SHARE = float(os.getenv('SANDBOX_CPU_SHARE', '1.0'))  # CPUs per run, cgroup only
+    SANDBOX_CGROUP_ROOT = os.getenv('SANDBOX_CGROUP_ROOT', '')  # delegated cgroup v2 directory, optional
+    SANDBOX_MONITOR_INTERVAL = 1.0  # seconds
+
+    # AST analysis of generated projects, cached per file content and per project tree
+    ANALYSIS_CACHE_ENTRIES = int(os.getenv('ANALYSIS_CACHE_ENTRIES', '5000'))  # files
+    ANALYSIS_CACHE_PROJECTS = int(os.getenv('ANALYSIS_CACHE_PROJECTS', '200'))
+
+    # Syntax/import checks of generated code, fanned out over a process pool and cached by content hash
+    CODE_CHECK_WORKERS = int(os.getenv('CODE_CHECK_WORKERS', str(min(4, os.cpu_count() or 1))))
+    CODE_CHECK_PARALLEL_MIN_FILES = int(os.getenv('CODE_CHECK_PARALLEL_MIN_FILES', '8'))
+    CODE_CHECK_CACHE_ENTRIES = int(os.getenv('CODE_CHECK_CACHE_ENTRIES', '10000'))
+
+    # Runtime-fix loop: targeted edits to the failing files, re-tested after each patch
+    REPAIR_MAX_ITERATIONS = int(os.getenv('REPAIR_MAX_ITERATIONS', '3'))
+    REPAIR_FULL_FILE_LINES = int(os.getenv('REPAIR_FULL_FILE_LINES', '200'))  # longer files are sent as excerpts
+    REPAIR_CONTEXT_LINES = int(os.getenv('REPAIR_CONTEXT_LINES', '30'))
+    REPAIR_MAX_CONTEXT_CHARS = int(os.getenv('REPAIR_MAX_CONTEXT_CHARS', '30000'))
+
+    # Uploaded datasets for the data-cleaning endpoints, parsed once and reused by id
+    DATASET_DIR = os.getenv('DATASET_DIR', os.path.join(DATA_DIR, 'datasets'))
+    DATASET_MEMORY_MAX_BYTES = int(os.getenv('DATASET_MEMORY_MAX_BYTES', str(1024 * 1024 * 1024)))  # hot frames
+    DATASET_MAX_BYTES = int(os.getenv('DATASET_MAX_BYTES', str(10 * 1024 * 1024 * 1024)))  # on disk
+    DATASET_TTL = int(os.getenv('DATASET_TTL', str(24 * 3600)))  # seconds since last use
+    DATASET_CHUNK_ROWS = int(os.getenv('DATASET_CHUNK_ROWS', '100000'))  # Parquet row groups and processing chunks
+    DATASET_HASH_PARTITION_ROWS = int(os.getenv('DATASET_HASH_PARTITION_ROWS', '5000000'))  # row hashes per in-memory sort
+
+    # Single-pass dataset profiles shared by analysis, graphs and cleaning (data_profiler)
+    PROFILE_SKETCH_SIZE = int(os.getenv('PROFILE_SKETCH_SIZE', '100000'))  # sampled values per column for quantiles / IQR
+    PROFILE_HEAVY_HITTERS = int(os.getenv('PROFILE_HEAVY_HITTERS', '1000'))  # frequent values tracked per column
+    PROFILE_DISTINCT_SKETCH = int(os.getenv('PROFILE_DISTINCT_SKETCH', '4096'))  # hashes kept per column for distinct counts
+    PROFILE_SAMPLE_ROWS = int(os.getenv('PROFILE_SAMPLE_ROWS', '10000'))  # rows sampled for type and pattern checks
+    PROFILE_TOP_VALUES = 10
+    PROFILE_CACHE_ENTRIES = int(os.getenv('PROFILE_CACHE_ENTRIES', '64'))
+
+    # Cleaned datasets kept for download (artifact_store), as CSV, gzip-CSV or Parquet
+    ARTIFACT_DIR = os.getenv('ARTIFACT_DIR', os.path.join(DATA_DIR, 'cleaned'))
+    ARTIFACT_TTL = int(os.getenv('ARTIFACT_TTL', str(24 * 3600)))  # seconds since last download
+    ARTIFACT_MAX_BYTES = int(os.getenv('ARTIFACT_MAX_BYTES', str(5 * 1024 * 1024 * 1024)))
+
+    # Data-quality graphs (graph_renderer), rendered as SVG in a process pool and cached per dataset
+    GRAPH_WORKERS = int(os.getenv('GRAPH_WORKERS', str(min(4, os.cpu_count() or 1))))
+    GRAPH_CACHE_MAX_BYTES = int(os.getenv('GRAPH_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+    GRAPH_HEATMAP_ROWS = int(os.getenv('GRAPH_HEATMAP_ROWS', '200'))  # row bands in the missing-values heatmap
+    GRAPH_SAMPLE_ROWS = int(os.getenv('GRAPH_SAMPLE_ROWS', '50000'))  # rows sampled for correlations, box plots, text lengths
+
+    # Stream code-generation responses to the project's Socket.IO room as they arrive
+    STREAM_AGENT_OUTPUT = os.getenv('STREAM_AGENT_OUTPUT', 'true').lower() == 'true'
+
+    # Project events are batched per Socket.IO room and kept for replay to late joiners
+    PROGRESS_FLUSH_INTERVAL = float(os.getenv('PROGRESS_FLUSH_INTERVAL', '0.1'))  # seconds
+    PROGRESS_REPLAY_EVENTS = int(os.getenv('PROGRESS_REPLAY_EVENTS', '500'))  # per project
+    PROGRESS_REPLAY_PROJECTS = int(os.getenv('PROGRESS_REPLAY_PROJECTS', '200'))
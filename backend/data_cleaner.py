@@ -6,15 +6,15 @@ try:
     import re
     from datetime import datetime
     import io
+    import os
     import csv
-    from werkzeug.datastructures import FileStorage
     import google.generativeai as genai
+    from llm_gateway import llm_gateway
+    from data_profiler import data_profiler
+    from chunked_cleaner import chunked_cleaner
+    from artifact_store import artifact_store
+    from graph_renderer import graph_renderer
     from config import Config
-    import matplotlib
-    matplotlib.use('Agg')  # Use non-interactive backend
-    import matplotlib.pyplot as plt
-    import seaborn as sns
-    import base64
     
     PANDAS_AVAILABLE = True
 except ImportError as e:
@@ -31,277 +31,33 @@ class DataCleaner:
         # Configure Gemini AI
         if Config.GOOGLE_API_KEY:
             genai.configure(api_key=Config.GOOGLE_API_KEY)
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
+            self.model_name = 'gemini-1.5-flash'
             self.ai_available = True
         else:
             self.ai_available = False
             
         self.supported_formats = ['.csv', '.xlsx', '.xls', '.json']
     
-    def generate_data_quality_graphs(self, file: FileStorage) -> Dict[str, Any]:
-        """Generate matplotlib/seaborn graphs for data quality visualization"""
+    def generate_data_quality_graphs(self, dataset_id: str) -> Dict[str, Any]:
+        """Render the data quality graphs of a stored dataset; returns the names of the graphs that apply
+        
+        The SVGs themselves are cached by graph_renderer and served separately.
+        """
         try:
-            # Read data
-            filename = file.filename.lower()
-            
-            if filename.endswith('.csv'):
-                df = pd.read_csv(file.stream)
-            elif filename.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file.stream)
-            elif filename.endswith('.json'):
-                data = json.load(file.stream)
-                df = pd.json_normalize(data)
-            else:
-                raise ValueError("Unsupported file format")
-            
-            # Set style for better graphs
-            plt.style.use('default')
-            sns.set_palette("husl")
-            
-            # Make graphs smaller and more compact
-            plt.rcParams.update({
-                'figure.figsize': (8, 6),
-                'font.size': 10,
-                'axes.titlesize': 12,
-                'axes.labelsize': 10,
-                'xtick.labelsize': 8,
-                'ytick.labelsize': 8,
-                'legend.fontsize': 9
-            })
-            
-            graphs = {}
-            
-            # 1. Missing Values Heatmap
-            if df.isnull().any().any():
-                plt.figure(figsize=(12, 8))
-                missing_data = df.isnull()
-                
-                # Create a more informative heatmap
-                sns.heatmap(missing_data, 
-                           cbar=True, 
-                           cmap='RdYlBu_r',  # Better color scheme
-                           yticklabels=False, 
-                           xticklabels=True,
-                           cbar_kws={'label': 'Missing Values (White=Missing, Blue=Present)'},
-                           linewidths=0.1,
-                           linecolor='gray')
-                
-                plt.title('Missing Values Pattern Analysis', fontsize=14, pad=20)
-                plt.xlabel('Column Names', fontsize=12)
-                plt.ylabel(f'Rows (Total: {len(df):,})', fontsize=12)
-                plt.xticks(rotation=45, ha='right', fontsize=10)
-                
-                # Add summary text
-                missing_summary = f"Total Missing: {df.isnull().sum().sum():,} cells ({(df.isnull().sum().sum()/(df.shape[0]*df.shape[1])*100):.1f}%)"
-                plt.figtext(0.02, 0.02, missing_summary, fontsize=10, 
-                           bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgray", alpha=0.8))
-                
-                plt.tight_layout()
-                
-                buffer = io.BytesIO()
-                plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
-                buffer.seek(0)
-                graphs['missing_values_heatmap'] = base64.b64encode(buffer.getvalue()).decode()
-                plt.close()
-            
-            # 2. Data Types Distribution
-            plt.figure(figsize=(8, 6))
-            type_counts = df.dtypes.value_counts()
-            colors = sns.color_palette("husl", len(type_counts))
-            plt.pie(type_counts.values, labels=type_counts.index, autopct='%1.1f%%', 
-                   startangle=90, colors=colors)
-            plt.title('Data Types Distribution', fontsize=12, pad=20)
-            plt.axis('equal')
-            
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-            buffer.seek(0)
-            graphs['data_types_distribution'] = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            # 3. Missing Values Bar Chart
-            missing_counts = df.isnull().sum()
-            missing_counts = missing_counts[missing_counts > 0]
-            if len(missing_counts) > 0:
-                plt.figure(figsize=(10, 5))
-                bars = missing_counts.plot(kind='bar', color='salmon', alpha=0.7)
-                plt.title('Missing Values Count by Column', fontsize=12, pad=20)
-                plt.xlabel('Columns')
-                plt.ylabel('Missing Values Count')
-                plt.xticks(rotation=45, ha='right')
-                plt.grid(axis='y', alpha=0.3)
-                
-                # Add value labels on bars
-                for i, v in enumerate(missing_counts.values):
-                    plt.text(i, v + 0.1, str(v), ha='center', va='bottom')
-                
-                plt.tight_layout()
-                buffer = io.BytesIO()
-                plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-                buffer.seek(0)
-                graphs['missing_values_bar'] = base64.b64encode(buffer.getvalue()).decode()
-                plt.close()
-            
-            # 4. Data Completeness
-            plt.figure(figsize=(6, 6))
-            total_cells = df.shape[0] * df.shape[1]
-            missing_cells = df.isnull().sum().sum()
-            complete_cells = total_cells - missing_cells
-            
-            sizes = [complete_cells, missing_cells]
-            labels = ['Complete Data', 'Missing Data']
-            colors = ['lightgreen', 'lightcoral']
-            explode = (0.1, 0)  # explode the missing data slice
-            
-            plt.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', 
-                   startangle=90, explode=explode, shadow=True)
-            plt.title('Overall Data Completeness', fontsize=12, pad=20)
-            plt.axis('equal')
-            
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-            buffer.seek(0)
-            graphs['data_completeness'] = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            # 5. Numeric Columns Distribution
-            numeric_columns = df.select_dtypes(include=[np.number]).columns
-            if len(numeric_columns) > 0:
-                n_cols = min(4, len(numeric_columns))
-                plt.figure(figsize=(15, 4))
-                for i, col in enumerate(numeric_columns[:n_cols]):
-                    plt.subplot(1, n_cols, i+1)
-                    df[col].hist(bins=20, alpha=0.7, color=f'C{i}', edgecolor='black')
-                    plt.title(f'{col}', fontsize=10)
-                    plt.xlabel(col, fontsize=9)
-                    plt.ylabel('Frequency', fontsize=9)
-                    plt.grid(alpha=0.3)
-                
-                plt.suptitle('Numeric Columns Distribution', fontsize=12)
-                plt.tight_layout()
-                buffer = io.BytesIO()
-                plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-                buffer.seek(0)
-                graphs['numeric_distributions'] = base64.b64encode(buffer.getvalue()).decode()
-                plt.close()
-            
-            # 6. Correlation Matrix
-            if len(numeric_columns) > 1:
-                plt.figure(figsize=(8, 6))
-                correlation_matrix = df[numeric_columns].corr()
-                mask = np.triu(np.ones_like(correlation_matrix, dtype=bool))
-                sns.heatmap(correlation_matrix, mask=mask, annot=True, cmap='RdBu_r', 
-                           center=0, square=True, fmt='.2f', cbar_kws={'shrink': 0.8})
-                plt.title('Correlation Matrix of Numeric Columns', fontsize=12, pad=20)
-                plt.tight_layout()
-                
-                buffer = io.BytesIO()
-                plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-                buffer.seek(0)
-                graphs['correlation_matrix'] = base64.b64encode(buffer.getvalue()).decode()
-                plt.close()
-            
-            # 7. Outliers Detection (Box Plots)
-            if len(numeric_columns) > 0:
-                n_cols = min(4, len(numeric_columns))
-                plt.figure(figsize=(15, 4))
-                for i, col in enumerate(numeric_columns[:n_cols]):
-                    plt.subplot(1, n_cols, i+1)
-                    sns.boxplot(y=df[col], color=f'C{i}')
-                    plt.title(f'{col}', fontsize=10)
-                    plt.ylabel(col, fontsize=9)
-                
-                plt.suptitle('Outliers Detection (Box Plots)', fontsize=12)
-                plt.tight_layout()
-                buffer = io.BytesIO()
-                plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-                buffer.seek(0)
-                graphs['outliers_detection'] = base64.b64encode(buffer.getvalue()).decode()
-                plt.close()
-            
-            # 8. Text Data Analysis (String length distribution)
-            text_columns = df.select_dtypes(include=['object']).columns
-            if len(text_columns) > 0:
-                plt.figure(figsize=(8, 5))
-                for i, col in enumerate(text_columns[:3]):  # Show first 3 text columns
-                    lengths = df[col].astype(str).str.len()
-                    plt.hist(lengths, bins=20, alpha=0.6, label=col, edgecolor='black')
-                
-                plt.title('Text Data Length Distribution', fontsize=12, pad=20)
-                plt.xlabel('Character Length')
-                plt.ylabel('Frequency')
-                plt.legend()
-                plt.grid(alpha=0.3)
-                plt.tight_layout()
-                
-                buffer = io.BytesIO()
-                plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-                buffer.seek(0)
-                graphs['text_analysis'] = base64.b64encode(buffer.getvalue()).decode()
-                plt.close()
-            
-            # 9. Data Quality Heatmap (Missing + Data Types)
-            plt.figure(figsize=(10, 6))
-            quality_matrix = pd.DataFrame(index=df.columns, columns=['Missing %', 'Data Type'])
-            
-            for col in df.columns:
-                missing_pct = (df[col].isnull().sum() / len(df)) * 100
-                quality_matrix.loc[col, 'Missing %'] = missing_pct
-                quality_matrix.loc[col, 'Data Type'] = 1 if df[col].dtype == 'object' else 0
-            
-            quality_matrix = quality_matrix.astype(float)
-            sns.heatmap(quality_matrix.T, annot=True, cmap='RdYlBu_r', 
-                       cbar_kws={'label': 'Quality Score'}, fmt='.1f')
-            plt.title('Data Quality Overview', fontsize=12, pad=20)
-            plt.xlabel('Columns')
-            plt.xticks(rotation=45, ha='right')
-            plt.tight_layout()
-            
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-            buffer.seek(0)
-            graphs['quality_heatmap'] = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            # 10. Categorical Value Counts
-            categorical_cols = df.select_dtypes(include=['object']).columns
-            if len(categorical_cols) > 0:
-                plt.figure(figsize=(10, 6))
-                col = categorical_cols[0]  # Take first categorical column
-                top_values = df[col].value_counts().head(10)
-                
-                bars = plt.bar(range(len(top_values)), top_values.values, 
-                              color=sns.color_palette("viridis", len(top_values)))
-                plt.title(f'Top Values in "{col}" Column', fontsize=12, pad=20)
-                plt.xlabel('Categories')
-                plt.ylabel('Count')
-                plt.xticks(range(len(top_values)), top_values.index, rotation=45, ha='right')
-                
-                # Add value labels on bars
-                for i, v in enumerate(top_values.values):
-                    plt.text(i, v + 0.1, str(v), ha='center', va='bottom', fontsize=9)
-                
-                plt.grid(axis='y', alpha=0.3)
-                plt.tight_layout()
-                
-                buffer = io.BytesIO()
-                plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-                buffer.seek(0)
-                graphs['categorical_counts'] = base64.b64encode(buffer.getvalue()).decode()
-                plt.close()
-            
-            # Reset file stream
-            file.stream.seek(0)
+            graphs = graph_renderer.render(dataset_id)
+            profile = data_profiler.get_profile(dataset_id)
+            total_cells = profile['rows'] * profile['columns']
+            kinds = [column['kind'] for column in profile['column_profiles'].values()]
             
             return {
                 'success': True,
                 'graphs': graphs,
                 'stats': {
-                    'total_rows': len(df),
-                    'total_columns': len(df.columns),
-                    'missing_percentage': (df.isnull().sum().sum() / (df.shape[0] * df.shape[1]) * 100),
-                    'numeric_columns': len(numeric_columns),
-                    'categorical_columns': len(categorical_cols),
+                    'total_rows': profile['rows'],
+                    'total_columns': profile['columns'],
+                    'missing_percentage': profile['missing_cells'] / total_cells * 100 if total_cells else 0.0,
+                    'numeric_columns': kinds.count('numeric'),
+                    'categorical_columns': kinds.count('text'),
                     'graphs_generated': len(graphs)
                 }
             }
@@ -312,25 +68,9 @@ class DataCleaner:
                 'error': str(e)
             }
     
-    def analyze_file(self, file: FileStorage) -> Dict[str, Any]:
-        """Analyze uploaded file and return preview with basic stats"""
+    def analyze_file(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Preview and basic stats of an uploaded dataset"""
         try:
-            # Determine file type and read data
-            filename = file.filename.lower()
-            
-            if filename.endswith('.csv'):
-                df = pd.read_csv(file.stream)
-            elif filename.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file.stream)
-            elif filename.endswith('.json'):
-                data = json.load(file.stream)
-                df = pd.json_normalize(data)
-            else:
-                raise ValueError("Unsupported file format")
-            
-            # Reset file stream position
-            file.stream.seek(0)
-            
             # Basic stats
             rows, columns = df.shape
             column_names = df.columns.tolist()
@@ -342,8 +82,6 @@ class DataCleaner:
             
             return {
                 'success': True,
-                'filename': file.filename,
-                'size': len(file.read()),
                 'rows': rows,
                 'columns': columns,
                 'column_names': column_names,
@@ -357,40 +95,34 @@ class DataCleaner:
                 'error': str(e)
             }
     
-    def ai_analysis(self, file: FileStorage) -> Dict[str, Any]:
+    def ai_analysis(self, dataset_id: str) -> Dict[str, Any]:
         """Perform AI-powered analysis to detect data quality issues"""
         try:
-            # Read data
-            filename = file.filename.lower()
-            
-            if filename.endswith('.csv'):
-                df = pd.read_csv(file.stream)
-            elif filename.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file.stream)
-            elif filename.endswith('.json'):
-                data = json.load(file.stream)
-                df = pd.json_normalize(data)
-            
-            # Basic statistics and data overview
+            # Basic statistics and data overview, all from the cached single-pass profile
+            profile = data_profiler.get_profile(dataset_id)
+            columns = profile['column_profiles']
             basic_stats = {
-                'total_rows': len(df),
-                'total_columns': len(df.columns),
-                'column_names': df.columns.tolist(),
-                'data_types': df.dtypes.astype(str).to_dict(),
-                'missing_values_per_column': df.isnull().sum().to_dict(),
-                'duplicate_rows': int(df.duplicated().sum()),
-                'sample_data': df.head(5).fillna('NULL').to_dict('records')
+                'total_rows': profile['rows'],
+                'total_columns': profile['columns'],
+                'column_names': [str(col) for col in columns],
+                'data_types': {str(col): column['dtype'] for col, column in columns.items()},
+                'missing_values_per_column': {str(col): column['nulls'] for col, column in columns.items()},
+                'duplicate_rows': profile['duplicate_rows'],
+                'sample_data': [
+                    {str(col): 'NULL' if value is None else value for col, value in row.items()}
+                    for row in profile['head']
+                ]
             }
             
             # Use AI to analyze data quality if available
             if self.ai_available:
-                ai_analysis = self._get_ai_analysis(df, basic_stats)
+                ai_analysis = self._get_ai_analysis(profile, basic_stats)
                 issues = ai_analysis.get('issues', [])
                 recommendations = ai_analysis.get('recommendations', [])
                 quality_score = ai_analysis.get('quality_score', 80)
             else:
                 # Fallback to basic analysis
-                issues, recommendations, quality_score = self._basic_analysis(df, basic_stats)
+                issues, recommendations, quality_score = self._basic_analysis(profile, basic_stats)
             
             return {
                 'success': True,
@@ -406,7 +138,7 @@ class DataCleaner:
                 'error': str(e)
             }
     
-    def _get_ai_analysis(self, df: pd.DataFrame, basic_stats: Dict) -> Dict[str, Any]:
+    def _get_ai_analysis(self, profile: Dict[str, Any], basic_stats: Dict) -> Dict[str, Any]:
         """Use Gemini AI to analyze data quality"""
         try:
             # Prepare data summary for AI
@@ -421,8 +153,11 @@ class DataCleaner:
             - Missing Values: {json.dumps(basic_stats['missing_values_per_column'], indent=2)}
             - Duplicate Rows: {basic_stats['duplicate_rows']}
             
+            Column Statistics:
+            {json.dumps(self._column_digest(profile), indent=2, default=str)}
+            
             Sample Data (First 5 rows):
-            {json.dumps(basic_stats['sample_data'], indent=2)}
+            {json.dumps(basic_stats['sample_data'], indent=2, default=str)}
             
             Please analyze this dataset and identify SPECIFIC data quality issues with ACTUAL EXAMPLES from the data. For each issue found, provide:
             1. Issue type (e.g., "Missing Values", "Data Type Inconsistency", "Invalid Format", "Outliers", "Duplicate Data", etc.)
@@ -463,7 +198,9 @@ class DataCleaner:
             }}
             """
             
-            response = self.model.generate_content(data_summary)
+            response = llm_gateway.generate(
+                data_summary, role='data_quality_analyst', feature='data_cleaning', model_name=self.model_name
+            )
             
             # Try to parse JSON response
             response_text = response.text.strip()
@@ -478,19 +215,31 @@ class DataCleaner:
         except Exception as e:
             print(f"AI analysis failed: {e}")
             # Fallback to basic analysis
-            return self._basic_analysis(df, basic_stats)
+            return self._basic_analysis(profile, basic_stats)
+    
+    def _column_digest(self, profile: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """The parts of each column's profile worth showing the model"""
+        digest = {}
+        for col, column in profile['column_profiles'].items():
+            entry = {'distinct': column['distinct'], 'top_values': column['top_values'][:5]}
+            for key in ('min', 'max', 'mean', 'outliers', 'numeric_ratio', 'patterns', 'mixed_types'):
+                if key in column:
+                    entry[key] = column[key]
+            digest[str(col)] = entry
+        return digest
     
-    def _basic_analysis(self, df: pd.DataFrame, basic_stats: Dict) -> Tuple[List[Dict], List[str], int]:
+    def _basic_analysis(self, profile: Dict[str, Any], basic_stats: Dict) -> Tuple[List[Dict], List[str], int]:
         """Fallback basic analysis when AI is not available"""
         issues = []
         recommendations = []
+        rows = profile['rows']
         
         # Check for missing values
         for col, missing_count in basic_stats['missing_values_per_column'].items():
             if missing_count > 0:
                 issues.append({
                     'type': 'Missing Values',
-                    'severity': 'medium' if missing_count < len(df) * 0.1 else 'high',
+                    'severity': 'medium' if missing_count < rows * 0.1 else 'high',
                     'column': col,
                     'description': f'{missing_count} missing values detected in column "{col}"',
                     'count': int(missing_count)
@@ -508,25 +257,59 @@ class DataCleaner:
             })
             recommendations.append('Remove duplicate rows')
         
-        # Basic data type checks
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                # Check for mixed types in text columns
-                unique_types = set(type(val).__name__ for val in df[col].dropna().head(100))
-                if len(unique_types) > 1:
-                    issues.append({
-                        'type': 'Mixed Data Types',
-                        'severity': 'medium',
-                        'column': col,
-                        'description': f'Column "{col}" contains mixed data types',
-                        'count': 1
-                    })
-                    recommendations.append(f'Standardize data types in "{col}" column')
+        for col, column in profile['column_profiles'].items():
+            # Check for mixed types in text columns
+            if column.get('mixed_types'):
+                issues.append({
+                    'type': 'Mixed Data Types',
+                    'severity': 'medium',
+                    'column': col,
+                    'description': f'Column "{col}" contains mixed data types',
+                    'count': 1
+                })
+                recommendations.append(f'Standardize data types in "{col}" column')
+            
+            # Text columns that are mostly numbers
+            if column['kind'] == 'text' and 0.8 < column['numeric_ratio'] < 1.0:
+                invalid = int(round((1 - column['numeric_ratio']) * column['non_null']))
+                issues.append({
+                    'type': 'Data Type Inconsistency',
+                    'severity': 'medium',
+                    'column': col,
+                    'description': f'About {invalid} non-numeric values in mostly numeric column "{col}"',
+                    'count': invalid
+                })
+                recommendations.append(f'Convert "{col}" to numbers')
+            
+            # Values outside the IQR fences
+            if column.get('outliers'):
+                lower, upper = column['iqr_bounds']
+                issues.append({
+                    'type': 'Outliers',
+                    'severity': 'low',
+                    'column': col,
+                    'description': f'About {column["outliers"]} values in "{col}" fall outside {lower:.4g} to {upper:.4g}',
+                    'count': column['outliers']
+                })
+                recommendations.append(f'Review or cap outliers in "{col}"')
+            
+            # Columns that look like emails but have malformed entries
+            email_ratio = column.get('patterns', {}).get('email', 0.0)
+            if 0.5 < email_ratio < 1.0:
+                invalid = int(round((1 - email_ratio) * column['non_null']))
+                issues.append({
+                    'type': 'Invalid Format',
+                    'severity': 'medium',
+                    'column': col,
+                    'description': f'About {invalid} values in "{col}" are not valid email addresses',
+                    'count': invalid
+                })
+                recommendations.append(f'Fix malformed email addresses in "{col}"')
         
         # Calculate quality score
-        total_cells = len(df) * len(df.columns)
+        total_cells = rows * profile['columns']
         issues_count = sum(issue['count'] for issue in issues)
-        quality_score = max(0, min(100, int((1 - issues_count / total_cells) * 100)))
+        quality_score = max(0, min(100, int((1 - issues_count / total_cells) * 100))) if total_cells else 100
         
         if not issues:
             issues.append({
@@ -540,105 +323,21 @@ class DataCleaner:
         
         return issues, recommendations, quality_score
     
-    def clean_data(self, file: FileStorage, options: Dict[str, bool]) -> Dict[str, Any]:
-        """Clean data based on selected options"""
+    def clean_data(self, dataset_id: str, options: Dict[str, bool], filename: str) -> Dict[str, Any]:
+        """Clean a stored dataset based on selected options into a downloadable artifact"""
         try:
-            # Read data
-            filename = file.filename.lower()
-            
-            if filename.endswith('.csv'):
-                df = pd.read_csv(file.stream)
-            elif filename.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file.stream)
-            elif filename.endswith('.json'):
-                data = json.load(file.stream)
-                df = pd.json_normalize(data)
-            
-            original_shape = df.shape
-            cleaning_log = []
-            
-            # Remove duplicates
-            if options.get('removeDuplicates', True):
-                before_dup = len(df)
-                df = df.drop_duplicates()
-                after_dup = len(df)
-                if before_dup != after_dup:
-                    cleaning_log.append(f'Removed {before_dup - after_dup} duplicate rows')
-            
-            # Handle missing values
-            if options.get('handleMissingValues', True):
-                for col in df.columns:
-                    if df[col].dtype in ['object', 'string']:
-                        # For text columns, fill with most frequent value
-                        mode_val = df[col].mode()
-                        if not mode_val.empty:
-                            missing_count = df[col].isnull().sum()
-                            df[col].fillna(mode_val[0], inplace=True)
-                            if missing_count > 0:
-                                cleaning_log.append(f'Filled {missing_count} missing values in "{col}" with mode')
-                    else:
-                        # For numeric columns, fill with median
-                        median_val = df[col].median()
-                        missing_count = df[col].isnull().sum()
-                        df[col].fillna(median_val, inplace=True)
-                        if missing_count > 0:
-                            cleaning_log.append(f'Filled {missing_count} missing values in "{col}" with median')
-            
-            # Validate data types
-            if options.get('validateDataTypes', True):
-                for col in df.columns:
-                    if self._should_be_numeric(df[col]):
-                        # Convert to numeric, errors='coerce' will turn invalid values to NaN
-                        numeric_col = pd.to_numeric(df[col], errors='coerce')
-                        invalid_count = df[col].notna().sum() - numeric_col.notna().sum()
-                        if invalid_count > 0:
-                            df[col] = numeric_col
-                            cleaning_log.append(f'Converted {invalid_count} invalid values to NaN in "{col}"')
-            
-            # Standardize formats
-            if options.get('standardizeFormats', True):
-                # Standardize email formats
-                email_cols = [col for col in df.columns if 'email' in col.lower()]
-                for col in email_cols:
-                    df[col] = df[col].str.lower().str.strip()
-                    cleaning_log.append(f'Standardized email format in "{col}"')
-                
-                # Standardize country names
-                country_cols = [col for col in df.columns if 'country' in col.lower()]
-                for col in country_cols:
-                    df[col] = df[col].str.title().str.strip()
-                    cleaning_log.append(f'Standardized country format in "{col}"')
-            
-            # Detect and handle outliers
-            if options.get('detectOutliers', True):
-                numeric_cols = df.select_dtypes(include=[np.number]).columns
-                for col in numeric_cols:
-                    outliers = self._detect_outliers(df[col])
-                    if len(outliers) > 0:
-                        # Cap outliers at 95th percentile
-                        upper_limit = df[col].quantile(0.95)
-                        lower_limit = df[col].quantile(0.05)
-                        df[col] = df[col].clip(lower=lower_limit, upper=upper_limit)
-                        cleaning_log.append(f'Capped {len(outliers)} outliers in "{col}"')
-            
-            # Generate cleaned data
-            output = io.StringIO()
-            df.to_csv(output, index=False)
-            cleaned_csv = output.getvalue()
+            # Two passes over bounded chunks, so the dataset never has to fit in memory
+            with artifact_store.writer(f"cleaned_{os.path.splitext(filename)[0]}") as output:
+                summary = chunked_cleaner.clean(dataset_id, options, output)
             
             return {
                 'success': True,
-                'cleaned_data': cleaned_csv,
-                'cleaning_log': cleaning_log,
-                'before_stats': {
-                    'rows': original_shape[0],
-                    'columns': original_shape[1]
-                },
-                'after_stats': {
-                    'rows': len(df),
-                    'columns': len(df.columns)
-                },
-                'filename': f"cleaned_{file.filename}"
+                'artifact_id': output.artifact_id,
+                'formats': artifact_store.formats(),
+                'cleaning_log': summary['cleaning_log'],
+                'before_stats': summary['before_stats'],
+                'after_stats': summary['after_stats'],
+                'filename': output.filename
             }
             
         except Exception as e:
@@ -647,20 +346,11 @@ class DataCleaner:
                 'error': str(e)
             }
     
-    def manual_clean_data(self, file: FileStorage, operation: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    def manual_clean_data(self, df: pd.DataFrame, operation: str, parameters: Dict[str, Any], filename: str) -> Dict[str, Any]:
         """Perform manual cleaning operations on data"""
         try:
-            # Read data
-            filename = file.filename.lower()
-            
-            if filename.endswith('.csv'):
-                df = pd.read_csv(file.stream)
-            elif filename.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file.stream)
-            elif filename.endswith('.json'):
-                data = json.load(file.stream)
-                df = pd.json_normalize(data)
-            
+            # The frame is shared with other requests on the same dataset
+            df = df.copy()
             original_shape = df.shape
             cleaning_log = []
             
@@ -727,14 +417,14 @@ class DataCleaner:
                         df[column] = pd.to_datetime(df[column], errors='coerce')
                         cleaning_log.append(f'Converted {column} to datetime')
             
-            # Generate cleaned data
-            output = io.StringIO()
-            df.to_csv(output, index=False)
-            cleaned_csv = output.getvalue()
+            # Store the result for download instead of inlining it in the response
+            with artifact_store.writer(f"manually_cleaned_{os.path.splitext(filename)[0]}") as output:
+                output.write(df)
             
             return {
                 'success': True,
-                'cleaned_data': cleaned_csv,
+                'artifact_id': output.artifact_id,
+                'formats': artifact_store.formats(),
                 'cleaning_log': cleaning_log,
                 'before_stats': {
                     'rows': original_shape[0],
@@ -744,7 +434,7 @@ class DataCleaner:
                     'rows': len(df),
                     'columns': len(df.columns)
                 },
-                'filename': f"manually_cleaned_{file.filename}"
+                'filename': output.filename
             }
             
         except Exception as e:
@@ -752,22 +442,6 @@ class DataCleaner:
                 'success': False,
                 'error': str(e)
             }
-    
-    def _should_be_numeric(self, series: pd.Series) -> bool:
-        """Determine if a series should be numeric based on majority of values"""
-        try:
-            non_null_series = series.dropna()
-            if len(non_null_series) == 0:
-                return False
-            
-            # Try to convert to numeric
-            numeric_series = pd.to_numeric(non_null_series, errors='coerce')
-            numeric_count = numeric_series.notna().sum()
-            
-            # If more than 80% can be converted to numeric, consider it should be numeric
-            return (numeric_count / len(non_null_series)) > 0.8
-        except:
-            return False
 
 # Global data cleaner instance
 try:
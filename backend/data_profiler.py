@@ -0,0 +1,375 @@
+import os
+import re
+import shutil
+import tempfile
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import (
+    infer_dtype, is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+)
+
+from config import Config
+from dataset_store import dataset_store
+
+logger = logging.getLogger(__name__)
+
+IQR_FACTOR = 1.5
+QUANTILES = {'p05': 0.05, 'q1': 0.25, 'median': 0.5, 'q3': 0.75, 'p95': 0.95}
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+DATE_PATTERN = re.compile(
+    r'^(\d{4}[-/.]\d{1,2}[-/.]\d{1,2}|\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})([ T]\d{1,2}:\d{2}(:\d{2})?.*)?$'
+)
+
+HASH_RECORD = np.dtype([('hash', '<u8'), ('row', '<i8')])
+
+
+class QuantileSketch:
+    """Uniform reservoir sample of a numeric column; quantiles are exact until it fills up"""
+
+    def __init__(self, capacity: int, seed: int):
+        self.capacity = capacity
+        self.sample = np.empty(0, dtype=np.float64)
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray):
+        values = values[np.isfinite(values)]
+        room = self.capacity - len(self.sample)
+        if room > 0:
+            self.sample = np.concatenate([self.sample, values[:room]])
+            self.seen += min(room, len(values))
+            values = values[room:]
+        if len(values):
+            # Algorithm R, vectorized: the i-th value seen replaces a random slot with probability capacity / i
+            seen = np.arange(self.seen + 1, self.seen + len(values) + 1)
+            slots = (self._rng.random(len(values)) * seen).astype(np.int64)
+            keep = slots < self.capacity
+            self.sample[slots[keep]] = values[keep]
+            self.seen += len(values)
+
+    def quantiles(self, probabilities: List[float]) -> Optional[np.ndarray]:
+        if not len(self.sample):
+            return None
+        return np.quantile(self.sample, probabilities)
+
+
+class HeavyHitters:
+    """Misra-Gries summary of a column's most frequent values; exact while it has at most capacity distinct values"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts = {}
+
+    def update(self, counts: pd.Series):
+        """Merge in a chunk's value_counts() (sorted by count, descending)"""
+        if len(counts) > self.capacity:
+            counts = counts.iloc[:self.capacity] - counts.iloc[self.capacity]
+        for value, count in counts.items():
+            if count > 0:
+                self.counts[value] = self.counts.get(value, 0) + int(count)
+        if len(self.counts) > self.capacity:
+            cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+            self.counts = {value: count - cut for value, count in self.counts.items() if count > cut}
+
+    def top(self, k: int) -> List[list]:
+        # Ties go to the smallest value, like Series.mode()
+        ranked = sorted(self.counts.items(), key=lambda item: (-item[1], str(item[0])))
+        return [[_plain(value), count] for value, count in ranked[:k]]
+
+
+class DistinctSketch:
+    """K minimum values of 64-bit hashes: exact below k distinct values, about 1/sqrt(k) relative error above"""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.values = np.empty(0, dtype=np.uint64)
+
+    def update(self, hashes: np.ndarray):
+        if len(self.values) == self.k:
+            hashes = hashes[hashes < self.values[-1]]
+        if len(hashes):
+            self.values = np.unique(np.concatenate([self.values, hashes]))[:self.k]
+
+    def estimate(self) -> int:
+        if len(self.values) < self.k:
+            return len(self.values)
+        return int((self.k - 1) / (float(self.values[-1]) / 2.0 ** 64))
+
+
+class RowHashIndex:
+    """64-bit hashes of every row, spilled to partition files on disk so duplicates can be found in bounded memory"""
+
+    def __init__(self, work_dir: str, expected_rows: int):
+        self.work_dir = work_dir
+        self.partitions = max(1, -(-expected_rows // Config.DATASET_HASH_PARTITION_ROWS))
+        self.rows = 0
+        self._files = [open(os.path.join(work_dir, f"hashes-{p}"), 'wb') for p in range(self.partitions)]
+
+    def add(self, chunk: pd.DataFrame):
+        if not len(chunk):
+            return
+        records = np.empty(len(chunk), dtype=HASH_RECORD)
+        records['hash'] = _hash(chunk)
+        records['row'] = np.arange(self.rows, self.rows + len(chunk))
+        if self.partitions == 1:
+            records.tofile(self._files[0])
+        else:
+            records = records[np.argsort(records['hash'] % self.partitions, kind='stable')]
+            bounds = np.searchsorted(records['hash'] % self.partitions, np.arange(self.partitions + 1))
+            for p in range(self.partitions):
+                records[bounds[p]:bounds[p + 1]].tofile(self._files[p])
+        self.rows += len(chunk)
+
+    def _repeats(self):
+        """Per partition, the row numbers that repeat an earlier row"""
+        for f in self._files:
+            f.close()
+        for p in range(self.partitions):
+            records = np.fromfile(os.path.join(self.work_dir, f"hashes-{p}"), dtype=HASH_RECORD)
+            if len(records) < 2:
+                continue
+            records = records[np.lexsort((records['row'], records['hash']))]
+            repeated = records['hash'][1:] == records['hash'][:-1]
+            yield records['row'][1:][repeated]
+
+    def count_duplicates(self) -> int:
+        return sum(len(rows) for rows in self._repeats())
+
+    def duplicate_bitmap(self) -> Optional[np.ndarray]:
+        """On-disk bitmap of rows that repeat an earlier row"""
+        if not self.rows:
+            return None
+        bitmap = np.memmap(os.path.join(self.work_dir, 'duplicates'), dtype=np.bool_, mode='w+', shape=(self.rows,))
+        for rows in self._repeats():
+            bitmap[rows] = True
+        return bitmap
+
+
+def _hash(data) -> np.ndarray:
+    try:
+        return pd.util.hash_pandas_object(data, index=False).to_numpy()
+    except TypeError:
+        # Unhashable cells, e.g. lists from nested JSON
+        return pd.util.hash_pandas_object(data.astype(str), index=False).to_numpy()
+
+
+def _plain(value):
+    """numpy scalars as Python values, so profiles serialize to JSON"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _kind(series: pd.Series) -> str:
+    if is_bool_dtype(series):
+        return 'boolean'
+    if is_numeric_dtype(series):
+        return 'numeric'
+    if is_datetime64_any_dtype(series):
+        return 'datetime'
+    return 'text'
+
+
+def _numeric_summary(values: np.ndarray, count: int) -> Dict[str, Any]:
+    """Quantiles, IQR fences and the estimated outlier count from a sample of a column's values"""
+    if not len(values):
+        return {}
+    points = dict(zip(QUANTILES, (float(q) for q in np.quantile(values, list(QUANTILES.values())))))
+    spread = IQR_FACTOR * (points['q3'] - points['q1'])
+    lower, upper = points['q1'] - spread, points['q3'] + spread
+    outside = float(np.mean((values < lower) | (values > upper)))
+    return {
+        'quantiles': points,
+        'iqr_bounds': [lower, upper],
+        'outliers': int(round(outside * count)),
+    }
+
+
+class _ColumnAccumulator:
+    def __init__(self, index: int, kind: str, dtype: str):
+        self.kind = kind
+        self.dtype = dtype
+        self.nulls = 0
+        self.count = 0  # non-null numeric values, for the moments
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sketch = QuantileSketch(Config.PROFILE_SKETCH_SIZE, seed=index)
+        self.top = HeavyHitters(Config.PROFILE_HEAVY_HITTERS)
+        self.distinct = DistinctSketch(Config.PROFILE_DISTINCT_SKETCH)
+
+
+class DataProfiler:
+    """Per-column statistics of a stored dataset, computed in one pass over its chunks and cached per dataset.
+
+    Each chunk is folded into mergeable summaries: null counts for the whole
+    frame at once, moments (Chan/Welford), min and max across all numeric
+    columns in one array operation, a reservoir-sample quantile sketch
+    (quantiles, IQR fences, outlier counts), Misra-Gries top values, a KMV
+    distinct-count sketch and row hashes for duplicate counting. Checks that
+    need string work (how many text values parse as numbers, email and date
+    patterns, mixed types) run on a uniform sample of PROFILE_SAMPLE_ROWS
+    rows instead of whole columns.
+
+    Analysis, graphs and cleaning all read the same cached profile.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles = OrderedDict()  # dataset_id -> profile
+        self._computing = {}  # dataset_id -> lock
+        self.stats = {'computed': 0, 'hits': 0}
+
+    def get_profile(self, dataset_id: str) -> Dict[str, Any]:
+        """The profile of a dataset, computed on first use; raises KeyError for unknown datasets"""
+        with self._lock:
+            if dataset_id in self._profiles:
+                self._profiles.move_to_end(dataset_id)
+                self.stats['hits'] += 1
+                return self._profiles[dataset_id]
+            lock = self._computing.setdefault(dataset_id, threading.Lock())
+        with lock:
+            with self._lock:
+                if dataset_id in self._profiles:
+                    return self._profiles[dataset_id]
+            profile = self._compute(dataset_id)
+            with self._lock:
+                self._profiles[dataset_id] = profile
+                self._computing.pop(dataset_id, None)
+                self.stats['computed'] += 1
+                while len(self._profiles) > Config.PROFILE_CACHE_ENTRIES:
+                    self._profiles.popitem(last=False)
+        return profile
+
+    def _compute(self, dataset_id: str) -> Dict[str, Any]:
+        info = dataset_store.info(dataset_id)
+        if info is None:
+            raise KeyError(dataset_id)
+        rng = np.random.default_rng(0)
+        sample_fraction = min(1.0, Config.PROFILE_SAMPLE_ROWS / max(info['rows'], 1))
+        work_dir = tempfile.mkdtemp(prefix='profile-', dir=dataset_store.root)
+        try:
+            hashes = RowHashIndex(work_dir, info['rows'])
+            columns, samples, head = None, [], None
+            for chunk in dataset_store.iter_chunks(dataset_id):
+                if columns is None:
+                    columns = {col: _ColumnAccumulator(i, _kind(chunk[col]), str(chunk[col].dtype))
+                               for i, col in enumerate(chunk.columns)}
+                    head = chunk.head(5)
+                self._fold(chunk, columns)
+                hashes.add(chunk)
+                if sample_fraction >= 1.0:
+                    samples.append(chunk)
+                else:
+                    samples.append(chunk[rng.random(len(chunk)) < sample_fraction])
+            duplicate_rows = hashes.count_duplicates()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        sample = pd.concat(samples, ignore_index=True) if samples else pd.DataFrame()
+        rows = hashes.rows
+        column_profiles = {col: self._finish(col, accumulator, sample, rows) for col, accumulator in columns.items()}
+        return {
+            'dataset_id': dataset_id,
+            'rows': rows,
+            'columns': len(column_profiles),
+            'missing_cells': sum(column['nulls'] for column in column_profiles.values()),
+            'duplicate_rows': duplicate_rows,
+            'sample_rows': len(sample),
+            'head': head.astype(object).where(head.notna(), None).to_dict('records') if head is not None else [],
+            'column_profiles': column_profiles,
+        }
+
+    def _fold(self, chunk: pd.DataFrame, columns: Dict[str, _ColumnAccumulator]):
+        """Fold one chunk into the running per-column summaries"""
+        nulls = chunk.isna().sum()
+        numeric = [col for col, acc in columns.items() if acc.kind == 'numeric']
+        if numeric:
+            values = chunk[numeric].to_numpy(dtype=np.float64, na_value=np.nan)
+            present = ~np.isnan(values)
+            counts = present.sum(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = np.where(present, values, 0.0).sum(axis=0) / counts
+                m2s = np.where(present, (values - means) ** 2, 0.0).sum(axis=0)
+            minimums = np.where(present, values, np.inf).min(axis=0, initial=np.inf)
+            maximums = np.where(present, values, -np.inf).max(axis=0, initial=-np.inf)
+            for i, col in enumerate(numeric):
+                acc, n = columns[col], int(counts[i])
+                if n:
+                    total = acc.count + n
+                    delta = means[i] - acc.mean
+                    acc.mean += delta * n / total
+                    acc.m2 += m2s[i] + delta ** 2 * acc.count * n / total
+                    acc.count = total
+                    acc.min = min(acc.min, minimums[i])
+                    acc.max = max(acc.max, maximums[i])
+                acc.sketch.update(values[:, i])
+
+        for col, acc in columns.items():
+            acc.nulls += int(nulls[col])
+            present = chunk[col].dropna()
+            if not len(present):
+                continue
+            acc.distinct.update(_hash(present))
+            try:
+                acc.top.update(present.value_counts())
+            except TypeError:
+                acc.top.update(present.astype(str).value_counts())
+
+    def _finish(self, col, acc: _ColumnAccumulator, sample: pd.DataFrame, rows: int) -> Dict[str, Any]:
+        non_null = rows - acc.nulls
+        top_values = acc.top.top(Config.PROFILE_TOP_VALUES)
+        profile = {
+            'dtype': acc.dtype,
+            'kind': acc.kind,
+            'nulls': acc.nulls,
+            'non_null': non_null,
+            'distinct': acc.distinct.estimate(),
+            'top_values': top_values,
+            'mode': top_values[0][0] if top_values else None,
+        }
+        if acc.kind == 'numeric':
+            profile['numeric_ratio'] = 1.0
+            if acc.count:
+                profile.update({
+                    'min': float(acc.min),
+                    'max': float(acc.max),
+                    'mean': acc.mean,
+                    'std': float(np.sqrt(acc.m2 / (acc.count - 1))) if acc.count > 1 else 0.0,
+                })
+                profile.update(_numeric_summary(acc.sketch.sample, acc.count))
+            return profile
+
+        values = sample[col].dropna() if col in sample else pd.Series(dtype=object)
+        profile.update({'numeric_ratio': 0.0, 'patterns': {'email': 0.0, 'date': 0.0}, 'mixed_types': False})
+        if acc.kind != 'text' or not len(values):
+            return profile
+        profile['mixed_types'] = infer_dtype(values, skipna=True).startswith('mixed')
+        try:
+            numbers = pd.to_numeric(values, errors='coerce')
+        except TypeError:
+            numbers = pd.Series(np.nan, index=values.index)
+        numbers = numbers.to_numpy(dtype=np.float64, na_value=np.nan)
+        profile['numeric_ratio'] = float(np.isfinite(numbers).mean())
+        if profile['numeric_ratio']:
+            # Stats of the values that parse, for columns cleaning may convert to numbers
+            profile.update(_numeric_summary(numbers[np.isfinite(numbers)], non_null))
+        text = values.astype(str).str.strip()
+        profile['patterns'] = {
+            'email': float(text.str.match(EMAIL_PATTERN).mean()),
+            'date': float(text.str.match(DATE_PATTERN).mean()),
+        }
+        return profile
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'cached_profiles': len(self._profiles), **self.stats}
+
+
+# Global data profiler instance
+data_profiler = DataProfiler()
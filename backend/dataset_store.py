@@ -0,0 +1,338 @@
+import os
+import re
+import json
+import time
+import uuid
+import threading
+import importlib.util
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ['.csv', '.xlsx', '.xls', '.json']
+
+DATASET_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# Parquet needs pyarrow; without it frames are pickled, which is slower to load but keeps every dtype
+PARQUET_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+
+def read_upload(file) -> pd.DataFrame:
+    """Parse an uploaded CSV, Excel or JSON file into a DataFrame"""
+    filename = (file.filename or '').lower()
+    if filename.endswith('.csv'):
+        return pd.read_csv(file.stream)
+    if filename.endswith(('.xlsx', '.xls')):
+        return pd.read_excel(file.stream)
+    if filename.endswith('.json'):
+        return pd.json_normalize(json.load(file.stream))
+    raise ValueError(f"Unsupported file format. Supported formats: {', '.join(SUPPORTED_FORMATS)}")
+
+
+def _upload_size(file) -> int:
+    stream = file.stream
+    try:
+        position = stream.tell()
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return file.content_length or 0
+
+
+class DatasetStore:
+    """Parsed uploads for the data-cleaning endpoints, keyed by dataset id.
+
+    A file is parsed once on upload and saved as Parquet (pickle when pyarrow
+    is missing or the frame has columns Parquet can't hold); CSVs are
+    converted DATASET_CHUNK_ROWS rows at a time rather than read whole.
+    Recently used frames stay in memory up to DATASET_MEMORY_MAX_BYTES, so
+    analysis, graphs and cleaning of the same upload don't re-read it. Datasets not used for
+    DATASET_TTL seconds are deleted, oldest first once the directory exceeds
+    DATASET_MAX_BYTES.
+
+    Frames returned by get() are shared between requests: copy before
+    modifying one in place.
+    """
+
+    def __init__(self, root: str = None, memory_limit: int = None):
+        self.root = root or Config.DATASET_DIR
+        self.memory_limit = Config.DATASET_MEMORY_MAX_BYTES if memory_limit is None else memory_limit
+        self._lock = threading.Lock()
+        self._frames = OrderedDict()  # dataset_id -> (frame, bytes)
+        self._memory_bytes = 0
+        self.stats = {'created': 0, 'memory_hits': 0, 'disk_loads': 0, 'evicted': 0}
+
+    def _meta_path(self, dataset_id: str) -> str:
+        return os.path.join(self.root, f"{dataset_id}.json")
+
+    def _frame_path(self, dataset_id: str, storage_format: str) -> str:
+        return os.path.join(self.root, f"{dataset_id}.{'parquet' if storage_format == 'parquet' else 'pkl'}")
+
+    def create(self, file) -> Tuple[Dict[str, Any], Optional[pd.DataFrame]]:
+        """Parse and store an uploaded file; returns (dataset info, frame)
+
+        The frame is None when it was too large to keep in memory; get()
+        loads it from disk if a caller needs it whole.
+        """
+        size = _upload_size(file)
+        dataset_id = uuid.uuid4().hex
+        os.makedirs(self.root, exist_ok=True)
+
+        streamed = None
+        if PARQUET_AVAILABLE and (file.filename or '').lower().endswith('.csv'):
+            streamed = self._stream_csv(dataset_id, file)
+        if streamed is not None:
+            df, rows, columns = streamed
+            storage_format = 'parquet'
+        else:
+            df = read_upload(file)
+            rows, columns = int(df.shape[0]), int(df.shape[1])
+            storage_format = self._save_frame(dataset_id, df)
+        info = {
+            'dataset_id': dataset_id,
+            'filename': file.filename,
+            'size': size,
+            'rows': rows,
+            'columns': columns,
+            'format': storage_format,
+            'created_at': time.time(),
+        }
+        # The metadata file is written last: a dataset exists once it does
+        tmp_path = f"{self._meta_path(dataset_id)}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+        os.replace(tmp_path, self._meta_path(dataset_id))
+
+        with self._lock:
+            self.stats['created'] += 1
+            if df is not None:
+                self._remember(dataset_id, df)
+        self.evict(keep=dataset_id)
+        return info, df
+
+    def _stream_csv(self, dataset_id: str, file) -> Optional[Tuple[Optional[pd.DataFrame], int, int]]:
+        """Write a CSV upload to Parquet DATASET_CHUNK_ROWS rows at a time; (frame, rows, columns)
+
+        The frame is only assembled while the chunks read so far fit in the
+        memory limit, else it is None. Returns None, with the stream rewound,
+        when chunks don't share one schema (a column that is numeric at first
+        and text later, ...): the caller then parses the file whole.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self._frame_path(dataset_id, 'parquet')
+        writer = None
+        chunks, kept_bytes = [], 0
+        rows = columns = 0
+        try:
+            # Closing the reader leaves the upload stream open, so it can be re-read below
+            with pd.read_csv(file.stream, chunksize=Config.DATASET_CHUNK_ROWS) as reader:
+                for chunk in reader:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        columns = int(chunk.shape[1])
+                        writer = pq.ParquetWriter(f"{path}.tmp", table.schema)
+                    else:
+                        table = table.cast(writer.schema)
+                    writer.write_table(table, row_group_size=Config.DATASET_CHUNK_ROWS)
+                    rows += len(chunk)
+                    if chunks is not None:
+                        kept_bytes += int(chunk.memory_usage(deep=True).sum())
+                        if kept_bytes <= self.memory_limit:
+                            chunks.append(chunk)
+                        else:
+                            chunks = None
+            writer.close()
+            writer = None
+            os.replace(f"{path}.tmp", path)
+        except Exception as e:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(f"{path}.tmp"):
+                os.remove(f"{path}.tmp")
+            if not isinstance(e, (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError)):
+                raise
+            logger.info(f"Dataset {dataset_id} chunks don't share a schema ({e}), parsing it whole")
+            file.stream.seek(0)
+            return None
+        if chunks is None:
+            return None, rows, columns
+        return pd.concat(chunks, ignore_index=True), rows, columns
+
+    def _save_frame(self, dataset_id: str, df: pd.DataFrame) -> str:
+        if PARQUET_AVAILABLE:
+            path = self._frame_path(dataset_id, 'parquet')
+            try:
+                # Bounded row groups let iter_chunks() stream the file batch by batch
+                df.to_parquet(f"{path}.tmp", engine='pyarrow', index=False,
+                              row_group_size=Config.DATASET_CHUNK_ROWS)
+                os.replace(f"{path}.tmp", path)
+                return 'parquet'
+            except Exception as e:
+                # Mixed-type object columns, non-string column names, ...
+                logger.info(f"Dataset {dataset_id} can't be stored as Parquet ({e}), pickling it")
+                if os.path.exists(f"{path}.tmp"):
+                    os.remove(f"{path}.tmp")
+        path = self._frame_path(dataset_id, 'pickle')
+        df.to_pickle(f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        return 'pickle'
+
+    def info(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        """Metadata of a stored dataset, or None if the id is unknown or expired"""
+        if not DATASET_ID_PATTERN.match(dataset_id or ''):
+            return None
+        try:
+            with open(self._meta_path(dataset_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def get(self, dataset_id: str) -> Optional[pd.DataFrame]:
+        """The parsed frame of a dataset, from memory if it is hot, else from disk"""
+        info = self.info(dataset_id)
+        if info is None:
+            return None
+        self._touch(dataset_id)
+        with self._lock:
+            cached = self._frames.get(dataset_id)
+            if cached is not None:
+                self._frames.move_to_end(dataset_id)
+                self.stats['memory_hits'] += 1
+                return cached[0]
+
+        path = self._frame_path(dataset_id, info['format'])
+        try:
+            df = pd.read_parquet(path) if info['format'] == 'parquet' else pd.read_pickle(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self.stats['disk_loads'] += 1
+            if dataset_id in self._frames:
+                # Another request loaded it meanwhile; share that copy
+                return self._frames[dataset_id][0]
+            self._remember(dataset_id, df)
+        return df
+
+    def iter_chunks(self, dataset_id: str, chunk_rows: int = None) -> Iterator[pd.DataFrame]:
+        """A dataset as consecutive frames of at most chunk_rows rows, without loading it whole when it isn't hot
+
+        Raises KeyError if the dataset doesn't exist. Always yields at least
+        one (possibly empty) frame, so callers see the columns.
+        """
+        chunk_rows = chunk_rows or Config.DATASET_CHUNK_ROWS
+        info = self.info(dataset_id)
+        if info is None:
+            raise KeyError(dataset_id)
+        self._touch(dataset_id)
+        with self._lock:
+            cached = self._frames.get(dataset_id)
+        if cached is None and info['format'] == 'parquet':
+            import pyarrow.parquet as pq
+            parquet_file = pq.ParquetFile(self._frame_path(dataset_id, 'parquet'))
+            if parquet_file.metadata.num_rows == 0:
+                yield parquet_file.schema_arrow.empty_table().to_pandas()
+                return
+            for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+                yield batch.to_pandas()
+            return
+
+        df = cached[0] if cached is not None else self.get(dataset_id)
+        if df is None:
+            raise KeyError(dataset_id)
+        for start in range(0, max(len(df), 1), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+
+    def _remember(self, dataset_id: str, df: pd.DataFrame):
+        """Keep a frame in the in-memory LRU (caller holds the lock)"""
+        nbytes = int(df.memory_usage(deep=True).sum())
+        if nbytes > self.memory_limit:
+            return
+        self._frames[dataset_id] = (df, nbytes)
+        self._memory_bytes += nbytes
+        while self._memory_bytes > self.memory_limit:
+            _, (_, evicted_bytes) = self._frames.popitem(last=False)
+            self._memory_bytes -= evicted_bytes
+
+    def _forget(self, dataset_id: str):
+        cached = self._frames.pop(dataset_id, None)
+        if cached is not None:
+            self._memory_bytes -= cached[1]
+
+    def _touch(self, dataset_id: str):
+        """Record use of a dataset; the metadata file's mtime is its last access for TTL eviction"""
+        try:
+            os.utime(self._meta_path(dataset_id))
+        except OSError:
+            pass
+
+    def remove(self, dataset_id: str):
+        if not DATASET_ID_PATTERN.match(dataset_id or ''):
+            return
+        with self._lock:
+            self._forget(dataset_id)
+        for name in (f"{dataset_id}.json", f"{dataset_id}.parquet", f"{dataset_id}.pkl"):
+            try:
+                os.remove(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
+
+    def evict(self, keep: str = None) -> int:
+        """Delete expired datasets, then the least recently used ones while over the size limit"""
+        if not os.path.isdir(self.root):
+            return 0
+        datasets = {}
+        for entry in os.scandir(self.root):
+            dataset_id, _, extension = entry.name.partition('.')
+            if not DATASET_ID_PATTERN.match(dataset_id):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            record = datasets.setdefault(dataset_id, {'last_used': None, 'written': 0.0, 'bytes': 0})
+            record['bytes'] += stat.st_size
+            record['written'] = max(record['written'], stat.st_mtime)
+            if extension == 'json':
+                record['last_used'] = stat.st_mtime
+        for record in datasets.values():
+            # Still being created (no metadata yet): age it from its newest file
+            if record['last_used'] is None:
+                record['last_used'] = record['written']
+
+        now = time.time()
+        total = sum(record['bytes'] for record in datasets.values())
+        removed = 0
+        for dataset_id, record in sorted(datasets.items(), key=lambda item: item[1]['last_used']):
+            if dataset_id == keep:
+                continue
+            if now - record['last_used'] > Config.DATASET_TTL or total > Config.DATASET_MAX_BYTES:
+                self.remove(dataset_id)
+                total -= record['bytes']
+                removed += 1
+        if removed:
+            self.stats['evicted'] += removed
+            logger.info(f"Evicted {removed} dataset(s)")
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'frames_in_memory': len(self._frames),
+                'memory_bytes': self._memory_bytes,
+                'parquet': PARQUET_AVAILABLE,
+                **self.stats,
+            }
+
+
+# Global dataset store instance
+dataset_store = DatasetStore()
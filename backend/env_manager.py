@@ -0,0 +1,253 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import subprocess
+import threading
+import logging
+from typing import Dict, Any, Callable, Iterable, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Packages a project's runner needs on top of its own requirements
+RUNNER_PACKAGES = {
+    'streamlit': ['streamlit'],
+    'fastapi': ['fastapi', 'uvicorn[standard]'],
+    'flask': ['flask'],
+    'web': ['flask'],
+}
+
+_NAME_PATTERN = re.compile(r'^([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+
+def normalize_requirements(lines: Iterable[str]) -> List[str]:
+    """Requirement lines without comments/blank lines/duplicates, with canonical names, sorted"""
+    normalized = set()
+    for line in lines:
+        line = line.split('#', 1)[0].strip()
+        if not line or line.startswith('-'):
+            # Options such as -r/-e/--index-url would make the environment depend on more than this file
+            continue
+        line = re.sub(r'\s+', '', line)
+        match = _NAME_PATTERN.match(line)
+        if match:
+            name = re.sub(r'[-_.]+', '-', match.group(1)).lower()
+            line = name + line[match.end():]
+        normalized.add(line)
+    return sorted(normalized)
+
+
+def _package_name(requirement: str) -> str:
+    match = _NAME_PATTERN.match(requirement)
+    return match.group(1) if match else requirement
+
+
+class Environment:
+    """A ready (or best-effort) virtualenv handed to a project run"""
+
+    def __init__(self, key: str, path: str, ok: bool = True, message: str = ''):
+        self.key = key
+        self.path = path
+        self.ok = ok
+        self.message = message
+
+    @property
+    def python(self) -> str:
+        if os.name == 'nt':
+            return os.path.join(self.path, 'Scripts', 'python.exe')
+        return os.path.join(self.path, 'bin', 'python')
+
+
+class EnvironmentManager:
+    """Shared virtualenvs for executing generated projects.
+
+    One isolated venv is built per distinct (normalized) dependency set and
+    reused by every project and run that needs the same set. Packages are
+    installed from a local wheelhouse first, so rebuilding a known stack
+    needs no index access; the least recently used environments are
+    removed once the total size exceeds ENV_CACHE_MAX_BYTES.
+    """
+
+    READY_MARKER = '.env-ready.json'
+
+    def __init__(self, root: str = None, wheelhouse: str = None, max_bytes: int = None):
+        self.root = root or Config.ENV_CACHE_DIR
+        self.wheelhouse = wheelhouse or Config.WHEELHOUSE_DIR
+        self.max_bytes = max_bytes or Config.ENV_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._processes = {}
+
+    def key_for(self, requirements: List[str]) -> str:
+        """Cache key of a dependency set for the running interpreter version"""
+        payload = json.dumps({'python': sys.version_info[:2], 'requirements': requirements})
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def requirements_for_project(self, project_path: str, project_type: str = None) -> List[str]:
+        """Normalized requirements.txt of a project plus whatever its runner needs"""
+        lines = []
+        requirements_path = os.path.join(project_path, 'requirements.txt')
+        if os.path.exists(requirements_path):
+            with open(requirements_path, 'r', encoding='utf-8', errors='replace') as f:
+                lines = f.read().splitlines()
+        requirements = normalize_requirements(lines)
+        named = {_package_name(requirement) for requirement in requirements}
+        extras = [
+            package for package in RUNNER_PACKAGES.get(project_type, [])
+            if normalize_requirements([package])[0].split('[')[0] not in named
+        ]
+        return normalize_requirements(requirements + extras)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def ensure(self, requirements: List[str], on_progress: Optional[Callable[[str], None]] = None) -> Environment:
+        """Return the environment for a dependency set, building it on first use"""
+        report = on_progress or (lambda message: logger.info(message))
+        key = self.key_for(requirements)
+        path = os.path.join(self.root, key)
+        marker = os.path.join(path, self.READY_MARKER)
+
+        with self._key_lock(key):
+            if os.path.exists(marker):
+                os.utime(marker)  # Last use, for LRU eviction
+                return Environment(key, path)
+
+            if os.path.exists(path):
+                # Left over from an interrupted or failed build
+                shutil.rmtree(path, ignore_errors=True)
+
+            report(f"Creating isolated environment for {len(requirements)} dependencies...")
+            started = time.monotonic()
+            subprocess.run([sys.executable, '-m', 'venv', path], check=True, capture_output=True,
+                           timeout=Config.ENV_BUILD_TIMEOUT)
+            env = Environment(key, path)
+
+            ok, message = True, ''
+            if requirements:
+                ok, message = self._install(env, requirements, report)
+            if not ok:
+                # Usable for this run, but rebuilt next time instead of being reused
+                return Environment(key, path, ok=False, message=message)
+
+            with open(marker, 'w', encoding='utf-8') as f:
+                json.dump({'requirements': requirements, 'created_at': time.time()}, f, indent=2)
+            report(f"Environment ready in {time.monotonic() - started:.1f}s")
+
+        self._evict(keep=key)
+        return env
+
+    def _pip(self, env: Environment, args: List[str]) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [env.python, '-m', 'pip', *args, '--disable-pip-version-check', '--quiet'],
+            capture_output=True, text=True, timeout=Config.ENV_BUILD_TIMEOUT
+        )
+
+    def _install(self, env: Environment, requirements: List[str], report: Callable[[str], None]):
+        """Install from the wheelhouse, fetching missing wheels into it first if needed; returns (ok, message)"""
+        os.makedirs(self.wheelhouse, exist_ok=True)
+        requirements_file = os.path.join(env.path, 'requirements.lock.txt')
+        with open(requirements_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(requirements) + '\n')
+
+        offline = ['install', '--no-index', '--find-links', self.wheelhouse, '-r', requirements_file]
+        try:
+            if self._pip(env, offline).returncode == 0:
+                report("Dependencies installed from local wheel cache")
+                return True, ''
+
+            report("Downloading dependencies into the wheel cache (this may take a moment)...")
+            self._pip(env, ['wheel', '--find-links', self.wheelhouse, '-w', self.wheelhouse, '-r', requirements_file])
+            result = self._pip(env, offline)
+            if result.returncode != 0:
+                # Some packages may not build as wheels; let pip resolve them directly
+                result = self._pip(env, ['install', '--find-links', self.wheelhouse, '-r', requirements_file])
+        except subprocess.TimeoutExpired:
+            return False, "Dependency installation timed out"
+
+        if result.returncode != 0:
+            return False, result.stderr[-500:]
+        report("Dependencies installed successfully")
+        return True, ''
+
+    def attach(self, env: Environment, process: subprocess.Popen):
+        """Record a process using an environment so it is not evicted underneath it"""
+        with self._lock:
+            self._processes.setdefault(env.key, []).append(process)
+
+    def _in_use(self, key: str) -> bool:
+        processes = [process for process in self._processes.get(key, []) if process.poll() is None]
+        self._processes[key] = processes
+        return bool(processes)
+
+    def _evict(self, keep: str = None):
+        """Remove least recently used environments until under the disk budget"""
+        with self._lock:
+            if not os.path.isdir(self.root):
+                return
+            environments = []
+            for entry in os.scandir(self.root):
+                marker = os.path.join(entry.path, self.READY_MARKER)
+                if entry.is_dir() and os.path.exists(marker):
+                    environments.append((os.path.getmtime(marker), _directory_size(entry.path), entry.name))
+
+            total = sum(size for _, size, _ in environments)
+            for _, size, key in sorted(environments):
+                if total <= self.max_bytes:
+                    break
+                if key == keep or self._in_use(key) or self._key_locks.get(key, threading.Lock()).locked():
+                    continue
+                logger.info(f"Evicting environment {key} ({size // (1024 * 1024)} MB)")
+                shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+                total -= size
+
+    def prewarm(self, stacks: List[List[str]] = None):
+        """Build environments for common stacks in the background"""
+        stacks = stacks if stacks is not None else Config.ENV_PREWARM_STACKS
+
+        def run():
+            for stack in stacks:
+                try:
+                    self.ensure(normalize_requirements(stack))
+                except Exception as e:
+                    logger.warning(f"Could not prewarm environment for {stack}: {e}")
+
+        if stacks:
+            threading.Thread(target=run, name="env-prewarm", daemon=True).start()
+
+    def get_stats(self) -> Dict[str, Any]:
+        environments = []
+        if os.path.isdir(self.root):
+            for entry in os.scandir(self.root):
+                marker = os.path.join(entry.path, self.READY_MARKER)
+                if entry.is_dir() and os.path.exists(marker):
+                    with open(marker, 'r', encoding='utf-8') as f:
+                        metadata = json.load(f)
+                    environments.append({
+                        'key': entry.name,
+                        'requirements': metadata.get('requirements', []),
+                        'last_used': os.path.getmtime(marker),
+                        'in_use': self._in_use(entry.name),
+                    })
+        return {'max_bytes': self.max_bytes, 'environments': environments}
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+# Global environment manager instance
+env_manager = EnvironmentManager()
@@ -1,6 +1,7 @@
 # backend/evaluator.py
 
 import google.generativeai as genai
+from llm_gateway import llm_gateway
 from .config import GENERATION_MODEL
 import json
 
@@ -33,8 +34,7 @@ def evaluate_theoretical_answer(correct_answer, user_answer):
     """
 
     try:
-        model = genai.GenerativeModel(GENERATION_MODEL)
-        response = model.generate_content(prompt)
+        response = llm_gateway.generate(prompt, role='evaluator.evaluate_theoretical_answer', feature='exam', model_name=GENERATION_MODEL)
         evaluation_text = response.text.strip()
 
         classification = "irrelevant"
@@ -82,9 +82,9 @@ def get_question_topic(question):
     Topic: 
     """
     try:
-        model = genai.GenerativeModel(GENERATION_MODEL)
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        response_text = llm_gateway.generate_text(prompt, role='evaluator.get_question_topic', feature='exam',
+                                                  model_name=GENERATION_MODEL, cache=True)
+        return response_text.strip()
     except Exception as e:
         print(f"Error extracting topic: {e}")
         return "Unknown Topic"
@@ -152,8 +152,7 @@ def generate_explanation(question, correct_answer_text, context):
         """
     
     try:
-        model = genai.GenerativeModel(GENERATION_MODEL)
-        response = model.generate_content(prompt)
+        response = llm_gateway.generate(prompt, role='evaluator.generate_explanation', feature='exam', model_name=GENERATION_MODEL)
         return response.text.strip()
     except Exception as e:
         print(f"Error generating explanation: {e}")
@@ -181,8 +180,7 @@ def generate_explanation_for_theoretical_answer(question: str, correct_answer: s
     Based on the provided context, provide a clear, concise explanation (1-2 sentences) of why the Correct Answer is correct. You should also briefly address why the user's answer was incorrect or insufficient.
     """
     try:
-        model = genai.GenerativeModel(GENERATION_MODEL)
-        response = model.generate_content(prompt)
+        response = llm_gateway.generate(prompt, role='evaluator.generate_explanation_for_theoretical_answer', feature='exam', model_name=GENERATION_MODEL)
         return response.text.strip()
     except Exception as e:
         print(f"Error generating theoretical answer explanation: {e}")
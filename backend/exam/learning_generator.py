@@ -1,5 +1,6 @@
 # backend/learning_generator.py
 import google.generativeai as genai
+from llm_gateway import llm_gateway
 from .config import GENERATION_MODEL
 from .evaluator import evaluate_theoretical_answer
 
@@ -18,8 +19,7 @@ def generate_initial_explanation(context, document_title, topic):
     """
     
     try:
-        model = genai.GenerativeModel(GENERATION_MODEL)
-        response = model.generate_content(prompt)
+        response = llm_gateway.generate(prompt, role='learning_generator.generate_initial_explanation', feature='exam', model_name=GENERATION_MODEL)
         return response.text.strip()
     except Exception as e:
         print(f"Error generating initial explanation with Gemini: {e}")
@@ -55,8 +55,7 @@ def generate_next_question(context, document_title, topic, user_message, is_corr
         End with a direct question.
         """
     try:
-        model = genai.GenerativeModel(GENERATION_MODEL)
-        response = model.generate_content(prompt)
+        response = llm_gateway.generate(prompt, role='learning_generator.generate_next_question', feature='exam', model_name=GENERATION_MODEL)
         text = response.text.strip()
         return text
     except Exception as e:
@@ -80,8 +79,7 @@ def generate_correct_answer(context, document_title, topic, question):
     """
     
     try:
-        model = genai.GenerativeModel(GENERATION_MODEL)
-        response = model.generate_content(prompt)
+        response = llm_gateway.generate(prompt, role='learning_generator.generate_correct_answer', feature='exam', model_name=GENERATION_MODEL)
         return response.text.strip()
     except Exception as e:
         print(f"Error generating correct answer with Gemini: {e}")
@@ -103,8 +101,7 @@ def generate_first_question(context, document_title, topic):
     """
 
     try:
-        model = genai.GenerativeModel(GENERATION_MODEL)
-        response = model.generate_content(prompt)
+        response = llm_gateway.generate(prompt, role='learning_generator.generate_first_question', feature='exam', model_name=GENERATION_MODEL)
         return response.text.strip()
     except Exception as e:
         print(f"Error generating first question with Gemini: {e}")
@@ -132,8 +129,7 @@ def generate_explanation_for_correct_answer(context, document_title, topic, corr
     Provide a concise explanation.
     """
     try:
-        model = genai.GenerativeModel(GENERATION_MODEL)
-        response = model.generate_content(prompt)
+        response = llm_gateway.generate(prompt, role='learning_generator.generate_explanation_for_correct_answer', feature='exam', model_name=GENERATION_MODEL)
         return response.text.strip()
     except Exception as e:
         print(f"Error generating explanation for correct answer with Gemini: {e}")
@@ -4,6 +4,7 @@ import google.generativeai as genai
 import numpy as np
 import json
 import re
+from llm_gateway import llm_gateway
 from .config import GENERATION_MODEL, local_embedding_model_instance, GEMINI_EMBEDDING_MODEL_API, LOCAL_EMBEDDING_MODEL_NAME
 
 MAX_CONTEXT_CHARS = 30000
@@ -116,8 +117,7 @@ def _extract_json_from_text(raw: str):
 
 def _safe_llm_json(prompt: str):
     """Call Gemini and return parsed JSON or raise an error."""
-    model = genai.GenerativeModel(GENERATION_MODEL)
-    resp = model.generate_content(prompt)
+    resp = llm_gateway.generate(prompt, role='quiz_generator.generate_mcq', feature='exam', model_name=GENERATION_MODEL)
     text = (getattr(resp, "text", None) or "").strip()
     
     fenced = re.search(r"```json\s*(.*?)\s*```", text, flags=re.DOTALL | re.IGNORECASE)
@@ -177,7 +177,6 @@ def retrieve_relevant_chunks(query, faiss_index, chunks, k=5):
 
 def generate_explanation(question, correct_answer, context):
     """Generates an explanation for a correct answer using the provided context."""
-    model = genai.GenerativeModel(GENERATION_MODEL)
     prompt = f"""Given the following context, explain why the correct answer to the question is what it is.
 
     Context: {context}
@@ -185,7 +184,7 @@ def generate_explanation(question, correct_answer, context):
     Correct Answer: {correct_answer}
 
     Explanation:"""
-    response = model.generate_content(prompt)
+    response = llm_gateway.generate(prompt, role='quiz_generator.generate_explanation', feature='exam', model_name=GENERATION_MODEL)
     return response.text
 
 
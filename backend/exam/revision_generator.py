@@ -5,6 +5,7 @@ from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 import google.generativeai as genai
+from llm_gateway import llm_gateway
 from .config import GENERATION_MODEL
 from flask import jsonify
 import markdown_it
@@ -30,9 +31,9 @@ def generate_topic_summary(topic, level, context):
     Format the output using clear headings and bullet points where appropriate.
     """
     try:
-        model = genai.GenerativeModel(GENERATION_MODEL)
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        response_text = llm_gateway.generate_text(prompt, role='revision_generator.generate_topic_summary', feature='exam',
+                                                  model_name=GENERATION_MODEL, cache=True)
+        return response_text.strip()
     except Exception as e:
         print(f"Error generating topic summary: {e}")
         return "Content not available due to a generation error."
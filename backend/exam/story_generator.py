@@ -1,6 +1,7 @@
 # backend/story_generator.py
 
 import google.generativeai as genai
+from llm_gateway import llm_gateway
 from .config import GENERATION_MODEL
 
 def generate_story_explanation(context, document_title):
@@ -50,8 +51,7 @@ def generate_story_explanation(context, document_title):
     """
     
     try:
-        model = genai.GenerativeModel(GENERATION_MODEL)
-        response = model.generate_content(prompt)
+        response = llm_gateway.generate(prompt, role='story_generator.generate_story_explanation', feature='exam', model_name=GENERATION_MODEL)
         return response.text
     except Exception as e:
         print(f"Error generating story explanation with Gemini: {e}")
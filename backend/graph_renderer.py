@@ -0,0 +1,432 @@
+import io
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Use non-interactive backend
+from matplotlib.figure import Figure
+import seaborn as sns
+
+from config import Config
+from worker_pool import WorkerPool
+from dataset_store import dataset_store
+from data_profiler import data_profiler
+
+logger = logging.getLogger(__name__)
+
+# Keep SVG text as text instead of glyph outlines, and element ids stable between renders;
+# set once at import, never per request
+matplotlib.rcParams['svg.fonttype'] = 'none'
+matplotlib.rcParams['svg.hashsalt'] = 'graph_renderer'
+
+GRAPHS = [
+    'missing_values_heatmap', 'data_types_distribution', 'missing_values_bar', 'data_completeness',
+    'numeric_distributions', 'correlation_matrix', 'outliers_detection', 'text_analysis',
+    'quality_heatmap', 'categorical_counts',
+]
+
+# Graphs whose payload needs a pass over the data rather than just the profile
+SCANNED_GRAPHS = {'missing_values_heatmap', 'numeric_distributions', 'correlation_matrix',
+                  'outliers_detection', 'text_analysis'}
+
+HISTOGRAM_BINS = 20
+MAX_PLOTTED_NUMERIC = 4
+MAX_PLOTTED_TEXT = 3
+
+
+def _new_figure(width: float, height: float) -> Figure:
+    # A Figure not registered with pyplot: no global state, safe to draw on any thread
+    figure = Figure(figsize=(width, height), facecolor='white')
+    figure.set_layout_engine('tight')
+    return figure
+
+
+def _draw_missing_values_heatmap(payload: Dict[str, Any]) -> Figure:
+    figure = _new_figure(12, 8)
+    ax = figure.add_subplot()
+    # One cell per (row bin, column): the share of the bin's rows missing that column
+    image = ax.imshow(payload['matrix'], aspect='auto', cmap='RdYlBu_r', vmin=0, vmax=1, interpolation='nearest')
+    figure.colorbar(image, ax=ax, label='Share of Rows Missing (per row bin)')
+    ax.set_title('Missing Values Pattern Analysis', fontsize=14, pad=20)
+    ax.set_xlabel('Column Names', fontsize=12)
+    ax.set_ylabel(f"Rows (Total: {payload['rows']:,}, {payload['bin_rows']:,} per band)", fontsize=12)
+    ax.set_xticks(range(len(payload['columns'])), payload['columns'], rotation=45, ha='right', fontsize=10)
+    ax.set_yticks([])
+    figure.text(0.02, 0.02, payload['summary'], fontsize=10,
+                bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgray", alpha=0.8))
+    return figure
+
+
+def _draw_data_types_distribution(payload: Dict[str, Any]) -> Figure:
+    figure = _new_figure(8, 6)
+    ax = figure.add_subplot()
+    ax.pie(payload['counts'], labels=payload['labels'], autopct='%1.1f%%', startangle=90,
+           colors=sns.color_palette("husl", len(payload['counts'])))
+    ax.set_title('Data Types Distribution', fontsize=12, pad=20)
+    ax.axis('equal')
+    return figure
+
+
+def _draw_missing_values_bar(payload: Dict[str, Any]) -> Figure:
+    figure = _new_figure(10, 5)
+    ax = figure.add_subplot()
+    positions = range(len(payload['counts']))
+    ax.bar(positions, payload['counts'], color='salmon', alpha=0.7)
+    ax.set_title('Missing Values Count by Column', fontsize=12, pad=20)
+    ax.set_xlabel('Columns')
+    ax.set_ylabel('Missing Values Count')
+    ax.set_xticks(positions, payload['columns'], rotation=45, ha='right')
+    ax.grid(axis='y', alpha=0.3)
+    for i, v in enumerate(payload['counts']):
+        ax.text(i, v + 0.1, str(v), ha='center', va='bottom')
+    return figure
+
+
+def _draw_data_completeness(payload: Dict[str, Any]) -> Figure:
+    figure = _new_figure(6, 6)
+    ax = figure.add_subplot()
+    ax.pie([payload['complete'], payload['missing']], labels=['Complete Data', 'Missing Data'],
+           colors=['lightgreen', 'lightcoral'], autopct='%1.1f%%', startangle=90, explode=(0.1, 0), shadow=True)
+    ax.set_title('Overall Data Completeness', fontsize=12, pad=20)
+    ax.axis('equal')
+    return figure
+
+
+def _draw_numeric_distributions(payload: Dict[str, Any]) -> Figure:
+    figure = _new_figure(15, 4)
+    histograms = payload['histograms']
+    for i, (col, edges, counts) in enumerate(histograms):
+        ax = figure.add_subplot(1, len(histograms), i + 1)
+        ax.stairs(counts, edges, fill=True, alpha=0.7, color=f'C{i}', edgecolor='black')
+        ax.set_title(col, fontsize=10)
+        ax.set_xlabel(col, fontsize=9)
+        ax.set_ylabel('Frequency', fontsize=9)
+        ax.grid(alpha=0.3)
+    figure.suptitle('Numeric Columns Distribution', fontsize=12)
+    return figure
+
+
+def _draw_correlation_matrix(payload: Dict[str, Any]) -> Figure:
+    figure = _new_figure(8, 6)
+    ax = figure.add_subplot()
+    matrix = pd.DataFrame(payload['matrix'], index=payload['columns'], columns=payload['columns'])
+    mask = np.triu(np.ones_like(matrix, dtype=bool))
+    sns.heatmap(matrix, mask=mask, annot=len(matrix) <= 15, cmap='RdBu_r', center=0, square=True,
+                fmt='.2f', cbar_kws={'shrink': 0.8}, ax=ax)
+    title = 'Correlation Matrix of Numeric Columns'
+    if payload['sampled']:
+        title += f" ({payload['sample_rows']:,} sampled rows)"
+    ax.set_title(title, fontsize=12, pad=20)
+    return figure
+
+
+def _draw_outliers_detection(payload: Dict[str, Any]) -> Figure:
+    figure = _new_figure(15, 4)
+    samples = payload['samples']
+    for i, (col, values) in enumerate(samples):
+        ax = figure.add_subplot(1, len(samples), i + 1)
+        sns.boxplot(y=values, color=f'C{i}', ax=ax)
+        ax.set_title(col, fontsize=10)
+        ax.set_ylabel(col, fontsize=9)
+    figure.suptitle('Outliers Detection (Box Plots)', fontsize=12)
+    return figure
+
+
+def _draw_text_analysis(payload: Dict[str, Any]) -> Figure:
+    figure = _new_figure(8, 5)
+    ax = figure.add_subplot()
+    for col, lengths in payload['lengths']:
+        ax.hist(lengths, bins=HISTOGRAM_BINS, alpha=0.6, label=col, edgecolor='black')
+    ax.set_title('Text Data Length Distribution', fontsize=12, pad=20)
+    ax.set_xlabel('Character Length')
+    ax.set_ylabel('Frequency')
+    ax.legend()
+    ax.grid(alpha=0.3)
+    return figure
+
+
+def _draw_quality_heatmap(payload: Dict[str, Any]) -> Figure:
+    figure = _new_figure(10, 6)
+    ax = figure.add_subplot()
+    matrix = pd.DataFrame(payload['matrix'], index=payload['columns'], columns=['Missing %', 'Data Type'])
+    sns.heatmap(matrix.T, annot=len(matrix) <= 40, cmap='RdYlBu_r', cbar_kws={'label': 'Quality Score'},
+                fmt='.1f', ax=ax)
+    ax.set_title('Data Quality Overview', fontsize=12, pad=20)
+    ax.set_xlabel('Columns')
+    ax.tick_params(axis='x', labelrotation=45)
+    return figure
+
+
+def _draw_categorical_counts(payload: Dict[str, Any]) -> Figure:
+    figure = _new_figure(10, 6)
+    ax = figure.add_subplot()
+    positions = range(len(payload['counts']))
+    ax.bar(positions, payload['counts'], color=sns.color_palette("viridis", len(payload['counts'])))
+    ax.set_title(f'Top Values in "{payload["column"]}" Column', fontsize=12, pad=20)
+    ax.set_xlabel('Categories')
+    ax.set_ylabel('Count')
+    ax.set_xticks(positions, payload['labels'], rotation=45, ha='right')
+    for i, v in enumerate(payload['counts']):
+        ax.text(i, v + 0.1, str(v), ha='center', va='bottom', fontsize=9)
+    ax.grid(axis='y', alpha=0.3)
+    return figure
+
+
+DRAW = {
+    'missing_values_heatmap': _draw_missing_values_heatmap,
+    'data_types_distribution': _draw_data_types_distribution,
+    'missing_values_bar': _draw_missing_values_bar,
+    'data_completeness': _draw_data_completeness,
+    'numeric_distributions': _draw_numeric_distributions,
+    'correlation_matrix': _draw_correlation_matrix,
+    'outliers_detection': _draw_outliers_detection,
+    'text_analysis': _draw_text_analysis,
+    'quality_heatmap': _draw_quality_heatmap,
+    'categorical_counts': _draw_categorical_counts,
+}
+
+
+def render_graph(graph: str, payload: Dict[str, Any]) -> bytes:
+    """Draw one graph from its payload and return it as SVG (runs in the worker processes)"""
+    figure = DRAW[graph](payload)
+    buffer = io.BytesIO()
+    # No date in the metadata, so the same data always gives the same bytes (and ETag)
+    figure.savefig(buffer, format='svg', bbox_inches='tight', metadata={'Date': None})
+    return buffer.getvalue()
+
+
+def _columns_of_kind(profile: Dict[str, Any], kind: str) -> List[str]:
+    return [col for col, column in profile['column_profiles'].items() if column['kind'] == kind]
+
+
+def available_graphs(profile: Dict[str, Any]) -> List[str]:
+    """The graphs that apply to a dataset, in display order"""
+    numeric = _columns_of_kind(profile, 'numeric')
+    text = _columns_of_kind(profile, 'text')
+    present = {
+        'missing_values_heatmap': profile['missing_cells'] > 0,
+        'data_types_distribution': profile['columns'] > 0,
+        'missing_values_bar': profile['missing_cells'] > 0,
+        'data_completeness': profile['rows'] * profile['columns'] > 0,
+        'numeric_distributions': any('min' in profile['column_profiles'][col] for col in numeric),
+        'correlation_matrix': len(numeric) > 1,
+        'outliers_detection': any('min' in profile['column_profiles'][col] for col in numeric),
+        'text_analysis': len(text) > 0,
+        'quality_heatmap': profile['columns'] > 0,
+        'categorical_counts': len(text) > 0 and bool(profile['column_profiles'][text[0]]['top_values']),
+    }
+    return [graph for graph in GRAPHS if present[graph]]
+
+
+class GraphRenderer:
+    """Data-quality graphs of a stored dataset, rendered as SVG and cached by (dataset id, graph).
+
+    Each graph is drawn from a small payload: counts straight from the
+    dataset profile, or one streaming pass over the data that bins the
+    missing-value matrix into at most GRAPH_HEATMAP_ROWS row bands,
+    accumulates exact histograms and keeps a uniform sample of
+    GRAPH_SAMPLE_ROWS rows for correlations, box plots and text lengths.
+    Payloads are drawn in a process pool on per-call Figures, so concurrent
+    requests never share pyplot state. Rendered SVGs are kept in an LRU of
+    GRAPH_CACHE_MAX_BYTES and re-rendered on demand after eviction.
+    """
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = max_bytes or Config.GRAPH_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # (dataset_id, graph) -> (svg, etag)
+        self._cache_bytes = 0
+        self._rendering = {}  # dataset_id -> lock
+        self._pool = WorkerPool('Graph render', Config.GRAPH_WORKERS, preload=['graph_renderer'])
+        self.stats = {'rendered': 0, 'cache_hits': 0, 'parallel_batches': 0}
+
+    def render(self, dataset_id: str, graphs: List[str] = None) -> List[str]:
+        """Make sure a dataset's graphs are cached; returns the names of those that apply
+
+        Raises KeyError for unknown datasets.
+        """
+        profile = data_profiler.get_profile(dataset_id)
+        names = available_graphs(profile)
+        if graphs is not None:
+            names = [graph for graph in names if graph in graphs]
+        with self._lock:
+            lock = self._rendering.setdefault(dataset_id, threading.Lock())
+        with lock:
+            with self._lock:
+                missing = [graph for graph in names if (dataset_id, graph) not in self._cache]
+                self.stats['cache_hits'] += len(names) - len(missing)
+            if missing:
+                payloads = self._payloads(dataset_id, profile, missing)
+                self._store(dataset_id, self._render_payloads(payloads))
+        return names
+
+    def get(self, dataset_id: str, graph: str) -> Optional[Tuple[bytes, str]]:
+        """(svg, etag) of one graph, rendering it if it isn't cached
+
+        Returns None if the graph doesn't apply to the dataset; raises
+        ValueError for unknown graph names and KeyError for unknown datasets.
+        """
+        if graph not in DRAW:
+            raise ValueError(f"Unknown graph '{graph}'. Available graphs: {', '.join(GRAPHS)}")
+        for _ in range(2):
+            with self._lock:
+                cached = self._cache.get((dataset_id, graph))
+                if cached is not None:
+                    self._cache.move_to_end((dataset_id, graph))
+                    self.stats['cache_hits'] += 1
+                    return cached
+            if not self.render(dataset_id, [graph]):
+                return None
+        # Evicted again before we could read it (cache smaller than one graph)
+        profile = data_profiler.get_profile(dataset_id)
+        svg = render_graph(graph, self._payloads(dataset_id, profile, [graph])[graph])
+        return svg, hashlib.sha256(svg).hexdigest()[:32]
+
+    def _render_payloads(self, payloads: Dict[str, Dict[str, Any]]) -> Dict[str, bytes]:
+        graphs = list(payloads)
+        if len(graphs) > 1:
+            results, parallel = self._pool.map(render_graph, graphs, [payloads[g] for g in graphs])
+            if parallel:
+                with self._lock:
+                    self.stats['parallel_batches'] += 1
+            return dict(zip(graphs, results))
+        return {graph: render_graph(graph, payloads[graph]) for graph in graphs}
+
+    def _store(self, dataset_id: str, rendered: Dict[str, bytes]):
+        with self._lock:
+            self.stats['rendered'] += len(rendered)
+            for graph, svg in rendered.items():
+                key = (dataset_id, graph)
+                if key in self._cache:
+                    self._cache_bytes -= len(self._cache.pop(key)[0])
+                self._cache[key] = (svg, hashlib.sha256(svg).hexdigest()[:32])
+                self._cache_bytes += len(svg)
+            while self._cache_bytes > self.max_bytes and len(self._cache) > 1:
+                _, (svg, _) = self._cache.popitem(last=False)
+                self._cache_bytes -= len(svg)
+
+    def _payloads(self, dataset_id: str, profile: Dict[str, Any], graphs: List[str]) -> Dict[str, Dict[str, Any]]:
+        """The data each graph is drawn from, small enough to send to a worker process"""
+        columns = profile['column_profiles']
+        numeric = _columns_of_kind(profile, 'numeric')
+        text = _columns_of_kind(profile, 'text')
+        plotted = [col for col in numeric if 'min' in columns[col]][:MAX_PLOTTED_NUMERIC]
+        total_cells = profile['rows'] * profile['columns']
+        missing_pct = profile['missing_cells'] / total_cells * 100 if total_cells else 0.0
+        scan = self._scan(dataset_id, profile, graphs, plotted, numeric, text[:MAX_PLOTTED_TEXT]) \
+            if SCANNED_GRAPHS.intersection(graphs) else {}
+
+        payloads = {}
+        for graph in graphs:
+            if graph == 'missing_values_heatmap':
+                payloads[graph] = {
+                    'matrix': scan['missing'],
+                    'columns': [str(col) for col in columns],
+                    'rows': profile['rows'],
+                    'bin_rows': scan['bin_rows'],
+                    'summary': f"Total Missing: {profile['missing_cells']:,} cells ({missing_pct:.1f}%)",
+                }
+            elif graph == 'data_types_distribution':
+                counts = pd.Series([column['dtype'] for column in columns.values()]).value_counts()
+                payloads[graph] = {'labels': counts.index.tolist(), 'counts': counts.tolist()}
+            elif graph == 'missing_values_bar':
+                missing = [(str(col), column['nulls']) for col, column in columns.items() if column['nulls']]
+                payloads[graph] = {'columns': [c for c, _ in missing], 'counts': [n for _, n in missing]}
+            elif graph == 'data_completeness':
+                payloads[graph] = {'complete': total_cells - profile['missing_cells'], 'missing': profile['missing_cells']}
+            elif graph == 'numeric_distributions':
+                payloads[graph] = {'histograms': [(str(col), *scan['histograms'][col]) for col in plotted]}
+            elif graph == 'correlation_matrix':
+                sample = scan['sample']
+                payloads[graph] = {
+                    'matrix': sample[numeric].astype('float64').corr().to_numpy(),
+                    'columns': [str(col) for col in numeric],
+                    'sampled': len(sample) < profile['rows'],
+                    'sample_rows': len(sample),
+                }
+            elif graph == 'outliers_detection':
+                sample = scan['sample']
+                payloads[graph] = {'samples': [
+                    (str(col), sample[col].astype('float64').dropna().to_numpy()) for col in plotted
+                ]}
+            elif graph == 'text_analysis':
+                sample = scan['sample']
+                payloads[graph] = {'lengths': [
+                    (str(col), sample[col].astype(str).str.len().to_numpy()) for col in text[:MAX_PLOTTED_TEXT]
+                ]}
+            elif graph == 'quality_heatmap':
+                rows = profile['rows']
+                payloads[graph] = {
+                    'columns': [str(col) for col in columns],
+                    'matrix': [[column['nulls'] / rows * 100 if rows else 0.0, 1.0 if column['kind'] == 'text' else 0.0]
+                               for column in columns.values()],
+                }
+            elif graph == 'categorical_counts':
+                col = text[0]
+                top_values = columns[col]['top_values'][:10]
+                payloads[graph] = {
+                    'column': str(col),
+                    'labels': [str(value) for value, _ in top_values],
+                    'counts': [count for _, count in top_values],
+                }
+        return payloads
+
+    def _scan(self, dataset_id: str, profile: Dict[str, Any], graphs: List[str], plotted: List[str],
+              numeric: List[str], text: List[str]) -> Dict[str, Any]:
+        """One pass over the data: binned missing matrix, exact histograms and a uniform row sample"""
+        rows = profile['rows']
+        columns = profile['column_profiles']
+        bins = max(1, min(rows, Config.GRAPH_HEATMAP_ROWS))
+        bin_rows = max(1, -(-rows // bins))
+        missing = np.zeros((-(-max(rows, 1) // bin_rows), len(columns)), dtype=np.int64)
+        histograms = {}
+        for col in plotted:
+            low, high = columns[col]['min'], columns[col]['max']
+            if low == high:
+                low, high = low - 0.5, high + 0.5
+            histograms[col] = (np.linspace(low, high, HISTOGRAM_BINS + 1), np.zeros(HISTOGRAM_BINS, dtype=np.int64))
+
+        want_missing = 'missing_values_heatmap' in graphs
+        want_histograms = 'numeric_distributions' in graphs
+        sampled = list(dict.fromkeys(numeric + text))
+        rng = np.random.default_rng(0)
+        sample_fraction = min(1.0, Config.GRAPH_SAMPLE_ROWS / max(rows, 1))
+        samples, offset = [], 0
+        for chunk in dataset_store.iter_chunks(dataset_id):
+            if not len(chunk):
+                continue
+            if want_missing:
+                # Rows are consecutive, so each bin is a contiguous run: sum the runs with reduceat
+                row_bins = np.arange(offset, offset + len(chunk)) // bin_rows
+                starts = np.flatnonzero(np.diff(row_bins, prepend=-1))
+                missing[row_bins[starts]] += np.add.reduceat(chunk.isna().to_numpy(dtype=np.int64), starts, axis=0)
+            if want_histograms:
+                for col, (edges, counts) in histograms.items():
+                    values = chunk[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                    counts += np.histogram(values[np.isfinite(values)], bins=edges)[0]
+            if sample_fraction >= 1.0:
+                samples.append(chunk[sampled])
+            else:
+                samples.append(chunk.loc[rng.random(len(chunk)) < sample_fraction, sampled])
+            offset += len(chunk)
+
+        band_sizes = np.minimum(bin_rows, np.maximum(rows - np.arange(len(missing)) * bin_rows, 1))
+        return {
+            'missing': missing / band_sizes[:, None],
+            'bin_rows': bin_rows,
+            'histograms': histograms,
+            'sample': pd.concat(samples, ignore_index=True) if samples else pd.DataFrame(columns=sampled),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'cached_graphs': len(self._cache), 'cache_bytes': self._cache_bytes, **self.stats}
+
+
+# Global graph renderer instance
+graph_renderer = GraphRenderer()
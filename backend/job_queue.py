@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+import logging
+from typing import Dict, Any, Optional, Callable
+
+from config import Config
+from async_runtime import async_runtime
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised by submit() when a mode's queue is at capacity"""
+    def __init__(self, mode: str, retry_after: int):
+        super().__init__(f"Job queue for '{mode}' is full, retry in {retry_after}s")
+        self.mode = mode
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """Persistent, prioritised job queue with a bounded worker pool per mode.
+
+    Jobs live in SQLite so queued work survives a restart. Plain handlers run
+    on worker threads; coroutine handlers run as worker tasks on the shared
+    async runtime, where a running job can be cancelled outright.
+    """
+
+    def __init__(self, db_path: str = None, max_pending: int = None):
+        self.db_path = db_path or Config.JOB_QUEUE_PATH
+        self.max_pending = max_pending or Config.JOB_QUEUE_MAX_PENDING
+        self._conn = None
+        self._lock = threading.Lock()
+        self._handlers = {}
+        self._conditions = {}
+        self._async_events = {}
+        self._running_tasks = {}
+        self._started = False
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    mode TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs(mode, status, priority, created_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def register_handler(self, mode: str, handler: Callable, workers: int):
+        """Attach the function that processes jobs of a mode and its pool size"""
+        self._handlers[mode] = {'handler': handler, 'workers': max(1, workers)}
+        self._conditions[mode] = threading.Condition()
+
+    def start(self):
+        """Requeue jobs interrupted by a restart and start the worker pools"""
+        if self._started:
+            return
+        self._started = True
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+            conn.commit()
+
+        for mode, entry in self._handlers.items():
+            if asyncio.iscoroutinefunction(entry['handler']):
+                async_runtime.submit(self._start_async_workers(mode, entry['workers']))
+            else:
+                for index in range(entry['workers']):
+                    thread = threading.Thread(
+                        target=self._thread_worker, args=(mode,), name=f"job-{mode}-{index}", daemon=True
+                    )
+                    thread.start()
+            logger.info(f"Started {entry['workers']} '{mode}' job workers")
+
+    def submit(self, job_id: str, mode: str, payload: Dict[str, Any], priority: int = 0) -> Dict[str, Any]:
+        """Queue a job; raises QueueFullError when the mode is at capacity"""
+        if mode not in self._handlers:
+            raise ValueError(f"Unknown job mode: {mode}")
+
+        with self._lock:
+            conn = self._connection()
+            pending = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE mode = ? AND status = 'queued'", (mode,)
+            ).fetchone()[0]
+            if pending >= self.max_pending:
+                raise QueueFullError(mode, self._estimate_retry_after(conn, mode))
+
+            conn.execute(
+                "INSERT INTO jobs (id, mode, payload, priority, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, mode, json.dumps(payload), int(priority), time.time())
+            )
+            conn.commit()
+
+        self._wake(mode)
+        return self.get_job(job_id)
+
+    def _estimate_retry_after(self, conn: sqlite3.Connection, mode: str) -> int:
+        """Seconds until a queued job is likely to start, from recent job durations"""
+        row = conn.execute(
+            "SELECT AVG(finished_at - started_at) FROM (SELECT finished_at, started_at FROM jobs "
+            "WHERE mode = ? AND status = 'completed' ORDER BY finished_at DESC LIMIT 20)", (mode,)
+        ).fetchone()
+        average = row[0] or Config.JOB_DEFAULT_DURATION
+        workers = self._handlers[mode]['workers']
+        return max(5, int(average / workers))
+
+    def _wake(self, mode: str):
+        """Tell an idle worker of this mode that work arrived"""
+        condition = self._conditions[mode]
+        with condition:
+            condition.notify()
+        event = self._async_events.get(mode)
+        if event is not None:
+            async_runtime.loop.call_soon_threadsafe(event.set)
+
+    def _claim_next(self, mode: str) -> Optional[Dict[str, Any]]:
+        """Atomically move the highest-priority queued job of a mode to running"""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE mode = ? AND status = 'queued' "
+                "ORDER BY priority DESC, created_at ASC LIMIT 1", (mode,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), row['id'])
+            )
+            conn.commit()
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['status'] = 'running'
+        return job
+
+    def _finish(self, job_id: str, status: str, error: str = None):
+        """Record the outcome of a job unless it was cancelled meanwhile"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ? AND status = 'running'",
+                (status, time.time(), error, job_id)
+            )
+            conn.commit()
+
+    def _thread_worker(self, mode: str):
+        """Worker loop for plain (blocking) handlers"""
+        handler = self._handlers[mode]['handler']
+        condition = self._conditions[mode]
+        while True:
+            job = self._claim_next(mode)
+            if job is None:
+                with condition:
+                    condition.wait(timeout=Config.JOB_POLL_INTERVAL)
+                continue
+            try:
+                handler(job)
+                self._finish(job['id'], 'completed')
+            except Exception as e:
+                logger.error(f"Job {job['id']} ({mode}) failed: {e}")
+                self._finish(job['id'], 'failed', str(e))
+
+    async def _start_async_workers(self, mode: str, workers: int):
+        """Create the wake-up event and worker tasks on the shared loop"""
+        self._async_events[mode] = asyncio.Event()
+        for _ in range(workers):
+            asyncio.get_running_loop().create_task(self._async_worker(mode))
+
+    async def _async_worker(self, mode: str):
+        """Worker loop for coroutine handlers"""
+        handler = self._handlers[mode]['handler']
+        event = self._async_events[mode]
+        while True:
+            event.clear()
+            job = await asyncio.to_thread(self._claim_next, mode)
+            if job is None:
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=Config.JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.get_running_loop().create_task(handler(job))
+            self._running_tasks[job['id']] = task
+            try:
+                await task
+                await asyncio.to_thread(self._finish, job['id'], 'completed')
+            except asyncio.CancelledError:
+                logger.info(f"Job {job['id']} ({mode}) cancelled while running")
+            except Exception as e:
+                logger.error(f"Job {job['id']} ({mode}) failed: {e}")
+                await asyncio.to_thread(self._finish, job['id'], 'failed', str(e))
+            finally:
+                self._running_tasks.pop(job['id'], None)
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a queued or running job; returns the job's status afterwards (None if unknown)"""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            if row['status'] not in ('queued', 'running'):
+                return row['status']
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ?", (time.time(), job_id)
+            )
+            conn.commit()
+
+        # Coroutine jobs stop immediately; thread jobs finish but their result is discarded
+        task = self._running_tasks.get(job_id)
+        if task is not None:
+            async_runtime.loop.call_soon_threadsafe(task.cancel)
+        return 'cancelled'
+
+    def is_cancelled(self, job_id: str) -> bool:
+        """True once cancel() has been called for the job"""
+        job = self.get_job(job_id)
+        return bool(job and job['status'] == 'cancelled')
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job record with its current queue position (None when not queued)"""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = dict(row)
+            job['payload'] = json.loads(job['payload'])
+            job['queue_position'] = None
+            if job['status'] == 'queued':
+                job['queue_position'] = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE mode = ? AND status = 'queued' "
+                    "AND (priority > ? OR (priority = ? AND created_at < ?))",
+                    (job['mode'], job['priority'], job['priority'], job['created_at'])
+                ).fetchone()[0] + 1
+        return job
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queued/running counts per mode"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT mode, status, COUNT(*) AS count FROM jobs "
+                "WHERE status IN ('queued', 'running') GROUP BY mode, status"
+            ).fetchall()
+        stats = {
+            mode: {'workers': entry['workers'], 'queued': 0, 'running': 0, 'max_pending': self.max_pending}
+            for mode, entry in self._handlers.items()
+        }
+        for row in rows:
+            stats.setdefault(row['mode'], {'queued': 0, 'running': 0})[row['status']] = row['count']
+        return stats
+
+
+# Global job queue instance
+job_queue = JobQueue()
@@ -9,8 +9,9 @@ class RobustJSONParser:
     A robust JSON parser that handles common issues with AI-generated JSON responses.
     """
     
-    def __init__(self):
+    def __init__(self, use_incremental: bool = True):
         self.logger = logging.getLogger(__name__)
+        self.use_incremental = use_incremental
     
     def parse_json_response(self, response: Union[str, dict], expected_keys: Optional[list] = None, 
                           agent_type: str = "unknown", project_id: str = None) -> Optional[Dict[Any, Any]]:
@@ -43,47 +44,58 @@ class RobustJSONParser:
         except json.JSONDecodeError as e:
             self.logger.debug(f"Strategy 1: Direct JSON parsing failed: {e}")
         
-        # Strategy 2: Extract JSON from text wrapper
+        # Strategy 2: Tolerant single-pass parse (fences, raw quotes/newlines, trailing commas, truncation)
+        if self.use_incremental:
+            try:
+                result = IncrementalJSONParser().parse(response)
+                if result and self._validate_json(result, expected_keys):
+                    return result
+                else:
+                    self.logger.debug(f"Strategy 2: Incremental parsing succeeded but validation failed")
+            except Exception as e:
+                self.logger.debug(f"Strategy 2: Incremental parsing failed: {e}")
+        
+        # Strategy 3: Extract JSON from text wrapper
         try:
             result = self._extract_json_from_text(response)
             if result and self._validate_json(result, expected_keys):
                 return result
             else:
-                self.logger.debug(f"Strategy 2: Text extraction succeeded but validation failed")
+                self.logger.debug(f"Strategy 3: Text extraction succeeded but validation failed")
         except Exception as e:
-            self.logger.debug(f"Strategy 2: Text extraction failed: {e}")
+            self.logger.debug(f"Strategy 3: Text extraction failed: {e}")
         
-        # Strategy 3: Fix common JSON issues and retry
+        # Strategy 4: Fix common JSON issues and retry
         try:
             fixed_response = self._fix_common_json_issues(response)
             result = json.loads(fixed_response)
             if self._validate_json(result, expected_keys):
                 return result
             else:
-                self.logger.debug(f"Strategy 3: JSON fixing succeeded but validation failed")
+                self.logger.debug(f"Strategy 4: JSON fixing succeeded but validation failed")
         except Exception as e:
-            self.logger.debug(f"Strategy 3: JSON fixing failed: {e}")
+            self.logger.debug(f"Strategy 4: JSON fixing failed: {e}")
         
-        # Strategy 4: Extract using regex patterns
+        # Strategy 5: Extract using regex patterns
         try:
             result = self._extract_json_with_regex(response)
             if result and self._validate_json(result, expected_keys):
                 return result
             else:
-                self.logger.debug(f"Strategy 4: Regex extraction succeeded but validation failed")
+                self.logger.debug(f"Strategy 5: Regex extraction succeeded but validation failed")
         except Exception as e:
-            self.logger.debug(f"Strategy 4: Regex extraction failed: {e}")
+            self.logger.debug(f"Strategy 5: Regex extraction failed: {e}")
         
-        # Strategy 5: Clean and normalize the JSON string
+        # Strategy 6: Clean and normalize the JSON string
         try:
             cleaned_response = self._clean_json_string(response)
             result = json.loads(cleaned_response)
             if self._validate_json(result, expected_keys):
                 return result
             else:
-                self.logger.debug(f"Strategy 5: String cleaning succeeded but validation failed")
+                self.logger.debug(f"Strategy 6: String cleaning succeeded but validation failed")
         except Exception as e:
-            self.logger.debug(f"Strategy 5: String cleaning failed: {e}")
+            self.logger.debug(f"Strategy 6: String cleaning failed: {e}")
         
         self.logger.error(f"Failed to parse JSON response after all strategies. Response preview: {response[:200]}...")
         
@@ -448,5 +460,291 @@ if __name__ == "__main__":
         
         return files
 
+
+class IncrementalJSONParser:
+    """
+    Single-pass, tolerant JSON parser that can be fed a response chunk by chunk.
+
+    Skips markdown fences and prose around the payload, accepts raw newlines
+    and invalid escapes inside strings, treats unescaped quotes as literal
+    text when they cannot end the string, ignores trailing commas and closes
+    whatever is still open when the input is truncated. Entries of the
+    top-level "files" array are returned by feed() as soon as they close.
+    """
+
+    WHITESPACE = ' \t\r\n'
+    ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+    STRING_SPECIAL = re.compile(r'["\\]')
+    LITERAL = re.compile(r'-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null')
+    LITERAL_RUN = re.compile(r'[-+.\w]*')  # everything that could still belong to a literal
+    DELIMITERS = ' \t\r\n,}]:'
+    NEXT_KEY = re.compile(r',\s*"(?:[^"\\\n]|\\.)*"\s*:')
+    TRAILING_COMMA = re.compile(r',\s*[}\]]')
+
+    def __init__(self, files_key: str = "files"):
+        self.buffer = ""
+        self.pos = 0
+        self.root = None
+        self.done = False
+        self._stack = []
+        self._string = None
+        self._string_is_key = False
+        self._files_key = files_key
+        self._files_depth = None
+        self._completed = []
+        self._truncated = False
+
+    def feed(self, chunk: str) -> list:
+        """Add a chunk of text; returns the files[] entries completed by it"""
+        self.buffer += chunk
+        already = len(self._completed)
+        self._advance(final=False)
+        return self._completed[already:]
+
+    def finish(self) -> Any:
+        """Parse whatever is left and close open strings/containers; returns the root value"""
+        self._advance(final=True)
+        self._truncated = not self.done
+        if self._string is not None:
+            self._end_string(''.join(self._string))
+        while self._stack:
+            self._close_container()
+        return self.root
+
+    def parse(self, text: str) -> Any:
+        """Parse a complete response in one call"""
+        self.feed(text)
+        return self.finish()
+
+    @property
+    def completed_files(self) -> list:
+        return list(self._completed)
+
+    def current_file(self) -> Optional[str]:
+        """Path of the files[] entry currently being streamed, if it is known yet"""
+        if self._files_depth is None or len(self._stack) <= self._files_depth:
+            return None
+        entry = self._stack[self._files_depth]['value']
+        if isinstance(entry, dict):
+            return entry.get('path') or entry.get('filename')
+        return None
+
+    def _advance(self, final: bool):
+        buf = self.buffer
+        while self.pos < len(buf) and not self.done:
+            if self._string is not None:
+                if not self._scan_string(final):
+                    return
+                continue
+
+            char = buf[self.pos]
+            if self.root is None:
+                # Skip fences/prose before the payload
+                starts = [index for index in (buf.find('{', self.pos), buf.find('[', self.pos)) if index != -1]
+                if not starts:
+                    self.pos = len(buf)
+                    return
+                self.pos = min(starts)
+                opens = self._opens_payload(self.pos, final)
+                if opens is None:
+                    return
+                if not opens:
+                    # A bracket in prose ("{note}", "[1]"), not the start of the payload
+                    self.pos += 1
+                    continue
+                char = buf[self.pos]
+
+            if char in self.WHITESPACE:
+                self.pos += 1
+            elif char in '{[':
+                self._open_container({} if char == '{' else [])
+                self.pos += 1
+            elif char in '}]':
+                self._close_container()
+                self.pos += 1
+            elif char == '"':
+                frame = self._stack[-1] if self._stack else None
+                self._string_is_key = bool(frame) and isinstance(frame['value'], dict) and frame['key'] is None
+                self._string = []
+                self.pos += 1
+            elif char == ':':
+                self.pos += 1
+            elif char == ',':
+                frame = self._stack[-1] if self._stack else None
+                if frame and isinstance(frame['value'], dict):
+                    frame['key'] = None
+                self.pos += 1
+            else:
+                match = self.LITERAL.match(buf, self.pos)
+                if match and match.end() < len(buf) and buf[match.end()] in self.DELIMITERS:
+                    self._add_value(json.loads(match.group()))
+                    self.pos = match.end()
+                elif not final and self.LITERAL_RUN.match(buf, self.pos).end() == len(buf):
+                    # Runs into the chunk boundary: "-1" may yet become "-1.5e3"
+                    return
+                elif match:
+                    # Complete input, or followed by junk the tolerant parser skips next
+                    self._add_value(json.loads(match.group()))
+                    self.pos = match.end()
+                else:
+                    self.pos += 1
+
+    def _scan_string(self, final: bool) -> bool:
+        """Consume string content; returns False when more input is needed"""
+        buf = self.buffer
+        match = self.STRING_SPECIAL.search(buf, self.pos)
+        if match is None:
+            self._string.append(buf[self.pos:])
+            self.pos = len(buf)
+            return final
+        index = match.start()
+        self._string.append(buf[self.pos:index])
+        self.pos = index
+
+        if buf[index] == '\\':
+            if index + 1 >= len(buf):
+                if final:
+                    self._string.append('\\')
+                    self.pos = len(buf)
+                return final
+            escaped = buf[index + 1]
+            if escaped == 'u':
+                code = buf[index + 2:index + 6]
+                if len(code) < 4 and not final:
+                    return False
+                try:
+                    self._string.append(chr(int(code, 16)))
+                    self.pos = index + 6
+                except ValueError:
+                    self._string.append('\\u')
+                    self.pos = index + 2
+            else:
+                # Unknown escapes (e.g. regex "\d" in generated code) are kept verbatim
+                self._string.append(self.ESCAPES.get(escaped, '\\' + escaped))
+                self.pos = index + 2
+            return True
+
+        closes = self._closes_string(index, final)
+        if closes is None:
+            return False
+        self.pos = index + 1
+        if closes:
+            text = ''.join(self._string)
+            self._string = None
+            self._end_string(text)
+        else:
+            self._string.append('"')
+        return True
+
+    def _opens_payload(self, index: int, final: bool) -> Optional[bool]:
+        """Whether the bracket at index can start a JSON value (None: undecidable until more input arrives)"""
+        buf = self.buffer
+        after = self._next_significant(index + 1)
+        if after >= len(buf):
+            return True if final else None
+        if buf[index] == '{':
+            return buf[after] in '"}'
+        if buf[after] in '"{[]-0123456789':
+            return True
+        literal = self.LITERAL.match(buf, after)
+        if literal is None and not final and self.LITERAL_RUN.match(buf, after).end() == len(buf):
+            return None
+        return literal is not None
+
+    def _next_significant(self, index: int) -> int:
+        buf = self.buffer
+        while index < len(buf) and buf[index] in self.WHITESPACE:
+            index += 1
+        return index
+
+    def _closes_string(self, quote: int, final: bool) -> Optional[bool]:
+        """Whether a quote ends the current string (None: undecidable until more input arrives)"""
+        buf = self.buffer
+        index = self._next_significant(quote + 1)
+        if index >= len(buf):
+            return True if final else None
+        char = buf[index]
+
+        if self._string_is_key:
+            return char in ':,}'
+        if char == ':':
+            return False
+        if char in '}]':
+            # Closing the root ends the payload, whatever prose follows it
+            if len(self._stack) == 1 and char == ('}' if isinstance(self._stack[0]['value'], dict) else ']'):
+                return True
+            # Elsewhere only a real close if what follows the bracket is structural too
+            after = self._next_significant(index + 1)
+            if after >= len(buf):
+                return True if final else None
+            return buf[after] in ',}]`'
+        if char != ',':
+            return False
+
+        frame = self._stack[-1] if self._stack else None
+        if frame is not None and isinstance(frame['value'], list):
+            after = self._next_significant(index + 1)
+            if after >= len(buf):
+                return True if final else None
+            return buf[after] in '"{[-0123456789tfn]'
+
+        if self.NEXT_KEY.match(buf, index) or self.TRAILING_COMMA.match(buf, index):
+            return True
+        if not final and len(buf) - index < 256 and buf.find(':', index) == -1:
+            return None
+        return False
+
+    def _end_string(self, text: str):
+        frame = self._stack[-1] if self._stack else None
+        if self._string_is_key and frame is not None:
+            frame['key'] = text
+        else:
+            self._add_value(text)
+
+    def _add_value(self, value: Any):
+        frame = self._stack[-1] if self._stack else None
+        if frame is None:
+            return
+        container = frame['value']
+        if isinstance(container, list):
+            container.append(value)
+        elif frame['key'] is not None:
+            container[frame['key']] = value
+            frame['key'] = None
+
+    def _open_container(self, container):
+        if self.root is None:
+            self.root = container
+        else:
+            parent = self._stack[-1] if self._stack else None
+            if parent is None:
+                return
+            if (len(self._stack) == 1 and isinstance(container, list)
+                    and isinstance(parent['value'], dict) and parent['key'] == self._files_key):
+                self._files_depth = 2
+            self._add_value(container)
+        self._stack.append({'value': container, 'key': None})
+
+    def _close_container(self):
+        if not self._stack:
+            return
+        frame = self._stack.pop()
+        depth = len(self._stack)
+        if self._files_depth is not None:
+            if depth == self._files_depth and isinstance(frame['value'], dict) and not self._truncated:
+                self._completed.append(frame['value'])
+            elif depth == self._files_depth - 1:
+                self._drop_partial_file()
+                self._files_depth = None
+        if not self._stack:
+            self.done = True
+
+    def _drop_partial_file(self):
+        """On truncated input keep only files[] entries that were fully received"""
+        files = self._stack[-1]['value'].get(self._files_key) if self._stack else None
+        if isinstance(files, list) and files and not any(files[-1] is entry for entry in self._completed):
+            files.pop()
+
+
 # Global parser instance
 json_parser = RobustJSONParser()
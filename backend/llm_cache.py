@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import logging
+from typing import Dict, Any, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """SQLite-backed cache for deterministic LLM prompts.
+
+    Entries are keyed by a hash of (model, agent scope, prompt, generation
+    config), expire after a TTL and are evicted least-recently-used once the
+    stored responses exceed a byte budget.
+    """
+
+    def __init__(self, db_path: str = None, max_bytes: int = None, ttl_seconds: int = None):
+        self.db_path = db_path or Config.LLM_CACHE_PATH
+        self.max_bytes = max_bytes or Config.LLM_CACHE_MAX_BYTES
+        self.ttl_seconds = ttl_seconds or Config.LLM_CACHE_TTL
+        self._conn = None
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    role TEXT,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(model_name: str, scope: str, prompt: str,
+                 generation_config: Optional[Dict[str, Any]] = None) -> str:
+        """Content hash identifying one deterministic request"""
+        payload = json.dumps({
+            'model': model_name,
+            'scope': scope,
+            'prompt': prompt,
+            'generation_config': generation_config or {},
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _count(self, role: str, field: str):
+        stats = self._stats.setdefault(role, {'hits': 0, 'misses': 0})
+        stats[field] += 1
+
+    def get(self, key: str, role: str = 'default') -> Optional[str]:
+        """Return a cached response, or None on miss/expiry"""
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                    row = None
+                if row is None:
+                    self._count(role, 'misses')
+                    return None
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                conn.commit()
+                self._count(role, 'hits')
+                return row[0]
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache read failed: {e}")
+                self._count(role, 'misses')
+                return None
+
+    def put(self, key: str, response: str, role: str = 'default', model_name: str = None):
+        """Store a response and evict LRU entries beyond the byte budget"""
+        if not response:
+            return
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, role, model, response, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, role, model_name, response, size, now, now)
+                )
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-role hit/miss counters plus storage usage"""
+        with self._lock:
+            roles = {}
+            for role, stats in self._stats.items():
+                lookups = stats['hits'] + stats['misses']
+                roles[role] = dict(stats)
+                roles[role]['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+            entries, total_bytes = 0, 0
+            try:
+                entries, total_bytes = self._connection().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+            except sqlite3.Error:
+                pass
+        return {
+            'enabled': Config.LLM_CACHE_ENABLED,
+            'entries': entries,
+            'total_bytes': total_bytes,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'roles': roles,
+        }
+
+
+# Global cache instance
+response_cache = ResponseCache()
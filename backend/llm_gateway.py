@@ -0,0 +1,329 @@
+import asyncio
+import threading
+import time
+import logging
+from typing import Dict, Any, Optional
+
+import google.generativeai as genai
+from config import Config
+from llm_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+
+class LLMGatewayError(Exception):
+    """Raised when the gateway cannot serve a request (saturated or timed out)"""
+    pass
+
+
+class LLMGateway:
+    """Process-wide access point for Gemini calls.
+
+    Keeps one model handle per model name, caps concurrency globally and per
+    feature, applies a deadline to every call and records latency/token
+    counters per agent role.
+    """
+
+    # Seconds between slot checks while an async caller waits for capacity
+    ASYNC_POLL_INTERVAL = 0.05
+
+    def __init__(self):
+        self._configured = False
+        self._models = {}
+        self._models_lock = threading.Lock()
+
+        self._global_semaphore = threading.BoundedSemaphore(Config.LLM_MAX_CONCURRENCY)
+        self._feature_semaphores = {}
+        self._feature_limits = {}
+        self._feature_in_flight = {}
+        self._feature_lock = threading.Lock()
+
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def _ensure_configured(self):
+        """Configure the Gemini client once for the whole process"""
+        if not self._configured:
+            if Config.GOOGLE_API_KEY:
+                genai.configure(api_key=Config.GOOGLE_API_KEY)
+            self._configured = True
+
+    def get_model(self, model_name: str = None):
+        """Return the pooled model handle for a model name"""
+        model_name = model_name or Config.LLM_DEFAULT_MODEL
+        with self._models_lock:
+            model = self._models.get(model_name)
+            if model is None:
+                self._ensure_configured()
+                model = genai.GenerativeModel(model_name)
+                self._models[model_name] = model
+            return model
+
+    def _get_feature_semaphore(self, feature: str):
+        """Return (creating on first use) the semaphore guarding a feature"""
+        with self._feature_lock:
+            semaphore = self._feature_semaphores.get(feature)
+            if semaphore is None:
+                limit = Config.LLM_FEATURE_CONCURRENCY.get(feature, Config.LLM_DEFAULT_FEATURE_CONCURRENCY)
+                semaphore = threading.BoundedSemaphore(limit)
+                self._feature_semaphores[feature] = semaphore
+                self._feature_limits[feature] = limit
+                self._feature_in_flight[feature] = 0
+            return semaphore
+
+    def _acquire(self, feature: str, wait_timeout: float):
+        """Take a feature slot, then a global slot; returns seconds spent waiting"""
+        started = time.monotonic()
+        feature_semaphore = self._get_feature_semaphore(feature)
+        if not feature_semaphore.acquire(timeout=wait_timeout):
+            raise LLMGatewayError(f"LLM concurrency limit reached for feature '{feature}'")
+
+        remaining = max(0.0, wait_timeout - (time.monotonic() - started))
+        if not self._global_semaphore.acquire(timeout=remaining):
+            feature_semaphore.release()
+            raise LLMGatewayError("Global LLM concurrency limit reached")
+
+        with self._feature_lock:
+            self._feature_in_flight[feature] += 1
+        return time.monotonic() - started
+
+    async def _acquire_async(self, feature: str, wait_timeout: float):
+        """Non-blocking variant of _acquire for use on an event loop"""
+        started = time.monotonic()
+        deadline = started + wait_timeout
+        feature_semaphore = self._get_feature_semaphore(feature)
+        while not feature_semaphore.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                raise LLMGatewayError(f"LLM concurrency limit reached for feature '{feature}'")
+            await asyncio.sleep(self.ASYNC_POLL_INTERVAL)
+
+        while not self._global_semaphore.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                feature_semaphore.release()
+                raise LLMGatewayError("Global LLM concurrency limit reached")
+            await asyncio.sleep(self.ASYNC_POLL_INTERVAL)
+
+        with self._feature_lock:
+            self._feature_in_flight[feature] += 1
+        return time.monotonic() - started
+
+    def _release(self, feature: str):
+        """Return the slots taken by _acquire"""
+        with self._feature_lock:
+            self._feature_in_flight[feature] -= 1
+        self._global_semaphore.release()
+        self._feature_semaphores[feature].release()
+
+    def _record(self, role: str, feature: str, latency: float, queue_wait: float,
+                response=None, error: Exception = None, first_chunk: float = None):
+        """Update the per-role counters for one call"""
+        prompt_tokens = 0
+        response_tokens = 0
+        usage = getattr(response, 'usage_metadata', None) if response is not None else None
+        if usage is not None:
+            prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+            response_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+
+        with self._stats_lock:
+            stats = self._stats.setdefault(role, {
+                'feature': feature,
+                'calls': 0,
+                'errors': 0,
+                'timeouts': 0,
+                'total_latency': 0.0,
+                'max_latency': 0.0,
+                'total_queue_wait': 0.0,
+                'prompt_tokens': 0,
+                'response_tokens': 0,
+                'streamed_calls': 0,
+                'total_time_to_first_chunk': 0.0,
+            })
+            stats['calls'] += 1
+            stats['total_latency'] += latency
+            stats['max_latency'] = max(stats['max_latency'], latency)
+            stats['total_queue_wait'] += queue_wait
+            stats['prompt_tokens'] += prompt_tokens
+            stats['response_tokens'] += response_tokens
+            if first_chunk is not None:
+                stats['streamed_calls'] += 1
+                stats['total_time_to_first_chunk'] += first_chunk
+            if error is not None:
+                stats['errors'] += 1
+                if _is_timeout(error):
+                    stats['timeouts'] += 1
+
+    def generate(self, prompt: str, role: str = 'default', feature: str = 'default',
+                 model_name: str = None, timeout: float = None,
+                 generation_config: Optional[Dict[str, Any]] = None):
+        """Run generate_content under the concurrency limits and return the raw response"""
+        timeout = timeout or Config.LLM_REQUEST_TIMEOUT
+        model = self.get_model(model_name)
+
+        queue_wait = self._acquire(feature, Config.LLM_QUEUE_TIMEOUT)
+        started = time.monotonic()
+        try:
+            response = model.generate_content(
+                prompt,
+                generation_config=generation_config,
+                request_options={"timeout": timeout}
+            )
+        except Exception as e:
+            self._record(role, feature, time.monotonic() - started, queue_wait, error=e)
+            logger.warning(f"LLM call failed for role '{role}' ({feature}): {e}")
+            raise
+        finally:
+            self._release(feature)
+
+        self._record(role, feature, time.monotonic() - started, queue_wait, response=response)
+        return response
+
+    def generate_stream(self, prompt: str, on_chunk, role: str = 'default', feature: str = 'default',
+                        model_name: str = None, timeout: float = None,
+                        generation_config: Optional[Dict[str, Any]] = None) -> str:
+        """Stream a response, calling on_chunk(text) per chunk; returns the full text"""
+        timeout = timeout or Config.LLM_REQUEST_TIMEOUT
+        model = self.get_model(model_name)
+
+        queue_wait = self._acquire(feature, Config.LLM_QUEUE_TIMEOUT)
+        started = time.monotonic()
+        first_chunk = None
+        parts = []
+        try:
+            response = model.generate_content(
+                prompt,
+                generation_config=generation_config,
+                stream=True,
+                request_options={"timeout": timeout}
+            )
+            for chunk in response:
+                text = chunk.text
+                if not text:
+                    continue
+                if first_chunk is None:
+                    first_chunk = time.monotonic() - started
+                parts.append(text)
+                on_chunk(text)
+        except Exception as e:
+            self._record(role, feature, time.monotonic() - started, queue_wait, error=e)
+            logger.warning(f"LLM stream failed for role '{role}' ({feature}): {e}")
+            raise
+        finally:
+            self._release(feature)
+
+        self._record(role, feature, time.monotonic() - started, queue_wait, response=response,
+                     first_chunk=first_chunk)
+        return ''.join(parts)
+
+    async def generate_async(self, prompt: str, role: str = 'default', feature: str = 'default',
+                             model_name: str = None, timeout: float = None,
+                             generation_config: Optional[Dict[str, Any]] = None):
+        """Async generate() built on generate_content_async; never blocks the event loop"""
+        timeout = timeout or Config.LLM_REQUEST_TIMEOUT
+        model = self.get_model(model_name)
+
+        queue_wait = await self._acquire_async(feature, Config.LLM_QUEUE_TIMEOUT)
+        started = time.monotonic()
+        try:
+            response = await model.generate_content_async(
+                prompt,
+                generation_config=generation_config,
+                request_options={"timeout": timeout}
+            )
+        except Exception as e:
+            self._record(role, feature, time.monotonic() - started, queue_wait, error=e)
+            logger.warning(f"LLM call failed for role '{role}' ({feature}): {e}")
+            raise
+        finally:
+            self._release(feature)
+
+        self._record(role, feature, time.monotonic() - started, queue_wait, response=response)
+        return response
+
+    def _cache_lookup(self, cache: bool, cache_scope: str, role: str, model_name: str,
+                      prompt: str, generation_config: Optional[Dict[str, Any]]):
+        """Return (cache_key, cached_text); cache_key is None when caching is off"""
+        if not cache or not Config.LLM_CACHE_ENABLED:
+            return None, None
+        cache_key = response_cache.make_key(
+            model_name or Config.LLM_DEFAULT_MODEL, cache_scope or role, prompt, generation_config
+        )
+        return cache_key, response_cache.get(cache_key, role=role)
+
+    def generate_text(self, prompt: str, role: str = 'default', feature: str = 'default',
+                      model_name: str = None, timeout: float = None,
+                      generation_config: Optional[Dict[str, Any]] = None,
+                      cache: bool = False, cache_scope: str = '') -> str:
+        """Same as generate() but returns the response text.
+
+        With cache=True the text is looked up in (and stored to) the response
+        cache; only pass it for prompts fully determined by their inputs.
+        cache_scope should carry anything besides the prompt that shapes the
+        answer, e.g. the agent's role/goal/backstory.
+        """
+        cache_key, cached = self._cache_lookup(cache, cache_scope, role, model_name, prompt, generation_config)
+        if cached is not None:
+            return cached
+
+        response = self.generate(prompt, role=role, feature=feature, model_name=model_name,
+                                 timeout=timeout, generation_config=generation_config)
+        text = response.text
+        if cache_key is not None:
+            response_cache.put(cache_key, text, role=role, model_name=model_name or Config.LLM_DEFAULT_MODEL)
+        return text
+
+    async def generate_text_async(self, prompt: str, role: str = 'default', feature: str = 'default',
+                                  model_name: str = None, timeout: float = None,
+                                  generation_config: Optional[Dict[str, Any]] = None,
+                                  cache: bool = False, cache_scope: str = '') -> str:
+        """Async counterpart of generate_text()"""
+        cache_key, cached = self._cache_lookup(cache, cache_scope, role, model_name, prompt, generation_config)
+        if cached is not None:
+            return cached
+
+        response = await self.generate_async(prompt, role=role, feature=feature, model_name=model_name,
+                                             timeout=timeout, generation_config=generation_config)
+        text = response.text
+        if cache_key is not None:
+            response_cache.put(cache_key, text, role=role, model_name=model_name or Config.LLM_DEFAULT_MODEL)
+        return text
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of per-role metrics and current feature utilisation"""
+        with self._stats_lock:
+            roles = {}
+            for role, stats in self._stats.items():
+                calls = stats['calls'] or 1
+                roles[role] = dict(stats)
+                roles[role]['avg_latency'] = round(stats['total_latency'] / calls, 3)
+                roles[role]['avg_queue_wait'] = round(stats['total_queue_wait'] / calls, 3)
+                if stats['streamed_calls']:
+                    roles[role]['avg_time_to_first_chunk'] = round(
+                        stats['total_time_to_first_chunk'] / stats['streamed_calls'], 3
+                    )
+
+        with self._feature_lock:
+            features = {
+                feature: {
+                    'limit': self._feature_limits[feature],
+                    'in_flight': self._feature_in_flight[feature],
+                }
+                for feature in self._feature_semaphores
+            }
+
+        return {
+            'global_limit': Config.LLM_MAX_CONCURRENCY,
+            'pooled_models': list(self._models.keys()),
+            'features': features,
+            'roles': roles,
+            'cache': response_cache.get_stats(),
+        }
+
+
+def _is_timeout(error: Exception) -> bool:
+    """Best-effort check for deadline errors raised by the client library"""
+    name = type(error).__name__.lower()
+    return 'timeout' in name or 'deadline' in name or 'timed out' in str(error).lower()
+
+
+# Global gateway instance
+llm_gateway = LLMGateway()
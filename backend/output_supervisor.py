@@ -0,0 +1,220 @@
+import os
+import time
+import selectors
+import subprocess
+import threading
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import Config
+from progress_broadcaster import progress_broadcaster
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 64 * 1024
+
+
+class _ProjectLog:
+    """Ring buffer of a project's output lines, numbered across runs"""
+
+    def __init__(self):
+        self.lines = deque(maxlen=Config.PROJECT_LOG_LINES)
+        self.sequence = 0
+        self.process = None
+        self.run = None
+
+
+class _RunState:
+    """Pipes of one watched process that are still open"""
+
+    def __init__(self, open_streams: int, first_seq: int):
+        self.open_streams = open_streams
+        self.first_seq = first_seq
+        self.bytes = 0
+        self.closed = threading.Event()
+        if open_streams <= 0:
+            self.closed.set()
+
+
+class OutputSupervisor:
+    """Drains stdout/stderr of running projects so they never block on a full pipe.
+
+    One selector thread reads every watched pipe as data arrives, splits it
+    into lines and appends them to the project's ring buffer. New lines are
+    sent to the project's Socket.IO room as 'project_output' and can be paged
+    through with lines_since(), so output is visible while the app runs
+    rather than only after communicate().
+    """
+
+    def __init__(self):
+        self._selector = None
+        self._lock = threading.Lock()
+        self._logs = {}
+        self._thread = None
+        self._wakeup_r = self._wakeup_w = None
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._thread = threading.Thread(target=self._run, name="output-supervisor", daemon=True)
+        self._thread.start()
+
+    def watch(self, project_id: str, process: subprocess.Popen):
+        """Start draining a process's stdout/stderr pipes into the project's log"""
+        streams = [(name, getattr(process, name)) for name in ('stdout', 'stderr') if getattr(process, name)]
+        with self._lock:
+            log = self._logs.setdefault(project_id, _ProjectLog())
+            log.process = process
+            run = log.run = _RunState(len(streams), log.sequence + 1)
+            if not streams:
+                return
+            if os.name == 'nt':
+                # Pipes can't be selected on Windows; fall back to a reader thread per stream
+                for name, stream in streams:
+                    threading.Thread(target=self._read_blocking, args=(project_id, log, run, name, stream),
+                                     daemon=True).start()
+                return
+            self._ensure_started()
+            for name, stream in streams:
+                os.set_blocking(stream.fileno(), False)
+                self._selector.register(stream.fileno(), selectors.EVENT_READ,
+                                        (project_id, log, run, name, stream, []))
+        os.write(self._wakeup_w, b'\0')
+
+    def _run(self):
+        while True:
+            try:
+                events = self._selector.select(timeout=1.0)
+            except Exception as e:
+                logger.error(f"Output supervisor select failed: {e}")
+                time.sleep(1)
+                continue
+            for key, _ in events:
+                if key.data is None:
+                    try:
+                        os.read(self._wakeup_r, 4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                self._drain(key)
+
+    def _drain(self, key):
+        project_id, log, run, name, stream, partial = key.data
+        try:
+            data = os.read(key.fd, READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+
+        if data:
+            run.bytes += len(data)
+            *complete, rest = (b''.join(partial) + data).split(b'\n')
+            partial[:] = [rest] if rest else []
+            if len(rest) > READ_SIZE:
+                # Don't let a never-ending line grow without bound
+                complete.append(rest)
+                partial.clear()
+            self._append(project_id, log, name, complete)
+            return
+
+        # EOF: flush the unterminated last line and stop watching this pipe
+        self._append(project_id, log, name, partial)
+        with self._lock:
+            self._selector.unregister(key.fd)
+        try:
+            stream.close()
+        except Exception:
+            pass
+        self._stream_closed(run)
+
+    def _read_blocking(self, project_id: str, log: _ProjectLog, run: _RunState, name: str, stream):
+        try:
+            for line in stream:
+                run.bytes += len(line)
+                self._append(project_id, log, name, [line.encode('utf-8', errors='replace') if isinstance(line, str) else line])
+        except (OSError, ValueError):
+            pass
+        self._stream_closed(run)
+
+    def _stream_closed(self, run: _RunState):
+        with self._lock:
+            run.open_streams -= 1
+            if run.open_streams <= 0:
+                run.closed.set()
+
+    def _append(self, project_id: str, log: _ProjectLog, stream_name: str, raw_lines: List[bytes]):
+        if not raw_lines:
+            return
+        timestamp = datetime.now().isoformat()
+        entries = []
+        with self._lock:
+            for raw in raw_lines:
+                log.sequence += 1
+                entry = {
+                    'seq': log.sequence,
+                    'stream': stream_name,
+                    'line': raw.decode('utf-8', errors='replace').rstrip('\r\n'),
+                    'timestamp': timestamp,
+                }
+                log.lines.append(entry)
+                entries.append(entry)
+        # Clients page through lines_since() to catch up, so lines are not kept in the event replay log
+        progress_broadcaster.publish(project_id, 'project_output', {'project_id': project_id, 'lines': entries},
+                                     replay=False)
+
+    def lines_since(self, project_id: str, since: int = 0, limit: int = None) -> Dict[str, Any]:
+        """Buffered lines after sequence number since, oldest first"""
+        limit = limit or Config.PROJECT_LOG_PAGE_SIZE
+        with self._lock:
+            log = self._logs.get(project_id)
+            if log is None:
+                return {'lines': [], 'next': since, 'has_more': False, 'running': False}
+            lines = [entry for entry in log.lines if entry['seq'] > since]
+            running = log.process is not None and log.process.poll() is None
+        page = lines[:limit]
+        return {
+            'lines': page,
+            'next': page[-1]['seq'] if page else max(since, 0),
+            'has_more': len(lines) > limit,
+            # Above since + 1 when older lines were already dropped from the ring buffer
+            'oldest': lines[0]['seq'] if lines else None,
+            'running': running,
+        }
+
+    def communicate(self, project_id: str, process: subprocess.Popen,
+                    timeout: Optional[float] = None) -> Tuple[str, str]:
+        """Like Popen.communicate() for a watched process: wait for exit, then return the buffered output"""
+        process.wait(timeout=timeout)
+        with self._lock:
+            log = self._logs.get(project_id)
+        if log is None:
+            return '', ''
+        # Children that inherited the pipes may keep them open; don't wait on them forever
+        log.run.closed.wait(timeout=2)
+        with self._lock:
+            entries = [entry for entry in log.lines if entry['seq'] >= log.run.first_seq]
+        return (
+            '\n'.join(entry['line'] for entry in entries if entry['stream'] == 'stdout'),
+            '\n'.join(entry['line'] for entry in entries if entry['stream'] == 'stderr'),
+        )
+
+    def output_bytes(self, project_id: str) -> int:
+        """Bytes the project's current run has written to stdout/stderr so far"""
+        with self._lock:
+            log = self._logs.get(project_id)
+            return log.run.bytes if log is not None and log.run is not None else 0
+
+    def forget(self, project_id: str):
+        with self._lock:
+            self._logs.pop(project_id, None)
+
+
+# Global output supervisor instance
+output_supervisor = OutputSupervisor()
@@ -1,8 +1,22 @@
 import os
 import json
 import datetime
+import time
 from typing import Dict, Any, Optional
 
+# Responses with a known correct parse, replayed by benchmark_parsers() next to the logged failures
+BENCHMARK_SAMPLES = [
+    ("builtin:trailing_prose",
+     '{"project_name": "Calc", "description": "A calculator"}\n\nThis plan covers everything you need.',
+     {"project_name": "Calc", "description": "A calculator"}),
+    ("builtin:trailing_object",
+     '{"a": "x"} trailing {"b": 2}',
+     {"a": "x"}),
+    ("builtin:braces_in_prose",
+     'Sure! {note} Here: {"a": 1}',
+     {"a": 1}),
+]
+
 class JSONParsingDebugger:
     """
     Debug utility to log and analyze JSON parsing failures.
@@ -147,5 +161,86 @@ class JSONParsingDebugger:
         
         return stats
 
+    def benchmark_parsers(self, iterations: int = 20, chunk_size: int = 64) -> Dict[str, Any]:
+        """
+        Replay logged failures and BENCHMARK_SAMPLES through the legacy
+        strategy cascade and the incremental parser, comparing success and
+        parse time. Samples with a known parse also report whether each
+        parser returned exactly it.
+        
+        Args:
+            iterations: Parse repetitions per sample for timing
+            chunk_size: Chunk size used to simulate a streamed response
+            
+        Returns:
+            Per-sample results plus totals (a success is a recovered files list)
+        """
+        # Imported here: json_parser depends on this module's debug_logger
+        from json_parser import RobustJSONParser, IncrementalJSONParser
+        
+        cascade = RobustJSONParser(use_incremental=False)
+        results = {"samples": [], "cascade_successes": 0, "incremental_successes": 0}
+        
+        sources = list(BENCHMARK_SAMPLES)
+        for filename in sorted(os.listdir(self.log_dir)):
+            if not (filename.startswith("parse_failure_") and filename.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.log_dir, filename), 'r', encoding='utf-8') as f:
+                    sources.append((filename, json.load(f).get("full_response") or "", None))
+            except Exception as e:
+                print(f"Error reading log file {filename}: {e}")
+        
+        for filename, response, expected in sources:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                cascade_result = cascade.parse_json_response(response)
+            cascade_ms = (time.perf_counter() - start) * 1000 / iterations
+            
+            start = time.perf_counter()
+            for _ in range(iterations):
+                incremental_result = IncrementalJSONParser().parse(response)
+            incremental_ms = (time.perf_counter() - start) * 1000 / iterations
+            
+            # Streamed: how far into the response the first file becomes available
+            parser = IncrementalJSONParser()
+            first_file_at = None
+            for offset in range(0, len(response), chunk_size):
+                if parser.feed(response[offset:offset + chunk_size]) and first_file_at is None:
+                    first_file_at = min(offset + chunk_size, len(response))
+            parser.finish()
+            
+            # Success means the full files[] list came back, not just a fragment of it
+            cascade_files = self._count_files(cascade_result)
+            incremental_files = self._count_files(incremental_result)
+            results["cascade_successes"] += int(cascade_files > 0)
+            results["incremental_successes"] += int(incremental_files > 0)
+            sample = {
+                "file": filename,
+                "response_length": len(response),
+                "cascade_files": cascade_files,
+                "cascade_ms": round(cascade_ms, 3),
+                "incremental_files": incremental_files,
+                "incremental_ms": round(incremental_ms, 3),
+                "first_file_at_char": first_file_at
+            }
+            if expected is not None:
+                sample["cascade_correct"] = cascade_result == expected
+                sample["incremental_correct"] = incremental_result == expected
+            results["samples"].append(sample)
+        
+        results["total_samples"] = len(results["samples"])
+        return results
+    
+    def _count_files(self, result: Any) -> int:
+        """Number of entries in a parsed response's files list."""
+        if isinstance(result, dict) and isinstance(result.get("files"), list):
+            return len(result["files"])
+        return 0
+
 # Global debugger instance
 debug_logger = JSONParsingDebugger()
+
+
+if __name__ == "__main__":
+    print(json.dumps(debug_logger.benchmark_parsers(), indent=2))
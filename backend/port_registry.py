@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import signal
+import socket
+import threading
+import logging
+from typing import Dict, Any, Optional
+
+import psutil
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class PortRegistry:
+    """Leases ports from PROJECT_PORT_RANGE to running projects.
+
+    Each lease records the project, its port and the process group of the
+    process started on it (projects are started in their own session), and
+    the table is persisted so leases left by a previous server run can be
+    reclaimed at startup. Freeing a port kills only the leased process
+    group, never whatever else happens to listen on the host.
+    """
+
+    def __init__(self, path: str = None, port_range: str = None):
+        self.path = path or Config.PORT_LEASES_PATH
+        first, last = (port_range or Config.PROJECT_PORT_RANGE).split('-')
+        self.first_port, self.last_port = int(first), int(last)
+        self._lock = threading.Lock()
+        self._leases = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._leases, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def is_free(port: int) -> bool:
+        """Whether nothing on the host is bound to the port"""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            try:
+                s.bind(('0.0.0.0', port))
+                return True
+            except OSError:
+                return False
+
+    def find_free_port(self, preferred: Optional[int] = None) -> Optional[int]:
+        """First bindable port in the range that is not leased, trying preferred first"""
+        leased = {lease['port'] for lease in self._leases.values()}
+        candidates = range(self.first_port, self.last_port + 1)
+        if preferred and self.first_port <= preferred <= self.last_port:
+            candidates = [preferred, *candidates]
+        for port in candidates:
+            if port not in leased and self.is_free(port):
+                return port
+        return None
+
+    def lease(self, project_id: str, preferred: Optional[int] = None) -> int:
+        """Give a project a port, first reclaiming the one it already holds"""
+        self.release(project_id)
+        with self._lock:
+            port = self.find_free_port(preferred)
+            if port is None:
+                raise RuntimeError(f"No free port in range {self.first_port}-{self.last_port}")
+            self._leases[project_id] = {'port': port, 'pid': None, 'started': None, 'leased_at': time.time()}
+            self._save()
+        return port
+
+    def attach(self, project_id: str, pid: int):
+        """Record the process (and its process group) serving a lease"""
+        with self._lock:
+            lease = self._leases.get(project_id)
+            if lease is None:
+                return
+            try:
+                lease['started'] = psutil.Process(pid).create_time()
+            except psutil.Error:
+                lease['started'] = None
+            lease['pid'] = pid
+            self._save()
+
+    def get_port(self, project_id: str) -> Optional[int]:
+        lease = self._leases.get(project_id)
+        return lease['port'] if lease else None
+
+    def owner_of(self, port: int) -> Optional[str]:
+        for project_id, lease in self._leases.items():
+            if lease['port'] == port:
+                return project_id
+        return None
+
+    def release(self, project_id: str) -> bool:
+        """Stop the lease's process group and free its port; returns whether a lease existed"""
+        with self._lock:
+            lease = self._leases.pop(project_id, None)
+            if lease is None:
+                return False
+            self._save()
+        self._kill_group(lease)
+        return True
+
+    def _kill_group(self, lease: Dict[str, Any]):
+        pid = lease.get('pid')
+        if not pid:
+            return
+        try:
+            # Guard against the pid having been reused since the lease was taken
+            if lease.get('started') is not None and psutil.Process(pid).create_time() != lease['started']:
+                return
+        except psutil.NoSuchProcess:
+            return
+        except psutil.Error as e:
+            # Without the start time the pid can't be told apart from a reused one
+            logger.warning(f"Not stopping process group {pid}: {e}")
+            return
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(pid, signal.SIGKILL)
+            else:
+                psutil.Process(pid).kill()
+        except (ProcessLookupError, PermissionError, psutil.Error) as e:
+            logger.debug(f"Could not stop process group {pid}: {e}")
+
+    def reclaim_stale(self):
+        """Stop processes left running on leases from a previous server run"""
+        with self._lock:
+            stale, self._leases = self._leases, {}
+            self._save()
+        for project_id, lease in stale.items():
+            logger.info(f"Reclaiming port {lease['port']} leased to project {project_id}")
+            self._kill_group(lease)
+
+    def get_leases(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {project_id: dict(lease) for project_id, lease in self._leases.items()}
+
+
+# Global port registry instance
+port_registry = PortRegistry()
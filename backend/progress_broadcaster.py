@@ -0,0 +1,127 @@
+import threading
+import logging
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Events that end a phase of work; they are delivered immediately instead of batched
+IMMEDIATE_EVENTS = {'project_completed', 'project_failed', 'execution_complete', 'execution_error'}
+
+
+def project_room(project_id: str) -> str:
+    """Socket.IO room that receives a project's updates"""
+    return f"project_{project_id}"
+
+
+class ProgressBroadcaster:
+    """Routes per-project events to the project's Socket.IO room.
+
+    Events are queued per project and flushed as one 'progress_batch' every
+    PROGRESS_FLUSH_INTERVAL, with consecutive streamed chunks merged. Each
+    project keeps a bounded, sequence-numbered event log so a client that
+    joins late (or reconnects) can be replayed what it missed.
+    """
+
+    def __init__(self):
+        self.socketio = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._logs = OrderedDict()
+        self._sequence = {}
+        self._flusher_started = False
+
+    def attach(self, socketio):
+        """Use a SocketIO server for delivery and start the flush loop"""
+        self.socketio = socketio
+        if not self._flusher_started:
+            self._flusher_started = True
+            socketio.start_background_task(self._flush_loop)
+
+    def publish(self, project_id: str, event: str, data: Dict[str, Any], replay: bool = True):
+        """Queue an event for a project's room (terminal events are sent at once)"""
+        entry = {
+            'event': event,
+            'data': data,
+            'timestamp': datetime.now().isoformat()
+        }
+        with self._lock:
+            entry['seq'] = self._sequence.get(project_id, 0) + 1
+            self._sequence[project_id] = entry['seq']
+            # Raw stream chunks are too bulky to replay; the file completions they produce are logged
+            if replay and not data.get('partial'):
+                self._log_for(project_id).append(entry)
+            self._pending.setdefault(project_id, []).append(entry)
+
+        if event in IMMEDIATE_EVENTS:
+            self.flush(project_id)
+
+    def _log_for(self, project_id: str) -> deque:
+        """Replay buffer of a project, evicting the least recently active project when full"""
+        log = self._logs.get(project_id)
+        if log is None:
+            log = deque(maxlen=Config.PROGRESS_REPLAY_EVENTS)
+            self._logs[project_id] = log
+            while len(self._logs) > Config.PROGRESS_REPLAY_PROJECTS:
+                evicted, _ = self._logs.popitem(last=False)
+                self._sequence.pop(evicted, None)
+        else:
+            self._logs.move_to_end(project_id)
+        return log
+
+    def get_events(self, project_id: str, since: int = 0) -> List[Dict[str, Any]]:
+        """Logged events of a project with a sequence number above since"""
+        with self._lock:
+            return [entry for entry in self._logs.get(project_id, ()) if entry['seq'] > since]
+
+    def last_sequence(self, project_id: str) -> int:
+        with self._lock:
+            return self._sequence.get(project_id, 0)
+
+    def flush(self, project_id: Optional[str] = None):
+        """Send queued events for one project (or all projects) as batches"""
+        with self._lock:
+            if project_id is None:
+                pending, self._pending = self._pending, {}
+            else:
+                pending = {project_id: self._pending.pop(project_id, [])}
+
+        for pid, events in pending.items():
+            if events and self.socketio:
+                try:
+                    self.socketio.emit('progress_batch', {
+                        'project_id': pid,
+                        'events': _coalesce(events)
+                    }, to=project_room(pid))
+                except Exception as e:
+                    logger.warning(f"Failed to deliver progress for project {pid}: {e}")
+
+    def _flush_loop(self):
+        while True:
+            self.socketio.sleep(Config.PROGRESS_FLUSH_INTERVAL)
+            self.flush()
+
+
+def _coalesce(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge runs of streamed chunks from the same stage into a single update"""
+    merged = []
+    for entry in events:
+        previous = merged[-1] if merged else None
+        if (previous is not None and entry['data'].get('partial') and previous['data'].get('partial')
+                and previous['data'].get('stage') == entry['data'].get('stage')):
+            combined = dict(entry['data'])
+            before, after = previous['data'].get('data') or {}, entry['data'].get('data') or {}
+            combined['data'] = dict(after)
+            combined['data']['chunk'] = before.get('chunk', '') + after.get('chunk', '')
+            combined['data']['completed_files'] = before.get('completed_files', []) + after.get('completed_files', [])
+            merged[-1] = dict(entry, data=combined)
+        else:
+            merged.append(entry)
+    return merged
+
+
+# Global broadcaster instance
+progress_broadcaster = ProgressBroadcaster()
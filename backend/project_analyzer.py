@@ -0,0 +1,413 @@
+import os
+import ast
+import copy
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SKIPPED_DIRS = {'__pycache__', '.git', 'node_modules', 'venv', '.venv', 'env'}
+LISTED_EXTENSIONS = ('.py', '.html', '.js', '.css', '.json', '.txt', '.md')
+
+# Preferred entry files, most likely first
+ENTRY_FILE_PREFERENCE = ['main.py', 'app.py', 'streamlit_app.py', 'run.py', 'server.py']
+
+DESKTOP_MODULES = {
+    'tkinter': 'tkinter', 'Tkinter': 'tkinter', 'customtkinter': 'tkinter',
+    'pygame': 'pygame',
+    'PyQt5': 'qt', 'PyQt6': 'qt', 'PySide2': 'qt', 'PySide6': 'qt',
+}
+
+APP_CONSTRUCTORS = {'flask.Flask': 'flask', 'fastapi.FastAPI': 'fastapi'}
+APP_FACTORY_NAMES = {'create_app', 'make_app', 'get_app'}
+
+
+class _SourceVisitor(ast.NodeVisitor):
+    """Collects imports, app objects and run calls of one module"""
+
+    def __init__(self):
+        self.imports = set()
+        self.module_aliases = {}
+        self.name_aliases = {}
+        self.apps = []
+        self.run_calls = set()
+        self.uvicorn_run = False
+        self.streamlit_calls = 0
+        self.main_guard = False
+        self._function = None
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.add(alias.name.split('.')[0])
+            if alias.asname:
+                self.module_aliases[alias.asname] = alias.name
+            else:
+                top = alias.name.split('.')[0]
+                self.module_aliases[top] = top
+
+    def visit_ImportFrom(self, node):
+        module = node.module or ''
+        if node.level == 0 and module:
+            self.imports.add(module.split('.')[0])
+        for alias in node.names:
+            self.name_aliases[alias.asname or alias.name] = ('.' * node.level + module, alias.name)
+
+    def qualified_name(self, node) -> Optional[str]:
+        """Dotted name of an expression with import aliases resolved (st.sidebar.title -> streamlit.sidebar.title)"""
+        parts = []
+        while isinstance(node, ast.Attribute):
+            parts.append(node.attr)
+            node = node.value
+        if not isinstance(node, ast.Name):
+            return None
+        if node.id in self.name_aliases:
+            module, name = self.name_aliases[node.id]
+            base = f"{module}.{name}" if module else name
+        elif node.id in self.module_aliases:
+            base = self.module_aliases[node.id]
+        else:
+            base = node.id
+        return '.'.join([base, *reversed(parts)])
+
+    def _record_app(self, targets, value):
+        if not isinstance(value, ast.Call):
+            return
+        framework = APP_CONSTRUCTORS.get(self.qualified_name(value.func))
+        if framework is None:
+            return
+        if self._function in APP_FACTORY_NAMES:
+            self.apps.append({'name': self._function, 'framework': framework, 'factory': True})
+        elif self._function is None:
+            for target in targets:
+                if isinstance(target, ast.Name):
+                    self.apps.append({'name': target.id, 'framework': framework, 'factory': False})
+
+    def visit_Assign(self, node):
+        self._record_app(node.targets, node.value)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node):
+        if node.value is not None:
+            self._record_app([node.target], node.value)
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        outer, self._function = self._function, (node.name if self._function is None else self._function)
+        self.generic_visit(node)
+        self._function = outer
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Call(self, node):
+        name = self.qualified_name(node.func)
+        if name:
+            if name == 'uvicorn.run':
+                self.uvicorn_run = True
+            elif name.startswith('streamlit.'):
+                self.streamlit_calls += 1
+            elif isinstance(node.func, ast.Attribute) and node.func.attr == 'run' \
+                    and isinstance(node.func.value, ast.Name):
+                self.run_calls.add(node.func.value.id)
+        if self._function in APP_FACTORY_NAMES and name in APP_CONSTRUCTORS:
+            # Factories that build the app inline, e.g. `return Flask(__name__)`
+            if not any(app['name'] == self._function for app in self.apps):
+                self.apps.append({'name': self._function, 'framework': APP_CONSTRUCTORS[name], 'factory': True})
+        self.generic_visit(node)
+
+    def visit_If(self, node):
+        if _is_main_guard(node.test):
+            self.main_guard = True
+        self.generic_visit(node)
+
+
+def _is_main_guard(test) -> bool:
+    if not (isinstance(test, ast.Compare) and len(test.ops) == 1 and isinstance(test.ops[0], ast.Eq)):
+        return False
+    sides = [test.left, test.comparators[0]]
+    names = [side.id for side in sides if isinstance(side, ast.Name)]
+    constants = [side.value for side in sides if isinstance(side, ast.Constant)]
+    return names == ['__name__'] and constants == ['__main__']
+
+
+def analyze_source(source: str) -> Dict[str, Any]:
+    """Static facts about one Python module"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        return {'syntax_error': str(e), 'imports': [], 'from_imports': {}, 'apps': [], 'run_calls': [],
+                'uvicorn_run': False, 'streamlit_calls': 0, 'main_guard': False, 'generated_runner': False}
+
+    visitor = _SourceVisitor()
+    visitor.visit(tree)
+    docstring = ast.get_docstring(tree) or ''
+    return {
+        'syntax_error': None,
+        'imports': sorted(visitor.imports),
+        'from_imports': {local: list(target) for local, target in visitor.name_aliases.items()},
+        'apps': visitor.apps,
+        'run_calls': sorted(visitor.run_calls),
+        'uvicorn_run': visitor.uvicorn_run,
+        'streamlit_calls': visitor.streamlit_calls,
+        'main_guard': visitor.main_guard,
+        # run.py files we write ourselves; they import every framework and must not drive detection
+        'generated_runner': docstring.startswith('Auto-generated') and 'runner' in docstring.split('\n', 1)[0],
+    }
+
+
+def _module_name(rel_path: str) -> str:
+    return rel_path[:-3].replace('\\', '/').replace('/', '.')
+
+
+def _entry_order(rel_path: str) -> Tuple[int, int, str]:
+    name = os.path.basename(rel_path)
+    preference = ENTRY_FILE_PREFERENCE.index(name) if name in ENTRY_FILE_PREFERENCE else len(ENTRY_FILE_PREFERENCE)
+    return rel_path.count(os.sep), preference, rel_path
+
+
+class ProjectAnalyzer:
+    """AST-based detection of a project's frameworks, entry points and run command.
+
+    Facts about each .py file are cached by content hash (files whose mtime
+    and size are unchanged are not even re-read), and the complete analysis
+    of a project is cached against a fingerprint of its tree, so analyzing an
+    unchanged project again costs one directory walk.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or Config.ANALYSIS_CACHE_ENTRIES
+        self._lock = threading.Lock()
+        self._stat_cache = OrderedDict()
+        self._facts = OrderedDict()
+        self._projects = OrderedDict()
+        self.stats = {'project_hits': 0, 'project_misses': 0, 'file_hits': 0, 'file_misses': 0}
+
+    def _list_files(self, project_path: str) -> List[Tuple[str, os.stat_result]]:
+        files = []
+        for root, dirs, names in os.walk(project_path):
+            dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS)
+            for name in sorted(names):
+                if name.endswith(LISTED_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    try:
+                        files.append((os.path.relpath(path, project_path), os.stat(path)))
+                    except OSError:
+                        continue
+        return files
+
+    def file_facts(self, path: str, stat: os.stat_result = None) -> Dict[str, Any]:
+        """Facts of a Python file, reusing the cached result for unchanged content"""
+        stat = stat or os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._stat_cache.get(path)
+            if cached and cached[0] == key and cached[1] in self._facts:
+                self._facts.move_to_end(cached[1])
+                self.stats['file_hits'] += 1
+                return self._facts[cached[1]]
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            facts = self._facts.get(digest)
+        if facts is None:
+            facts = analyze_source(data.decode('utf-8', errors='replace'))
+            self.stats['file_misses'] += 1
+        else:
+            self.stats['file_hits'] += 1
+
+        with self._lock:
+            self._facts[digest] = facts
+            self._facts.move_to_end(digest)
+            self._stat_cache[path] = (key, digest)
+            self._stat_cache.move_to_end(path)
+            while len(self._facts) > self.max_entries:
+                self._facts.popitem(last=False)
+            while len(self._stat_cache) > self.max_entries:
+                self._stat_cache.popitem(last=False)
+        return facts
+
+    def analyze(self, project_path: str) -> Dict[str, Any]:
+        """Analysis of a project (a copy the caller may modify)"""
+        project_path = os.path.abspath(project_path)
+        files = self._list_files(project_path)
+        fingerprint = hashlib.sha256(
+            '\n'.join(f"{rel}\0{stat.st_size}\0{stat.st_mtime_ns}" for rel, stat in files).encode('utf-8')
+        ).hexdigest()
+
+        with self._lock:
+            cached = self._projects.get(project_path)
+            if cached and cached[0] == fingerprint:
+                self._projects.move_to_end(project_path)
+                self.stats['project_hits'] += 1
+                return copy.deepcopy(cached[1])
+
+        facts = {
+            rel: self.file_facts(os.path.join(project_path, rel), stat)
+            for rel, stat in files if rel.endswith('.py')
+        }
+        analysis = self._classify(project_path, [rel for rel, _ in files], facts)
+
+        with self._lock:
+            self.stats['project_misses'] += 1
+            self._projects[project_path] = (fingerprint, analysis)
+            self._projects.move_to_end(project_path)
+            while len(self._projects) > Config.ANALYSIS_CACHE_PROJECTS:
+                self._projects.popitem(last=False)
+        return copy.deepcopy(analysis)
+
+    def _classify(self, project_path: str, all_files: List[str], facts: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Decide project type, entry points and run command from per-file facts"""
+        analysis = {
+            'project_type': 'unknown',
+            'entry_points': [],
+            'frameworks': [],
+            'structure': {},
+            'run_method': 'python',
+            'recommended_command': None,
+            'port': None
+        }
+        python_files = [f for f in all_files if f.endswith('.py')]
+        html_files = [f for f in all_files if f.endswith('.html')]
+        js_files = [f for f in all_files if f.endswith('.js')]
+        css_files = [f for f in all_files if f.endswith('.css')]
+        analysis['structure'] = {
+            'all_files': all_files,
+            'python_files': python_files,
+            'html_files': html_files,
+            'js_files': js_files,
+            'css_files': css_files,
+            'syntax_errors': {f: facts[f]['syntax_error'] for f in python_files if facts[f]['syntax_error']},
+        }
+
+        # App objects defined anywhere, addressable as module.name for cross-file `app.run()` calls
+        apps_by_module = {}
+        for rel in python_files:
+            for app in facts[rel]['apps']:
+                apps_by_module[(_module_name(rel), app['name'])] = app
+
+        frameworks_found = set()
+        entry_points = []
+        for rel in sorted(python_files, key=_entry_order):
+            file_facts = facts[rel]
+            if file_facts['generated_runner']:
+                continue
+            imports = set(file_facts['imports'])
+
+            if 'streamlit' in imports:
+                frameworks_found.add('streamlit')
+                entry_points.append({'file': rel, 'type': 'streamlit', 'calls': file_facts['streamlit_calls']})
+
+            for app in file_facts['apps']:
+                frameworks_found.add(app['framework'])
+                entry_points.append({'file': rel, 'type': app['framework'], 'app': app['name'],
+                                     'factory': app['factory']})
+            if 'fastapi' in imports and not any(app['framework'] == 'fastapi' for app in file_facts['apps']):
+                frameworks_found.add('fastapi')
+            if 'flask' in imports and not any(app['framework'] == 'flask' for app in file_facts['apps']):
+                frameworks_found.add('flask')
+
+            if file_facts['uvicorn_run']:
+                frameworks_found.add('fastapi')
+                entry_points.append({'file': rel, 'type': 'fastapi_uvicorn'})
+
+            for name in file_facts['run_calls']:
+                local_app = next((app for app in file_facts['apps'] if app['name'] == name), None)
+                imported = file_facts['from_imports'].get(name)
+                imported_app = apps_by_module.get((imported[0].lstrip('.'), imported[1])) if imported else None
+                app = local_app or imported_app
+                if app and app['framework'] == 'flask':
+                    frameworks_found.add('flask')
+                    entry_points.append({'file': rel, 'type': 'flask_run', 'app': name})
+
+            if 'django' in imports:
+                frameworks_found.add('django')
+                entry_points.append({'file': rel, 'type': 'django'})
+
+            for module, kind in DESKTOP_MODULES.items():
+                if module in imports:
+                    frameworks_found.add(kind)
+                    entry_points.append({'file': rel, 'type': kind})
+                    break
+
+        # Scripts that actually drive the Streamlit UI come before helper modules that only import it
+        entry_points.sort(key=lambda ep: -ep.get('calls', 0) if ep['type'] == 'streamlit' else 0)
+
+        analysis['frameworks'] = sorted(frameworks_found)
+        analysis['entry_points'] = entry_points
+
+        if 'streamlit' in frameworks_found:
+            analysis['project_type'] = 'streamlit'
+            analysis['run_method'] = 'streamlit'
+            streamlit_files = [ep['file'] for ep in entry_points if ep['type'] == 'streamlit']
+            if streamlit_files:
+                analysis['recommended_command'] = f"streamlit run {streamlit_files[0]}"
+                analysis['port'] = 8501
+
+        elif 'fastapi' in frameworks_found:
+            analysis['project_type'] = 'fastapi'
+            analysis['run_method'] = 'fastapi'
+            runners = [ep['file'] for ep in entry_points if ep['type'] == 'fastapi_uvicorn']
+            apps = [ep for ep in entry_points if ep['type'] == 'fastapi']
+            if runners:
+                analysis['recommended_command'] = f"python {runners[0]}"
+            elif apps:
+                analysis['recommended_command'] = \
+                    f"uvicorn {_module_name(apps[0]['file'])}:{apps[0]['app']} --reload --port 8080"
+            analysis['port'] = 8080
+
+        elif 'flask' in frameworks_found:
+            analysis['project_type'] = 'flask'
+            analysis['run_method'] = 'web'
+            runners = [ep['file'] for ep in entry_points if ep['type'] == 'flask_run']
+            apps = [ep['file'] for ep in entry_points if ep['type'] == 'flask']
+            if runners or apps:
+                analysis['recommended_command'] = f"python {(runners or apps)[0]}"
+            analysis['port'] = 8080
+
+        elif 'django' in frameworks_found:
+            analysis['project_type'] = 'django'
+            analysis['run_method'] = 'django'
+            analysis['recommended_command'] = "python manage.py runserver"
+            analysis['port'] = 8000
+
+        elif html_files and (js_files or css_files):
+            analysis['project_type'] = 'web_frontend'
+            analysis['run_method'] = 'static'
+            if 'index.html' in all_files:
+                analysis['recommended_command'] = "serve index.html"
+
+        elif frameworks_found & set(DESKTOP_MODULES.values()):
+            analysis['project_type'] = 'desktop'
+            analysis['run_method'] = 'python'
+            desktop_files = [ep['file'] for ep in entry_points if ep['type'] in DESKTOP_MODULES.values()]
+            # The file that starts the GUI, not a widget module
+            guarded = [f for f in desktop_files if facts[f]['main_guard']]
+            if not guarded:
+                guarded = [f for f in sorted(python_files, key=_entry_order)
+                           if facts[f]['main_guard'] and not facts[f]['generated_runner']]
+            analysis['recommended_command'] = f"python {(guarded or desktop_files)[0]}"
+
+        else:
+            analysis['project_type'] = 'python'
+            analysis['run_method'] = 'python'
+            candidates = [f for f in sorted(python_files, key=_entry_order) if not facts[f]['generated_runner']]
+            conventional = [f for f in candidates if f in ENTRY_FILE_PREFERENCE]
+            guarded = [f for f in candidates if facts[f]['main_guard']]
+            if candidates:
+                analysis['recommended_command'] = f"python {(conventional or guarded or candidates)[0]}"
+
+        return analysis
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, cached_files=len(self._facts), cached_projects=len(self._projects))
+
+
+# Global analyzer instance
+project_analyzer = ProjectAnalyzer()
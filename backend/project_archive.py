@@ -0,0 +1,218 @@
+import os
+import stat as stat_module
+import time
+import zipfile
+import hashlib
+import threading
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+from config import Config
+from blob_store import blob_store
+
+logger = logging.getLogger(__name__)
+
+# Already-compressed formats gain nothing from deflate, so they are stored as-is
+STORED_EXTENSIONS = {
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.whl', '.jar',
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.ico', '.mp3', '.mp4', '.webm',
+    '.pdf', '.woff', '.woff2', '.parquet', '.pptx', '.docx', '.xlsx',
+}
+
+SKIPPED_DIRS = {'__pycache__'}
+SKIPPED_SUFFIXES = ('.pyc',)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _archive_mode(st_mode: int) -> int:
+    """Permissions a file gets in the zip: blob store links are read-only on disk, downloads shouldn't be"""
+    return 0o755 if st_mode & 0o111 else 0o644
+
+
+class _StreamBuffer:
+    """Write-only, unseekable file object collecting zip output between yields"""
+
+    def __init__(self, sink=None):
+        self._chunks = []
+        self._offset = 0
+        self._sink = sink
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._offset += len(data)
+        if self._sink is not None:
+            self._sink.write(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ProjectArchiver:
+    """Builds project zips on the fly and caches them by project content.
+
+    An archive is streamed straight from the project directory while it is
+    being built, so the first bytes go out immediately; the same bytes are
+    written to the cache, keyed by a fingerprint of the project tree, and
+    later downloads of an unchanged project are served from that file.
+    Any file change gives a new fingerprint and therefore a fresh archive.
+    Files that are still links to their blob store blob are fingerprinted by
+    content hash from the manifest, so re-linking them doesn't invalidate
+    the cache; everything else by size and modification time.
+    """
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        self.cache_dir = cache_dir or Config.ARCHIVE_CACHE_DIR
+        self.max_bytes = max_bytes or Config.ARCHIVE_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+
+    def _list_files(self, project_dir: str) -> List[Tuple[str, str, os.stat_result]]:
+        """(absolute path, archive name, stat) of every file to archive, in a stable order"""
+        entries = []
+        for root, dirs, files in os.walk(project_dir):
+            dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS)
+            for name in sorted(files):
+                if name.endswith(SKIPPED_SUFFIXES):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, os.path.relpath(path, project_dir).replace(os.sep, '/'), stat))
+        return entries
+
+    def fingerprint(self, project_dir: str, entries=None) -> str:
+        """Hash of the tree's paths, sizes and modification times"""
+        entries = entries if entries is not None else self._list_files(project_dir)
+        digest = hashlib.sha256()
+        for _, arcname, stat in entries:
+            digest.update(f"{arcname}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _snapshot(self, project_id: str, project_dir: str) -> Tuple[list, str]:
+        """(file entries, fingerprint) of a project's directory
+
+        The directory is always listed: projects are also written outside the
+        blob store, so its manifest need not cover the tree. The manifest only
+        saves stat-based fingerprinting of files that are still its blobs.
+        """
+        manifest = blob_store.load_manifest(project_id)
+        entries = self._list_files(project_dir)
+        digest = hashlib.sha256()
+        for _, arcname, stat in entries:
+            entry = manifest.get(arcname)
+            if entry and blob_store.is_blob(stat, entry['hash']):
+                digest.update(f"{arcname}\0{entry['hash']}\n".encode('utf-8'))
+            else:
+                digest.update(f"{arcname}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode('utf-8'))
+        return entries, digest.hexdigest()
+
+    def _archive_path(self, project_id: str, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, f"{project_id}-{fingerprint[:16]}.zip")
+
+    def cached_archive(self, project_id: str, project_dir: str) -> Tuple[Optional[str], list, str]:
+        """(cached archive path or None, file entries, fingerprint) for the project's current state"""
+        entries, fingerprint = self._snapshot(project_id, project_dir)
+        path = self._archive_path(project_id, fingerprint)
+        if os.path.exists(path):
+            os.utime(path)  # Mark as recently used for eviction
+            return path, entries, fingerprint
+        return None, entries, fingerprint
+
+    def stream(self, project_id: str, project_dir: str, entries=None, fingerprint: str = None) -> Iterator[bytes]:
+        """Yield the project's zip as it is built, caching it once complete"""
+        if entries is None:
+            entries, fingerprint = self._snapshot(project_id, project_dir)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        final_path = self._archive_path(project_id, fingerprint)
+        tmp_path = f"{final_path}.{threading.get_ident()}.tmp"
+        completed = False
+        cache_file = open(tmp_path, 'wb')
+        buffer = _StreamBuffer(sink=cache_file)
+        try:
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for path, arcname, stat in entries:
+                    try:
+                        yield from self._write_entry(archive, buffer, path, arcname, stat)
+                    except OSError as e:
+                        logger.warning(f"Skipping {arcname} in archive of {project_id}: {e}")
+            yield buffer.drain()
+            completed = True
+        finally:
+            cache_file.close()
+            if completed:
+                os.replace(tmp_path, final_path)
+                self._evict(project_id, keep=final_path)
+            elif os.path.exists(tmp_path):
+                # Client went away mid-download; don't cache a partial archive
+                os.remove(tmp_path)
+
+    def _write_entry(self, archive: zipfile.ZipFile, buffer: _StreamBuffer, path: str,
+                     arcname: str, stat: os.stat_result) -> Iterator[bytes]:
+        info = zipfile.ZipInfo(arcname, date_time=time.localtime(max(stat.st_mtime, 315532800))[:6])
+        info.external_attr = (stat_module.S_IFREG | _archive_mode(stat.st_mode)) << 16
+        extension = os.path.splitext(arcname)[1].lower()
+        info.compress_type = zipfile.ZIP_STORED if extension in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+        with open(path, 'rb') as source, archive.open(info, 'w', force_zip64=stat.st_size > 0x7FFFFFFF) as target:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                target.write(chunk)
+                data = buffer.drain()
+                if data:
+                    yield data
+        data = buffer.drain()
+        if data:
+            yield data
+
+    def build(self, project_id: str, project_dir: str) -> str:
+        """Make sure a cached archive of the project's current state exists and return its path"""
+        path, entries, fingerprint = self.cached_archive(project_id, project_dir)
+        if path is None:
+            for _ in self.stream(project_id, project_dir, entries, fingerprint):
+                pass
+            path = self._archive_path(project_id, fingerprint)
+        return path
+
+    def remove(self, project_id: str):
+        """Drop every cached archive of a project"""
+        self._evict(project_id, keep=None)
+
+    def _evict(self, project_id: str, keep: Optional[str]):
+        """Remove the project's outdated archives, then the least recently used ones over budget"""
+        with self._lock:
+            if not os.path.isdir(self.cache_dir):
+                return
+            archives = []
+            for entry in os.scandir(self.cache_dir):
+                if not entry.name.endswith('.zip'):
+                    continue
+                if entry.name.startswith(f"{project_id}-") and entry.path != keep:
+                    os.remove(entry.path)
+                    continue
+                archives.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+
+            total = sum(size for _, size, _ in archives)
+            for _, size, path in sorted(archives):
+                if total <= self.max_bytes:
+                    break
+                if path != keep:
+                    os.remove(path)
+                    total -= size
+
+
+# Global archiver instance
+project_archiver = ProjectArchiver()
@@ -0,0 +1,247 @@
+import os
+import time
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NAME = "Python Project"
+DEFAULT_DESCRIPTION = "No description available"
+
+# Columns history queries may sort by, mapped to their SQL expression
+SORTABLE_COLUMNS = {
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'name': 'name COLLATE NOCASE',
+    'status': 'status',
+    'file_count': 'file_count',
+}
+
+
+class ProjectCatalog:
+    """SQLite index of generated projects backing the history endpoint.
+
+    Generation code records projects as they are queued and finished; a
+    background reconciler picks up directories created or removed outside
+    the app by comparing directory mtimes with what is indexed, so listing
+    history never has to walk the projects folder.
+    """
+
+    def __init__(self, db_path: str = None, projects_dir: str = None):
+        self.db_path = db_path or Config.PROJECT_CATALOG_PATH
+        self.projects_dir = projects_dir or Config.GENERATED_PROJECTS_DIR
+        self._conn = None
+        self._lock = threading.Lock()
+        self._reconciler_started = False
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS projects (
+                    id TEXT PRIMARY KEY,
+                    name TEXT,
+                    description TEXT,
+                    prompt TEXT,
+                    mode TEXT,
+                    status TEXT NOT NULL DEFAULT 'completed',
+                    file_count INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    dir_mtime REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_created_at ON projects(created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_status ON projects(status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_name ON projects(name COLLATE NOCASE)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def upsert(self, project_id: str, **fields):
+        """Create or update a project's entry; fields left as None keep their stored value"""
+        fields = {key: value for key, value in fields.items() if value is not None}
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            exists = conn.execute("SELECT 1 FROM projects WHERE id = ?", (project_id,)).fetchone()
+            if exists:
+                # A project's creation time is fixed when it is first recorded
+                fields.pop('created_at', None)
+                fields['updated_at'] = now
+                assignments = ', '.join(f"{column} = ?" for column in fields)
+                conn.execute(f"UPDATE projects SET {assignments} WHERE id = ?", (*fields.values(), project_id))
+            else:
+                fields.setdefault('created_at', now)
+                fields['updated_at'] = now
+                columns = ', '.join(['id', *fields])
+                placeholders = ', '.join('?' * (len(fields) + 1))
+                conn.execute(f"INSERT INTO projects ({columns}) VALUES ({placeholders})", (project_id, *fields.values()))
+            conn.commit()
+
+    def index_directory(self, project_id: str, **fields):
+        """Refresh a project's entry from its directory (README title/summary, file count)"""
+        project_path = os.path.join(self.projects_dir, project_id)
+        if not os.path.isdir(project_path):
+            self.upsert(project_id, **fields)
+            return
+
+        name, description = _read_readme(project_path)
+        stat = os.stat(project_path)
+        # Walked rather than read from the blob store manifest: not every file is written through the store
+        metadata = {
+            'name': name,
+            'description': description,
+            'file_count': _count_files(project_path),
+            'dir_mtime': stat.st_mtime,
+        }
+        metadata.update({key: value for key, value in fields.items() if value is not None})
+        # Only applies to directories not indexed yet; they date from their creation, not from indexing
+        metadata.setdefault('created_at', stat.st_ctime)
+        self.upsert(project_id, **metadata)
+
+    def remove(self, project_id: str):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+            conn.commit()
+
+    def get(self, project_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection().execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
+        return _to_history_entry(row) if row else None
+
+    def query(self, status: str = None, search: str = None, sort: str = 'created_at', order: str = 'desc',
+              limit: int = None, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """One page of history entries plus the total number matching the filters"""
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if search:
+            conditions.append("(name LIKE ? OR description LIKE ? OR prompt LIKE ?)")
+            params.extend([f"%{search}%"] * 3)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        sort_expression = SORTABLE_COLUMNS.get(sort, 'created_at')
+        direction = 'ASC' if str(order).lower() == 'asc' else 'DESC'
+        limit = limit or Config.PROJECT_HISTORY_PAGE_SIZE
+
+        with self._lock:
+            conn = self._connection()
+            total = conn.execute(f"SELECT COUNT(*) FROM projects {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM projects {where} ORDER BY {sort_expression} {direction}, id LIMIT ? OFFSET ?",
+                (*params, int(limit), max(0, int(offset)))
+            ).fetchall()
+        return [_to_history_entry(row) for row in rows], total
+
+    def reconcile(self):
+        """Index project directories added/changed on disk and drop entries whose directory is gone"""
+        if not os.path.isdir(self.projects_dir):
+            return
+
+        on_disk = {}
+        with os.scandir(self.projects_dir) as entries:
+            for entry in entries:
+                # Dot-directories are staging areas of writes in progress
+                if entry.is_dir() and not entry.name.startswith('.'):
+                    on_disk[entry.name] = entry.stat().st_mtime
+
+        with self._lock:
+            indexed = {
+                row['id']: (row['dir_mtime'], row['status'])
+                for row in self._connection().execute("SELECT id, dir_mtime, status FROM projects")
+            }
+
+        for project_id, mtime in on_disk.items():
+            known = indexed.get(project_id)
+            if known is None or known[0] != mtime:
+                try:
+                    self.index_directory(project_id)
+                except OSError as e:
+                    logger.warning(f"Could not index project {project_id}: {e}")
+
+        for project_id, (_, status) in indexed.items():
+            # Queued projects have no directory yet
+            if project_id not in on_disk and status not in ('queued', 'running'):
+                self.remove(project_id)
+
+    def start_reconciler(self, interval: float = None):
+        """Reconcile once now, then periodically on a background thread"""
+        if self._reconciler_started:
+            return
+        self._reconciler_started = True
+        interval = interval or Config.PROJECT_CATALOG_RECONCILE_INTERVAL
+
+        def run():
+            while True:
+                try:
+                    self.reconcile()
+                except Exception as e:
+                    logger.error(f"Project catalog reconcile failed: {e}")
+                time.sleep(interval)
+
+        threading.Thread(target=run, name="project-catalog-reconciler", daemon=True).start()
+
+
+def _read_readme(project_path: str) -> Tuple[Optional[str], Optional[str]]:
+    """Project name from the README's first heading and the first line of prose"""
+    readme_path = os.path.join(project_path, "README.md")
+    if not os.path.exists(readme_path):
+        return None, None
+
+    name, description = None, None
+    try:
+        with open(readme_path, 'r', encoding='utf-8') as f:
+            lines = f.read().split('\n')
+    except Exception as e:
+        logger.warning(f"Error reading README in {project_path}: {e}")
+        return None, None
+
+    for line in lines:
+        if line.strip().startswith('# '):
+            name = line.strip()[2:]
+            break
+    for line in lines:
+        if line.strip() and not line.startswith('#') and not line.startswith('```'):
+            description = line.strip()
+            break
+    if description and len(description) > 100:
+        description = description[:100] + "..."
+    return name, description
+
+
+def _count_files(project_path: str) -> int:
+    """Number of project files, ignoring bytecode"""
+    file_count = 0
+    for root, dirs, files in os.walk(project_path):
+        dirs[:] = [d for d in dirs if d != '__pycache__']
+        file_count += len([f for f in files if not f.endswith('.pyc')])
+    return file_count
+
+
+def _to_history_entry(row: sqlite3.Row) -> Dict[str, Any]:
+    """Shape a catalog row like the entries /api/projects/history has always returned"""
+    return {
+        'id': row['id'],
+        'name': row['name'] or DEFAULT_NAME,
+        'description': row['description'] or DEFAULT_DESCRIPTION,
+        'status': row['status'],
+        'mode': row['mode'],
+        'created_at': datetime.fromtimestamp(row['created_at']).strftime('%Y-%m-%d %H:%M:%S'),
+        'file_count': row['file_count']
+    }
+
+
+# Global catalog instance
+project_catalog = ProjectCatalog()
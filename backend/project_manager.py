@@ -3,12 +3,14 @@ import json
 import subprocess
 import sys
 import shutil
-import zipfile
 import webbrowser
 import time
 import logging
 import psutil
 import signal
+import inspect
+import functools
+import contextvars
 from datetime import datetime
 from agents import (
     PlanningAgent, SrDeveloper1Agent, SrDeveloper2Agent, 
@@ -19,7 +21,19 @@ from web_agents import (
     FullStackIntegratorAgent, WebTesterAgent
 )
 from config import Config
-from json_parser import json_parser
+from json_parser import json_parser, IncrementalJSONParser
+from progress_broadcaster import progress_broadcaster
+from project_catalog import project_catalog
+from blob_store import blob_store
+from project_archive import project_archiver
+from env_manager import env_manager
+from runtime_pool import runtime_pool
+from port_registry import port_registry
+from output_supervisor import output_supervisor
+from sandbox import sandbox
+from project_analyzer import project_analyzer
+from code_checker import code_checker, format_diagnostics
+from code_repair import read_sources, locate_failures, build_repair_context, apply_edits
 from advanced_agents import (
     PlannerAgent as AdvancedPlannerAgent,
     ResearchAgent,
@@ -29,6 +43,23 @@ from advanced_agents import (
     DocumentationAgent
 )
 
+# Project whose generation/execution is running in the current thread or task
+_current_project = contextvars.ContextVar('current_project', default=None)
+
+def _for_project(method):
+    """Route the progress emitted while a method runs to its project_id's room"""
+    signature = inspect.signature(method)
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        project_id = signature.bind(self, *args, **kwargs).arguments.get('project_id')
+        token = _current_project.set(project_id)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            _current_project.reset(token)
+    return wrapper
+
 class ProjectManager:
     def __init__(self, socketio=None):
         self.socketio = socketio
@@ -55,65 +86,39 @@ class ProjectManager:
         os.makedirs(Config.GENERATED_PROJECTS_DIR, exist_ok=True)
         os.makedirs(Config.TEMP_DIR, exist_ok=True)
         
-        # Clean up any leftover processes on startup
-        self.cleanup_leftover_processes()
+        # Ports handed to running projects, with the process group serving each;
+        # the server reclaims leases left by a previous run on startup (cleanup_leftover_processes)
+        self.port_registry = port_registry
     
     def cleanup_leftover_processes(self):
-        """Clean up any leftover Streamlit or web server processes"""
+        """Clean up project servers left running by a previous server run"""
         try:
             self.logger.info("Cleaning up any leftover processes...")
-            
-            # Kill any processes on commonly used ports
-            ports_to_clean = [8501, 8502, 8503, 8504, 8080]
-            for port in ports_to_clean:
-                self.kill_processes_on_port(port)
-                
+            self.port_registry.reclaim_stale()
         except Exception as e:
             self.logger.warning(f"Could not clean up leftover processes: {e}")
     
     def kill_processes_on_port(self, port):
-        """Kill any processes using the specified port"""
+        """Free a port held by one of our projects; processes we did not start are left alone"""
         try:
             if hasattr(self, 'emit_progress'):
                 self.emit_progress("execution", f"Checking for processes on port {port}...")
             else:
                 self.logger.info(f"Checking for processes on port {port}...")
-                
-            killed_any = False
             
-            for proc in psutil.process_iter(['pid', 'name']):
-                try:
-                    # Get connections for this process
-                    connections = proc.connections()
-                    if connections:
-                        for conn in connections:
-                            if hasattr(conn, 'laddr') and conn.laddr and conn.laddr.port == port:
-                                message = f"Killing process {proc.info['name']} (PID: {proc.info['pid']}) using port {port}"
-                                if hasattr(self, 'emit_progress'):
-                                    self.emit_progress("execution", message)
-                                else:
-                                    self.logger.info(message)
-                                proc.kill()
-                                killed_any = True
-                                break
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-                except Exception as e:
-                    continue
-            
-            if killed_any:
-                time.sleep(2)  # Give killed processes time to clean up
+            owner = self.port_registry.owner_of(port)
+            if owner is not None:
+                self.port_registry.release(owner)
                 message = f"Cleaned up processes on port {port}"
-                if hasattr(self, 'emit_progress'):
-                    self.emit_progress("execution", message)
-                else:
-                    self.logger.info(message)
-            else:
+            elif self.port_registry.is_free(port):
                 message = f"Port {port} is available"
-                if hasattr(self, 'emit_progress'):
-                    self.emit_progress("execution", message)
-                else:
-                    self.logger.info(message)
+            else:
+                message = f"Port {port} is in use by a process not started by this server"
+            
+            if hasattr(self, 'emit_progress'):
+                self.emit_progress("execution", message)
+            else:
+                self.logger.info(message)
                 
         except Exception as e:
             message = f"Warning: Could not check port {port}: {str(e)}"
@@ -123,10 +128,11 @@ class ProjectManager:
                 self.logger.warning(message)
             # Continue anyway - this is not critical
     
-    def emit_progress(self, stage, message, data=None):
-        """Emit progress updates to frontend via WebSocket"""
-        if self.socketio:
-            self.socketio.emit('progress_update', {
+    def emit_progress(self, stage, message, data=None, project_id=None):
+        """Send a progress update to the room of the project being worked on"""
+        project_id = project_id or _current_project.get()
+        if project_id:
+            progress_broadcaster.publish(project_id, 'progress_update', {
                 'stage': stage,
                 'message': message,
                 'data': data,
@@ -134,6 +140,46 @@ class ProjectManager:
             })
         print(f"[{stage}] {message}")
     
+    def _make_stream_handler(self, project_id, stage, label):
+        """Build an on_chunk callback that streams an agent's response to the project's room.
+
+        Returns None when streaming is disabled so agents fall back to a single call.
+        """
+        if not Config.STREAM_AGENT_OUTPUT:
+            return None
+        
+        parser = IncrementalJSONParser()
+        progress = {'chars': 0, 'files': 0}
+        
+        def on_chunk(text):
+            if progress['chars'] == 0:
+                self.emit_progress(stage, f"{label} is writing code...")
+            progress['chars'] += len(text)
+            completed = parser.feed(text)
+            progress['files'] += len(completed)
+            
+            progress_broadcaster.publish(project_id, 'progress_update', {
+                'stage': stage,
+                'message': f"{label}: {progress['chars']} characters received",
+                'data': {
+                    'project_id': project_id,
+                    'chunk': text,
+                    'current_file': parser.current_file(),
+                    'completed_files': [entry.get('path') or entry.get('filename') for entry in completed],
+                    'chars_received': progress['chars']
+                },
+                'partial': True,
+                'timestamp': datetime.now().isoformat()
+            })
+            
+            for entry in completed:
+                path = entry.get('path') or entry.get('filename')
+                self.emit_progress(stage, f"📄 {label} finished {path}", {'filesCreated': progress['files']},
+                                   project_id=project_id)
+        
+        return on_chunk
+    
+    @_for_project
     def generate_project(self, user_prompt, project_id, mode='simple'):
         """Main method to generate a complete project (Python or Web Application)"""
         try:
@@ -160,17 +206,26 @@ class ProjectManager:
             else:
                 self.logger.info("Plan parsed successfully")
             
+            project_catalog.upsert(
+                project_id,
+                name=project_plan.get('project_name'),
+                description=project_plan.get('description'),
+                prompt=user_prompt,
+                mode=mode,
+                status="running"
+            )
+            
             # Determine project type and route to appropriate generation method
             # If advanced mode requested, route to advanced pipeline
             if mode == 'advanced':
-                return self.generate_advanced_project(user_prompt, project_id, project_plan)
-
-            project_type = project_plan.get('project_type', 'python_application')
-
-            if project_type == 'web_application':
-                return self.generate_web_application(user_prompt, project_id, project_plan)
+                result = self.generate_advanced_project(user_prompt, project_id, project_plan)
+            elif project_plan.get('project_type', 'python_application') == 'web_application':
+                result = self.generate_web_application(user_prompt, project_id, project_plan)
             else:
-                return self.generate_python_application(user_prompt, project_id, project_plan)
+                result = self.generate_python_application(user_prompt, project_id, project_plan)
+            
+            project_catalog.index_directory(project_id, status="completed" if result and result.get('success') else "failed")
+            return result
                 
         except Exception as e:
             self.logger.error(f"Error in generate_project: {str(e)}")
@@ -197,55 +252,45 @@ class ProjectManager:
             planner_result = planner.create_high_level_plan(user_prompt)
             for log in planner_result.get('logs', []):
                 all_logs.append(log)
-                if self.socketio:
-                    self.socketio.emit('advanced_log', log)
+                progress_broadcaster.publish(project_id, 'advanced_log', log)
 
             # Research
             research_result = researcher.gather_requirements(planner_result.get('plan'))
             for log in research_result.get('logs', []):
                 all_logs.append(log)
-                if self.socketio:
-                    self.socketio.emit('advanced_log', log)
+                progress_broadcaster.publish(project_id, 'advanced_log', log)
 
             # Data engineering
             pipeline_result = data_engineer.design_pipeline(research_result.get('research'))
             for log in pipeline_result.get('logs', []):
                 all_logs.append(log)
-                if self.socketio:
-                    self.socketio.emit('advanced_log', log)
+                progress_broadcaster.publish(project_id, 'advanced_log', log)
 
             # ML engineering
             model_result = ml_engineer.design_model(pipeline_result.get('pipeline'))
             for log in model_result.get('logs', []):
                 all_logs.append(log)
-                if self.socketio:
-                    self.socketio.emit('advanced_log', log)
+                progress_broadcaster.publish(project_id, 'advanced_log', log)
 
             # Review
             review_result = reviewer.review({'plan': planner_result.get('plan'), 'model': model_result.get('model')})
             for log in review_result.get('logs', []):
                 all_logs.append(log)
-                if self.socketio:
-                    self.socketio.emit('advanced_log', log)
+                progress_broadcaster.publish(project_id, 'advanced_log', log)
 
             # Documentation
             docs_result = doc_agent.generate_docs(planner_result.get('plan'), research_result.get('research'), pipeline_result.get('pipeline'), model_result.get('model'))
             for log in docs_result.get('logs', []):
                 all_logs.append(log)
-                if self.socketio:
-                    self.socketio.emit('advanced_log', log)
+                progress_broadcaster.publish(project_id, 'advanced_log', log)
 
             # Write docs to project dir
             docs = docs_result.get('docs', {})
             for fname, content in docs.items():
-                with open(os.path.join(project_dir, fname), 'w', encoding='utf-8') as f:
-                    f.write(content)
+                self._save_file(os.path.join(project_dir, fname), content)
 
             # Package minimal placeholder project (high-level)
-            zip_path = os.path.join(Config.GENERATED_PROJECTS_DIR, f"{project_id}.zip")
-            with zipfile.ZipFile(zip_path, 'w') as z:
-                for fname in docs.keys():
-                    z.write(os.path.join(project_dir, fname), arcname=fname)
+            zip_path = self._create_project_zip(project_dir, project_id)
 
             result = {
                 'success': True,
@@ -279,7 +324,10 @@ class ProjectManager:
             
             # Stage 2: Code Generation
             self.emit_progress("coding", "Generating Python code...")
-            code_result = self.sr_developer1.generate_code(json.dumps(project_plan))
+            code_result = self.sr_developer1.generate_code(
+                json.dumps(project_plan),
+                on_chunk=self._make_stream_handler(project_id, "coding", "Senior Developer")
+            )
             
             # Parse the code result using robust parser
             self.logger.info(f"Parsing code result, type: {type(code_result)}, length: {len(str(code_result)) if code_result else 0}")
@@ -336,33 +384,17 @@ class ProjectManager:
             
             self.emit_progress("writing", "Project files written successfully")
             
-            # Stage 5: Runtime Testing
+            # Stage 5: Static checks and Runtime Testing
             self.emit_progress("testing", "Testing project runtime...")
             main_file = project_plan.get('main_file', 'main.py')
+            code_check = code_checker.check_project(project_dir, blob_store.load_manifest(project_id))
             runtime_success, error_traceback = self._test_runtime(project_dir, main_file)
             
-            if not runtime_success and error_traceback:
-                self.emit_progress("testing", "Runtime errors found, fixing...")
-                # Try to fix runtime errors
-                fixed_code_result = self.sr_developer2.review_and_fix(
-                    json.dumps(project_plan), 
-                    json.dumps({"files": final_code}),
-                    error_traceback
+            if (not runtime_success and error_traceback) or code_check['errors']:
+                self.emit_progress("testing", "Runtime or static check errors found, fixing...", {"diagnostics": code_check['diagnostics']})
+                final_code, runtime_success, error_traceback, code_check = self._repair_project(
+                    project_id, project_dir, main_file, final_code, runtime_success, error_traceback, code_check
                 )
-                
-                # Parse the runtime-fixed code using robust parser
-                fixed_code = json_parser.parse_json_response(
-                    fixed_code_result,
-                    expected_keys=['files'],
-                    agent_type="runtime_fix",
-                    project_id=project_id
-                )
-                
-                if fixed_code:
-                    final_code = fixed_code.get('files', final_code)
-                    # Rewrite files and test again
-                    self._write_project_files(project_dir, final_code)
-                    runtime_success, error_traceback = self._test_runtime(project_dir, main_file)
             
             if runtime_success:
                 self.emit_progress("testing", "Runtime testing passed")
@@ -389,13 +421,11 @@ class ProjectManager:
             doc_path = os.path.join(project_dir, "README.md")
             try:
                 doc_content = str(documentation) if documentation else "# Project Documentation\n\nNo documentation available"
-                with open(doc_path, 'w', encoding='utf-8', errors='replace') as f:
-                    f.write(doc_content)
+                self._save_file(doc_path, doc_content)
             except UnicodeDecodeError as e:
                 print(f"Unicode error writing documentation: {e}")
                 # Fallback to ASCII-safe content
-                with open(doc_path, 'w', encoding='ascii', errors='replace') as f:
-                    f.write("# Project Documentation\n\nDocumentation encoding error - content not available")
+                self._save_file(doc_path, "# Project Documentation\n\nDocumentation encoding error - content not available", encoding='ascii')
             except Exception as e:
                 print(f"Error writing documentation: {e}")
             
@@ -414,6 +444,7 @@ class ProjectManager:
                 "project_id": project_id,
                 "project_plan": project_plan,
                 "runtime_success": runtime_success,
+                "diagnostics": code_check['diagnostics'],
                 "functional_test": functional_test_result,
                 "zip_path": zip_path,
                 "project_dir": project_dir
@@ -447,7 +478,10 @@ class ProjectManager:
             
             # Stage 2: Frontend Generation
             self.emit_progress("frontend", "Generating frontend code (HTML, CSS, JavaScript)...")
-            frontend_result = self.frontend_developer.generate_frontend_code(json.dumps(project_plan))
+            frontend_result = self.frontend_developer.generate_frontend_code(
+                json.dumps(project_plan),
+                on_chunk=self._make_stream_handler(project_id, "frontend", "Frontend Developer")
+            )
             
             frontend_code = json_parser.parse_json_response(
                 frontend_result,
@@ -464,7 +498,10 @@ class ProjectManager:
             
             # Stage 3: Backend API Generation
             self.emit_progress("backend", "Generating backend API...")
-            backend_result = self.backend_api_developer.generate_backend_code(json.dumps(project_plan))
+            backend_result = self.backend_api_developer.generate_backend_code(
+                json.dumps(project_plan),
+                on_chunk=self._make_stream_handler(project_id, "backend", "Backend Developer")
+            )
             
             backend_code = json_parser.parse_json_response(
                 backend_result,
@@ -541,13 +578,11 @@ class ProjectManager:
             doc_path = os.path.join(project_dir, "README.md")
             try:
                 doc_content = str(documentation) if documentation else self._create_web_readme(project_plan)
-                with open(doc_path, 'w', encoding='utf-8', errors='replace') as f:
-                    f.write(doc_content)
+                self._save_file(doc_path, doc_content)
             except Exception as e:
                 print(f"Error writing web documentation: {e}")
                 # Create basic web README
-                with open(doc_path, 'w', encoding='utf-8', errors='replace') as f:
-                    f.write(self._create_web_readme(project_plan))
+                self._save_file(doc_path, self._create_web_readme(project_plan))
             
             self.emit_progress("documenting", "Web documentation created successfully")
             
@@ -609,8 +644,7 @@ class ProjectManager:
             main_content = self._generate_main_content(gui_framework, project_files, project_plan)
             
             try:
-                with open(main_path, 'w', encoding='utf-8') as f:
-                    f.write(main_content)
+                self._save_file(main_path, main_content)
             except Exception as e:
                 print(f"Error creating main.py: {e}")
     
@@ -674,7 +708,7 @@ def main():
                 result = subprocess.run([
                     sys.executable, '-m', 'streamlit', 'run', streamlit_file_path,
                     '--server.headless', 'true',
-                    '--server.port', '8501'
+                    '--server.port', os.environ.get('PORT', '8501')
                 ], check=True)
                 
             except ImportError:
@@ -835,19 +869,11 @@ if __name__ == "__main__":
             main_py_path = os.path.join(project_dir, 'main.py')
             if not os.path.exists(main_py_path):
                 main_content = self._generate_main_entry_point(all_files)
-                with open(main_py_path, 'w', encoding='utf-8') as f:
-                    f.write(main_content)
+                self._save_file(main_py_path, main_content)
             
             # Create zip file
             self.emit_progress("packaging", "Creating project archive...")
-            zip_path = os.path.join(Config.TEMP_DIR, f"python_project_{project_id}.zip")
-            
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(project_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arc_name = os.path.relpath(file_path, project_dir)
-                        zipf.write(file_path, arc_name)
+            zip_path = self._create_project_zip(project_dir, project_id)
             
             self.emit_progress("completed", "Advanced project generation completed successfully!")
             
@@ -911,37 +937,29 @@ if __name__ == "__main__":
         return main_content
 
     def _write_project_files(self, project_dir, files):
-        """Write generated code files to disk"""
+        """Write generated code files as one batch through the content-addressed blob store.
+
+        Either every file lands or the project is left as it was (the error is
+        raised); unchanged files are not rewritten. Returns the project's
+        manifest ({path: {'hash', 'size'}}).
+        """
+        encoded = []
         for file_info in files:
             try:
-                file_path = os.path.join(project_dir, file_info['path'])
-                file_dir = os.path.dirname(file_path)
-                
-                # Create directory if it doesn't exist
-                if file_dir:
-                    os.makedirs(file_dir, exist_ok=True)
-                
                 # Get file content and handle potential encoding issues
                 content = file_info.get('content', '')
                 if not isinstance(content, str):
                     content = str(content)
-                
-                # Write file content with explicit UTF-8 encoding
-                with open(file_path, 'w', encoding='utf-8', errors='replace') as f:
-                    f.write(content)
-                    
-            except UnicodeDecodeError as e:
-                print(f"Unicode error writing file {file_info.get('path', 'unknown')}: {e}")
-                # Try writing with different encoding or skip
-                try:
-                    with open(file_path, 'w', encoding='latin-1') as f:
-                        f.write(content)
-                except Exception as e2:
-                    print(f"Failed to write file with fallback encoding: {e2}")
-                    continue
+                encoded.append((file_info['path'], content.encode('utf-8', errors='replace')))
             except Exception as e:
-                print(f"Error writing file {file_info.get('path', 'unknown')}: {e}")
+                print(f"Error preparing file {file_info.get('path', 'unknown')}: {e}")
                 continue
+        
+        return blob_store.write_files(project_dir, encoded)
+    
+    def _save_file(self, file_path, content, encoding='utf-8'):
+        """Write one project file through the blob store (replacing, never editing, a shared blob)"""
+        blob_store.write_file(file_path, content.encode(encoding, errors='replace'))
     
     def _test_runtime(self, project_dir, main_file):
         """Test if the project runs without runtime errors"""
@@ -950,14 +968,11 @@ if __name__ == "__main__":
             if not os.path.exists(main_path):
                 return False, f"Main file main.py not found"
             
-            # Run the main file in a subprocess with a timeout
-            result = subprocess.run(
-                [sys.executable, "main.py"],
-                cwd=project_dir,
-                capture_output=True,
-                text=True,
-                timeout=10  # Reduced timeout for quick validation
-            )
+            # Run on private copies of the stored files, in case the program writes to them
+            blob_store.detach(os.path.basename(os.path.normpath(project_dir)), project_dir)
+            
+            # Run the main file in a warm pooled interpreter with a timeout
+            result = runtime_pool.run(project_dir, ["main.py"], timeout=10)  # Reduced timeout for quick validation
             
             if result.returncode == 0:
                 return True, None
@@ -973,51 +988,87 @@ if __name__ == "__main__":
         except Exception as e:
             return False, str(e)
     
+    def _describe_problems(self, runtime_success, error_traceback, code_check):
+        """Runtime traceback plus static diagnostics, as one report for the fix agent"""
+        sections = []
+        if not runtime_success and error_traceback:
+            sections.append(error_traceback)
+        errors = [d for d in code_check['diagnostics'] if d['severity'] == 'error']
+        if errors:
+            sections.append("Static check errors:\n" + format_diagnostics(errors))
+        return "\n\n".join(sections)
+    
+    def _repair_project(self, project_id, project_dir, main_file, final_code, runtime_success, error_traceback, code_check):
+        """Fix errors with targeted edits to the failing files only, re-testing after every patch"""
+        files = read_sources(project_dir)
+        previous_problems = None
+        for iteration in range(1, Config.REPAIR_MAX_ITERATIONS + 1):
+            targets = locate_failures(project_dir, files, error_traceback if not runtime_success else '',
+                                      code_check['diagnostics'])
+            if not targets and main_file in files:
+                targets = {main_file: []}
+            context = build_repair_context(files, targets)
+            self.emit_progress("testing", f"Repair attempt {iteration}: fixing {', '.join(targets)}...", {
+                "iteration": iteration,
+                "files": list(targets),
+                "context_chars": len(context)
+            })
+            
+            response = json_parser.parse_json_response(
+                self.sr_developer2.repair(
+                    self._describe_problems(runtime_success, error_traceback, code_check),
+                    context,
+                    previous_problems
+                ),
+                agent_type="runtime_fix",
+                project_id=project_id
+            )
+            if not response:
+                previous_problems = ["The response was not valid JSON."]
+                continue
+            changed, previous_problems = apply_edits(files, response)
+            if not changed:
+                previous_problems = previous_problems or ["The patch did not change anything."]
+                continue
+            
+            # Only the patched files are written and re-checked
+            manifest = self._write_project_files(project_dir, [{'path': path, 'content': content} for path, content in changed.items()])
+            files.update(changed)
+            known = {file_info.get('path') for file_info in final_code}
+            final_code = [dict(file_info, content=changed[file_info['path']]) if file_info.get('path') in changed else file_info
+                          for file_info in final_code]
+            final_code += [{'path': path, 'content': content} for path, content in changed.items() if path not in known]
+            
+            code_check = code_checker.check_project(project_dir, manifest)
+            runtime_success, error_traceback = self._test_runtime(project_dir, main_file)
+            if runtime_success and not code_check['errors']:
+                self.emit_progress("testing", f"Errors fixed after {iteration} repair attempt(s)")
+                break
+        return final_code, runtime_success, error_traceback, code_check
+    
     def _create_requirements_file(self, project_dir, dependencies):
         """Create requirements.txt file"""
         req_path = os.path.join(project_dir, "requirements.txt")
         try:
-            with open(req_path, 'w', encoding='utf-8', errors='replace') as f:
-                for dep in dependencies:
-                    if dep and dep.strip():  # Only write non-empty dependencies
-                        # Ensure dependency is a string and clean it
-                        dep_str = str(dep).strip()
-                        f.write(f"{dep_str}\n")
+            lines = []
+            for dep in dependencies:
+                if dep and dep.strip():  # Only write non-empty dependencies
+                    # Ensure dependency is a string and clean it
+                    dep_str = str(dep).strip()
+                    lines.append(f"{dep_str}\n")
+            self._save_file(req_path, ''.join(lines))
         except Exception as e:
             print(f"Error creating requirements.txt: {e}")
             # Create an empty requirements.txt as fallback
             try:
-                with open(req_path, 'w', encoding='utf-8') as f:
-                    f.write("# Requirements file - error during generation\n")
+                self._save_file(req_path, "# Requirements file - error during generation\n")
             except Exception as e2:
                 print(f"Failed to create fallback requirements.txt: {e2}")
     
     def _create_project_zip(self, project_dir, project_id):
-        """Create a zip file of the project"""
-        # Ensure temp directory exists
-        os.makedirs(Config.TEMP_DIR, exist_ok=True)
-        
-        zip_path = os.path.join(Config.TEMP_DIR, f"{project_id}.zip")
-        
+        """Build (or reuse) the cached download archive of the project"""
         try:
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(project_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, project_dir)
-                        
-                        # Add error handling for individual files
-                        try:
-                            zipf.write(file_path, arcname)
-                        except UnicodeDecodeError as e:
-                            print(f"Unicode error with file {file_path}: {e}")
-                            # Skip problematic files or handle them differently
-                            continue
-                        except Exception as e:
-                            print(f"Error adding file {file_path} to zip: {e}")
-                            continue
-            
-            return zip_path
+            return project_archiver.build(project_id, project_dir)
         except Exception as e:
             print(f"Error creating zip file: {e}")
             raise
@@ -1025,163 +1076,11 @@ if __name__ == "__main__":
     def analyze_project_structure(self, project_path):
         """
         Dynamically analyze project structure and determine the best execution method.
-        This method inspects the actual files and creates appropriate run configurations.
+        Imports, app objects and run calls are resolved from each file's AST; results are
+        cached, so analyzing an unchanged project again does not re-read its files.
         """
         try:
-            analysis = {
-                'project_type': 'unknown',
-                'entry_points': [],
-                'frameworks': [],
-                'structure': {},
-                'run_method': 'python',
-                'recommended_command': None,
-                'port': None
-            }
-            
-            # Get all files in the project
-            all_files = []
-            for root, dirs, files in os.walk(project_path):
-                for file in files:
-                    if file.endswith(('.py', '.html', '.js', '.css', '.json', '.txt', '.md')):
-                        rel_path = os.path.relpath(os.path.join(root, file), project_path)
-                        all_files.append(rel_path)
-            
-            analysis['structure']['all_files'] = all_files
-            
-            # Analyze Python files for frameworks and patterns
-            python_files = [f for f in all_files if f.endswith('.py')]
-            html_files = [f for f in all_files if f.endswith('.html')]
-            js_files = [f for f in all_files if f.endswith('.js')]
-            css_files = [f for f in all_files if f.endswith('.css')]
-            
-            analysis['structure']['python_files'] = python_files
-            analysis['structure']['html_files'] = html_files
-            analysis['structure']['js_files'] = js_files
-            analysis['structure']['css_files'] = css_files
-            
-            # Check for specific framework indicators
-            frameworks_found = set()
-            entry_points = []
-            
-            for py_file in python_files:
-                file_path = os.path.join(project_path, py_file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read().lower()
-                        
-                        # Framework detection
-                        if 'streamlit' in content or 'st.' in content:
-                            frameworks_found.add('streamlit')
-                            entry_points.append({'file': py_file, 'type': 'streamlit'})
-                        
-                        if 'fastapi' in content:
-                            frameworks_found.add('fastapi')
-                            entry_points.append({'file': py_file, 'type': 'fastapi'})
-                        
-                        if 'flask' in content:
-                            frameworks_found.add('flask')
-                            entry_points.append({'file': py_file, 'type': 'flask'})
-                        
-                        if 'django' in content:
-                            frameworks_found.add('django')
-                            entry_points.append({'file': py_file, 'type': 'django'})
-                        
-                        if 'tkinter' in content or 'tk' in content:
-                            frameworks_found.add('tkinter')
-                            entry_points.append({'file': py_file, 'type': 'tkinter'})
-                        
-                        if 'pygame' in content:
-                            frameworks_found.add('pygame')
-                            entry_points.append({'file': py_file, 'type': 'pygame'})
-                        
-                        # Check for uvicorn.run calls (FastAPI)
-                        if 'uvicorn.run' in content:
-                            frameworks_found.add('fastapi')
-                            entry_points.append({'file': py_file, 'type': 'fastapi_uvicorn'})
-                        
-                        # Check for app.run calls (Flask)
-                        if 'app.run(' in content:
-                            frameworks_found.add('flask')
-                            entry_points.append({'file': py_file, 'type': 'flask_run'})
-                            
-                except Exception as e:
-                    continue
-            
-            analysis['frameworks'] = list(frameworks_found)
-            analysis['entry_points'] = entry_points
-            
-            # Determine project type and run method
-            if 'streamlit' in frameworks_found:
-                analysis['project_type'] = 'streamlit'
-                analysis['run_method'] = 'streamlit'
-                # Find the main streamlit file
-                streamlit_files = [ep['file'] for ep in entry_points if ep['type'] == 'streamlit']
-                if streamlit_files:
-                    analysis['recommended_command'] = f"streamlit run {streamlit_files[0]}"
-                    analysis['port'] = 8501
-                    
-            elif 'fastapi' in frameworks_found:
-                analysis['project_type'] = 'fastapi'
-                analysis['run_method'] = 'fastapi'
-                # Check for uvicorn runner files
-                fastapi_files = [ep['file'] for ep in entry_points if 'fastapi' in ep['type']]
-                if fastapi_files:
-                    # Look for run.py or main.py with uvicorn
-                    if 'run.py' in all_files:
-                        analysis['recommended_command'] = "python run.py"
-                    else:
-                        # Try to determine the app location
-                        app_location = self._find_fastapi_app_location(project_path, fastapi_files[0])
-                        analysis['recommended_command'] = f"uvicorn {app_location} --reload --port 8080"
-                    analysis['port'] = 8080
-                    
-            elif 'flask' in frameworks_found:
-                analysis['project_type'] = 'flask'
-                analysis['run_method'] = 'web'
-                # Check for run.py or app.py
-                if 'run.py' in all_files:
-                    analysis['recommended_command'] = "python run.py"
-                elif 'app.py' in all_files:
-                    analysis['recommended_command'] = "python app.py"
-                analysis['port'] = 8080
-                
-            elif 'django' in frameworks_found:
-                analysis['project_type'] = 'django'
-                analysis['run_method'] = 'django'
-                analysis['recommended_command'] = "python manage.py runserver"
-                analysis['port'] = 8000
-                
-            elif html_files and (js_files or css_files):
-                analysis['project_type'] = 'web_frontend'
-                analysis['run_method'] = 'static'
-                # Static web project
-                if 'index.html' in all_files:
-                    analysis['recommended_command'] = "serve index.html"
-                    
-            elif 'tkinter' in frameworks_found or 'pygame' in frameworks_found:
-                analysis['project_type'] = 'desktop'
-                analysis['run_method'] = 'python'
-                # Desktop application
-                desktop_files = [ep['file'] for ep in entry_points if ep['type'] in ['tkinter', 'pygame']]
-                if desktop_files:
-                    analysis['recommended_command'] = f"python {desktop_files[0]}"
-                    
-            else:
-                # Generic Python project
-                analysis['project_type'] = 'python'
-                analysis['run_method'] = 'python'
-                # Look for main.py, run.py, or app.py
-                if 'main.py' in all_files:
-                    analysis['recommended_command'] = "python main.py"
-                elif 'run.py' in all_files:
-                    analysis['recommended_command'] = "python run.py"
-                elif 'app.py' in all_files:
-                    analysis['recommended_command'] = "python app.py"
-                elif python_files:
-                    analysis['recommended_command'] = f"python {python_files[0]}"
-            
-            return analysis
-            
+            return project_analyzer.analyze(project_path)
         except Exception as e:
             self.logger.error(f"Error analyzing project structure: {e}")
             return {
@@ -1192,30 +1091,14 @@ if __name__ == "__main__":
     
     def _find_fastapi_app_location(self, project_path, main_file):
         """Find the FastAPI app instance location for uvicorn"""
+        module_path = main_file.replace('.py', '').replace('/', '.').replace('\\', '.')
         try:
-            file_path = os.path.join(project_path, main_file)
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                
-                # Look for app = FastAPI() or similar patterns
-                import re
-                app_patterns = [
-                    r'(\w+)\s*=\s*FastAPI\(',
-                    r'app\s*=\s*FastAPI\(',
-                ]
-                
-                for pattern in app_patterns:
-                    match = re.search(pattern, content)
-                    if match:
-                        app_name = match.group(1) if match.groups() else 'app'
-                        # Convert file path to module path
-                        module_path = main_file.replace('.py', '').replace('/', '.').replace('\\', '.')
-                        return f"{module_path}:{app_name}"
-                
-                # Default assumption
-                module_path = main_file.replace('.py', '').replace('/', '.').replace('\\', '.')
-                return f"{module_path}:app"
-                
+            facts = project_analyzer.file_facts(os.path.join(project_path, main_file))
+            for app in facts['apps']:
+                if app['framework'] == 'fastapi' and not app['factory']:
+                    return f"{module_path}:{app['name']}"
+            # Default assumption
+            return f"{module_path}:app"
         except Exception:
             return "app:app"
     
@@ -1279,10 +1162,11 @@ def main():
         # Define the streamlit file to run
         streamlit_file = "{main_file}"
         
-        # Start streamlit server
+        # Start streamlit server on the port leased to this project
+        port = os.environ.get('PORT', '8501')
         cmd = [
             sys.executable, '-m', 'streamlit', 'run', streamlit_file,
-            '--server.port', '8501',
+            '--server.port', port,
             '--server.headless', 'false'
         ]
         
@@ -1291,7 +1175,7 @@ def main():
         # Open browser after a delay
         def open_browser():
             time.sleep(3)
-            webbrowser.open('http://localhost:8501')
+            webbrowser.open(f'http://localhost:{{port}}')
         
         browser_thread = threading.Thread(target=open_browser)
         browser_thread.daemon = True
@@ -1318,8 +1202,7 @@ if __name__ == "__main__":
 '''
         
         run_py_path = os.path.join(project_path, 'run.py')
-        with open(run_py_path, 'w', encoding='utf-8') as f:
-            f.write(runner_content)
+        self._save_file(run_py_path, runner_content)
         
         return {'success': True, 'runner_type': 'streamlit', 'entry_file': main_file}
     
@@ -1360,9 +1243,10 @@ import threading
 
 def main():
     """Run the FastAPI application"""
+    port = int(os.environ.get('PORT', '8080'))
     print("Starting FastAPI application...")
-    print("API will be available at http://localhost:8080")
-    print("Documentation at http://localhost:8080/docs")
+    print(f"API will be available at http://localhost:{{port}}")
+    print(f"Documentation at http://localhost:{{port}}/docs")
     print("-" * 50)
     
     try:
@@ -1388,14 +1272,14 @@ def main():
         # Open browser after a delay
         def open_browser():
             time.sleep(3)
-            webbrowser.open('http://localhost:8080/docs')
+            webbrowser.open(f'http://localhost:{{port}}/docs')
         
         browser_thread = threading.Thread(target=open_browser)
         browser_thread.daemon = True
         browser_thread.start()
         
         # Run uvicorn
-        uvicorn.run(app_location, host="0.0.0.0", port=8080, reload=True)
+        uvicorn.run(app_location, host="0.0.0.0", port=port, reload=True)
         
     except KeyboardInterrupt:
         print("\\nApplication stopped by user.")
@@ -1404,7 +1288,7 @@ def main():
         print("Trying alternative startup method...")
         try:
             # Fallback method
-            cmd = [sys.executable, '-m', 'uvicorn', app_location, '--host', '0.0.0.0', '--port', '8080', '--reload']
+            cmd = [sys.executable, '-m', 'uvicorn', app_location, '--host', '0.0.0.0', '--port', str(port), '--reload']
             subprocess.run(cmd, cwd=current_dir)
         except Exception as e2:
             print(f"Fallback method failed: {{e2}}")
@@ -1417,8 +1301,7 @@ if __name__ == "__main__":
 '''
         
         run_py_path = os.path.join(project_path, 'run.py')
-        with open(run_py_path, 'w', encoding='utf-8') as f:
-            f.write(runner_content)
+        self._save_file(run_py_path, runner_content)
         
         # Ensure package structure
         self._ensure_package_structure(project_path)
@@ -1427,29 +1310,17 @@ if __name__ == "__main__":
     
     def _create_flask_runner(self, project_path, analysis):
         """Create a Flask-specific runner using WSGI server for Windows compatibility"""
-        entry_points = [ep for ep in analysis.get('entry_points', []) if ep['type'] in ['flask', 'flask_run']]
+        # The module defining the Flask app (or its factory), as found by the project analyzer
+        flask_apps = [ep for ep in analysis.get('entry_points', []) if ep['type'] == 'flask']
         
-        # Find the Flask app
         app_file = 'app.py'
-        if entry_points:
-            app_file = entry_points[0]['file']
-        elif 'app.py' in analysis.get('structure', {}).get('python_files', []):
-            app_file = 'app.py'
-        
-        # Check if it's using app factory pattern
-        app_import = "from app import app"
-        app_obj = "app"
+        if flask_apps:
+            app_file = flask_apps[0]['file']
         
-        try:
-            app_path = os.path.join(project_path, app_file)
-            if os.path.exists(app_path):
-                with open(app_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    if 'def create_app(' in content:
-                        app_import = "from app import create_app"
-                        app_obj = "create_app()"
-        except Exception:
-            pass
+        app_module = app_file[:-3].replace('/', '.').replace('\\', '.')
+        app_name = flask_apps[0]['app'] if flask_apps else 'app'
+        app_import = f"from {app_module} import {app_name}"
+        app_obj = f"{app_name}()" if flask_apps and flask_apps[0]['factory'] else app_name
         
         runner_content = f'''#!/usr/bin/env python3
 """
@@ -1472,8 +1343,9 @@ class QuietWSGIServer(WSGIServer):
 
 def main():
     """Run the Flask application"""
+    port = int(os.environ.get('PORT', '8080'))
     print("Starting Flask web application...")
-    print("Application will be available at http://localhost:8080")
+    print(f"Application will be available at http://localhost:{{port}}")
     print("-" * 50)
     
     try:
@@ -1486,7 +1358,6 @@ def main():
         {app_import}
         app = {app_obj}
         
-        port = 8080
         host = '0.0.0.0'
         
         # Create WSGI server
@@ -1524,8 +1395,7 @@ if __name__ == "__main__":
 '''
         
         run_py_path = os.path.join(project_path, 'run.py')
-        with open(run_py_path, 'w', encoding='utf-8') as f:
-            f.write(runner_content)
+        self._save_file(run_py_path, runner_content)
         
         return {'success': True, 'runner_type': 'flask', 'app_file': app_file}
     
@@ -1544,8 +1414,7 @@ if __name__ == "__main__":
             for py_dir in python_dirs:
                 init_path = os.path.join(project_path, py_dir, '__init__.py')
                 if not os.path.exists(init_path):
-                    with open(init_path, 'w', encoding='utf-8') as f:
-                        f.write('# This file makes the directory a Python package\\n')
+                    self._save_file(init_path, '# This file makes the directory a Python package\\n')
                         
         except Exception as e:
             self.logger.warning(f"Could not ensure package structure: {e}")
@@ -1669,10 +1538,16 @@ if __name__ == "__main__":
             print(f"Error determining run method: {e}")
             return 'python'
 
+    @_for_project
     def execute_project(self, project_id, project_path, run_method):
         """Execute the project and capture output with dynamic detection"""
         original_cwd = os.getcwd()
         try:
+            # Restore any stored files missing from the working directory
+            restored = blob_store.materialize(project_id, project_path)
+            if restored:
+                self.emit_progress("execution", f"Restored {restored} project files from storage")
+            
             self.emit_progress("execution", f"Analyzing project structure...")
             
             # Dynamically analyze the project structure
@@ -1701,34 +1576,30 @@ if __name__ == "__main__":
                 self.stop_project_execution(project_id)
                 time.sleep(1)  # Give it a moment to clean up
             
+            # Run on private copies of the stored files, in case the program writes to them
+            blob_store.detach(project_id, project_path)
+            
             # Change to project directory
             os.chdir(project_path)
             
-            # Install dependencies first
-            self.emit_progress("execution", "Installing project dependencies...")
-            requirements_path = os.path.join(project_path, 'requirements.txt')
-            
-            if os.path.exists(requirements_path):
-                try:
-                    # Install requirements
-                    self.emit_progress("execution", "Installing dependencies (this may take a moment)...")
-                    pip_result = subprocess.run([
-                        sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt', '--user', '--quiet'
-                    ], capture_output=True, text=True, timeout=300)
-                    
-                    if pip_result.returncode != 0:
-                        self.emit_progress("execution", f"Warning: Some dependencies may not have installed properly")
-                        self.emit_progress("execution", f"Pip stderr: {pip_result.stderr[:200]}...")
-                        # Continue anyway - many projects can run with partial dependencies
-                    else:
-                        self.emit_progress("execution", "Dependencies installed successfully")
-                        
-                except subprocess.TimeoutExpired:
-                    self.emit_progress("execution", "Warning: Dependency installation timed out, proceeding anyway")
-                except Exception as e:
-                    self.emit_progress("execution", f"Warning: Could not install dependencies: {str(e)[:100]}...")
-            else:
-                self.emit_progress("execution", "No requirements.txt found, proceeding without dependency installation")
+            # Resolve the shared environment for this dependency set, building it only on first use
+            self.emit_progress("execution", "Preparing project environment...")
+            python_executable = sys.executable
+            environment = None
+            try:
+                requirements = env_manager.requirements_for_project(project_path, project_type)
+                environment = env_manager.ensure(
+                    requirements, on_progress=lambda message: self.emit_progress("execution", message)
+                )
+                python_executable = environment.python
+                if not environment.ok:
+                    self.emit_progress("execution", f"Warning: Some dependencies may not have installed properly")
+                    self.emit_progress("execution", f"Pip stderr: {environment.message[:200]}...")
+                    # Continue anyway - many projects can run with partial dependencies
+                else:
+                    self.emit_progress("execution", f"Using environment {environment.key} ({len(requirements)} dependencies)")
+            except Exception as e:
+                self.emit_progress("execution", f"Warning: Could not prepare environment: {str(e)[:100]}...")
             
             
         except Exception as e:
@@ -1751,26 +1622,42 @@ if __name__ == "__main__":
             recommended_command = analysis.get('recommended_command', 'python run.py')
             port = analysis.get('port', 8080)
             
+            # Servers get a leased port (passed as PORT) instead of a fixed one
+            process_env = dict(os.environ)
+            if analysis.get('port'):
+                port = self.port_registry.lease(project_id, preferred=analysis['port'])
+                analysis['port'] = port
+                process_env['PORT'] = str(port)
+                self.emit_progress("execution", f"Leased port {port}")
+            
             self.emit_progress("execution", f"Executing: {recommended_command}")
             
             # Always try to run run.py first (our dynamic runner)
             run_py_path = os.path.join(project_path, 'run.py')
             if os.path.exists(run_py_path):
-                cmd = [sys.executable, 'run.py']
+                cmd = [python_executable, 'run.py']
                 self.emit_progress("execution", f"Starting with dynamic runner: {' '.join(cmd)}")
                 
-                # Start the process
+                # Start the process under the sandbox's quotas, in its own process group so stopping it
+                # also stops its children
                 process = subprocess.Popen(
-                    cmd,
+                    sandbox.wrap(project_id, cmd),
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                     text=True,
                     bufsize=1,
                     universal_newlines=True,
-                    cwd=project_path
+                    cwd=project_path,
+                    env=process_env,
+                    start_new_session=True
                 )
                 
                 self.running_processes[project_id] = process
+                self.port_registry.attach(project_id, process.pid)
+                output_supervisor.watch(project_id, process)
+                sandbox.monitor(project_id, process)
+                if environment is not None:
+                    env_manager.attach(environment, process)
                 
                 # Monitor process startup
                 startup_checks = 5
@@ -1779,7 +1666,8 @@ if __name__ == "__main__":
                     
                     # Check if process terminated early
                     if process.poll() is not None:
-                        stdout, stderr = process.communicate()
+                        stdout, stderr = output_supervisor.communicate(project_id, process)
+                        self.port_registry.release(project_id)
                         self.emit_progress("execution", f"Process failed to start. Exit code: {process.returncode}")
                         if stdout:
                             self.emit_progress("execution", f"Stdout: {stdout[:500]}")
@@ -1790,7 +1678,8 @@ if __name__ == "__main__":
                             'method': run_method,
                             'error': f"Process failed to start: {stderr or 'Process terminated unexpectedly'}",
                             'output': stdout or '',
-                            'status': 'failed'
+                            'status': 'failed',
+                            'resources': sandbox.usage(project_id)
                         }
                     
                     self.emit_progress("execution", f"Checking startup... ({i+1}/{startup_checks})")
@@ -1814,7 +1703,7 @@ if __name__ == "__main__":
                                 self.emit_progress("execution", f"Browser opened automatically: {url}")
                             
                             import threading
-                            browser_thread = threading.Thread(target=open_browser)
+                            browser_thread = threading.Thread(target=contextvars.copy_context().run, args=(open_browser,))
                             browser_thread.daemon = True
                             browser_thread.start()
                             
@@ -1831,22 +1720,26 @@ if __name__ == "__main__":
                         'port': port,
                         'output': f'Application is running on port {port}' if port else 'Application started successfully',
                         'auto_opened': True,
-                        'project_type': analysis.get('project_type', 'unknown')
+                        'project_type': analysis.get('project_type', 'unknown'),
+                        'resources': sandbox.usage(project_id)
                     }
                 else:
                     # Final check - process terminated after startup monitoring
-                    stdout, stderr = process.communicate()
+                    stdout, stderr = output_supervisor.communicate(project_id, process)
+                    self.port_registry.release(project_id)
                     self.emit_progress("execution", f"Application stopped unexpectedly after startup")
                     return {
                         'success': False,
                         'method': run_method,
                         'error': f"Application stopped unexpectedly: {stderr or 'Unknown error'}",
                         'output': stdout or '',
-                        'status': 'failed'
+                        'status': 'failed',
+                        'resources': sandbox.usage(project_id)
                     }
             else:
                 # No run.py found, try direct execution based on analysis
-                return self._execute_direct_command(project_id, project_path, recommended_command, analysis)
+                return self._execute_direct_command(project_id, project_path, recommended_command, analysis,
+                                                    environment=environment, process_env=process_env)
                 
         except Exception as e:
             self.emit_progress("execution", f"Dynamic execution failed: {str(e)}")
@@ -2023,7 +1916,7 @@ if __name__ == "__main__":
                             self.emit_progress("execution", f"Could not open browser automatically: {str(e)}")
                     
                     import threading
-                    browser_thread = threading.Thread(target=open_browser)
+                    browser_thread = threading.Thread(target=contextvars.copy_context().run, args=(open_browser,))
                     browser_thread.daemon = True
                     browser_thread.start()
                     
@@ -2147,7 +2040,7 @@ if __name__ == "__main__":
                         self.emit_progress("execution", f"Could not open browser automatically: {str(e)}")
                 
                 import threading
-                browser_thread = threading.Thread(target=open_browser)
+                browser_thread = threading.Thread(target=contextvars.copy_context().run, args=(open_browser,))
                 browser_thread.daemon = True
                 browser_thread.start()
                 
@@ -2282,7 +2175,7 @@ if __name__ == "__main__":
                                 self.emit_progress("execution", f"Browser opened automatically: {url}")
                             
                             import threading
-                            browser_thread = threading.Thread(target=open_browser)
+                            browser_thread = threading.Thread(target=contextvars.copy_context().run, args=(open_browser,))
                             browser_thread.daemon = True
                             browser_thread.start()
                             
@@ -2326,41 +2219,69 @@ if __name__ == "__main__":
                 'status': 'failed'
             }
     
-    def _execute_direct_command(self, project_id, project_path, command, analysis):
+    def _execute_direct_command(self, project_id, project_path, command, analysis, environment=None, process_env=None):
         """Execute project using direct command when no run.py is available"""
         try:
             # Parse the command
             if isinstance(command, str):
                 cmd_parts = command.split()
             else:
-                cmd_parts = command
+                cmd_parts = list(command)
+            
+            # Run inside the project's environment rather than the server's interpreter
+            if environment is not None and cmd_parts:
+                if cmd_parts[0] in ('python', 'python3'):
+                    cmd_parts[0] = environment.python
+                elif cmd_parts[0] in ('streamlit', 'uvicorn', 'flask'):
+                    cmd_parts = [environment.python, '-m'] + cmd_parts
+            
+            # Point servers at the leased port
+            leased_port = process_env.get('PORT') if process_env else None
+            if leased_port:
+                for flag in ('--port', '--server.port'):
+                    if flag in cmd_parts[:-1]:
+                        cmd_parts[cmd_parts.index(flag) + 1] = leased_port
+                        break
+                else:
+                    if 'streamlit' in cmd_parts:
+                        cmd_parts += ['--server.port', leased_port]
+                    elif 'uvicorn' in cmd_parts:
+                        cmd_parts += ['--port', leased_port]
             
             self.emit_progress("execution", f"Direct execution: {' '.join(cmd_parts)}")
             
             # Start the process
             process = subprocess.Popen(
-                cmd_parts,
+                sandbox.wrap(project_id, cmd_parts),
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
                 bufsize=1,
                 universal_newlines=True,
-                cwd=project_path
+                cwd=project_path,
+                env=process_env,
+                start_new_session=True
             )
             
             self.running_processes[project_id] = process
+            self.port_registry.attach(project_id, process.pid)
+            output_supervisor.watch(project_id, process)
+            sandbox.monitor(project_id, process)
+            if environment is not None:
+                env_manager.attach(environment, process)
             
             # For quick-running scripts, get output
             if analysis.get('project_type') in ['python', 'desktop']:
                 try:
-                    stdout, stderr = process.communicate(timeout=30)
+                    stdout, stderr = output_supervisor.communicate(project_id, process, timeout=30)
                     return {
                         'success': process.returncode == 0,
                         'method': analysis.get('run_method', 'python'),
                         'error': stderr if process.returncode != 0 else None,
                         'output': stdout,
                         'status': 'completed',
-                        'exit_code': process.returncode
+                        'exit_code': process.returncode,
+                        'resources': sandbox.usage(project_id)
                     }
                 except subprocess.TimeoutExpired:
                     # Long-running process
@@ -2369,7 +2290,8 @@ if __name__ == "__main__":
                         'method': analysis.get('run_method', 'python'),
                         'message': 'Long-running application started',
                         'status': 'running',
-                        'pid': process.pid
+                        'pid': process.pid,
+                        'resources': sandbox.usage(project_id)
                     }
             else:
                 # Web applications - monitor like before
@@ -2381,16 +2303,18 @@ if __name__ == "__main__":
                         'message': 'Web application started',
                         'status': 'running',
                         'pid': process.pid,
-                        'port': analysis.get('port', 8080)
+                        'port': analysis.get('port', 8080),
+                        'resources': sandbox.usage(project_id)
                     }
                 else:
-                    stdout, stderr = process.communicate()
+                    stdout, stderr = output_supervisor.communicate(project_id, process)
                     return {
                         'success': False,
                         'method': analysis.get('run_method', 'web'),
                         'error': stderr,
                         'output': stdout,
-                        'status': 'failed'
+                        'status': 'failed',
+                        'resources': sandbox.usage(project_id)
                     }
                     
         except Exception as e:
@@ -2414,12 +2338,14 @@ if __name__ == "__main__":
                     if process.poll() is None:
                         process.kill()  # Force kill if still running
                     del self.running_processes[project_id]
+                    self.port_registry.release(project_id)
                     return True
             return False
         except Exception as e:
             print(f"Error stopping project {project_id}: {e}")
             return False
 
+    @_for_project
     def stop_project_execution(self, project_id):
         """Stop a running project execution"""
         try:
@@ -2441,12 +2367,16 @@ if __name__ == "__main__":
                 except:
                     pass  # Process might already be dead
                 
+                # Stop anything the project started (e.g. the server behind run.py) and free its port
+                self.port_registry.release(project_id)
+                
                 # Remove from running processes immediately
                 del self.running_processes[project_id]
                 self.emit_progress("execution", "Project execution stopped")
                 return {'success': True, 'message': 'Project execution stopped successfully'}
             else:
                 del self.running_processes[project_id]
+                self.port_registry.release(project_id)
                 return {'success': False, 'message': 'Project was not running'}
                 
         except Exception as e:
@@ -2475,17 +2405,8 @@ if __name__ == "__main__":
         return running
 
     def find_available_port(self, start_port=8501):
-        """Find an available port starting from start_port"""
-        import socket
-        port = start_port
-        while port <= start_port + 10:  # Try up to 10 ports
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                try:
-                    s.bind(('localhost', port))
-                    return port
-                except OSError:
-                    port += 1
-        return start_port  # Fallback to original port
+        """Find an unleased, available port in the project port range, preferring start_port"""
+        return self.port_registry.find_free_port(start_port) or start_port
 
     def kill_existing_streamlit_processes(self):
         """Kill any existing Streamlit processes to free up ports"""
@@ -2932,8 +2853,7 @@ API_BASE_URL=http://localhost:5000/api
 '''
         
         try:
-            with open(env_example_path, 'w', encoding='utf-8') as f:
-                f.write(env_content)
+            self._save_file(env_example_path, env_content)
         except Exception as e:
             print(f"Error creating .env.example: {e}")
         
@@ -2964,8 +2884,7 @@ if __name__ == '__main__':
 '''
         
         try:
-            with open(run_py_path, 'w', encoding='utf-8') as f:
-                f.write(run_content)
+            self._save_file(run_py_path, run_content)
         except Exception as e:
             print(f"Error creating run.py: {e}")
 
@@ -3098,8 +3017,7 @@ API_BASE_URL=http://localhost:8080/api
 """
         env_path = os.path.join(project_dir, '.env.example')
         try:
-            with open(env_path, 'w', encoding='utf-8') as f:
-                f.write(env_content)
+            self._save_file(env_path, env_content)
         except Exception as e:
             print(f"Error creating .env.example: {e}")
     
@@ -4018,7 +3936,7 @@ def internal_server_error(e):
 
 # Run the application if this script is executed
 if __name__ == '__main__':
-    app.run(debug=False, host='0.0.0.0', port=8080, threaded=True, use_reloader=False)"""
+    app.run(debug=False, host='0.0.0.0', port=int(os.environ.get('PORT', 8080)), threaded=True, use_reloader=False)"""
 
     def _get_fallback_run(self):
         """Get fallback run.py content"""
@@ -4043,7 +3961,7 @@ class QuietWSGIServer(WSGIServer):
 
 def main():
     \"\"\"Main function to run the development server\"\"\"
-    port = 8080
+    port = int(os.environ.get('PORT', 8080))
     host = '0.0.0.0'
     
     print("Starting web application development server...")
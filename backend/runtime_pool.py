@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import queue
+import subprocess
+import threading
+import logging
+from typing import List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ZYGOTE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'runtime_zygote.py')
+
+
+class RuntimePool:
+    """Pool of warm interpreters for validation runs of generated projects.
+
+    Each worker is a runtime_zygote process that imported the common libraries
+    once at startup and forks a fresh child per run, so a run pays for a fork
+    instead of interpreter startup plus heavy imports. Up to
+    RUNTIME_POOL_SIZE projects validate in parallel. Where fork is not
+    available, or a worker fails, runs fall back to a plain subprocess.
+    """
+
+    def __init__(self, size: int = None, preload: List[str] = None):
+        self.size = size or Config.RUNTIME_POOL_SIZE
+        self.preload = preload if preload is not None else Config.RUNTIME_POOL_PRELOAD
+        self.available = hasattr(os, 'fork') and self.size > 0
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = 0
+
+    def start(self):
+        """Warm up the workers in the background"""
+        if not self.available:
+            return
+
+        def warm():
+            for _ in range(self.size):
+                worker = self._spawn()
+                if worker is None:
+                    return
+                self._idle.put(worker)
+
+        threading.Thread(target=warm, name="runtime-pool-warmup", daemon=True).start()
+
+    def _spawn(self) -> Optional[subprocess.Popen]:
+        """Start a worker and wait until its preloads are imported"""
+        with self._lock:
+            if self._workers >= self.size:
+                return None
+            self._workers += 1
+        worker = None
+        try:
+            worker = subprocess.Popen(
+                [sys.executable, ZYGOTE_SCRIPT, ','.join(self.preload)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                bufsize=1,
+                start_new_session=True
+            )
+            ready = json.loads(worker.stdout.readline() or '{}')
+            if not ready.get('ready'):
+                raise RuntimeError("worker exited during startup")
+            logger.info(f"Runtime worker {worker.pid} ready (preloaded: {', '.join(ready['preloaded']) or 'none'})")
+            return worker
+        except Exception as e:
+            logger.warning(f"Could not start runtime worker: {e}")
+            self._discard(worker)
+            return None
+
+    def _discard(self, worker: Optional[subprocess.Popen]):
+        with self._lock:
+            self._workers -= 1
+        if worker is not None and worker.poll() is None:
+            worker.kill()
+
+    def _acquire(self, timeout: float) -> Optional[subprocess.Popen]:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        worker = self._spawn()
+        if worker is not None:
+            return worker
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def run(self, project_dir: str, argv: List[str], timeout: float = 10):
+        """Run a project script like subprocess.run(..., capture_output=True, text=True, timeout=timeout)"""
+        args = [sys.executable, *argv]
+        worker = self._acquire(timeout) if self.available else None
+        if worker is None:
+            return subprocess.run(args, cwd=project_dir, capture_output=True, text=True, timeout=timeout)
+
+        request = {
+            'cwd': os.path.abspath(project_dir),
+            'argv': argv,
+            'timeout': timeout,
+            'memory_mb': Config.RUNTIME_MEMORY_LIMIT_MB,
+            'cpu_seconds': int(timeout) + 1,
+        }
+        try:
+            worker.stdin.write(json.dumps(request) + '\n')
+            worker.stdin.flush()
+            result = json.loads(worker.stdout.readline() or '{}')
+            if 'returncode' not in result:
+                raise RuntimeError(result.get('error', 'worker exited'))
+        except Exception as e:
+            logger.warning(f"Runtime worker {worker.pid} failed, running in a subprocess instead: {e}")
+            self._discard(worker)
+            return subprocess.run(args, cwd=project_dir, capture_output=True, text=True, timeout=timeout)
+
+        self._idle.put(worker)
+        if result['timed_out']:
+            raise subprocess.TimeoutExpired(args, timeout, output=result['stdout'], stderr=result['stderr'])
+        return subprocess.CompletedProcess(args, result['returncode'], result['stdout'], result['stderr'])
+
+
+# Global runtime pool instance
+runtime_pool = RuntimePool()
@@ -0,0 +1,147 @@
+"""Warm interpreter that runs project entry points in forked children.
+
+Started by runtime_pool with the libraries generated projects commonly use
+already imported. It reads one JSON request per line on stdin, forks a child
+that runs the requested script (cwd, argv and resource limits applied) and
+writes one JSON result per line to stdout. Only the standard library is
+imported here so the project's own modules (config.py, utils.py, ...) never
+collide with ours.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import runpy
+import tempfile
+import traceback
+import importlib
+
+POLL_INTERVAL = 0.01
+
+
+def _apply_limits(memory_mb, cpu_seconds):
+    try:
+        import resource
+    except ImportError:
+        return
+    if memory_mb:
+        limit = int(memory_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (int(cpu_seconds), int(cpu_seconds) + 1))
+
+
+def _child(request, stdout_fd, stderr_fd):
+    """Runs in the forked child; never returns"""
+    code = 1
+    try:
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        sys.stdin = open(os.devnull, 'r')
+
+        cwd = request['cwd']
+        os.chdir(cwd)
+        sys.argv = list(request['argv'])
+        sys.path.insert(0, cwd)
+        _apply_limits(request.get('memory_mb'), request.get('cpu_seconds'))
+
+        runpy.run_path(sys.argv[0], run_name='__main__')
+        code = 0
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            sys.stderr.write(f"{e.code}\n")
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def _read_tail(f, limit):
+    size = f.seek(0, os.SEEK_END)
+    f.seek(max(0, size - limit))
+    return f.read().decode('utf-8', errors='replace')
+
+
+def _run(request):
+    output_limit = int(request.get('output_limit', 64 * 1024))
+    timeout = float(request.get('timeout', 10))
+    with tempfile.TemporaryFile() as stdout_file, tempfile.TemporaryFile() as stderr_file:
+        started = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            _child(request, stdout_file.fileno(), stderr_file.fileno())
+
+        timed_out = False
+        status = None
+        while True:
+            finished, status = os.waitpid(pid, os.WNOHANG)
+            if finished:
+                break
+            if time.monotonic() - started > timeout:
+                timed_out = True
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                os.waitpid(pid, 0)
+                break
+            time.sleep(POLL_INTERVAL)
+
+        if timed_out:
+            returncode = None
+        elif os.WIFSIGNALED(status):
+            returncode = -os.WTERMSIG(status)
+        else:
+            returncode = os.WEXITSTATUS(status)
+
+        return {
+            'returncode': returncode,
+            'timed_out': timed_out,
+            'duration': round(time.monotonic() - started, 3),
+            'stdout': _read_tail(stdout_file, output_limit),
+            'stderr': _read_tail(stderr_file, output_limit),
+        }
+
+
+def main(preload):
+    # Plots must not open windows or block during validation
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    loaded = []
+    for name in preload:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception:
+            pass
+
+    protocol = sys.stdout
+    protocol.write(json.dumps({'ready': True, 'preloaded': loaded}) + '\n')
+    protocol.flush()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            result = _run(json.loads(line))
+        except Exception as e:
+            result = {'error': str(e)}
+        protocol.write(json.dumps(result) + '\n')
+        protocol.flush()
+
+
+if __name__ == '__main__':
+    main([name for name in (sys.argv[1] if len(sys.argv) > 1 else '').split(',') if name])
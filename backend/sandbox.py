@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import time
+import signal
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import psutil
+
+from config import Config
+from output_supervisor import output_supervisor
+from progress_broadcaster import progress_broadcaster
+
+logger = logging.getLogger(__name__)
+
+LAUNCHER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox_launcher.py')
+
+
+class _SandboxedRun:
+    """Quotas and resource accounting of one sandboxed process group"""
+
+    def __init__(self, project_id: str, process, cgroup_dir: Optional[str]):
+        self.project_id = project_id
+        self.process = process
+        self.cgroup_dir = cgroup_dir
+        self.started = time.monotonic()
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.rss_bytes = 0
+        self.peak_rss_bytes = 0
+        self.output_bytes = 0
+        self.processes = 1
+        self.killed_reason = None
+        self.exit_code = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'pid': self.process.pid,
+            'running': self.exit_code is None,
+            'exit_code': self.exit_code,
+            'wall_seconds': round(self.wall_seconds, 2),
+            'cpu_seconds': round(self.cpu_seconds, 2),
+            'rss_mb': round(self.rss_bytes / (1024 * 1024), 1),
+            'peak_rss_mb': round(self.peak_rss_bytes / (1024 * 1024), 1),
+            'output_bytes': self.output_bytes,
+            'processes': self.processes,
+            'killed_reason': self.killed_reason,
+            'cgroup': bool(self.cgroup_dir),
+            'limits': _limits(),
+        }
+
+
+def _limits() -> Dict[str, Any]:
+    return {
+        'cpu_seconds': Config.SANDBOX_CPU_SECONDS,
+        'memory_mb': Config.SANDBOX_MEMORY_MB,
+        'address_space_mb': Config.SANDBOX_ADDRESS_SPACE_MB,
+        'max_open_files': Config.SANDBOX_MAX_OPEN_FILES,
+        'max_file_mb': Config.SANDBOX_MAX_FILE_MB,
+        'max_processes': Config.SANDBOX_MAX_PROCESSES,
+        'wall_clock_seconds': Config.SANDBOX_WALL_CLOCK_SECONDS,
+        'output_mb': Config.SANDBOX_OUTPUT_MB,
+    }
+
+
+class Sandbox:
+    """Runs generated projects under per-run resource quotas.
+
+    Commands are started through sandbox_launcher, which sets rlimits (CPU
+    time, address space, file size, open files) on the process before
+    exec'ing the project, inside its own process group. When
+    SANDBOX_CGROUP_ROOT points at a cgroup v2 directory delegated to this
+    user, each run also gets a child cgroup with memory.max, pids.max and
+    cpu.max. A single monitor thread accounts CPU, RSS, wall-clock time and
+    output for every run and kills the whole group once a quota is exceeded.
+    """
+
+    def __init__(self):
+        self.enabled = Config.SANDBOX_ENABLED and os.name == 'posix'
+        self._lock = threading.Lock()
+        self._runs = {}
+        self._cgroups = {}
+        self._monitor_started = False
+
+    def wrap(self, project_id: str, command: List[str]) -> List[str]:
+        """Command line that runs command inside the sandbox"""
+        if not self.enabled:
+            return command
+        cgroup_dir = self._create_cgroup(project_id) or ''
+        with self._lock:
+            self._cgroups[project_id] = cgroup_dir or None
+        return [sys.executable, LAUNCHER_SCRIPT, json.dumps(_limits()), cgroup_dir, '--', *command]
+
+    def _create_cgroup(self, project_id: str) -> Optional[str]:
+        root = Config.SANDBOX_CGROUP_ROOT
+        if not root:
+            return None
+        cgroup_dir = os.path.join(root, f"project-{project_id}")
+        try:
+            os.makedirs(cgroup_dir, exist_ok=True)
+            settings = {
+                'memory.max': str(Config.SANDBOX_MEMORY_MB * 1024 * 1024) if Config.SANDBOX_MEMORY_MB else 'max',
+                'pids.max': str(Config.SANDBOX_MAX_PROCESSES) if Config.SANDBOX_MAX_PROCESSES else 'max',
+                'cpu.max': f"{int(Config.SANDBOX_CPU_SHARE * 100000)} 100000" if Config.SANDBOX_CPU_SHARE else 'max 100000',
+            }
+            for name, value in settings.items():
+                with open(os.path.join(cgroup_dir, name), 'w') as f:
+                    f.write(value)
+            return cgroup_dir
+        except OSError as e:
+            logger.warning(f"cgroup isolation unavailable ({e}); using rlimits only")
+            return None
+
+    def monitor(self, project_id: str, process):
+        """Start accounting (and enforcing quotas on) a process started from wrap()"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._runs[project_id] = _SandboxedRun(project_id, process, self._cgroups.pop(project_id, None))
+            if not self._monitor_started:
+                self._monitor_started = True
+                threading.Thread(target=self._monitor_loop, name="sandbox-monitor", daemon=True).start()
+
+    def usage(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Resource accounting of the project's latest run"""
+        with self._lock:
+            run = self._runs.get(project_id)
+        if run is None:
+            return None
+        # Memory/CPU figures are from the monitor's last pass; only the cheap ones are refreshed here
+        self._refresh(run)
+        return run.to_dict()
+
+    def _monitor_loop(self):
+        while True:
+            time.sleep(Config.SANDBOX_MONITOR_INTERVAL)
+            with self._lock:
+                runs = [run for run in self._runs.values() if run.exit_code is None]
+            if not runs:
+                continue
+            try:
+                tree = self._process_tree() if any(run.cgroup_dir is None for run in runs) else {}
+                for run in runs:
+                    self._sample(run, tree)
+                    self._enforce(run)
+            except Exception as e:
+                logger.error(f"Sandbox monitor failed: {e}")
+
+    @staticmethod
+    def _process_tree() -> Dict[int, List[int]]:
+        """Children of every process, gathered once per monitoring pass"""
+        children = {}
+        for proc in psutil.process_iter(['pid', 'ppid']):
+            children.setdefault(proc.info['ppid'], []).append(proc.info['pid'])
+        return children
+
+    def _refresh(self, run: _SandboxedRun):
+        if run.exit_code is not None:
+            return
+        run.wall_seconds = time.monotonic() - run.started
+        run.output_bytes = output_supervisor.output_bytes(run.project_id)
+        if run.process.poll() is not None:
+            run.exit_code = run.process.returncode
+            self._remove_cgroup(run)
+
+    def _sample(self, run: _SandboxedRun, tree: Dict[int, List[int]]):
+        self._refresh(run)
+        if run.exit_code is not None:
+            return
+
+        if run.cgroup_dir:
+            try:
+                run.rss_bytes = int(_read(os.path.join(run.cgroup_dir, 'memory.current')))
+                stat = dict(line.split() for line in _read(os.path.join(run.cgroup_dir, 'cpu.stat')).splitlines())
+                run.cpu_seconds = int(stat.get('usage_usec', 0)) / 1e6
+                run.processes = len(_read(os.path.join(run.cgroup_dir, 'cgroup.procs')).split())
+                run.peak_rss_bytes = max(run.peak_rss_bytes, run.rss_bytes)
+                return
+            except (OSError, ValueError):
+                pass
+
+        pids, stack = [], [run.process.pid]
+        while stack:
+            pid = stack.pop()
+            pids.append(pid)
+            stack.extend(tree.get(pid, []))
+        rss, cpu = 0, 0.0
+        for pid in pids:
+            try:
+                proc = psutil.Process(pid)
+                with proc.oneshot():
+                    rss += proc.memory_info().rss
+                    times = proc.cpu_times()
+                    cpu += times.user + times.system + times.children_user + times.children_system
+            except psutil.Error:
+                continue
+        run.rss_bytes = rss
+        run.peak_rss_bytes = max(run.peak_rss_bytes, rss)
+        run.cpu_seconds = max(run.cpu_seconds, cpu)
+        run.processes = len(pids)
+
+    def _enforce(self, run: _SandboxedRun):
+        if run.exit_code is not None:
+            return
+        reason = None
+        if Config.SANDBOX_MEMORY_MB and run.rss_bytes > Config.SANDBOX_MEMORY_MB * 1024 * 1024:
+            reason = f"memory quota exceeded ({run.rss_bytes // (1024 * 1024)} MB > {Config.SANDBOX_MEMORY_MB} MB)"
+        elif Config.SANDBOX_CPU_SECONDS and run.cpu_seconds > Config.SANDBOX_CPU_SECONDS:
+            reason = f"CPU time quota exceeded ({run.cpu_seconds:.0f}s > {Config.SANDBOX_CPU_SECONDS}s)"
+        elif Config.SANDBOX_WALL_CLOCK_SECONDS and run.wall_seconds > Config.SANDBOX_WALL_CLOCK_SECONDS:
+            reason = f"wall-clock quota exceeded ({Config.SANDBOX_WALL_CLOCK_SECONDS}s)"
+        elif Config.SANDBOX_OUTPUT_MB and run.output_bytes > Config.SANDBOX_OUTPUT_MB * 1024 * 1024:
+            reason = f"output quota exceeded ({Config.SANDBOX_OUTPUT_MB} MB)"
+        elif Config.SANDBOX_MAX_PROCESSES and run.processes > Config.SANDBOX_MAX_PROCESSES:
+            reason = f"process quota exceeded ({run.processes} > {Config.SANDBOX_MAX_PROCESSES})"
+        if reason is None:
+            return
+
+        run.killed_reason = reason
+        logger.warning(f"Stopping project {run.project_id}: {reason}")
+        try:
+            os.killpg(run.process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        progress_broadcaster.publish(run.project_id, 'progress_update', {
+            'stage': 'execution',
+            'message': f"Sandbox stopped the project: {reason}",
+            'data': run.to_dict(),
+            'timestamp': datetime.now().isoformat()
+        })
+
+    def _remove_cgroup(self, run: _SandboxedRun):
+        if run.cgroup_dir:
+            try:
+                os.rmdir(run.cgroup_dir)
+            except OSError:
+                pass
+
+
+def _read(path: str) -> str:
+    with open(path, 'r') as f:
+        return f.read().strip()
+
+
+# Global sandbox instance
+sandbox = Sandbox()
@@ -0,0 +1,66 @@
+"""Applies a sandbox's limits to itself, then execs the project command.
+
+Usage: sandbox_launcher.py <limits json> <cgroup dir or ''> -- <command...>
+
+Limits are set here rather than in a Popen preexec_fn, which is unsafe in
+the threaded server. Only the standard library is imported.
+"""
+import os
+import sys
+import json
+
+
+def apply_limits(limits):
+    try:
+        import resource
+    except ImportError:
+        return
+    rlimits = {
+        'cpu_seconds': (resource.RLIMIT_CPU, 1),
+        'address_space_mb': (resource.RLIMIT_AS, 1024 * 1024),
+        'max_file_mb': (resource.RLIMIT_FSIZE, 1024 * 1024),
+        'max_open_files': (resource.RLIMIT_NOFILE, 1),
+    }
+    for name, (limit, unit) in rlimits.items():
+        value = limits.get(name)
+        if not value:
+            continue
+        value = int(value) * unit
+        _, hard = resource.getrlimit(limit)
+        if hard != resource.RLIM_INFINITY:
+            # Unprivileged processes can only lower limits
+            value = min(value, hard)
+        resource.setrlimit(limit, (value, hard if limit == resource.RLIMIT_CPU else value))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+
+def join_cgroup(cgroup_dir):
+    try:
+        with open(os.path.join(cgroup_dir, 'cgroup.procs'), 'w') as f:
+            f.write(str(os.getpid()))
+    except OSError as e:
+        sys.stderr.write(f"sandbox: could not join cgroup {cgroup_dir}: {e}\n")
+
+
+def main(argv):
+    separator = argv.index('--')
+    limits = json.loads(argv[0])
+    cgroup_dir = argv[1] if separator > 1 else ''
+    command = argv[separator + 1:]
+
+    if cgroup_dir:
+        join_cgroup(cgroup_dir)
+    try:
+        apply_limits(limits)
+    except (ValueError, OSError) as e:
+        sys.stderr.write(f"sandbox: could not apply limits: {e}\n")
+
+    try:
+        os.execvp(command[0], command)
+    except OSError as e:
+        sys.stderr.write(f"sandbox: could not start {command[0]}: {e}\n")
+        os._exit(127)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
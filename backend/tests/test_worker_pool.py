@@ -0,0 +1,55 @@
+import os
+import sys
+import json
+import subprocess
+import textwrap
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run as the main script, like app.py: pool workers used to re-run it, and
+# building ProjectManager there reclaimed (killed) every leased project
+SCRIPT = textwrap.dedent("""
+    import json
+    import subprocess
+    import uuid
+
+    import app
+    from config import Config
+    from code_checker import code_checker
+    from port_registry import PortRegistry, port_registry
+
+    if __name__ == '__main__':
+        port_registry.lease('regression')
+        process = subprocess.Popen(['sleep', '600'], start_new_session=True)
+        port_registry.attach('regression', process.pid)
+
+        # Unique sources, so none of them is answered from the check cache
+        marker = uuid.uuid4().hex
+        files = {f"module_{i}.py": f"VALUE_{i} = '{marker}'\\n" for i in range(Config.CODE_CHECK_PARALLEL_MIN_FILES)}
+        code_checker.check_files(files)
+
+        returncode = process.poll()
+        # As persisted, which is what a worker's registry would have reclaimed
+        leased = 'regression' in PortRegistry().get_leases()
+        port_registry.release('regression')
+        print(json.dumps({'returncode': returncode, 'leased': leased,
+                          'parallel_batches': code_checker.stats['parallel_batches']}))
+""")
+
+
+def test_pooled_code_check_leaves_leased_projects_running(tmp_path):
+    script = tmp_path / "server.py"
+    script.write_text(SCRIPT)
+    env = dict(os.environ,
+               PYTHONPATH=os.pathsep.join([BACKEND_DIR, os.environ.get('PYTHONPATH', '')]),
+               PORT_LEASES_PATH=str(tmp_path / "port_leases.json"),
+               CODE_CHECK_WORKERS='2')
+
+    result = subprocess.run([sys.executable, str(script)], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=600)
+    assert result.returncode == 0, result.stderr
+
+    outcome = json.loads(result.stdout.strip().splitlines()[-1])
+    assert outcome['parallel_batches'] == 1
+    assert outcome['returncode'] is None  # still running, not SIGKILLed
+    assert outcome['leased']
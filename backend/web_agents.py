@@ -1,5 +1,6 @@
 import google.generativeai as genai
 from config import Config
+from llm_gateway import llm_gateway
 import json
 import re
 
@@ -13,10 +14,14 @@ class BaseWebAgent:
         self.role = role
         self.goal = goal
         self.backstory = backstory
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model_name = 'gemini-2.5-flash'
     
-    def execute_task(self, description):
-        """Execute a task using the Gemini model"""
+    def execute_task(self, description, cache=False, on_chunk=None):
+        """Execute a task using the Gemini model (cache=True for deterministic prompts).
+
+        When on_chunk is given the response is streamed and on_chunk(text) is
+        called for every chunk as it arrives.
+        """
         try:
             prompt = f"""
 Role: {self.role}
@@ -28,8 +33,22 @@ Task: {description}
 Please provide a comprehensive response following the task requirements.
 """
             
-            response = self.model.generate_content(prompt)
-            return response.text
+            if on_chunk:
+                return llm_gateway.generate_stream(
+                    prompt,
+                    on_chunk,
+                    role=self.role,
+                    feature='code_generation',
+                    model_name=self.model_name
+                )
+            return llm_gateway.generate_text(
+                prompt,
+                role=self.role,
+                feature='code_generation',
+                model_name=self.model_name,
+                cache=cache,
+                cache_scope=f"{self.role}|{self.goal}|{self.backstory}"
+            )
         except Exception as e:
             return f"Error executing task: {str(e)}"
 
@@ -93,7 +112,7 @@ class WebPlanningAgent(BaseWebAgent):
         Return ONLY valid JSON, no additional text.
         """
         
-        result = self.execute_task(description)
+        result = self.execute_task(description, cache=True)
         return result
 
 class FrontendDeveloperAgent(BaseWebAgent):
@@ -108,7 +127,7 @@ class FrontendDeveloperAgent(BaseWebAgent):
             interactive applications."""
         )
     
-    def generate_frontend_code(self, project_plan):
+    def generate_frontend_code(self, project_plan, on_chunk=None):
         description = f"""
         Based on the following project plan, generate complete frontend code (HTML, CSS, JavaScript):
         
@@ -216,7 +235,7 @@ class FrontendDeveloperAgent(BaseWebAgent):
         Return ONLY valid JSON, no additional text.
         """
         
-        result = self.execute_task(description)
+        result = self.execute_task(description, on_chunk=on_chunk)
         return result
 
 class BackendAPIAgent(BaseWebAgent):
@@ -230,7 +249,7 @@ class BackendAPIAgent(BaseWebAgent):
             and API documentation. You can work with Flask, FastAPI, Django, and various databases."""
         )
     
-    def generate_backend_code(self, project_plan):
+    def generate_backend_code(self, project_plan, on_chunk=None):
         description = f"""
         Based on the following project plan, generate complete backend code:
         
@@ -362,7 +381,7 @@ class BackendAPIAgent(BaseWebAgent):
         Return ONLY valid JSON, no additional text.
         """
         
-        result = self.execute_task(description)
+        result = self.execute_task(description, on_chunk=on_chunk)
         return result
 
 class FullStackIntegratorAgent(BaseWebAgent):
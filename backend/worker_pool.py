@@ -0,0 +1,67 @@
+import sys
+import types
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Modules imported once by the forkserver, so workers fork warm. Never '__main__':
+# that would re-run the server script's top level (queue workers, reconcilers, cleanup) in a helper process.
+_preload = {'config'}
+
+
+def detach_main_module():
+    """Keep pool workers from re-running the main script.
+
+    Spawned and forkserver workers execute the parent's __main__ file again
+    as __mp_main__, so that functions defined there can be unpickled. The
+    server script builds the app and its managers at import, so its entry
+    point calls this first: __main__ becomes an empty module without a file,
+    which workers leave alone. Pooled functions must live in importable modules.
+    """
+    main = sys.modules['__main__']
+    if getattr(main, '__file__', None) is None:
+        return
+    sys.modules['__main__'] = types.ModuleType('__main__')
+
+
+class WorkerPool:
+    """A process pool started on first use, falling back to the calling process when it can't run.
+
+    The server is multi-threaded, so workers are never forked from it; they
+    come from a forkserver (or are spawned where there is none).
+    """
+
+    def __init__(self, name: str, workers: int, preload: Iterable[str] = ()):
+        self.name = name
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._executor = None
+        _preload.update(preload)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                context = multiprocessing.get_context(method)
+                if method == 'forkserver':
+                    # Only takes effect before the (process-wide) forkserver starts
+                    context.set_forkserver_preload(sorted(_preload))
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._executor
+
+    def map(self, fn: Callable, *iterables, chunksize: int = 1) -> Tuple[List, bool]:
+        """(results of fn over the iterables, whether they ran in the pool)"""
+        args = [list(iterable) for iterable in iterables]
+        if self.workers > 1:
+            try:
+                return list(self._pool().map(fn, *args, chunksize=chunksize)), True
+            except (BrokenProcessPool, OSError) as e:
+                logger.warning(f"{self.name} pool unavailable ({e}); running in-process")
+                with self._lock:
+                    self._executor = None
+        return [fn(*call) for call in zip(*args)], False
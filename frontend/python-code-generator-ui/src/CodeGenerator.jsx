@@ -1,20 +1,24 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { io } from 'socket.io-client';
 import axios from 'axios';
 import './App.css';
 
 const API_BASE_URL = 'http://localhost:5000';
+const HISTORY_PAGE_SIZE = 100;
 
 function CodeGenerator() {
   const navigate = useNavigate();
   const [socket, setSocket] = useState(null);
+  // Last event sequence number seen per project, used to resume replays
+  const lastSeqRef = useRef({});
   const [prompt, setPrompt] = useState('');
   const [isGenerating, setIsGenerating] = useState(false);
   const [currentProject, setCurrentProject] = useState(null);
   const [logs, setLogs] = useState([]);
   const [activeTab, setActiveTab] = useState('generator');
   const [projectHistory, setProjectHistory] = useState([]);
+  const [projectHistoryTotal, setProjectHistoryTotal] = useState(0);
   const [mode, setMode] = useState('simple'); // 'simple' or 'multi_agent'
   const [selectedProject, setSelectedProject] = useState(null);
   const [projectFiles, setProjectFiles] = useState([]);
@@ -108,10 +112,16 @@ function CodeGenerator() {
     );
   };
 
-  const fetchProjectHistory = async () => {
+  // The history endpoint is paged; X-Total-Count says how many projects there are in all
+  const fetchProjectHistory = async (append = false) => {
     try {
-      const response = await axios.get(`${API_BASE_URL}/api/projects/history`);
-      setProjectHistory(response.data);
+      const offset = append ? projectHistory.length : 0;
+      const response = await axios.get(`${API_BASE_URL}/api/projects/history`, {
+        params: { limit: HISTORY_PAGE_SIZE, offset }
+      });
+      setProjectHistory(previous => (append ? [...previous, ...response.data] : response.data));
+      const total = parseInt(response.headers['x-total-count'], 10);
+      setProjectHistoryTotal(Number.isNaN(total) ? offset + response.data.length : total);
     } catch (error) {
       console.error('Error fetching project history:', error);
       addLog('⚠️ Failed to fetch project history', 'warning');
@@ -178,6 +188,12 @@ function CodeGenerator() {
     });
 
     newSocket.on('progress_update', (data) => {
+      // Streamed agent output arrives as many small partial updates; file
+      // completions are announced separately, so don't log every chunk
+      if (data.partial) {
+        return;
+      }
+
       console.log('Progress update:', data);
       addLog(`🔄 ${data.message}`, 'info', data.data);
       
@@ -255,6 +271,26 @@ function CodeGenerator() {
       addLog(`❌ Project execution failed: ${data.error.error}`, 'error');
     });
 
+    // Live stdout/stderr of the running project
+    newSocket.on('project_output', (data) => {
+      data.lines.forEach(({ stream, line }) => {
+        addLog(`📟 ${line}`, stream === 'stderr' ? 'warning' : 'info');
+      });
+    });
+
+    // Project events arrive in batches on the project's room; hand each one to
+    // the listener registered above for its event name
+    newSocket.on('progress_batch', (batch) => {
+      const seen = lastSeqRef.current[batch.project_id] || 0;
+      batch.events.forEach(({ event, data, seq }) => {
+        if (seq <= seen) {
+          return;
+        }
+        lastSeqRef.current[batch.project_id] = seq;
+        newSocket.listeners(event).forEach((listener) => listener(data));
+      });
+    });
+
     newSocket.on('disconnect', () => {
       console.log('Disconnected from server');
       setIsConnected(false);
@@ -301,7 +337,8 @@ function CodeGenerator() {
       if (response.data.project_id) {
         addLog(`🆔 Project created with ID: ${response.data.project_id}`, 'success');
         addLog('👥 Connecting to multi-agent system...', 'info');
-        socket.emit('join_project', { project_id: response.data.project_id });
+        // since: 0 replays anything emitted before the join reached the server
+        socket.emit('join_project', { project_id: response.data.project_id, since: 0 });
       }
     } catch (error) {
       console.error('Error starting generation:', error);
@@ -348,6 +385,7 @@ function CodeGenerator() {
       setExecutionResult(null);
       setExecutionLogs([]);
       addLog('🚀 Starting project execution...', 'info');
+      socket.emit('join_project', { project_id: projectId, since: lastSeqRef.current[projectId] ?? null });
 
       const response = await axios.post(`${API_BASE_URL}/api/projects/${projectId}/run`);
       
@@ -1219,11 +1257,11 @@ function CodeGenerator() {
                       </div>
                       <div>
                         <h2 className="text-xl font-bold text-bw-primary">Project Archive</h2>
-                        <p className="text-bw-secondary text-sm">{projectHistory.length} total projects</p>
+                        <p className="text-bw-secondary text-sm">{projectHistoryTotal} total projects</p>
                       </div>
                     </div>
                     <button
-                      onClick={fetchProjectHistory}
+                      onClick={() => fetchProjectHistory()}
                       className="flex items-center space-x-2 btn-bw-primary px-3 py-2 rounded-lg transition-bw shadow-bw hover:shadow-bw-lg active:scale-95"
                       title="Refresh Projects"
                     >
@@ -1327,6 +1365,14 @@ function CodeGenerator() {
                         </div>
                       ))
                     )}
+                    {projectHistory.length < projectHistoryTotal && (
+                      <button
+                        onClick={() => fetchProjectHistory(true)}
+                        className="w-full btn-bw-secondary px-3 py-2 rounded-lg text-xs font-medium"
+                      >
+                        Load more ({projectHistoryTotal - projectHistory.length} remaining)
+                      </button>
+                    )}
                   </div>
                 </div>
               </div>
@@ -27,6 +27,8 @@ const DataWash = () => {
   const fileInputRef = useRef(null);
   
   const [uploadedFile, setUploadedFile] = useState(null);
+  const [datasetId, setDatasetId] = useState(null);
+  const [downloadFormat, setDownloadFormat] = useState('csv');
   const [dataPreview, setDataPreview] = useState(null);
   const [analysisResults, setAnalysisResults] = useState(null);
   const [dataGraphs, setDataGraphs] = useState(null);
@@ -59,11 +61,49 @@ const DataWash = () => {
   }, [selectedGraphModal]);
   const [manualParams, setManualParams] = useState({});
 
+  // The server keeps the parsed upload; later requests refer to it by dataset id
+  // and only send the file again if the dataset has expired there.
+  const postDataRequest = async (endpoint, fields = {}, id = datasetId) => {
+    const send = (includeFile) => {
+      const formData = new FormData();
+      if (includeFile) {
+        formData.append('file', uploadedFile);
+      } else {
+        formData.append('dataset_id', id);
+      }
+      Object.entries(fields).forEach(([key, value]) => {
+        formData.append(key, value);
+      });
+      return fetch(`http://localhost:5000/api/data/${endpoint}`, {
+        method: 'POST',
+        body: formData
+      });
+    };
+
+    let response = await send(!id);
+    if (response.status === 404 && id && uploadedFile) {
+      response = await send(true);
+    }
+    const result = await response.json();
+    if (result.dataset_id) {
+      setDatasetId(result.dataset_id);
+    }
+    return { response, result };
+  };
+
+  // Cleaned results are stored on the server as artifacts and fetched by id in the chosen format
+  const downloadArtifact = (artifactId, format = downloadFormat) => {
+    const a = document.createElement('a');
+    a.href = `http://localhost:5000/api/data/download/${artifactId}?format=${encodeURIComponent(format)}`;
+    a.click();
+  };
+
   const handleFileUpload = async (event) => {
     const file = event.target.files[0];
     if (!file) return;
 
     setUploadedFile(file);
+    setDatasetId(null);
     setActiveTab('preview');
     
     try {
@@ -78,6 +118,7 @@ const DataWash = () => {
       const result = await response.json();
       
       if (result.success) {
+        setDatasetId(result.dataset_id);
         setDataPreview({
           filename: result.filename,
           size: result.size,
@@ -88,7 +129,7 @@ const DataWash = () => {
         });
         
         // Automatically generate graphs when file is uploaded
-        generateDataGraphs();
+        generateDataGraphs(result.dataset_id);
       } else {
         alert('Error processing file: ' + result.error);
       }
@@ -105,15 +146,7 @@ const DataWash = () => {
     setActiveTab('analysis');
     
     try {
-      const formData = new FormData();
-      formData.append('file', uploadedFile);
-      
-      const response = await fetch('http://localhost:5000/api/data/analyze', {
-        method: 'POST',
-        body: formData
-      });
-      
-      const result = await response.json();
+      const { result } = await postDataRequest('analyze');
       
       if (result.success) {
         setAnalysisResults({
@@ -132,27 +165,23 @@ const DataWash = () => {
     }
   };
 
-  const generateDataGraphs = async () => {
-    if (!uploadedFile) return;
+  const generateDataGraphs = async (id = datasetId) => {
+    if (!id && !uploadedFile) return;
     
     setIsGeneratingGraphs(true);
     console.log('Starting graph generation...');
     
     try {
-      const formData = new FormData();
-      formData.append('file', uploadedFile);
-      
-      const response = await fetch('http://localhost:5000/api/data/graphs', {
-        method: 'POST',
-        body: formData
-      });
+      const { response, result } = await postDataRequest('graphs', {}, id);
       
       console.log('Graph response status:', response.status);
-      const result = await response.json();
       console.log('Graph result:', result);
       
       if (result.success) {
-        setDataGraphs(result.graphs);
+        // The server returns one SVG URL per graph; the images load (and cache) separately
+        setDataGraphs(Object.fromEntries(
+          Object.entries(result.graphs).map(([name, url]) => [name, `http://localhost:5000${url}`])
+        ));
         console.log('Graphs set successfully:', Object.keys(result.graphs));
       } else {
         console.error('Graph generation failed:', result.error);
@@ -170,30 +199,16 @@ const DataWash = () => {
     if (!uploadedFile) return;
     
     try {
-      const formData = new FormData();
-      formData.append('file', uploadedFile);
-      
       // Add cleaning options
+      const options = {};
       Object.entries(cleaningOptions).forEach(([key, value]) => {
-        formData.append(key, value.toString());
+        options[key] = value.toString();
       });
       
-      const response = await fetch('http://localhost:5000/api/data/clean', {
-        method: 'POST',
-        body: formData
-      });
-      
-      const result = await response.json();
+      const { result } = await postDataRequest('clean', options);
       
       if (result.success) {
-        // Create and download the cleaned file
-        const blob = new Blob([result.cleaned_data], { type: 'text/csv' });
-        const url = URL.createObjectURL(blob);
-        const a = document.createElement('a');
-        a.href = url;
-        a.download = result.filename || 'cleaned_data.csv';
-        a.click();
-        URL.revokeObjectURL(url);
+        downloadArtifact(result.artifact_id);
         
         alert('Data cleaned and downloaded successfully!');
       } else {
@@ -209,35 +224,21 @@ const DataWash = () => {
     if (!uploadedFile) return;
     
     try {
-      const formData = new FormData();
-      formData.append('file', uploadedFile);
-      formData.append('operation', operation);
+      const fields = { operation };
       
       // Add operation-specific parameters
       Object.entries(params).forEach(([key, value]) => {
         if (Array.isArray(value)) {
-          formData.append(key, value.join(','));
+          fields[key] = value.join(',');
         } else {
-          formData.append(key, value.toString());
+          fields[key] = value.toString();
         }
       });
       
-      const response = await fetch('http://localhost:5000/api/data/manual-clean', {
-        method: 'POST',
-        body: formData
-      });
-      
-      const result = await response.json();
+      const { result } = await postDataRequest('manual-clean', fields);
       
       if (result.success) {
-        // Create and download the manually cleaned file
-        const blob = new Blob([result.cleaned_data], { type: 'text/csv' });
-        const url = URL.createObjectURL(blob);
-        const a = document.createElement('a');
-        a.href = url;
-        a.download = result.filename || 'manually_cleaned_data.csv';
-        a.click();
-        URL.revokeObjectURL(url);
+        downloadArtifact(result.artifact_id);
         
         alert('Manual cleaning completed successfully!\n\nChanges made:\n' + result.cleaning_log.join('\n'));
       } else {
@@ -547,7 +548,7 @@ const DataWash = () => {
               </button>
               
               <button
-                onClick={generateDataGraphs}
+                onClick={() => generateDataGraphs()}
                 disabled={!uploadedFile || isGeneratingGraphs}
                 className="flex items-center space-x-2 px-6 py-3 bg-green-600 hover:bg-green-700 disabled:bg-gray-600 disabled:cursor-not-allowed rounded-lg font-medium transition-colors"
               >
@@ -596,7 +597,7 @@ const DataWash = () => {
                         <h4 className="text-xs font-medium mb-2 text-gray-400">Missing Values Heatmap</h4>
                         <div className="h-40 flex items-center justify-center bg-gray-900 rounded">
                           <img 
-                            src={`data:image/png;base64,${dataGraphs.missing_values_heatmap}`} 
+                            src={dataGraphs.missing_values_heatmap} 
                             alt="Missing Values Heatmap"
                             className="max-w-full max-h-full object-contain rounded"
                           />
@@ -615,7 +616,7 @@ const DataWash = () => {
                         <h4 className="text-xs font-medium mb-2 text-gray-400">Data Types Distribution</h4>
                         <div className="h-40 flex items-center justify-center bg-gray-900 rounded">
                           <img 
-                            src={`data:image/png;base64,${dataGraphs.data_types_distribution}`} 
+                            src={dataGraphs.data_types_distribution} 
                             alt="Data Types Distribution"
                             className="max-w-full max-h-full object-contain rounded"
                           />
@@ -634,7 +635,7 @@ const DataWash = () => {
                         <h4 className="text-xs font-medium mb-2 text-gray-400">Overall Data Completeness</h4>
                         <div className="h-40 flex items-center justify-center bg-gray-900 rounded">
                           <img 
-                            src={`data:image/png;base64,${dataGraphs.data_completeness}`} 
+                            src={dataGraphs.data_completeness} 
                             alt="Data Completeness"
                             className="max-w-full max-h-full object-contain rounded"
                           />
@@ -653,7 +654,7 @@ const DataWash = () => {
                         <h4 className="text-xs font-medium mb-2 text-gray-400">Data Quality Heatmap</h4>
                         <div className="h-40 flex items-center justify-center bg-gray-900 rounded">
                           <img 
-                            src={`data:image/png;base64,${dataGraphs.quality_heatmap}`} 
+                            src={dataGraphs.quality_heatmap} 
                             alt="Data Quality Heatmap"
                             className="max-w-full max-h-full object-contain rounded"
                           />
@@ -675,7 +676,7 @@ const DataWash = () => {
                         <h4 className="text-xs font-medium mb-2 text-gray-400">Missing Values by Column</h4>
                         <div className="h-48 flex items-center justify-center bg-gray-900 rounded">
                           <img 
-                            src={`data:image/png;base64,${dataGraphs.missing_values_bar}`} 
+                            src={dataGraphs.missing_values_bar} 
                             alt="Missing Values Bar Chart"
                             className="max-w-full max-h-full object-contain rounded"
                           />
@@ -694,7 +695,7 @@ const DataWash = () => {
                         <h4 className="text-xs font-medium mb-2 text-gray-400">Text Data Length Distribution</h4>
                         <div className="h-48 flex items-center justify-center bg-gray-900 rounded">
                           <img 
-                            src={`data:image/png;base64,${dataGraphs.text_analysis}`} 
+                            src={dataGraphs.text_analysis} 
                             alt="Text Data Analysis"
                             className="max-w-full max-h-full object-contain rounded"
                           />
@@ -713,7 +714,7 @@ const DataWash = () => {
                         <h4 className="text-xs font-medium mb-2 text-gray-400">Top Categorical Values</h4>
                         <div className="h-48 flex items-center justify-center bg-gray-900 rounded">
                           <img 
-                            src={`data:image/png;base64,${dataGraphs.categorical_counts}`} 
+                            src={dataGraphs.categorical_counts} 
                             alt="Categorical Value Counts"
                             className="max-w-full max-h-full object-contain rounded"
                           />
@@ -735,7 +736,7 @@ const DataWash = () => {
                         <h4 className="text-sm font-medium mb-3 text-gray-400">Numeric Columns Distribution</h4>
                         <div className="h-64 flex items-center justify-center bg-gray-900 rounded">
                           <img 
-                            src={`data:image/png;base64,${dataGraphs.numeric_distributions}`} 
+                            src={dataGraphs.numeric_distributions} 
                             alt="Numeric Distributions"
                             className="max-w-full max-h-full object-contain rounded"
                           />
@@ -754,7 +755,7 @@ const DataWash = () => {
                         <h4 className="text-sm font-medium mb-3 text-gray-400">Correlation Matrix</h4>
                         <div className="h-64 flex items-center justify-center bg-gray-900 rounded">
                           <img 
-                            src={`data:image/png;base64,${dataGraphs.correlation_matrix}`} 
+                            src={dataGraphs.correlation_matrix} 
                             alt="Correlation Matrix"
                             className="max-w-full max-h-full object-contain rounded"
                           />
@@ -775,7 +776,7 @@ const DataWash = () => {
                         <h4 className="text-sm font-medium mb-3 text-gray-400">Outliers Detection (Box Plots)</h4>
                         <div className="h-64 flex items-center justify-center bg-gray-900 rounded">
                           <img 
-                            src={`data:image/png;base64,${dataGraphs.outliers_detection}`} 
+                            src={dataGraphs.outliers_detection} 
                             alt="Outliers Detection"
                             className="max-w-full max-h-full object-contain rounded"
                           />
@@ -1036,6 +1037,19 @@ const DataWash = () => {
 
             {/* Download Section */}
             <div className="text-center">
+              <div className="flex items-center justify-center space-x-2 mb-4">
+                <label htmlFor="download-format" className="text-sm text-gray-400">Format:</label>
+                <select
+                  id="download-format"
+                  value={downloadFormat}
+                  onChange={(e) => setDownloadFormat(e.target.value)}
+                  className="bg-gray-700 border border-gray-600 rounded-lg px-3 py-1 text-sm"
+                >
+                  <option value="csv">CSV</option>
+                  <option value="csv.gz">CSV (gzip)</option>
+                  <option value="parquet">Parquet</option>
+                </select>
+              </div>
               <button
                 onClick={downloadCleanedData}
                 className="flex items-center space-x-2 px-8 py-4 bg-green-600 hover:bg-green-700 rounded-lg font-medium transition-colors mx-auto"
@@ -1044,7 +1058,7 @@ const DataWash = () => {
                 <span>Download Cleaned Data</span>
               </button>
               <p className="text-sm text-gray-400 mt-2">
-                Data will be downloaded as a CSV file with all issues resolved
+                Data will be downloaded in the selected format with all issues resolved
               </p>
             </div>
           </div>
@@ -1105,7 +1119,7 @@ const DataWash = () => {
             <div className="p-4 overflow-auto max-h-[calc(90vh-80px)]">
               <div className="flex justify-center">
                 <img 
-                  src={`data:image/png;base64,${selectedGraphModal.image}`} 
+                  src={selectedGraphModal.image} 
                   alt={selectedGraphModal.title}
                   className="max-w-full h-auto rounded"
                   style={{ maxHeight: 'calc(90vh - 120px)' }}